@@ -1,5 +1,6 @@
 import logging
 import math
+import uuid
 from typing import List
 
 try:
@@ -14,6 +15,7 @@ import streamlit as st
 from streamlit_server_state import server_state, server_state_lock
 
 from streamlit_webrtc import (
+    AudioMixRoom,
     VideoProcessorBase,
     WebRtcMode,
     WebRtcStreamerContext,
@@ -125,16 +127,30 @@ def main() -> None:
                 kind="video", mixer_callback=mixer_callback, key="mix"
             )
 
+    with server_state_lock["audio_room"]:
+        if "audio_room" not in server_state:
+            server_state["audio_room"] = AudioMixRoom()
+
     mix_track = server_state["mix_track"]
+    audio_room: AudioMixRoom = server_state["audio_room"]
+
+    if "participant_id" not in st.session_state:
+        st.session_state["participant_id"] = uuid.uuid4().hex
+    participant_id = st.session_state["participant_id"]
 
+    # Each participant hears the mix of everyone else's audio.
     self_ctx = webrtc_streamer(
         key="self",
         mode=WebRtcMode.SENDRECV,
         media_stream_constraints={"video": True, "audio": True},
         source_video_track=mix_track,
-        sendback_audio=False,
+        source_audio_track=audio_room.output_track(participant_id),
+        on_audio_ended=lambda: audio_room.remove_participant(participant_id),
     )
 
+    if self_ctx.input_audio_track:
+        audio_room.set_input_track(participant_id, self_ctx.input_audio_track)
+
     self_process_track = None
     if self_ctx.input_video_track:
         self_process_track = create_process_track(
@@ -162,19 +178,10 @@ def main() -> None:
             webrtc_contexts.remove(self_ctx)
             server_state["webrtc_contexts"] = webrtc_contexts
 
-    if self_ctx.state.playing:
-        # Audio streams are transferred in SFU manner
-        # TODO: Create MCU to mix audio streams
-        for ctx in webrtc_contexts:
-            if ctx == self_ctx or not ctx.state.playing:
-                continue
-            webrtc_streamer(
-                key=f"sound-{id(ctx)}",
-                mode=WebRtcMode.RECVONLY,
-                media_stream_constraints={"video": False, "audio": True},
-                source_audio_track=ctx.input_audio_track,
-                desired_playing_state=ctx.state.playing,
-            )
+    if not self_ctx.state.playing and not self_ctx.state.signalling:
+        # Ends the output track so that the next session starts a fresh one.
+        # Not while signalling, as the worker being set up has taken it.
+        audio_room.remove_participant(participant_id)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,3 @@
-import math
-from typing import List
-
 try:
     from typing import Literal, cast
 except ImportError:
@@ -8,15 +5,16 @@ except ImportError:
 
 import av
 import cv2
-import numpy as np
 import streamlit as st
 from streamlit_webrtc import (
     MediaStreamMixTrack,
+    VideoCompositor,
     WebRtcMode,
     create_mix_track,
     create_process_track,
     webrtc_streamer,
 )
+from streamlit_webrtc.mixers import CompositorLayout
 
 st.markdown(
     """
@@ -68,51 +66,6 @@ def make_video_frame_callback(_type: VideoFilterType):
     return callback
 
 
-def mixer_callback(frames: List[av.VideoFrame]) -> av.VideoFrame:
-    buf_w = 640
-    buf_h = 480
-    buffer = np.zeros((buf_h, buf_w, 3), dtype=np.uint8)
-
-    n_inputs = len(frames)
-
-    n_cols = math.ceil(math.sqrt(n_inputs))
-    n_rows = math.ceil(n_inputs / n_cols)
-    grid_w = buf_w // n_cols
-    grid_h = buf_h // n_rows
-
-    for i in range(n_inputs):
-        frame = frames[i]
-        if frame is None:
-            continue
-
-        grid_x = (i % n_cols) * grid_w
-        grid_y = (i // n_cols) * grid_h
-
-        img = frame.to_ndarray(format="bgr24")
-        src_h, src_w = img.shape[0:2]
-
-        aspect_ratio = src_w / src_h
-
-        window_w = min(grid_w, int(grid_h * aspect_ratio))
-        window_h = min(grid_h, int(window_w / aspect_ratio))
-
-        window_offset_x = (grid_w - window_w) // 2
-        window_offset_y = (grid_h - window_h) // 2
-
-        window_x0 = grid_x + window_offset_x
-        window_y0 = grid_y + window_offset_y
-        window_x1 = window_x0 + window_w
-        window_y1 = window_y0 + window_h
-
-        buffer[window_y0:window_y1, window_x0:window_x1, :] = cv2.resize(
-            img, (window_w, window_h)
-        )
-
-    new_frame = av.VideoFrame.from_ndarray(buffer, format="bgr24")
-
-    return new_frame
-
-
 st.header("Input 1")
 input1_ctx = webrtc_streamer(
     key="input1_ctx",
@@ -158,7 +111,15 @@ input3_ctx = webrtc_streamer(
 )
 
 st.header("Mixed output")
-mix_track = create_mix_track(kind="video", mixer_callback=mixer_callback, key="mix")
+if "mix_compositor" not in st.session_state:
+    # Keep the compositor across the reruns so that it keeps its canvas.
+    st.session_state["mix_compositor"] = VideoCompositor(width=640, height=480)
+compositor: VideoCompositor = st.session_state["mix_compositor"]
+compositor.layout = cast(
+    CompositorLayout,
+    st.radio("Layout", ("grid", "pip", "speaker"), key="mix-layout"),
+)
+mix_track = create_mix_track(kind="video", mixer_callback=compositor, key="mix")
 mix_ctx = webrtc_streamer(
     key="mix",
     mode=WebRtcMode.RECVONLY,
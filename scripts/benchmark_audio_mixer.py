@@ -0,0 +1,52 @@
+"""Measure the CPU time `AudioMixer` takes to mix one 20 ms frame.
+
+Usage: python scripts/benchmark_audio_mixer.py [--ticks N] [--inputs 2,10,50]
+
+For each number of inputs, mixes that many 48 kHz stereo s16 frames, as the
+Opus decoder outputs them, and reports the time per tick and the share of
+one CPU core it takes to keep up with real time.
+"""
+
+import argparse
+import time
+
+import av
+import numpy as np
+
+from streamlit_webrtc.mixers import AudioMixer
+
+
+def mix_time_us(inputs: int, ticks: int) -> float:
+    mixer = AudioMixer()
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(inputs):
+        frame = av.AudioFrame.from_ndarray(
+            rng.integers(-8000, 8000, (1, mixer.samples * 2), dtype=np.int16),
+            format="s16",
+            layout="stereo",
+        )
+        frame.sample_rate = mixer.sample_rate
+        frames.append(frame)
+
+    mixer(frames)
+    started_at = time.perf_counter()
+    for _ in range(ticks):
+        mixer(frames)
+    return (time.perf_counter() - started_at) / ticks * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--inputs", default="2,5,10,25,50,100")
+    args = parser.parse_args()
+
+    print(f"{'inputs':>6} {'per tick [us]':>14} {'CPU [%]':>8}")
+    for inputs in map(int, args.inputs.split(",")):
+        us = mix_time_us(inputs, args.ticks)
+        print(f"{inputs:>6} {us:>14.1f} {us / 20_000 * 100:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
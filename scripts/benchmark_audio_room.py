@@ -0,0 +1,93 @@
+"""Measure the CPU time an `AudioMixRoom` takes to mix one 20 ms tick.
+
+Usage: python scripts/benchmark_audio_room.py [--ticks N] [--participants 3,10,50]
+
+For each number of participants, compares one tick of a room, which sums the
+inputs once and subtracts each participant's own, with one `AudioMixer` per
+participant summing the inputs of everyone else, and reports the time per
+tick and the share of one CPU core it takes to keep up with real time.
+"""
+
+import argparse
+import asyncio
+import time
+
+import av
+import numpy as np
+from aiortc.contrib.media import MediaRelay
+
+from streamlit_webrtc.mixers import AudioMixer
+from streamlit_webrtc.room import AudioMixRoom
+
+
+def _frames(count: int, samples: int) -> list:
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(count):
+        frame = av.AudioFrame.from_ndarray(
+            rng.integers(-8000, 8000, (1, samples * 2), dtype=np.int16),
+            format="s16",
+            layout="stereo",
+        )
+        frame.sample_rate = 48000
+        frame.pts = 0
+        frames.append(frame)
+    return frames
+
+
+def room_time_us(participants: int, ticks: int) -> float:
+    room = AudioMixRoom(loop=asyncio.new_event_loop(), relay=MediaRelay())
+    frames = _frames(participants, room.samples)
+    for participant in range(participants):
+        room.output_track(participant)
+    buffers = [state.jitter_buffer for state in room._participants.values()]
+
+    elapsed = 0.0
+    for tick in range(ticks + 1):
+        for buffer, frame in zip(buffers, frames):
+            frame.pts = tick * room.samples
+            buffer.push(frame)
+        started_at = time.perf_counter()
+        room._mix(tick * room.samples)
+        if tick > 0:
+            elapsed += time.perf_counter() - started_at
+        for state in room._participants.values():
+            state.output._queue.get_nowait()
+    return elapsed / ticks * 1e6
+
+
+def mixers_time_us(participants: int, ticks: int) -> float:
+    mixers = [AudioMixer() for _ in range(participants)]
+    frames = _frames(participants, mixers[0].samples)
+    others = [frames[:i] + frames[i + 1 :] for i in range(participants)]
+
+    for mixer, inputs in zip(mixers, others):
+        mixer(inputs)
+    started_at = time.perf_counter()
+    for _ in range(ticks):
+        for mixer, inputs in zip(mixers, others):
+            mixer(inputs)
+    return (time.perf_counter() - started_at) / ticks * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=500)
+    parser.add_argument("--participants", default="3,5,10,25,50")
+    args = parser.parse_args()
+
+    print(
+        f"{'participants':>12} {'room [us]':>10} {'CPU [%]':>8}"
+        f" {'mixers [us]':>12} {'CPU [%]':>8}"
+    )
+    for participants in map(int, args.participants.split(",")):
+        room_us = room_time_us(participants, args.ticks)
+        mixers_us = mixers_time_us(participants, args.ticks)
+        print(
+            f"{participants:>12} {room_us:>10.1f} {room_us / 20_000 * 100:>8.2f}"
+            f" {mixers_us:>12.1f} {mixers_us / 20_000 * 100:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
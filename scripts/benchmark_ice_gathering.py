@@ -0,0 +1,99 @@
+"""Measure the worker's time-to-answer with each ICE gathering setting.
+
+Usage: python scripts/benchmark_ice_gathering.py [--rounds N] [--stun URL]
+
+Each round answers an offer from an in-process aiortc client and reports how
+long `WebRtcWorker.process_offer()` took, which is dominated by the ICE
+candidate gathering of the answer.
+"""
+
+import argparse
+import asyncio
+import statistics
+from typing import Dict, List, Optional
+
+from aiortc import RTCConfiguration, RTCIceServer, RTCPeerConnection
+from aiortc.contrib.media import MediaRelay
+
+from streamlit_webrtc.ice import IceGatheringOptions
+from streamlit_webrtc.webrtc import WebRtcMode, WebRtcWorker
+
+SETTINGS: Dict[str, Optional[IceGatheringOptions]] = {
+    "default": None,
+    "no ipv6": IceGatheringOptions(use_ipv6=False),
+    "stun timeout 1s": IceGatheringOptions(timeout=1),
+    "no stun/turn": IceGatheringOptions(use_stun=False, use_turn=False),
+    "loopback only": IceGatheringOptions(
+        interfaces=["127.0.0.1"], use_ipv6=False, use_stun=False, use_turn=False
+    ),
+}
+
+
+async def time_to_answer(
+    stun_url: str, ice_gathering: Optional[IceGatheringOptions]
+) -> float:
+    client = RTCPeerConnection()
+    client.addTransceiver("video", direction="sendonly")
+    await client.setLocalDescription(await client.createOffer())
+    assert client.localDescription is not None
+
+    worker: WebRtcWorker = WebRtcWorker(
+        mode=WebRtcMode.SENDONLY,
+        rtc_configuration=RTCConfiguration(iceServers=[RTCIceServer(urls=stun_url)]),
+        source_video_track=None,
+        source_audio_track=None,
+        sink_video_track=None,
+        sink_audio_track=None,
+        player_factory=None,
+        in_recorder_factory=None,
+        out_recorder_factory=None,
+        video_frame_callback=None,
+        audio_frame_callback=None,
+        queued_video_frames_callback=None,
+        queued_audio_frames_callback=None,
+        on_video_ended=None,
+        on_audio_ended=None,
+        video_processor_factory=None,
+        audio_processor_factory=None,
+        async_processing=True,
+        video_receiver_size=4,
+        audio_receiver_size=4,
+        sendback_video=False,
+        sendback_audio=False,
+        loop=asyncio.get_running_loop(),
+        relay=MediaRelay(),
+        ice_gathering=ice_gathering,
+    )
+    try:
+        await asyncio.to_thread(
+            worker.process_offer,
+            client.localDescription.sdp,
+            client.localDescription.type,
+            30,
+        )
+        assert worker.time_to_answer is not None
+        return worker.time_to_answer
+    finally:
+        await asyncio.to_thread(worker.stop, 1.0)
+        await client.close()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--stun", default="stun:stun.l.google.com:19302")
+    args = parser.parse_args()
+
+    print(f"{'setting':<16} {'median [s]':>10} {'min [s]':>10} {'max [s]':>10}")
+    for name, ice_gathering in SETTINGS.items():
+        samples: List[float] = [
+            await time_to_answer(args.stun, ice_gathering) for _ in range(args.rounds)
+        ]
+        print(
+            f"{name:<16} {statistics.median(samples):>10.3f} "
+            f"{min(samples):>10.3f} {max(samples):>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+"""Measure how long importing streamlit_webrtc takes in a fresh interpreter.
+
+Usage: python scripts/benchmark_import_time.py [--rounds N] [--max-ms MS]
+
+With ``--max-ms``, exits with an error if the median time of the bare
+``import streamlit_webrtc`` exceeds it, to catch regressions such as a heavy
+dependency imported at the package level again.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import List
+
+REPO_ROOT = Path(__file__).parent.parent
+
+CASES = {
+    "import streamlit_webrtc": "import streamlit_webrtc",
+    "+ webrtc_streamer": "from streamlit_webrtc import webrtc_streamer",
+}
+
+
+def import_time_ms(code: str) -> float:
+    timed = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        f"{code}\n"
+        "print((time.perf_counter() - start) * 1000)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", timed],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=REPO_ROOT,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    print(f"{'case':<24} {'median [ms]':>12} {'min [ms]':>10}")
+    medians = {}
+    for name, code in CASES.items():
+        samples: List[float] = [import_time_ms(code) for _ in range(args.rounds)]
+        medians[name] = statistics.median(samples)
+        print(f"{name:<24} {medians[name]:>12.1f} {min(samples):>10.1f}")
+
+    bare = medians["import streamlit_webrtc"]
+    if args.max_ms is not None and bare > args.max_ms:
+        sys.exit(f"import streamlit_webrtc took {bare:.1f} ms > {args.max_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Measure the per-frame cost of routing input frames in MediaStreamMixTrack.
+
+Usage: python scripts/benchmark_mix_routing.py [--frames N] [--inputs 2,10,100]
+
+For each number of inputs, queues frames from all the inputs in turn and
+reports how long `gather_frames_coro` takes to route each one to its input's
+latest-frame slot. It should stay flat as the inputs grow.
+"""
+
+import argparse
+import asyncio
+import fractions
+import time
+from typing import List
+
+import av
+from aiortc import MediaStreamTrack
+from aiortc.mediastreams import MediaStreamError
+
+from streamlit_webrtc.mix import InputQueueItem, MediaStreamMixTrack, gather_frames_coro
+from streamlit_webrtc.relay import BoundedMediaRelay
+
+
+class IdleTrack(MediaStreamTrack):
+    """An input that never produces a frame of its own."""
+
+    kind = "video"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._ended = asyncio.Event()
+
+    async def recv(self) -> av.VideoFrame:
+        await self._ended.wait()
+        raise MediaStreamError
+
+    def stop(self) -> None:
+        super().stop()
+        self._ended.set()
+
+
+async def routing_time_us(inputs: int, frames: int) -> float:
+    mix_track: MediaStreamMixTrack = MediaStreamMixTrack(
+        kind="video",
+        mixer_callback=lambda frames: frames[0],
+        loop=asyncio.get_running_loop(),
+        relay=BoundedMediaRelay(),
+    )
+    tracks: List[MediaStreamTrack] = [IdleTrack() for _ in range(inputs)]
+    for track in tracks:
+        mix_track.add_input_track(track)
+    proxy_ids = [proxy.id for proxy in mix_track._input_proxies.values()]
+
+    frame = av.VideoFrame(16, 16, "yuv420p")
+    frame.pts = 0
+    frame.time_base = fractions.Fraction(1, 90000)
+    for i in range(frames):
+        mix_track._input_queue.put_nowait(
+            InputQueueItem(source_track_id=proxy_ids[i % inputs], frame=frame)
+        )
+
+    started_at = time.perf_counter()
+    task = asyncio.ensure_future(gather_frames_coro(mix_track))
+    while not mix_track._input_queue.empty():
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started_at
+
+    task.cancel()
+    mix_track.stop()
+    for track in tracks:
+        track.stop()
+    # Let the relay and the input tasks see the inputs end.
+    await asyncio.sleep(0.1)
+    return elapsed / frames * 1e6
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--inputs", default="2,5,10,25,50,100")
+    args = parser.parse_args()
+
+    print(f"{'inputs':>6} {'per frame [us]':>15}")
+    for inputs in map(int, args.inputs.split(",")):
+        print(f"{inputs:>6} {await routing_time_us(inputs, args.frames):>15.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
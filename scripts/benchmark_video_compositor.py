@@ -0,0 +1,55 @@
+"""Measure the time `VideoCompositor` takes to compose one output frame.
+
+Usage: python scripts/benchmark_video_compositor.py [--ticks N] [--inputs 4,9]
+
+For each number of 640x480 inputs on a 1280x720 grid, reports the time per
+tick when every input, one input or no input has a new frame since the last
+tick. Only the tiles of the inputs with a new frame are redrawn.
+"""
+
+import argparse
+import time
+from typing import List
+
+import av
+import numpy as np
+
+from streamlit_webrtc.mixers import VideoCompositor
+
+
+def compose_time_ms(inputs: int, ticks: int, changed: int) -> float:
+    compositor = VideoCompositor(width=1280, height=720)
+    rng = np.random.default_rng(0)
+    pool = [
+        av.VideoFrame.from_ndarray(
+            rng.integers(0, 255, (480, 640, 3), dtype=np.uint8), format="bgr24"
+        ).reformat(format="yuv420p")
+        for _ in range(inputs + 1)
+    ]
+    frames: List[av.VideoFrame] = pool[:inputs]
+    compositor(frames)
+
+    started_at = time.perf_counter()
+    for tick in range(ticks):
+        for i in range(changed):
+            frames[i] = pool[(tick + i) % len(pool)]
+        compositor(frames)
+    return (time.perf_counter() - started_at) / ticks * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=300)
+    parser.add_argument("--inputs", default="1,4,9,16")
+    args = parser.parse_args()
+
+    print(f"{'inputs':>6} {'all [ms]':>9} {'one [ms]':>9} {'none [ms]':>10}")
+    for inputs in map(int, args.inputs.split(",")):
+        all_ms = compose_time_ms(inputs, args.ticks, inputs)
+        one_ms = compose_time_ms(inputs, args.ticks, 1)
+        none_ms = compose_time_ms(inputs, args.ticks, 0)
+        print(f"{inputs:>6} {all_ms:>9.2f} {one_ms:>9.2f} {none_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+"""Concurrent load testing of ``WebRtcWorker`` with in-process peers.
+
+Each session connects a synthetic aiortc client, which sends a generated
+video (and optionally audio) track, to a real ``WebRtcWorker`` in
+``SENDRECV`` mode on the same event loop, the way
+``tests/webrtc_loopback_test.py`` does. Every video frame the client sends
+carries its sequence number, drawn as black and white blocks that survive
+the VP8 round trip, so the frames the client gets back can be matched to
+when they were sent. Everything runs offline over the loopback interface.
+
+Usage, from the repository root so that the shared loopback helpers in
+``tests/loopback.py`` can be imported::
+
+    python -m scripts.loadtest --sessions 8 --duration 10 --processor copy
+
+With ``--trace PATH``, a sample of the frames is traced through the
+pipeline (see :mod:`streamlit_webrtc.tracing`) and written to ``PATH`` as a
+Chrome trace.
+
+``--processor`` is ``none`` (echo without processing), ``copy`` (decode
+into an ndarray and back), ``busy:<ms>`` (spin the CPU for that long per
+frame), or ``<module>:<function>`` naming a ``video_frame_callback``.
+"""
+
+import argparse
+import asyncio
+import fractions
+import importlib
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import av
+import numpy as np
+from aiortc import RTCConfiguration, RTCPeerConnection
+from aiortc.mediastreams import MediaStreamError, MediaStreamTrack
+
+from streamlit_webrtc.ice import IceGatheringOptions
+from streamlit_webrtc.models import VideoFrameCallback
+from streamlit_webrtc.relay import BoundedMediaRelay
+from streamlit_webrtc.source import AudioSourceTrack, VideoSourceTrack
+from streamlit_webrtc.tracing import start_frame_tracing, stop_frame_tracing
+from streamlit_webrtc.webrtc import WebRtcMode, WebRtcWorker
+from tests.loopback import WORKER_DEFAULTS, wire_ice
+
+# The sequence number is drawn as `_STAMP_BITS` blocks along the top of
+# each frame: white for a 1, black for a 0.
+_STAMP_BITS = 16
+_STAMP_HEIGHT = 16
+
+
+class SessionReport(NamedTuple):
+    session: int
+    video_frames_sent: int
+    video_frames_received: int
+    video_fps: float
+    audio_fps: Optional[float]
+    # End-to-end latency of the video frames in seconds, from the client's
+    # track to the client receiving them back processed.
+    latency_mean: Optional[float]
+    latency_p95: Optional[float]
+    time_to_answer: Optional[float]
+
+
+class LoadTestReport(NamedTuple):
+    sessions: List[SessionReport]
+    duration: float
+    # Process-wide, as the clients and workers share the process: CPU time
+    # per wall-clock time (1.0 = one core busy), and resident memory.
+    cpu_usage: float
+    rss_bytes: Optional[int]
+    max_rss_bytes: Optional[int]
+
+    def to_dict(self) -> Dict:
+        result = self._asdict()
+        result["sessions"] = [s._asdict() for s in self.sessions]
+        return result
+
+
+def _stamp(image: np.ndarray, seq: int) -> None:
+    width = image.shape[1] // _STAMP_BITS
+    for bit in range(_STAMP_BITS):
+        value = 255 if (seq >> bit) & 1 else 0
+        image[:_STAMP_HEIGHT, bit * width : (bit + 1) * width] = value
+
+
+def _read_stamp(image: np.ndarray) -> int:
+    width = image.shape[1] // _STAMP_BITS
+    # The block edges blur in encoding, so only their centers are read.
+    margin_x, margin_y = width // 4, _STAMP_HEIGHT // 4
+    seq = 0
+    for bit in range(_STAMP_BITS):
+        block = image[
+            margin_y : _STAMP_HEIGHT - margin_y,
+            bit * width + margin_x : (bit + 1) * width - margin_x,
+        ]
+        if block.mean() > 128:
+            seq |= 1 << bit
+    return seq
+
+
+class _StampedVideoSourceTrack(VideoSourceTrack):
+    """Generates frames stamped with their sequence numbers, recording when
+    each one is handed to the peer connection."""
+
+    def __init__(self, width: int, height: int, fps: float) -> None:
+        self.sent_at: Dict[int, float] = {}
+        self._seq = 0
+        self._background = np.full((height, width, 3), 96, dtype=np.uint8)
+        super().__init__(self._generate, fps=fps)
+
+    def _generate(self, pts: int, time_base: fractions.Fraction) -> av.VideoFrame:
+        image = self._background.copy()
+        _stamp(image, self._seq % (1 << _STAMP_BITS))
+        frame = av.VideoFrame.from_ndarray(image, format="bgr24")
+        frame.pts = pts
+        frame.time_base = time_base
+        return frame
+
+    async def recv(self) -> av.frame.Frame:
+        frame = await super().recv()
+        self.sent_at[self._seq % (1 << _STAMP_BITS)] = time.monotonic()
+        self._seq += 1
+        return frame
+
+
+def _silence(pts: int, time_base: fractions.Fraction) -> av.AudioFrame:
+    samples = 960
+    frame = av.AudioFrame.from_ndarray(
+        np.zeros((1, samples * 2), dtype=np.int16), format="s16", layout="stereo"
+    )
+    frame.sample_rate = 48000
+    frame.pts = pts
+    frame.time_base = time_base
+    return frame
+
+
+def resolve_processor(spec: str) -> Optional[VideoFrameCallback]:
+    """Return the ``video_frame_callback`` that ``spec`` names; see the
+    module docstring for the accepted values."""
+    if spec == "none":
+        return None
+    if spec == "copy":
+
+        def copy(frame: av.VideoFrame) -> av.VideoFrame:
+            image = frame.to_ndarray(format="bgr24")
+            return av.VideoFrame.from_ndarray(image, format="bgr24")
+
+        return copy
+    if spec.startswith("busy:"):
+        seconds = float(spec[len("busy:") :]) / 1000
+
+        def busy(frame: av.VideoFrame) -> av.VideoFrame:
+            until = time.perf_counter() + seconds
+            while time.perf_counter() < until:
+                pass
+            return frame
+
+        return busy
+    if ":" in spec:
+        module_name, attr_name = spec.split(":", 1)
+        return getattr(importlib.import_module(module_name), attr_name)
+    raise ValueError(f"Unknown processor: {spec!r}")
+
+
+class _Session:
+    def __init__(
+        self,
+        index: int,
+        *,
+        processor: Optional[VideoFrameCallback],
+        width: int,
+        height: int,
+        fps: float,
+        audio: bool,
+        relay: BoundedMediaRelay,
+    ) -> None:
+        self.index = index
+        self.video_source = _StampedVideoSourceTrack(width, height, fps)
+        self.audio_source = AudioSourceTrack(_silence) if audio else None
+        # No STUN or TURN server, so that the test runs offline.
+        self.client = RTCPeerConnection(RTCConfiguration(iceServers=[]))
+        self.worker: WebRtcWorker = WebRtcWorker(
+            mode=WebRtcMode.SENDRECV,
+            **{
+                **WORKER_DEFAULTS,
+                "rtc_configuration": RTCConfiguration(iceServers=[]),
+                "video_frame_callback": processor,
+            },
+            loop=asyncio.get_running_loop(),
+            relay=relay,
+            ice_gathering=IceGatheringOptions(use_stun=False, use_turn=False),
+        )
+
+        self.measuring = False
+        self.video_frames_received = 0
+        self.audio_frames_received = 0
+        self.latencies: List[float] = []
+        self._consumers: List["asyncio.Task[None]"] = []
+        self._sent_at_start = 0
+
+    async def connect(self) -> None:
+        client, worker = self.client, self.worker
+
+        @client.on("track")  # type: ignore[arg-type]
+        def on_track(track: MediaStreamTrack) -> None:
+            self._consumers.append(asyncio.ensure_future(self._consume(track)))
+
+        wire_ice(client, worker)
+        client.addTrack(self.video_source)
+        if self.audio_source is not None:
+            client.addTrack(self.audio_source)
+        await client.setLocalDescription(await client.createOffer())
+        offer = client.localDescription
+        answer = await asyncio.to_thread(
+            worker.process_offer, offer.sdp, offer.type, 30
+        )
+        await client.setRemoteDescription(answer)
+
+    def start_measuring(self) -> None:
+        self.measuring = True
+        self._sent_at_start = len(self.video_source.sent_at)
+
+    async def _consume(self, track: MediaStreamTrack) -> None:
+        while True:
+            try:
+                frame = await track.recv()
+            except MediaStreamError:
+                return
+            if not self.measuring:
+                continue
+            if track.kind == "audio":
+                self.audio_frames_received += 1
+                continue
+            received_at = time.monotonic()
+            self.video_frames_received += 1
+            assert isinstance(frame, av.VideoFrame)
+            sent_at = self.video_source.sent_at.get(
+                _read_stamp(frame.to_ndarray(format="gray"))
+            )
+            if sent_at is not None:
+                self.latencies.append(received_at - sent_at)
+
+    def report(self, duration: float) -> SessionReport:
+        latencies = sorted(self.latencies)
+        return SessionReport(
+            session=self.index,
+            video_frames_sent=len(self.video_source.sent_at) - self._sent_at_start,
+            video_frames_received=self.video_frames_received,
+            video_fps=self.video_frames_received / duration,
+            audio_fps=(
+                self.audio_frames_received / duration
+                if self.audio_source is not None
+                else None
+            ),
+            latency_mean=statistics.fmean(latencies) if latencies else None,
+            latency_p95=(
+                latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+                if latencies
+                else None
+            ),
+            time_to_answer=self.worker.time_to_answer,
+        )
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self.worker.stop, 1.0)
+        await self.client.close()
+        for consumer in self._consumers:
+            consumer.cancel()
+
+
+def _max_rss_bytes() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:  # Not available on Windows.
+        return None
+    # Kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+async def run_load_test(
+    sessions: int = 1,
+    duration: float = 10.0,
+    *,
+    processor: Optional[VideoFrameCallback] = None,
+    warmup: float = 2.0,
+    width: int = 320,
+    height: int = 240,
+    fps: float = 30,
+    audio: bool = False,
+) -> LoadTestReport:
+    """Run ``sessions`` concurrent sessions, measuring them for ``duration``
+    seconds after ``warmup`` seconds of connection setup and ramp-up."""
+    relay = BoundedMediaRelay()
+    running = [
+        _Session(
+            i,
+            processor=processor,
+            width=width,
+            height=height,
+            fps=fps,
+            audio=audio,
+            relay=relay,
+        )
+        for i in range(sessions)
+    ]
+    try:
+        await asyncio.gather(*(session.connect() for session in running))
+        await asyncio.sleep(warmup)
+
+        for session in running:
+            session.start_measuring()
+        started_at = time.monotonic()
+        process_time_at_start = time.process_time()
+        await asyncio.sleep(duration)
+        elapsed = time.monotonic() - started_at
+        cpu_usage = (time.process_time() - process_time_at_start) / elapsed
+        for session in running:
+            session.measuring = False
+    finally:
+        await asyncio.gather(*(session.close() for session in running))
+        # Let aiortc's background cleanup tasks run.
+        await asyncio.sleep(0.2)
+
+    return LoadTestReport(
+        sessions=[session.report(elapsed) for session in running],
+        duration=elapsed,
+        cpu_usage=cpu_usage,
+        rss_bytes=_rss_bytes(),
+        max_rss_bytes=_max_rss_bytes(),
+    )
+
+
+def _format_ms(seconds: Optional[float]) -> str:
+    return f"{seconds * 1000:.1f}" if seconds is not None else "-"
+
+
+def _print_report(report: LoadTestReport, out: Callable[[str], None]) -> None:
+    out(
+        f"{'session':>7} {'sent':>6} {'recv':>6} {'fps':>6} "
+        f"{'lat mean':>9} {'lat p95':>8} {'answer':>7}"
+    )
+    for s in report.sessions:
+        out(
+            f"{s.session:>7} {s.video_frames_sent:>6} {s.video_frames_received:>6} "
+            f"{s.video_fps:>6.1f} {_format_ms(s.latency_mean):>9} "
+            f"{_format_ms(s.latency_p95):>8} {_format_ms(s.time_to_answer):>7}"
+        )
+    out(f"duration: {report.duration:.1f} s")
+    out(f"cpu: {report.cpu_usage:.2f} cores")
+    if report.rss_bytes is not None:
+        out(f"rss: {report.rss_bytes / 2**20:.0f} MiB")
+    if report.max_rss_bytes is not None:
+        out(f"max rss: {report.max_rss_bytes / 2**20:.0f} MiB")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m scripts.loadtest",
+        description="Load-test WebRtcWorker with in-process peers.",
+    )
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--processor", default="none")
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--height", type=int, default=240)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--audio", action="store_true")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--trace", metavar="PATH", help="Write a Chrome trace to PATH")
+    parser.add_argument("--trace-sample-rate", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        start_frame_tracing(sample_rate=args.trace_sample_rate)
+    report = asyncio.run(
+        run_load_test(
+            args.sessions,
+            args.duration,
+            processor=resolve_processor(args.processor),
+            warmup=args.warmup,
+            width=args.width,
+            height=args.height,
+            fps=args.fps,
+            audio=args.audio,
+        )
+    )
+    if args.trace:
+        tracer = stop_frame_tracing()
+        assert tracer is not None
+        tracer.dump(args.trace)
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2))
+    else:
+        _print_report(report, print)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
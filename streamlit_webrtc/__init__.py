@@ -1,64 +1,257 @@
 """streamlit-webrtc"""
 
+import importlib
 import importlib.metadata
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    from .component import (
+        WebRtcStreamerContext,
+        WebRtcStreamerState,
+        webrtc_streamer,
+    )
+    from .config import (
+        DEFAULT_AUDIO_HTML_ATTRS,
+        DEFAULT_MEDIA_STREAM_CONSTRAINTS,
+        DEFAULT_VIDEO_HTML_ATTRS,
+        AudioHTMLAttributes,
+        MediaStreamConstraints,
+        RTCConfiguration,
+        Translations,
+        VideoHTMLAttributes,
+    )
+    from .credentials import (
+        get_hf_ice_servers,
+        get_twilio_ice_servers,
+    )
+    from .decoder_pool import DecoderPool, DecoderPoolStats
+    from .factory import (
+        create_audio_sink_track,
+        create_audio_source_track,
+        create_mix_track,
+        create_pcm_audio_source_track,
+        create_process_track,
+        create_video_sink_track,
+        create_video_source_track,
+    )
+    from .governor import DegradationLevel, GovernorStats, ResourceGovernor
+    from .ice import IceGatheringOptions
+    from .jitter_buffer import (
+        AudioJitterBuffer,
+        JitterBufferOptions,
+        JitterBufferStats,
+    )
+    from .loop_monitor import (
+        LoopLagMonitor,
+        LoopLagStats,
+        get_loop_lag_monitor,
+        start_loop_lag_monitor,
+        stop_loop_lag_monitor,
+    )
+    from .metrics import (
+        MetricsRegistry,
+        get_metrics_registry,
+        render_metrics,
+        start_metrics_server,
+    )
+    from .mix import InputAwareMixer, MediaStreamMixTrack, MixerCallback, MixerStats
+    from .mixers import AudioMixer, VideoCompositor
+    from .normalize import AudioInputFormat, InputFormat, VideoInputFormat
+    from .pcm_source import PcmAudioSource
+    from .recorder import PassthroughRecorder
+    from .relay import BoundedMediaRelay, RelaySubscriberStats
+    from .room import AudioMixRoom, AudioMixRoomStats
+    from .sink import (
+        AudioSinkCallback,
+        AudioSinkTrack,
+        CallbackSinkTrack,
+        MediaSink,
+        VideoSinkCallback,
+        VideoSinkTrack,
+    )
+    from .source import (
+        AudioSourceCallback,
+        AudioSourceTrack,
+        VideoSourceCallback,
+        VideoSourceTrack,
+    )
+    from .sync import FrameSynchronizer, FrameSyncOptions, FrameSyncStats
+    from .tracing import (
+        FrameTracer,
+        get_frame_tracer,
+        start_frame_tracing,
+        stop_frame_tracing,
+    )
+    from .transport_stats import InboundRtpStats, OutboundRtpStats, TransportStats
+    from .webrtc import (
+        AudioProcessorBase,
+        AudioProcessorFactory,
+        AudioReceiver,
+        MediaPlayerFactory,
+        MediaRecorderFactory,
+        VideoProcessorBase,
+        VideoProcessorFactory,
+        VideoReceiver,
+        VideoTransformerBase,
+        WebRtcMode,
+        WebRtcWorker,
+    )
+
+    # For backward compatibility
+    VideoTransformerFactory = VideoProcessorFactory
+
+# The public names by the submodule they are imported from on first access
+# (PEP 562), so that `import streamlit_webrtc` alone loads neither aiortc,
+# PyAV and NumPy nor the Streamlit component. `tests/import_test.py` guards
+# this.
+_EXPORTS_BY_MODULE: Dict[str, Tuple[str, ...]] = {
+    "component": (
+        "WebRtcStreamerContext",
+        "WebRtcStreamerState",
+        "webrtc_streamer",
+    ),
+    "config": (
+        "DEFAULT_AUDIO_HTML_ATTRS",
+        "DEFAULT_MEDIA_STREAM_CONSTRAINTS",
+        "DEFAULT_VIDEO_HTML_ATTRS",
+        "AudioHTMLAttributes",
+        "MediaStreamConstraints",
+        "RTCConfiguration",
+        "Translations",
+        "VideoHTMLAttributes",
+    ),
+    "credentials": (
+        "get_hf_ice_servers",
+        "get_twilio_ice_servers",
+    ),
+    "decoder_pool": (
+        "DecoderPool",
+        "DecoderPoolStats",
+    ),
+    "factory": (
+        "create_audio_sink_track",
+        "create_audio_source_track",
+        "create_mix_track",
+        "create_pcm_audio_source_track",
+        "create_process_track",
+        "create_video_sink_track",
+        "create_video_source_track",
+    ),
+    "governor": (
+        "DegradationLevel",
+        "GovernorStats",
+        "ResourceGovernor",
+    ),
+    "ice": ("IceGatheringOptions",),
+    "jitter_buffer": (
+        "AudioJitterBuffer",
+        "JitterBufferOptions",
+        "JitterBufferStats",
+    ),
+    "loop_monitor": (
+        "LoopLagMonitor",
+        "LoopLagStats",
+        "get_loop_lag_monitor",
+        "start_loop_lag_monitor",
+        "stop_loop_lag_monitor",
+    ),
+    "metrics": (
+        "MetricsRegistry",
+        "get_metrics_registry",
+        "render_metrics",
+        "start_metrics_server",
+    ),
+    "mix": (
+        "InputAwareMixer",
+        "MediaStreamMixTrack",
+        "MixerCallback",
+        "MixerStats",
+    ),
+    "mixers": (
+        "AudioMixer",
+        "VideoCompositor",
+    ),
+    "normalize": (
+        "AudioInputFormat",
+        "InputFormat",
+        "VideoInputFormat",
+    ),
+    "pcm_source": ("PcmAudioSource",),
+    "recorder": ("PassthroughRecorder",),
+    "relay": (
+        "BoundedMediaRelay",
+        "RelaySubscriberStats",
+    ),
+    "room": (
+        "AudioMixRoom",
+        "AudioMixRoomStats",
+    ),
+    "sink": (
+        "AudioSinkCallback",
+        "AudioSinkTrack",
+        "CallbackSinkTrack",
+        "MediaSink",
+        "VideoSinkCallback",
+        "VideoSinkTrack",
+    ),
+    "source": (
+        "AudioSourceCallback",
+        "AudioSourceTrack",
+        "VideoSourceCallback",
+        "VideoSourceTrack",
+    ),
+    "sync": (
+        "FrameSynchronizer",
+        "FrameSyncOptions",
+        "FrameSyncStats",
+    ),
+    "tracing": (
+        "FrameTracer",
+        "get_frame_tracer",
+        "start_frame_tracing",
+        "stop_frame_tracing",
+    ),
+    "transport_stats": (
+        "InboundRtpStats",
+        "OutboundRtpStats",
+        "TransportStats",
+    ),
+    "webrtc": (
+        "AudioProcessorBase",
+        "AudioProcessorFactory",
+        "AudioReceiver",
+        "MediaPlayerFactory",
+        "MediaRecorderFactory",
+        "VideoProcessorBase",
+        "VideoProcessorFactory",
+        "VideoReceiver",
+        "VideoTransformerBase",
+        "WebRtcMode",
+        "WebRtcWorker",
+    ),
+}
+_LAZY_IMPORTS: Dict[str, Tuple[str, str]] = {
+    name: (module, name)
+    for module, names in _EXPORTS_BY_MODULE.items()
+    for name in names
+}
+# For backward compatibility
+_LAZY_IMPORTS["VideoTransformerFactory"] = ("webrtc", "VideoProcessorFactory")
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        module_name, attr_name = _LAZY_IMPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), attr_name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
 
-from .component import (
-    WebRtcStreamerContext,
-    WebRtcStreamerState,
-    webrtc_streamer,
-)
-from .config import (
-    DEFAULT_AUDIO_HTML_ATTRS,
-    DEFAULT_MEDIA_STREAM_CONSTRAINTS,
-    DEFAULT_VIDEO_HTML_ATTRS,
-    AudioHTMLAttributes,
-    MediaStreamConstraints,
-    RTCConfiguration,
-    Translations,
-    VideoHTMLAttributes,
-)
-from .credentials import (
-    get_hf_ice_servers,
-    get_twilio_ice_servers,
-)
-from .factory import (
-    create_audio_sink_track,
-    create_audio_source_track,
-    create_mix_track,
-    create_pcm_audio_source_track,
-    create_process_track,
-    create_video_sink_track,
-    create_video_source_track,
-)
-from .mix import MediaStreamMixTrack, MixerCallback
-from .pcm_source import PcmAudioSource
-from .sink import (
-    AudioSinkCallback,
-    AudioSinkTrack,
-    CallbackSinkTrack,
-    MediaSink,
-    VideoSinkCallback,
-    VideoSinkTrack,
-)
-from .source import (
-    AudioSourceCallback,
-    AudioSourceTrack,
-    VideoSourceCallback,
-    VideoSourceTrack,
-)
-from .webrtc import (
-    AudioProcessorBase,
-    AudioProcessorFactory,
-    AudioReceiver,
-    MediaPlayerFactory,
-    MediaRecorderFactory,
-    VideoProcessorBase,
-    VideoProcessorFactory,
-    VideoReceiver,
-    VideoTransformerBase,
-    WebRtcMode,
-    WebRtcWorker,
-)
 
 # Set __version__ dynamically base on metadata.
 # https://github.com/python-poetry/poetry/issues/1036#issuecomment-489880822
@@ -69,10 +262,6 @@ try:
 except importlib.metadata.PackageNotFoundError:
     pass
 
-# For backward compatibility
-VideoTransformerFactory = VideoProcessorFactory
-
-
 __all__ = [
     "webrtc_streamer",
     "AudioProcessorBase",
@@ -80,6 +269,31 @@ __all__ = [
     "AudioReceiver",
     "MediaPlayerFactory",
     "MediaRecorderFactory",
+    "PassthroughRecorder",
+    "DecoderPool",
+    "DecoderPoolStats",
+    "ResourceGovernor",
+    "DegradationLevel",
+    "GovernorStats",
+    "TransportStats",
+    "InboundRtpStats",
+    "OutboundRtpStats",
+    "IceGatheringOptions",
+    "BoundedMediaRelay",
+    "RelaySubscriberStats",
+    "FrameTracer",
+    "start_frame_tracing",
+    "stop_frame_tracing",
+    "get_frame_tracer",
+    "MetricsRegistry",
+    "get_metrics_registry",
+    "render_metrics",
+    "start_metrics_server",
+    "LoopLagMonitor",
+    "LoopLagStats",
+    "start_loop_lag_monitor",
+    "stop_loop_lag_monitor",
+    "get_loop_lag_monitor",
     "VideoProcessorBase",
     "VideoProcessorFactory",
     "VideoTransformerBase",  # XXX: Deprecated
@@ -111,6 +325,21 @@ __all__ = [
     "create_mix_track",
     "MixerCallback",
     "MediaStreamMixTrack",
+    "MixerStats",
+    "InputAwareMixer",
+    "AudioMixer",
+    "VideoCompositor",
+    "AudioJitterBuffer",
+    "JitterBufferOptions",
+    "JitterBufferStats",
+    "AudioMixRoom",
+    "AudioMixRoomStats",
+    "FrameSynchronizer",
+    "FrameSyncOptions",
+    "FrameSyncStats",
+    "AudioInputFormat",
+    "InputFormat",
+    "VideoInputFormat",
     "WebRtcStreamerContext",
     "WebRtcStreamerState",
     "DEFAULT_AUDIO_HTML_ATTRS",
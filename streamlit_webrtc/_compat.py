@@ -11,12 +11,13 @@ requiring Python >=3.10), so all paths below assume that floor.
 
 from streamlit import cache_data, rerun
 from streamlit.runtime.app_session import AppSession, AppSessionState
-from streamlit.runtime.scriptrunner import get_script_run_ctx
+from streamlit.runtime.scriptrunner import ScriptRunnerEvent, get_script_run_ctx
 from streamlit.runtime.session_manager import ActiveSessionInfo as SessionInfo
 
 __all__ = [
     "AppSession",
     "AppSessionState",
+    "ScriptRunnerEvent",
     "SessionInfo",
     "cache_data",
     "get_script_run_ctx",
@@ -33,7 +33,7 @@ from streamlit_webrtc.models import (
 )
 from streamlit_webrtc.sink import MediaSink
 
-from ._compat import cache_data, rerun
+from ._compat import rerun
 from .config import (
     DEFAULT_AUDIO_HTML_ATTRS,
     DEFAULT_MEDIA_STREAM_CONSTRAINTS,
@@ -49,7 +49,11 @@ from .config import (
 from .credentials import (
     get_available_ice_servers,
 )
+from .decoder_pool import DecoderPool
+from .governor import ResourceGovernor
+from .ice import IceGatheringOptions
 from .session_info import get_script_run_count, get_this_session_info
+from .transport_stats import TransportStats
 from .webrtc import (
     AudioProcessorFactory,
     AudioProcessorT,
@@ -82,6 +86,9 @@ else:
 class WebRtcStreamerState(NamedTuple):
     playing: bool
     signalling: bool
+    # The last offer was refused by the `governor` passed to
+    # `webrtc_streamer()` because the server is at capacity.
+    server_busy: bool = False
 
 
 # To restore component value after `rerun()`.
@@ -127,6 +134,8 @@ class WebRtcStreamerContext(Generic[VideoProcessorT, AudioProcessorT]):
     _sdp_answer_json: Optional[str]
     _is_sdp_answer_sent: bool
     _last_rendered_run_count: Optional[int]
+    _server_busy: bool
+    _refusing_offer: bool
 
     # Passthrough attributes forwarded to the worker. Each returns the
     # worker's attribute when a worker is attached, otherwise None.
@@ -140,6 +149,9 @@ class WebRtcStreamerContext(Generic[VideoProcessorT, AudioProcessorT]):
     input_audio_track = _WorkerForwarded[MediaStreamTrack]("input_audio_track")
     output_video_track = _WorkerForwarded[MediaStreamTrack]("output_video_track")
     output_audio_track = _WorkerForwarded[MediaStreamTrack]("output_audio_track")
+    # Sampled every `transport_stats_interval` seconds; None when disabled.
+    transport_stats = _WorkerForwarded[List[TransportStats]]("transport_stats")
+    time_to_answer = _WorkerForwarded[float]("time_to_answer")
 
     def __init__(
         self,
@@ -153,6 +165,8 @@ class WebRtcStreamerContext(Generic[VideoProcessorT, AudioProcessorT]):
         self._sdp_answer_json = None
         self._is_sdp_answer_sent = False
         self._last_rendered_run_count = None
+        self._server_busy = False
+        self._refusing_offer = False
 
     def _set_worker(
         self, worker: Optional[WebRtcWorker[VideoProcessorT, AudioProcessorT]]
@@ -167,6 +181,8 @@ class WebRtcStreamerContext(Generic[VideoProcessorT, AudioProcessorT]):
 
     @property
     def state(self) -> WebRtcStreamerState:
+        if self._server_busy:
+            return self._state._replace(server_busy=True)
         return self._state
 
     @property
@@ -249,7 +265,6 @@ def compile_state(component_value) -> WebRtcStreamerState:
     return WebRtcStreamerState(playing=playing, signalling=signalling)
 
 
-@cache_data
 def enhance_frontend_rtc_configuration(
     user_frontend_rtc_configuration: Optional[
         Union[Dict[str, Any], RTCConfiguration]
@@ -357,7 +372,7 @@ def _make_state_change_callback(
         old_state = context.state
         context._set_state(new_state)
 
-        if user_on_change and old_state != new_state:
+        if user_on_change and old_state != context.state:
             user_on_change()
 
     return callback
@@ -396,6 +411,7 @@ def _restore_snapshot_if_needed(
 
 def _resolve_server_rtc_configuration(
     server_rtc_configuration: Optional[Union[Dict[str, Any], RTCConfiguration]],
+    ice_gathering: Optional[IceGatheringOptions] = None,
 ) -> AiortcRTCConfiguration:
     """Convert the user-supplied server RTC configuration into the aiortc
     equivalent, filling in default ICE servers when none were given."""
@@ -404,7 +420,11 @@ def _resolve_server_rtc_configuration(
         if server_rtc_configuration and isinstance(server_rtc_configuration, dict)
         else AiortcRTCConfiguration()
     )
-    if config.iceServers is None:
+    if ice_gathering is not None and not ice_gathering.uses_ice_servers:
+        # No need to fetch TURN credentials that would not be used.
+        if config.iceServers is None:
+            config.iceServers = []
+    elif config.iceServers is None:
         LOGGER.info(
             "rtc_configuration.iceServers is not set. Try to set it automatically."
         )
@@ -420,6 +440,7 @@ def _handle_worker_lifecycle(
     sdp_offer: Optional[Dict],
     *,
     make_worker: Callable[[], "WebRtcWorker"],
+    governor: Optional[ResourceGovernor] = None,
 ) -> None:
     """Reconcile the worker against the frontend's current state.
 
@@ -429,6 +450,11 @@ def _handle_worker_lifecycle(
       and `rerun()` so the SDP answer args get cleared from the frontend.
     - **Create**: there is no worker but the frontend offered an SDP.
       Construct a worker under the creation lock and feed it the offer.
+      If the ``governor`` refuses the session, mark the context as
+      server-busy instead and have the frontend stop on the next run.
+      **Reconnect**: a reconnectable worker exists and the frontend
+      offered a different SDP for a new connection. The worker answers it
+      keeping its processors, and the new answer gets flushed below.
     - **Flush answer**: a worker has produced a local description that the
       frontend hasn't seen yet. Stash it on the context and `rerun()` so
       the next run forwards it as a component arg.
@@ -448,27 +474,70 @@ def _handle_worker_lifecycle(
             _reset_context(context)
             # Rerun to unset the SDP answer from the frontend args
             rerun()
+        elif context._refusing_offer:
+            # The frontend has stopped after a refused offer; rerun to give
+            # the playing state back to the user.
+            context._refusing_offer = False
+            context._server_busy = False
+            rerun()
 
     # --- Create ---
     # This point can be reached in parallel, so the lock makes worker
     # creation atomic.
+    refused = False
     with context._worker_creation_lock:
-        if not context._get_worker() and sdp_offer:
+        existing_worker = context._get_worker()
+        if not existing_worker and sdp_offer and not context._refusing_offer:
+            if governor is not None and not governor.try_admit():
+                LOGGER.warning('The server is busy. Refuse the offer (key="%s").', key)
+                context._server_busy = True
+                context._refusing_offer = True
+                refused = True
+            else:
+                LOGGER.debug(
+                    "No worker exists though the offer SDP is set. "
+                    'Create a new worker (key="%s").',
+                    key,
+                )
+                context._server_busy = False
+                try:
+                    worker = make_worker()
+                except BaseException:
+                    if governor is not None:
+                        governor.release()
+                    raise
+                worker.process_offer(
+                    sdp_offer["sdp"],
+                    sdp_offer["type"],
+                    # aioice's internal method uses a 5s timeout
+                    # (https://github.com/aiortc/aioice/blob/aaada959aa8de31b880822db36f1c0c0cef75c0e/src/aioice/ice.py#L973);
+                    # give a bit more headroom here.
+                    timeout=10,
+                )
+                context._set_worker(worker)
+        elif (
+            existing_worker
+            and sdp_offer
+            and existing_worker.reconnectable
+            and sdp_offer["sdp"] != existing_worker.offer_sdp
+        ):
             LOGGER.debug(
-                "No worker exists though the offer SDP is set. "
-                'Create a new worker (key="%s").',
+                'The frontend offered a new SDP. Reconnect the worker (key="%s").',
                 key,
             )
-            worker = make_worker()
-            worker.process_offer(
-                sdp_offer["sdp"],
-                sdp_offer["type"],
-                # aioice's internal method uses a 5s timeout
-                # (https://github.com/aiortc/aioice/blob/aaada959aa8de31b880822db36f1c0c0cef75c0e/src/aioice/ice.py#L973);
-                # give a bit more headroom here.
-                timeout=10,
-            )
-            context._set_worker(worker)
+            try:
+                existing_worker.reconnect(
+                    sdp_offer["sdp"], sdp_offer["type"], timeout=10
+                )
+            except BaseException:
+                _reset_context(context)
+                raise
+            context._is_sdp_answer_sent = False
+    if refused:
+        # Rerun so that the frontend gets `desired_playing_state=False` and
+        # stops signalling. Outside the lock for the same reason as below.
+        rerun()
+        return
 
     # --- Flush answer ---
     running_worker = context._get_worker()
@@ -526,6 +595,11 @@ def webrtc_streamer(
     sink_audio_track: Optional[MediaSink] = None,
     sendback_video: bool = True,
     sendback_audio: bool = True,
+    decoder_pool: Optional[DecoderPool] = None,
+    governor: Optional[ResourceGovernor] = None,
+    transport_stats_interval: Optional[float] = None,
+    reconnect_grace_period: Optional[float] = None,
+    ice_gathering: Optional[IceGatheringOptions] = None,
     video_html_attrs: Optional[Union[VideoHTMLAttributes, Dict]] = None,
     audio_html_attrs: Optional[Union[AudioHTMLAttributes, Dict]] = None,
     translations: Optional[Translations] = None,
@@ -573,6 +647,11 @@ def webrtc_streamer(
     sink_audio_track: Optional[MediaSink] = None,
     sendback_video: bool = True,
     sendback_audio: bool = True,
+    decoder_pool: Optional[DecoderPool] = None,
+    governor: Optional[ResourceGovernor] = None,
+    transport_stats_interval: Optional[float] = None,
+    reconnect_grace_period: Optional[float] = None,
+    ice_gathering: Optional[IceGatheringOptions] = None,
     video_html_attrs: Optional[Union[VideoHTMLAttributes, Dict]] = None,
     audio_html_attrs: Optional[Union[AudioHTMLAttributes, Dict]] = None,
     translations: Optional[Translations] = None,
@@ -616,6 +695,11 @@ def webrtc_streamer(
     sink_audio_track: Optional[MediaSink] = None,
     sendback_video: bool = True,
     sendback_audio: bool = True,
+    decoder_pool: Optional[DecoderPool] = None,
+    governor: Optional[ResourceGovernor] = None,
+    transport_stats_interval: Optional[float] = None,
+    reconnect_grace_period: Optional[float] = None,
+    ice_gathering: Optional[IceGatheringOptions] = None,
     video_html_attrs: Optional[Union[VideoHTMLAttributes, Dict]] = None,
     audio_html_attrs: Optional[Union[AudioHTMLAttributes, Dict]] = None,
     translations: Optional[Translations] = None,
@@ -659,6 +743,11 @@ def webrtc_streamer(
     sink_audio_track: Optional[MediaSink] = None,
     sendback_video: bool = True,
     sendback_audio: bool = True,
+    decoder_pool: Optional[DecoderPool] = None,
+    governor: Optional[ResourceGovernor] = None,
+    transport_stats_interval: Optional[float] = None,
+    reconnect_grace_period: Optional[float] = None,
+    ice_gathering: Optional[IceGatheringOptions] = None,
     video_html_attrs: Optional[Union[VideoHTMLAttributes, Dict]] = None,
     audio_html_attrs: Optional[Union[AudioHTMLAttributes, Dict]] = None,
     translations: Optional[Translations] = None,
@@ -701,6 +790,11 @@ def webrtc_streamer(
     sink_audio_track: Optional[MediaSink] = None,
     sendback_video: bool = True,
     sendback_audio: bool = True,
+    decoder_pool: Optional[DecoderPool] = None,
+    governor: Optional[ResourceGovernor] = None,
+    transport_stats_interval: Optional[float] = None,
+    reconnect_grace_period: Optional[float] = None,
+    ice_gathering: Optional[IceGatheringOptions] = None,
     video_html_attrs: Optional[Union[VideoHTMLAttributes, Dict]] = None,
     audio_html_attrs: Optional[Union[AudioHTMLAttributes, Dict]] = None,
     translations: Optional[Translations] = None,
@@ -781,12 +875,19 @@ def webrtc_streamer(
         audio_html_attrs=audio_html_attrs,
         translations=translations,
         media_toggle_controls=media_toggle_controls,
-        desired_playing_state=desired_playing_state,
+        # A refused offer overrides the playing state for one run to make
+        # the frontend stop.
+        desired_playing_state=(
+            False if context._refusing_offer else desired_playing_state
+        ),
         # `sendback_*` lets the frontend negotiate recvonly transceivers for
         # kinds the local capture won't produce — without this, an audio-only
         # capture cannot receive a server-generated video stream.
         sendback_video=sendback_video,
         sendback_audio=sendback_audio,
+        # Have the frontend re-offer on a new connection when the current one
+        # fails, instead of stopping.
+        reconnect=reconnect_grace_period is not None,
         on_change=_make_state_change_callback(key, frontend_key, on_change),
     )
     component_value = _restore_snapshot_if_needed(context, component_value)
@@ -800,7 +901,7 @@ def webrtc_streamer(
         make_worker=lambda: WebRtcWorker(
             mode=mode,
             rtc_configuration=_resolve_server_rtc_configuration(
-                server_rtc_configuration
+                server_rtc_configuration, ice_gathering
             ),
             player_factory=player_factory,
             in_recorder_factory=in_recorder_factory,
@@ -822,7 +923,13 @@ def webrtc_streamer(
             sink_audio_track=sink_audio_track,
             sendback_video=sendback_video,
             sendback_audio=sendback_audio,
+            decoder_pool=decoder_pool,
+            governor=governor,
+            transport_stats_interval=transport_stats_interval,
+            reconnect_grace_period=reconnect_grace_period,
+            ice_gathering=ice_gathering,
         ),
+        governor=governor,
     )
 
     worker = context._get_worker()
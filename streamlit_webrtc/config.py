@@ -1,11 +1,14 @@
-from typing import Any, Dict, List, Optional, TypedDict, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, TypedDict, Union
 
-from aiortc import (
-    RTCConfiguration as AiortcRTCConfiguration,
-)
-from aiortc import (
-    RTCIceServer as AiortcRTCIceServer,
-)
+if TYPE_CHECKING:
+    # Imported in the functions at runtime, so that the configuration types
+    # can be used without loading aiortc.
+    from aiortc import (
+        RTCConfiguration as AiortcRTCConfiguration,
+    )
+    from aiortc import (
+        RTCIceServer as AiortcRTCIceServer,
+    )
 
 RTCIceServer = TypedDict(
     "RTCIceServer",
@@ -24,7 +27,9 @@ class RTCConfiguration(TypedDict, total=False):
 
 def compile_rtc_ice_server(
     ice_server: Union[RTCIceServer, dict[str, Any]],
-) -> AiortcRTCIceServer:
+) -> "AiortcRTCIceServer":
+    from aiortc import RTCIceServer as AiortcRTCIceServer
+
     if not isinstance(ice_server, dict):
         raise ValueError("ice_server must be a dict")
     if "urls" not in ice_server:
@@ -39,7 +44,7 @@ def compile_rtc_ice_server(
 
 def compile_ice_servers(
     ice_servers: Union[List[RTCIceServer], List[dict[str, Any]]],
-) -> List[AiortcRTCIceServer]:
+) -> List["AiortcRTCIceServer"]:
     return [
         compile_rtc_ice_server(server)
         for server in ice_servers
@@ -49,7 +54,9 @@ def compile_ice_servers(
 
 def compile_rtc_configuration(
     rtc_configuration: Union[RTCConfiguration, dict[str, Any]],
-) -> AiortcRTCConfiguration:
+) -> "AiortcRTCConfiguration":
+    from aiortc import RTCConfiguration as AiortcRTCConfiguration
+
     if not isinstance(rtc_configuration, dict):
         raise ValueError("rtc_configuration must be a dict")
     ice_servers = rtc_configuration.get("iceServers", [])
@@ -23,29 +23,304 @@ SOFTWARE.
 """
 # Original: https://github.com/freddyaboulton/fastrtc/blob/66f0a81b76684c5d58761464fb67642891066f93/LICENSE
 
+import hashlib
 import json
 import logging
 import os
+import tempfile
+import threading
+import time
 import urllib.error
 import urllib.request
-from typing import List
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
 
-from ._compat import cache_data
 from .config import RTCIceServer
 
 LOGGER = logging.getLogger(__name__)
 
 
+# Path of a JSON file to keep the fetched credentials in, so that they
+# survive server restarts. Not set by default, as the file holds secrets.
+ICE_SERVERS_CACHE_PATH_ENV = "STREAMLIT_WEBRTC_ICE_SERVERS_CACHE_PATH"
+
+
+class _CacheEntry(NamedTuple):
+    value: Any
+    # Wall-clock time, as the entries may be loaded from the disk cache.
+    fetched_at: float
+
+
+class _RefreshingCache:
+    """A TTL cache of ICE server credentials that keeps them fresh in the
+    background.
+
+    Only the first fetch for a key blocks the caller. After that, the value
+    is refetched in the background once ``refresh_ratio`` of its ``ttl`` has
+    passed, on one thread that refreshes all the keys of the cache in turn,
+    and the previous value is served until the refetch succeeds, even past
+    its TTL (stale-while-revalidate), but no longer than ``stale_grace``
+    seconds past it; then the next caller fetches it again.
+    Keys not asked for during a whole TTL are no longer refreshed. A failed
+    first fetch is not retried for ``failure_backoff`` seconds, so that a
+    down credential server does not stall every script run. With the
+    ``STREAMLIT_WEBRTC_ICE_SERVERS_CACHE_PATH`` environment variable set, the
+    entries are also stored in that file and loaded from it while unexpired.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        *,
+        refresh_ratio: float = 0.8,
+        stale_grace: float = 300.0,
+        failure_backoff: float = 60.0,
+    ) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.refresh_ratio = refresh_ratio
+        self.stale_grace = stale_grace
+        self.failure_backoff = failure_backoff
+
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _CacheEntry] = {}
+        self._failures: Dict[str, Tuple[float, Exception]] = {}
+        self._fetch_locks: Dict[str, threading.Lock] = {}
+        self._refreshing: Set[str] = set()
+        # When to refresh each key, and how.
+        self._refresh_at: Dict[str, Tuple[float, Callable[[], Any]]] = {}
+        self._scheduler: Optional[threading.Thread] = None
+        self._scheduler_wakeup = threading.Condition(self._lock)
+        self._last_used_at: Dict[str, float] = {}
+
+    def get(self, key: Tuple[str, ...], fetch: Callable[[], Any]) -> Any:
+        cache_key = self._cache_key(key)
+        with self._lock:
+            self._last_used_at[cache_key] = time.time()
+            entry = self._entries.get(cache_key)
+            if entry is not None and self._expired(entry):
+                LOGGER.debug("The cached %s ICE servers expired", self.name)
+                del self._entries[cache_key]
+                self._cancel_refresh(cache_key)
+                entry = None
+            if entry is None:
+                entry = self._load(cache_key)
+                if entry is not None:
+                    self._entries[cache_key] = entry
+            if entry is not None:
+                if (
+                    cache_key not in self._refresh_at
+                    and cache_key not in self._refreshing
+                ):
+                    self._schedule_refresh(cache_key, fetch, entry)
+                return entry.value
+
+            failure = self._failures.get(cache_key)
+            if failure is not None:
+                failed_at, error = failure
+                if time.time() - failed_at < self.failure_backoff:
+                    raise error
+            fetch_lock = self._fetch_locks.setdefault(cache_key, threading.Lock())
+
+        # Let concurrent callers wait for one fetch instead of making their own.
+        with fetch_lock:
+            with self._lock:
+                entry = self._entries.get(cache_key)
+                if entry is not None:
+                    return entry.value
+            try:
+                value = fetch()
+            except Exception as e:
+                with self._lock:
+                    self._failures[cache_key] = (time.time(), e)
+                raise
+            self._store(cache_key, fetch, value)
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._refresh_at.clear()
+            self._scheduler_wakeup.notify()
+            self._entries.clear()
+            self._failures.clear()
+            self._last_used_at.clear()
+
+    def _cache_key(self, key: Tuple[str, ...]) -> str:
+        # Hashed so that the tokens are not written to the disk cache.
+        digest = hashlib.sha256("\0".join(key).encode()).hexdigest()
+        return f"{self.name}:{digest}"
+
+    def _expired(self, entry: _CacheEntry) -> bool:
+        return time.time() - entry.fetched_at >= self.ttl + self.stale_grace
+
+    def _store(self, cache_key: str, fetch: Callable[[], Any], value: Any) -> None:
+        entry = _CacheEntry(value=value, fetched_at=time.time())
+        with self._lock:
+            self._entries[cache_key] = entry
+            self._failures.pop(cache_key, None)
+            self._schedule_refresh(cache_key, fetch, entry)
+        self._save(cache_key, entry)
+
+    def _schedule_refresh(
+        self,
+        cache_key: str,
+        fetch: Callable[[], Any],
+        entry: _CacheEntry,
+        delay: Optional[float] = None,
+    ) -> None:
+        # Called with `self._lock` held.
+        if delay is None:
+            refresh_at = entry.fetched_at + self.ttl * self.refresh_ratio
+            delay = max(refresh_at - time.time(), 0.0)
+        self._refresh_at[cache_key] = (time.time() + delay, fetch)
+        if self._scheduler is None:
+            self._scheduler = threading.Thread(
+                target=self._run_scheduler,
+                name=f"streamlit-webrtc-ice-servers-refresh-{self.name}",
+                daemon=True,
+            )
+            self._scheduler.start()
+        else:
+            self._scheduler_wakeup.notify()
+
+    def _cancel_refresh(self, cache_key: str) -> None:
+        # Called with `self._lock` held.
+        self._refresh_at.pop(cache_key, None)
+
+    def _run_scheduler(self) -> None:
+        """Refresh the keys as they come due, one at a time, until none is
+        scheduled."""
+        while True:
+            with self._lock:
+                while True:
+                    if not self._refresh_at:
+                        self._scheduler = None
+                        return
+                    cache_key, (refresh_at, fetch) = min(
+                        self._refresh_at.items(), key=lambda item: item[1][0]
+                    )
+                    delay = refresh_at - time.time()
+                    if delay <= 0:
+                        del self._refresh_at[cache_key]
+                        break
+                    self._scheduler_wakeup.wait(delay)
+            self._refresh(cache_key, fetch)
+
+    def _refresh(self, cache_key: str, fetch: Callable[[], Any]) -> None:
+        with self._lock:
+            if cache_key in self._refreshing or cache_key not in self._entries:
+                return
+            last_used_at = self._last_used_at.get(cache_key)
+            if last_used_at is None or time.time() - last_used_at >= self.ttl:
+                # Refreshed again by the next `get()`, if any.
+                LOGGER.debug("Stop refreshing the unused %s ICE servers", self.name)
+                return
+            self._refreshing.add(cache_key)
+        try:
+            LOGGER.debug("Refresh the %s ICE servers in the background", self.name)
+            try:
+                value = fetch()
+            except Exception as e:
+                LOGGER.warning(
+                    "Failed to refresh the %s ICE servers, keep serving the "
+                    "previous ones and retry in %s seconds: %s",
+                    self.name,
+                    self.failure_backoff,
+                    e,
+                )
+                with self._lock:
+                    entry = self._entries.get(cache_key)
+                    if entry is not None:
+                        self._schedule_refresh(
+                            cache_key, fetch, entry, delay=self.failure_backoff
+                        )
+                return
+            with self._lock:
+                if cache_key not in self._entries:
+                    # Cleared or expired while refreshing.
+                    return
+            self._store(cache_key, fetch, value)
+        finally:
+            with self._lock:
+                self._refreshing.discard(cache_key)
+
+    def _load(self, cache_key: str) -> Optional[_CacheEntry]:
+        path = os.getenv(ICE_SERVERS_CACHE_PATH_ENV)
+        if not path:
+            return None
+        item = _read_disk_cache(path).get(cache_key)
+        if not isinstance(item, dict):
+            return None
+        try:
+            entry = _CacheEntry(value=item["value"], fetched_at=item["fetched_at"])
+        except KeyError:
+            return None
+        if time.time() - entry.fetched_at >= self.ttl:
+            return None
+        LOGGER.debug("Loaded the %s ICE servers from %s", self.name, path)
+        return entry
+
+    def _save(self, cache_key: str, entry: _CacheEntry) -> None:
+        path = os.getenv(ICE_SERVERS_CACHE_PATH_ENV)
+        if not path:
+            return
+        with _disk_cache_lock:
+            data = _read_disk_cache(path)
+            data[cache_key] = entry._asdict()
+            try:
+                _write_disk_cache(path, data)
+            except (OSError, TypeError, ValueError) as e:
+                LOGGER.warning("Failed to write the ICE servers cache %s: %s", path, e)
+
+
+_disk_cache_lock = threading.Lock()
+
+
+def _read_disk_cache(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        LOGGER.warning("Failed to read the ICE servers cache %s: %s", path, e)
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _write_disk_cache(path: str, data: Dict[str, Any]) -> None:
+    content = json.dumps(data)
+    # Write to a temporary file and rename it so that readers, including
+    # other server processes, never see a partial file. `mkstemp()` creates
+    # it readable by the owner only, as it holds credentials.
+    dirname = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=dirname, prefix=".ice-servers-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
 HF_ICE_SERVER_TTL = 3600  # 1 hour. Not sure if this is the best value.
 
+HF_ICE_SERVER_CREDENTIALS_URL = "https://fastrtc-turn-server-login.hf.space/credentials"
+
+_hf_ice_servers_cache = _RefreshingCache("hf", HF_ICE_SERVER_TTL)
+
 
-@cache_data(ttl=HF_ICE_SERVER_TTL)
 def get_hf_ice_servers(token: str) -> List[RTCIceServer]:
     if not token:
         raise ValueError("Hugging Face API token is not set")
 
+    return _hf_ice_servers_cache.get((token,), lambda: _fetch_hf_ice_servers(token))
+
+
+def _fetch_hf_ice_servers(token: str) -> List[RTCIceServer]:
     req = urllib.request.Request(
-        "https://fastrtc-turn-server-login.hf.space/credentials",
+        HF_ICE_SERVER_CREDENTIALS_URL,
         headers={"X-HF-Access-Token": token},
     )
     try:
@@ -65,9 +340,17 @@ def get_hf_ice_servers(token: str) -> List[RTCIceServer]:
 
 TWILIO_CRED_TTL = 3600  # 1 hour. Twilio's default is 1 day. Shorter TTL should be ok for this library's use case.
 
+_twilio_ice_servers_cache = _RefreshingCache("twilio", TWILIO_CRED_TTL)
+
 
-@cache_data(ttl=TWILIO_CRED_TTL)
 def get_twilio_ice_servers(twilio_sid: str, twilio_token: str) -> List[RTCIceServer]:
+    return _twilio_ice_servers_cache.get(
+        (twilio_sid, twilio_token),
+        lambda: _fetch_twilio_ice_servers(twilio_sid, twilio_token),
+    )
+
+
+def _fetch_twilio_ice_servers(twilio_sid: str, twilio_token: str) -> List[RTCIceServer]:
     try:
         from twilio.rest import Client
     except ImportError:
@@ -82,7 +365,6 @@ def get_twilio_ice_servers(twilio_sid: str, twilio_token: str) -> List[RTCIceSer
     return token.ice_servers
 
 
-@cache_data(ttl=min(HF_ICE_SERVER_TTL, TWILIO_CRED_TTL))
 def get_available_ice_servers() -> List[RTCIceServer]:
     twilio_sid = os.getenv("TWILIO_ACCOUNT_SID")
     twilio_token = os.getenv("TWILIO_AUTH_TOKEN")
@@ -0,0 +1,331 @@
+"""A decoder thread pool shared by many ``RTCRtpReceiver``s.
+
+aiortc starts one decoder thread per ``RTCRtpReceiver``, so a server with
+hundreds of sessions runs hundreds of decoder threads. A :class:`DecoderPool`
+decodes the frames of all the receivers it serves on a fixed number of
+threads instead: each receiver gets a :class:`DecoderLane` holding its own
+decoder and backlog, and the pool's threads take turns over the lanes with
+pending frames, one frame at a time, so a busy receiver cannot starve the
+others.
+"""
+
+import asyncio
+import collections
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Deque, NamedTuple, Optional, Set
+
+import aiortc.rtcrtpreceiver
+from aiortc.codecs import get_decoder
+
+from .metrics import FRAMES_DROPPED
+from .tracing import get_frame_tracer
+
+__all__ = [
+    "DecoderLane",
+    "DecoderPool",
+    "DecoderPoolStats",
+]
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+_END_OF_STREAM = object()
+
+
+class DecoderPoolStats(NamedTuple):
+    threads: int
+    lanes: int
+    pending_frames: int
+    frames_decoded: int
+    frames_dropped: int
+    decode_time_total: float
+    decode_time_max: float
+
+
+class DecoderLane:
+    """The pool-side counterpart of one receiver's decoder thread.
+
+    Frames are submitted from the event loop with :meth:`submit` and decoded
+    in order on one of the pool's threads. The decoded frames go to the
+    receiver's track queue, as aiortc's own decoder thread does.
+    """
+
+    def __init__(self, pool: "DecoderPool", name: str) -> None:
+        self.name = name
+        self._pool = pool
+        self._pending: Deque[Any] = collections.deque()
+        self._scheduled = False
+        self._closed = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._output_q: Optional[asyncio.Queue] = None
+        self._codec_name: Optional[str] = None
+        self._decoder: Any = None
+
+        self.frames_decoded = 0
+        self.frames_dropped = 0
+        self.decode_time_total = 0.0
+        self.decode_time_max = 0.0
+
+    def attach(self, loop: asyncio.AbstractEventLoop, output_q: asyncio.Queue) -> None:
+        """Start delivering decoded frames to ``output_q`` on ``loop``."""
+        with self._pool._cond:
+            self._loop = loop
+            self._output_q = output_q
+            self._pool._schedule(self)
+
+    def submit(self, item: Any) -> bool:
+        """Queue a ``(codec, encoded_frame)`` pair for decoding.
+
+        Returns ``False`` if the lane's backlog overflowed, in which case the
+        backlog (including ``item``) was discarded and decoding has to resume
+        from a keyframe.
+        """
+        with self._pool._cond:
+            if self._closed:
+                return True
+            if len(self._pending) >= self._pool.max_pending_frames:
+                dropped = len(self._pending) + 1
+                self._pending.clear()
+                self._pool._unschedule(self)
+                self.frames_dropped += dropped
+                self._pool._frames_dropped += dropped
+                FRAMES_DROPPED.inc(dropped, stage="decoder_pool")
+                logger.debug("Decoder lane %s overflowed", self.name)
+                return False
+            self._pending.append(item)
+            self._pool._schedule(self)
+            return True
+
+    def close(self) -> None:
+        """End the receiver's track once the frames already queued are decoded."""
+        with self._pool._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._pending.append(_END_OF_STREAM)
+            self._pool._schedule(self)
+
+    def _process(self, item: Any) -> None:
+        loop = self._loop
+        output_q = self._output_q
+        assert loop is not None and output_q is not None
+
+        if item is _END_OF_STREAM:
+            self._decoder = None
+            self._pool._release(self)
+            self._deliver(loop, output_q, None)
+            return
+
+        codec, encoded_frame = item
+        if codec.name != self._codec_name:
+            self._decoder = get_decoder(codec)
+            self._codec_name = codec.name
+
+        start = time.perf_counter()
+        try:
+            frames = self._decoder.decode(encoded_frame)
+        except Exception:
+            logger.exception("Failed to decode a frame on lane %s", self.name)
+            return
+        elapsed = time.perf_counter() - start
+
+        self.frames_decoded += 1
+        self.decode_time_total += elapsed
+        self.decode_time_max = max(self.decode_time_max, elapsed)
+        self._pool._record_decode(elapsed)
+
+        tracer = get_frame_tracer()
+        if tracer is not None:
+            decoded_at = time.monotonic()
+            for frame in frames:
+                tracer.record(
+                    frame, "decode", decoded_at - elapsed, decoded_at, lane=self.name
+                )
+
+        for frame in frames:
+            self._deliver(loop, output_q, frame)
+
+    @staticmethod
+    def _deliver(
+        loop: asyncio.AbstractEventLoop, output_q: asyncio.Queue, frame: Any
+    ) -> None:
+        try:
+            asyncio.run_coroutine_threadsafe(output_q.put(frame), loop)
+        except RuntimeError:
+            # The loop is already closed.
+            pass
+
+
+class DecoderPool:
+    """Decodes the media of many receivers on at most ``max_workers`` threads.
+
+    Pass one to ``webrtc_streamer(decoder_pool=...)`` for every session that
+    should share it, typically created once per process with
+    ``st.cache_resource``. The threads are daemon threads started on first
+    use. ``max_pending_frames`` bounds each receiver's backlog; when decoding
+    cannot keep up, the backlog is discarded and video resumes from the next
+    keyframe instead of falling further behind.
+    """
+
+    def __init__(self, max_workers: int = 4, *, max_pending_frames: int = 30) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+        self.max_pending_frames = max_pending_frames
+
+        self._cond = threading.Condition()
+        self._ready: Deque[DecoderLane] = collections.deque()
+        self._lanes: Set[DecoderLane] = set()
+        self._threads: Set[threading.Thread] = set()
+        self._lane_ids = itertools.count()
+        self._shutdown = False
+
+        self._frames_decoded = 0
+        self._frames_dropped = 0
+        self._decode_time_total = 0.0
+        self._decode_time_max = 0.0
+
+    def open_lane(self, kind: str) -> DecoderLane:
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("The decoder pool has been shut down")
+            lane = DecoderLane(self, f"{kind}-{next(self._lane_ids)}")
+            self._lanes.add(lane)
+            return lane
+
+    def stats(self) -> DecoderPoolStats:
+        with self._cond:
+            return DecoderPoolStats(
+                threads=len(self._threads),
+                lanes=len(self._lanes),
+                pending_frames=sum(len(lane._pending) for lane in self._lanes),
+                frames_decoded=self._frames_decoded,
+                frames_dropped=self._frames_dropped,
+                decode_time_total=self._decode_time_total,
+                decode_time_max=self._decode_time_max,
+            )
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        """Stop the threads after the lanes already scheduled are drained."""
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+            threads = list(self._threads)
+        for thread in threads:
+            thread.join(timeout=timeout)
+
+    def _schedule(self, lane: DecoderLane) -> None:
+        # Called with `self._cond` held. A lane is in `_ready` (or being
+        # processed) at most once, so its frames are decoded in order by one
+        # thread at a time.
+        if lane._scheduled or not lane._pending or lane._loop is None:
+            return
+        lane._scheduled = True
+        self._ready.append(lane)
+        if len(self._threads) < min(self.max_workers, len(self._lanes)):
+            self._start_thread()
+        self._cond.notify()
+
+    def _unschedule(self, lane: DecoderLane) -> None:
+        # Called with `self._cond` held, after the lane's backlog is cleared.
+        # A lane being processed is not in `_ready`; the thread processing it
+        # unschedules it once done.
+        try:
+            self._ready.remove(lane)
+        except ValueError:
+            return
+        lane._scheduled = False
+
+    def _start_thread(self) -> None:
+        thread = threading.Thread(
+            target=self._run_worker,
+            name=f"streamlit-webrtc-decoder-{len(self._threads)}",
+            daemon=True,
+        )
+        self._threads.add(thread)
+        thread.start()
+
+    def _run_worker(self) -> None:
+        try:
+            self._work()
+        finally:
+            with self._cond:
+                self._threads.discard(threading.current_thread())
+                if self._ready and not self._shutdown:
+                    # Exited unexpectedly; let another thread take over.
+                    self._start_thread()
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                while not self._ready and not self._shutdown:
+                    self._cond.wait()
+                if not self._ready:
+                    return
+                lane = self._ready.popleft()
+                if not lane._pending:
+                    lane._scheduled = False
+                    continue
+                item = lane._pending.popleft()
+
+            try:
+                lane._process(item)
+            except Exception:
+                logger.exception("Failed to process a frame on lane %s", lane.name)
+            finally:
+                with self._cond:
+                    if lane._pending:
+                        # Back of the line, so that each lane with pending
+                        # frames gets one decode per round.
+                        self._ready.append(lane)
+                        self._cond.notify()
+                    else:
+                        lane._scheduled = False
+
+    def _record_decode(self, elapsed: float) -> None:
+        with self._cond:
+            self._frames_decoded += 1
+            self._decode_time_total += elapsed
+            self._decode_time_max = max(self._decode_time_max, elapsed)
+
+    def _release(self, lane: DecoderLane) -> None:
+        with self._cond:
+            self._lanes.discard(lane)
+
+
+def install_decoder_worker_dispatcher() -> bool:
+    """Make aiortc's per-receiver decoder threads defer to a :class:`DecoderLane`.
+
+    ``RTCRtpReceiver.receive()`` starts a thread running the module-level
+    ``decoder_worker(loop, input_q, output_q)`` (aiortc 1.14:
+    ``src/aiortc/rtcrtpreceiver.py``). It is replaced by a dispatcher that,
+    when ``input_q`` carries a ``decoder_lane``, attaches the lane to
+    ``output_q`` and returns at once, so that thread exits immediately;
+    other receivers run the original worker. Returns ``False`` if aiortc
+    no longer has that function, in which case receivers keep their own
+    decoder threads.
+    """
+    module: Any = aiortc.rtcrtpreceiver
+    original = getattr(module, "decoder_worker", None)
+    if not callable(original):
+        logger.debug("aiortc.rtcrtpreceiver.decoder_worker is not available.")
+        return False
+    if getattr(original, "_streamlit_webrtc_dispatcher", False):
+        return True
+
+    def decoder_worker(
+        loop: asyncio.AbstractEventLoop, input_q: Any, output_q: asyncio.Queue
+    ) -> None:
+        lane = getattr(input_q, "decoder_lane", None)
+        if isinstance(lane, DecoderLane):
+            lane.attach(loop, output_q)
+            return
+        original(loop, input_q, output_q)
+
+    decoder_worker._streamlit_webrtc_dispatcher = True  # type: ignore[attr-defined]
+    module.decoder_worker = decoder_worker
+    return True
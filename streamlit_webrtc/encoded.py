@@ -0,0 +1,379 @@
+"""Access to the encoded media a peer sends, before aiortc decodes it.
+
+aiortc's ``RTCRtpReceiver`` re-assembles RTP packets into encoded frames and
+hands them to its decoder thread through a private ``queue.Queue``. An
+:class:`EncodedFrameTap` takes the place of that queue so the encoded frames
+can be fanned out to :class:`EncodedStreamTrack` subscribers (e.g. a
+:class:`~streamlit_webrtc.recorder.PassthroughRecorder`), and so they only
+reach the decoder while someone is actually pulling the decoded track.
+"""
+
+import asyncio
+import fractions
+import logging
+import queue
+import time
+from typing import Any, List, Optional, Union
+
+import av
+from aiortc import MediaStreamTrack, RTCPeerConnection
+from aiortc.mediastreams import MediaStreamError
+from aiortc.rtcrtpparameters import RTCRtpCodecParameters
+
+from .decoder_pool import DecoderLane, DecoderPool, install_decoder_worker_dispatcher
+
+__all__ = [
+    "EncodedForwardTrack",
+    "EncodedFrameTap",
+    "EncodedStreamTrack",
+    "get_encoded_frame_tap",
+    "install_encoded_frame_tap",
+]
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+# How long the decoded track counts as "in demand" after its last `recv()`
+# returned. Consumers such as `MediaRelay` call `recv()` back to back, so this
+# only needs to cover the gap between two calls.
+DECODE_DEMAND_TIMEOUT = 1.0
+
+# Minimum interval between two keyframe requests sent while waiting for a
+# keyframe to resume decoding from.
+KEYFRAME_REQUEST_INTERVAL = 0.5
+
+
+def is_keyframe(codec: RTCRtpCodecParameters, data: bytes) -> bool:
+    """Whether ``data`` is an encoded frame a decoder can start from."""
+    name = codec.name.lower()
+    if name == "vp8":
+        # RFC 6386 9.1: the inverse key frame flag is the first bit.
+        return len(data) > 0 and (data[0] & 0x01) == 0
+    if name == "h264":
+        # aiortc depayloads H.264 into an Annex B byte stream.
+        for nal_start in _iter_annexb_nal_starts(data):
+            if data[nal_start] & 0x1F in (5, 7):  # IDR slice or SPS
+                return True
+        return False
+    # Audio codecs have no inter-frame dependency.
+    return True
+
+
+def _iter_annexb_nal_starts(data: bytes):
+    i = data.find(b"\x00\x00\x01")
+    while i != -1 and i + 3 < len(data):
+        yield i + 3
+        i = data.find(b"\x00\x00\x01", i + 3)
+
+
+class EncodedStreamTrack(MediaStreamTrack):
+    """A track yielding the peer's encoded frames as ``av.Packet``s.
+
+    ``pts``/``dts`` carry the RTP timestamp (rebased to start at 0) in the
+    codec's clock rate, and ``codec`` is the codec of the last yielded packet.
+    aiortc's ``RTCRtpSender`` sends packets as-is, without re-encoding, when
+    the negotiated codec matches.
+    """
+
+    codec: Optional[RTCRtpCodecParameters]
+
+    def __init__(self, kind: str) -> None:
+        super().__init__()
+        self.kind = kind
+        self.codec = None
+        self._queue: "asyncio.Queue[Optional[av.Packet]]" = asyncio.Queue()
+
+    def _put(self, codec: RTCRtpCodecParameters, data: bytes, timestamp: int) -> None:
+        if self.readyState != "live":
+            return
+        packet = av.Packet(data)
+        packet.pts = timestamp
+        packet.dts = timestamp
+        packet.time_base = fractions.Fraction(1, codec.clockRate)
+        packet.is_keyframe = is_keyframe(codec, data)
+        self.codec = codec
+        self._queue.put_nowait(packet)
+
+    async def recv(self) -> av.Packet:
+        if self.readyState != "live":
+            raise MediaStreamError
+
+        packet = await self._queue.get()
+        if packet is None:
+            self.stop()
+            raise MediaStreamError
+        return packet
+
+
+class EncodedFrameTap(queue.Queue):
+    """Stands in for an ``RTCRtpReceiver``'s decoder queue.
+
+    Every encoded frame the receiver puts is copied to the subscribed
+    :class:`EncodedStreamTrack`s, and forwarded to the decoder thread only
+    while the decoded track is being pulled. Video decoding always resumes
+    from a keyframe, which is requested from the peer if needed.
+
+    With a ``decoder_lane``, the frames are decoded on a shared
+    :class:`~streamlit_webrtc.decoder_pool.DecoderPool` instead of the
+    receiver's own decoder thread.
+    """
+
+    def __init__(
+        self,
+        receiver: Any,
+        loop: asyncio.AbstractEventLoop,
+        decoder_lane: Optional[DecoderLane] = None,
+    ) -> None:
+        super().__init__()
+        self.decoder_lane = decoder_lane
+        self.kind: str = receiver.track.kind
+        self._receiver = receiver
+        self._loop = loop
+        self._subscribers: List[EncodedStreamTrack] = []
+        self._pending_recv_count = 0
+        self._last_recv_at: Optional[float] = None
+        self._waiting_for_keyframe = True
+        self._last_keyframe_request_at: Optional[float] = None
+
+        self.frames_received = 0
+        self._frames_forwarded = 0
+
+    @property
+    def frames_decoded(self) -> int:
+        """The frames decoded, or with the receiver's own decoder thread, the
+        frames passed to it."""
+        if self.decoder_lane is not None:
+            # Counted by the lane as the decoder returns, so that the frames
+            # dropped from its backlog are not.
+            return self.decoder_lane.frames_decoded
+        return self._frames_forwarded
+
+    def subscribe(self) -> EncodedStreamTrack:
+        track = EncodedStreamTrack(self.kind)
+        self._subscribers.append(track)
+        return track
+
+    def track_demand(self, track: MediaStreamTrack) -> None:
+        """Count ``recv()`` calls on the decoded ``track`` as decoding demand."""
+        recv = track.recv
+
+        async def demand_tracking_recv():
+            self._pending_recv_count += 1
+            try:
+                return await recv()
+            finally:
+                self._pending_recv_count -= 1
+                self._last_recv_at = time.monotonic()
+
+        track.recv = demand_tracking_recv  # type: ignore[method-assign]
+
+    def decoding_demanded(self) -> bool:
+        if self._pending_recv_count > 0:
+            return True
+        return (
+            self._last_recv_at is not None
+            and time.monotonic() - self._last_recv_at < DECODE_DEMAND_TIMEOUT
+        )
+
+    def put(self, item, block: bool = True, timeout: Optional[float] = None) -> None:
+        if item is None:
+            # End of stream, sent by `RTCRtpReceiver.__stop_decoder` from any
+            # thread. Let the decoder thread exit as well.
+            self._end_subscribers()
+            if self.decoder_lane is not None:
+                self.decoder_lane.close()
+            super().put(item, block, timeout)
+            return
+
+        codec, encoded_frame = item
+        self.frames_received += 1
+        self._subscribers = [t for t in self._subscribers if t.readyState == "live"]
+        for track in self._subscribers:
+            track._put(codec, encoded_frame.data, encoded_frame.timestamp)
+
+        if not self.decoding_demanded():
+            self._waiting_for_keyframe = True
+            return
+        if self._waiting_for_keyframe:
+            if not is_keyframe(codec, encoded_frame.data):
+                self.request_keyframe()
+                return
+            self._waiting_for_keyframe = False
+
+        if self.decoder_lane is not None:
+            if not self.decoder_lane.submit(item):
+                # The shared decoders fell behind and dropped this lane's
+                # backlog; the next decodable frame is a keyframe.
+                self._waiting_for_keyframe = True
+                self.request_keyframe()
+                return
+        else:
+            super().put(item, block, timeout)
+            self._frames_forwarded += 1
+
+    def _end_subscribers(self) -> None:
+        for track in self._subscribers:
+            try:
+                self._loop.call_soon_threadsafe(track._queue.put_nowait, None)
+            except RuntimeError:
+                # The loop is already closed.
+                pass
+        self._subscribers = []
+
+    def request_keyframe(self) -> None:
+        """Ask the peer for a keyframe, at most once per
+        ``KEYFRAME_REQUEST_INTERVAL``."""
+        now = time.monotonic()
+        if (
+            self._last_keyframe_request_at is not None
+            and now - self._last_keyframe_request_at < KEYFRAME_REQUEST_INTERVAL
+        ):
+            return
+        self._last_keyframe_request_at = now
+
+        # `_send_rtcp_pli` is a private aiortc API (aiortc 1.14:
+        # `src/aiortc/rtcrtpreceiver.py`). Without it, decoding resumes at the
+        # next keyframe the peer sends on its own.
+        send_pli = getattr(self._receiver, "_send_rtcp_pli", None)
+        if not callable(send_pli):
+            return
+        for source in self._receiver.getSynchronizationSources():
+            asyncio.ensure_future(send_pli(source.source), loop=self._loop)
+
+
+class EncodedForwardTrack(MediaStreamTrack):
+    """Sends the peer's encoded frames back to the peer as-is.
+
+    Meant to be added to the same ``RTCPeerConnection`` the frames come from,
+    to echo the input without decoding and re-encoding it. Keyframe requests
+    the peer sends for the echo are passed on to the peer's sender through
+    the ``tap``. If a frame's codec differs from the codec negotiated for
+    sending, it switches to the decoded ``fallback`` track for good, which
+    aiortc then encodes as usual.
+    """
+
+    def __init__(
+        self,
+        pc: RTCPeerConnection,
+        tap: EncodedFrameTap,
+        fallback: MediaStreamTrack,
+    ) -> None:
+        super().__init__()
+        self.kind = tap.kind
+        self._pc = pc
+        self._tap = tap
+        self._encoded = tap.subscribe()
+        self._fallback = fallback
+        self._forwarding = True
+        self._sender_codec: Optional[RTCRtpCodecParameters] = None
+
+    async def recv(self) -> Union[av.Packet, av.frame.Frame]:
+        if self.readyState != "live":
+            raise MediaStreamError
+
+        if self._forwarding:
+            packet = await self._encoded.recv()
+            if self._sender_codec is None:
+                self._sender_codec = self._bind_sender()
+            codec = self._encoded.codec
+            sender_codec = self._sender_codec
+            if (
+                codec is not None
+                and sender_codec is not None
+                and codec.mimeType.lower() == sender_codec.mimeType.lower()
+                and codec.clockRate == sender_codec.clockRate
+            ):
+                return packet
+
+            logger.info(
+                "Cannot forward %s frames as-is (received %s, sending %s). "
+                "Re-encode them instead.",
+                self.kind,
+                codec and codec.mimeType,
+                sender_codec and sender_codec.mimeType,
+            )
+            self._forwarding = False
+            self._encoded.stop()
+
+        return await self._fallback.recv()
+
+    def stop(self) -> None:
+        super().stop()
+        self._encoded.stop()
+        self._fallback.stop()
+
+    def _bind_sender(self) -> Optional[RTCRtpCodecParameters]:
+        for transceiver in self._pc.getTransceivers():
+            sender = transceiver.sender
+            if sender.track is not self:
+                continue
+
+            # `_send_keyframe` is what aiortc calls when the peer asks the
+            # sender for a keyframe (PLI/FIR), and `_codecs` holds the
+            # negotiated codecs, the first of which the sender uses; both
+            # are private (aiortc 1.14: `src/aiortc/rtcrtpsender.py`,
+            # `src/aiortc/rtcrtptransceiver.py`).
+            send_keyframe = getattr(sender, "_send_keyframe", None)
+            if callable(send_keyframe):
+                tap = self._tap
+
+                def forward_keyframe_request() -> None:
+                    send_keyframe()
+                    tap.request_keyframe()
+
+                sender._send_keyframe = forward_keyframe_request  # type: ignore[method-assign]
+
+            codecs = getattr(transceiver, "_codecs", None)
+            if codecs:
+                return codecs[0]
+        return None
+
+
+def get_encoded_frame_tap(receiver: Any) -> Optional[EncodedFrameTap]:
+    """The :class:`EncodedFrameTap` installed on ``receiver``, if any."""
+    decoder_queue = getattr(receiver, "_RTCRtpReceiver__decoder_queue", None)
+    return decoder_queue if isinstance(decoder_queue, EncodedFrameTap) else None
+
+
+def install_encoded_frame_tap(
+    pc: RTCPeerConnection,
+    track: MediaStreamTrack,
+    loop: asyncio.AbstractEventLoop,
+    decoder_pool: Optional[DecoderPool] = None,
+) -> Optional[EncodedFrameTap]:
+    """Install an :class:`EncodedFrameTap` on the receiver of the remote
+    ``track``.
+
+    Must be called before the receiver starts, i.e. between
+    ``setRemoteDescription`` and ``setLocalDescription``. It replaces the
+    private ``RTCRtpReceiver.__decoder_queue`` (aiortc 1.14:
+    ``src/aiortc/rtcrtpreceiver.py``); if that attribute disappears in a
+    future version, this returns ``None`` and the receiver decodes as usual.
+
+    With a ``decoder_pool``, the receiver's frames are decoded on the pool
+    rather than on a decoder thread of its own.
+    """
+    for transceiver in pc.getTransceivers():
+        receiver = transceiver.receiver
+        if receiver.track is not track:
+            continue
+
+        decoder_queue = getattr(receiver, "_RTCRtpReceiver__decoder_queue", None)
+        if isinstance(decoder_queue, EncodedFrameTap):
+            return decoder_queue
+        if not isinstance(decoder_queue, queue.Queue) or (
+            getattr(receiver, "_RTCRtpReceiver__decoder_thread", None) is not None
+        ):
+            logger.debug("RTCRtpReceiver.__decoder_queue is not available. Skip it.")
+            return None
+
+        decoder_lane = None
+        if decoder_pool is not None and install_decoder_worker_dispatcher():
+            decoder_lane = decoder_pool.open_lane(track.kind)
+        tap = EncodedFrameTap(receiver, loop, decoder_lane)
+        setattr(receiver, "_RTCRtpReceiver__decoder_queue", tap)
+        tap.track_demand(track)
+        return tap
+
+    return None
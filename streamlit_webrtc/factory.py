@@ -4,6 +4,7 @@ import streamlit as st
 
 from ._compat import get_script_run_ctx
 from .eventloop import get_global_event_loop, loop_context
+from .jitter_buffer import JitterBufferOptions
 from .mix import MediaStreamMixTrack, MixerCallback
 from .models import (
     AudioProcessorFactory,
@@ -17,6 +18,7 @@ from .models import (
     VideoProcessorFactory,
     VideoProcessorT,
 )
+from .normalize import InputFormat
 from .pcm_source import PcmAudioSource
 from .process import (
     AsyncAudioProcessTrack,
@@ -26,7 +28,7 @@ from .process import (
     MediaProcessTrack,
     VideoProcessTrack,
 )
-from .relay import get_global_relay
+from .relay import DropPolicy, get_global_relay
 from .shutdown import SessionShutdownObserver
 from .sink import (
     AudioSinkCallback,
@@ -40,6 +42,7 @@ from .source import (
     VideoSourceCallback,
     VideoSourceTrack,
 )
+from .sync import FrameSyncOptions
 
 _PROCESSOR_TRACK_CACHE_KEY_PREFIX = "__PROCESSOR_TRACK_CACHE__"
 LifecycleScope = Literal["webrtc-session", "streamlit-session"]
@@ -90,8 +93,8 @@ def _install_cached_with_shutdown_observer(
     shutdown_callback: Callable[[], None],
 ) -> None:
     # A prior observer for this exact cache slot is tied to a now-stale cached
-    # object. Stop it before replacing the object so its polling thread is not
-    # leaked for the rest of the Streamlit session.
+    # object. Stop it before replacing the object so it does not stay
+    # registered for the rest of the Streamlit session.
     old_observer = _session_state_get(session_state, observer_cache_key)
     if isinstance(old_observer, SessionShutdownObserver):
         old_observer.stop()
@@ -262,6 +265,12 @@ def create_mix_track(
     mixer_callback: MixerCallback[FrameT],
     key: str,
     mixer_output_interval: float = 1 / 30,
+    jitter_buffer: Optional[JitterBufferOptions] = None,
+    output_queue_size: int = 2,
+    output_drop_policy: DropPolicy = "drop_oldest",
+    async_mixing: bool = False,
+    frame_sync: Optional[FrameSyncOptions] = None,
+    input_format: Optional[InputFormat] = None,
 ) -> MediaStreamMixTrack[FrameT]:
     cache_key = _MIXER_TRACK_CACHE_KEY_PREFIX + key
     if cache_key in st.session_state:
@@ -272,6 +281,12 @@ def create_mix_track(
             kind=kind,
             mixer_callback=mixer_callback,
             mixer_output_interval=mixer_output_interval,
+            jitter_buffer=jitter_buffer,
+            output_queue_size=output_queue_size,
+            output_drop_policy=output_drop_policy,
+            async_mixing=async_mixing,
+            frame_sync=frame_sync,
+            input_format=input_format,
         )
         st.session_state[cache_key] = mixer_track
     return mixer_track
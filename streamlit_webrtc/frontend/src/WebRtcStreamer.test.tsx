@@ -151,6 +151,7 @@ function renderStreamer({
       mediaStreamConstraints={{ audio: true, video: true }}
       sendbackVideo={true}
       sendbackAudio={true}
+      reconnect={false}
       videoHtmlAttrs={{}}
       audioHtmlAttrs={{}}
       mediaToggleControls={mediaToggleControls}
@@ -58,6 +58,7 @@ interface WebRtcStreamerInnerProps {
   mediaStreamConstraints: MediaStreamConstraints | undefined;
   sendbackVideo: boolean;
   sendbackAudio: boolean;
+  reconnect: boolean;
   videoHtmlAttrs: Record<string, string>;
   audioHtmlAttrs: Record<string, string>;
   mediaToggleControls: boolean;
@@ -377,6 +378,7 @@ function WebRtcStreamer() {
     renderData.args.media_stream_constraints;
   const sendbackVideo: boolean = renderData.args.sendback_video ?? true;
   const sendbackAudio: boolean = renderData.args.sendback_audio ?? true;
+  const reconnect: boolean = renderData.args.reconnect ?? false;
   const videoHtmlAttrs = renderData.args.video_html_attrs;
   const audioHtmlAttrs = renderData.args.audio_html_attrs;
   const mediaToggleControls: boolean =
@@ -397,6 +399,7 @@ function WebRtcStreamer() {
       mediaStreamConstraints={mediaStreamConstraints}
       sendbackVideo={sendbackVideo}
       sendbackAudio={sendbackAudio}
+      reconnect={reconnect}
       videoHtmlAttrs={videoHtmlAttrs}
       audioHtmlAttrs={audioHtmlAttrs}
       mediaToggleControls={mediaToggleControls}
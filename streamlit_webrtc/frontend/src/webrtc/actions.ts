@@ -16,6 +16,10 @@ interface SetOfferAction extends ActionBase {
   type: "SET_OFFER";
   offer: RTCSessionDescription;
 }
+interface ReconnectAction extends ActionBase {
+  type: "RECONNECT";
+  offer: RTCSessionDescription;
+}
 interface AddIceCandidateAction extends ActionBase {
   type: "ADD_ICE_CANDIDATE";
   id: string;
@@ -47,6 +51,7 @@ export type Action =
   | OutputMediaStreamSetAction
   | InputMediaStreamSetAction
   | SetOfferAction
+  | ReconnectAction
   | AddIceCandidateAction
   | StoppingAction
   | StoppedAction
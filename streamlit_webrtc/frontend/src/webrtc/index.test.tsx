@@ -25,10 +25,21 @@ function makeStream(name: string): MediaStream {
 }
 
 class FakePeerConnection {
+  static instances: FakePeerConnection[] = [];
   localDescription = { type: "offer", sdp: "sdp", toJSON: () => ({}) };
   connectionState = "new";
   private senders: Array<{ track: unknown }> = [];
-  addEventListener() {}
+  private listeners: Record<string, Array<() => void>> = {};
+  constructor() {
+    FakePeerConnection.instances.push(this);
+  }
+  addEventListener(type: string, listener: () => void) {
+    (this.listeners[type] ??= []).push(listener);
+  }
+  setConnectionState(state: string) {
+    this.connectionState = state;
+    this.listeners["connectionstatechange"]?.forEach((listener) => listener());
+  }
   addTrack(track: unknown) {
     this.senders.push({ track });
   }
@@ -48,7 +59,7 @@ class FakePeerConnection {
   close() {}
 }
 
-function renderWebRtc() {
+function renderWebRtc(reconnect = false) {
   return renderHook(() =>
     useWebRtc(
       {
@@ -59,6 +70,7 @@ function renderWebRtc() {
         mediaStreamConstraints: { video: true, audio: false },
         sendbackVideo: false,
         sendbackAudio: false,
+        reconnect,
       },
       undefined,
       undefined,
@@ -70,6 +82,7 @@ function renderWebRtc() {
 }
 
 afterEach(() => {
+  FakePeerConnection.instances = [];
   cleanup();
   vi.unstubAllGlobals();
   vi.useRealTimers();
@@ -135,4 +148,33 @@ describe("useWebRtc", () => {
       expect(result.current.state.inputMediaStream).toBe(second);
     });
   });
+
+  describe("with reconnection enabled", () => {
+    const getUserMedia = vi.fn<() => Promise<MediaStream>>();
+
+    beforeEach(() => {
+      vi.stubGlobal("navigator", { mediaDevices: { getUserMedia } });
+      vi.stubGlobal("RTCPeerConnection", FakePeerConnection);
+    });
+
+    it("waits out a disconnection and reconnects once failed or closed", async () => {
+      getUserMedia.mockResolvedValue(makeStream("input"));
+
+      const { result } = renderWebRtc(true);
+      await act(async () => result.current.start());
+      const [pc] = FakePeerConnection.instances;
+      act(() => pc.setConnectionState("connected"));
+      expect(result.current.state.webRtcState).toBe("PLAYING");
+
+      // Often recovers by itself, on the server's side too.
+      act(() => pc.setConnectionState("disconnected"));
+      act(() => pc.setConnectionState("connected"));
+      expect(FakePeerConnection.instances).toHaveLength(1);
+      expect(result.current.state.webRtcState).toBe("PLAYING");
+
+      await act(async () => pc.setConnectionState("closed"));
+      expect(FakePeerConnection.instances).toHaveLength(2);
+      expect(result.current.state.webRtcState).toBe("SIGNALLING");
+    });
+  });
 });
@@ -24,6 +24,7 @@ export const useWebRtc = (
     mediaStreamConstraints: MediaStreamConstraints | undefined;
     sendbackVideo: boolean;
     sendbackAudio: boolean;
+    reconnect: boolean;
   },
   videoDeviceIdRequest: MediaDeviceInfo["deviceId"] | undefined,
   audioDeviceIdRequest: MediaDeviceInfo["deviceId"] | undefined,
@@ -140,6 +141,56 @@ export const useWebRtc = (
     [props.mediaStreamConstraints, state.inputMediaStream],
   );
 
+  const reconnectRef = useRef<() => void>(() => {});
+
+  const listenToPeerConnection = useCallback(
+    (pc: RTCPeerConnection) => {
+      // Connect received audio / video to DOM elements
+      if (props.mode === "SENDRECV" || props.mode === "RECVONLY") {
+        pc.addEventListener("track", (evt) => {
+          const outputMediaStream = evt.streams[0]; // TODO: Handle multiple streams
+          dispatch({ type: "SET_OUTPUT_MEDIA_STREAM", outputMediaStream });
+        });
+      }
+
+      pc.addEventListener("connectionstatechange", () => {
+        console.debug("connectionstatechange", pc.connectionState);
+        if (pc !== pcRef.current) {
+          // Replaced by a reconnection.
+          return;
+        }
+        if (pc.connectionState === "connected") {
+          dispatch({ type: "START_PLAYING" });
+        } else if (
+          props.reconnect &&
+          (pc.connectionState === "failed" || pc.connectionState === "closed")
+        ) {
+          // The same states the server closes its side of the connection on.
+          reconnectRef.current();
+        } else if (props.reconnect && pc.connectionState === "disconnected") {
+          // Often recovers by itself; otherwise it turns "failed". The server
+          // keeps its side of the connection open meanwhile.
+        } else if (
+          pc.connectionState === "disconnected" ||
+          pc.connectionState === "closed" ||
+          pc.connectionState === "failed"
+        ) {
+          stopRef.current();
+        }
+      });
+
+      // Trickle ICE
+      pc.addEventListener("icecandidate", (evt) => {
+        if (evt.candidate) {
+          console.debug("icecandidate", evt.candidate);
+          const id = uniqueIdGenerator.get(); // NOTE: Generate the ID here to ensure it is uniquely bound to the candidate. It can be violated if it's generated in the reducer.
+          dispatch({ type: "ADD_ICE_CANDIDATE", id, candidate: evt.candidate });
+        }
+      });
+    },
+    [props.mode, props.reconnect, uniqueIdGenerator],
+  );
+
   const start = useCallback((): Promise<void> => {
     if (state.webRtcState !== "STOPPED") {
       return Promise.reject(new Error("WebRTC is already started"));
@@ -160,14 +211,7 @@ export const useWebRtc = (
       const config: RTCConfiguration = props.rtcConfiguration || {};
       console.debug("RTCConfiguration:", config);
       const pc = new RTCPeerConnection(config);
-
-      // Connect received audio / video to DOM elements
-      if (mode === "SENDRECV" || mode === "RECVONLY") {
-        pc.addEventListener("track", (evt) => {
-          const outputMediaStream = evt.streams[0]; // TODO: Handle multiple streams
-          dispatch({ type: "SET_OUTPUT_MEDIA_STREAM", outputMediaStream });
-        });
-      }
+      listenToPeerConnection(pc);
 
       // Set up transceivers
       if (mode === "SENDRECV" || mode === "SENDONLY") {
@@ -235,30 +279,8 @@ export const useWebRtc = (
       }
       console.debug("transceivers", pc.getTransceivers());
 
-      pc.addEventListener("connectionstatechange", () => {
-        console.debug("connectionstatechange", pc.connectionState);
-        if (pc.connectionState === "connected") {
-          dispatch({ type: "START_PLAYING" });
-        } else if (
-          pc.connectionState === "disconnected" ||
-          pc.connectionState === "closed" ||
-          pc.connectionState === "failed"
-        ) {
-          stopRef.current();
-        }
-      });
-
       pcRef.current = pc;
 
-      // Trickle ICE
-      pc.addEventListener("icecandidate", (evt) => {
-        if (evt.candidate) {
-          console.debug("icecandidate", evt.candidate);
-          const id = uniqueIdGenerator.get(); // NOTE: Generate the ID here to ensure it is uniquely bound to the candidate. It can be violated if it's generated in the reducer.
-          dispatch({ type: "ADD_ICE_CANDIDATE", id, candidate: evt.candidate });
-        }
-      });
-
       pc.createOffer()
         .then((offer) =>
           pc.setLocalDescription(offer).then(() => {
@@ -291,9 +313,55 @@ export const useWebRtc = (
     state.webRtcState,
     onDevicesOpened,
     onDevicesUnavailable,
-    uniqueIdGenerator,
+    listenToPeerConnection,
   ]);
 
+  // The server cannot restart ICE on its peer connection, so a lost
+  // connection is replaced with a new one carrying the same media. The
+  // server keeps its processors running for the new connection.
+  const reconnect = useCallback(() => {
+    const oldPc = pcRef.current;
+    if (oldPc == null) {
+      return;
+    }
+    const inputMediaStream = inputMediaStreamRef.current;
+
+    const pc = new RTCPeerConnection(props.rtcConfiguration || {});
+    listenToPeerConnection(pc);
+    oldPc.getTransceivers().forEach((transceiver) => {
+      const track = transceiver.sender.track;
+      pc.addTransceiver(track ?? transceiver.receiver.track.kind, {
+        direction:
+          transceiver.direction === "stopped"
+            ? "inactive"
+            : transceiver.direction,
+        streams: track && inputMediaStream ? [inputMediaStream] : [],
+      });
+    });
+
+    pcRef.current = pc;
+    // The local tracks move to the new connection, so only the connection
+    // is closed, unlike in `stop`.
+    oldPc.close();
+
+    pc.createOffer()
+      .then((offer) => pc.setLocalDescription(offer))
+      .then(() => {
+        const localDescription = pc.localDescription;
+        if (localDescription == null) {
+          throw new Error("Failed to create an offer SDP");
+        }
+        dispatch({ type: "RECONNECT", offer: localDescription });
+      })
+      .catch((error) => {
+        dispatch({ type: "SET_OFFER_ERROR", error });
+      });
+  }, [props.rtcConfiguration, listenToPeerConnection]);
+
+  reconnectRef.current = reconnect;
+
+  const answeredSdpAnswerJsonRef = useRef<string>();
+
   // processAnswer
   useEffect(() => {
     const pc = pcRef.current;
@@ -303,7 +371,14 @@ export const useWebRtc = (
 
     const sdpAnswerJson = props.sdpAnswerJson;
     if (pc.remoteDescription == null) {
-      if (sdpAnswerJson && state.webRtcState === "SIGNALLING") {
+      if (
+        sdpAnswerJson &&
+        state.webRtcState === "SIGNALLING" &&
+        // After a reconnection, the answer for the previous connection stays
+        // until the server sends the new one.
+        sdpAnswerJson !== answeredSdpAnswerJsonRef.current
+      ) {
+        answeredSdpAnswerJsonRef.current = sdpAnswerJson;
         const sdpAnswer = JSON.parse(sdpAnswerJson);
         console.debug("Receive answer SDP", sdpAnswer);
         pc.setRemoteDescription(sdpAnswer).catch((error) => {
@@ -35,4 +35,17 @@ describe("reducer", () => {
     expect(nextState.inputMediaStream).toBeNull();
     expect(nextState.error).toBe(error);
   });
+
+  it("keeps media streams on RECONNECT", () => {
+    const offer = {} as RTCSessionDescription;
+    const state = makeStateWithStreams();
+
+    const nextState = reducer(state, { type: "RECONNECT", offer });
+
+    expect(nextState.webRtcState).toBe("SIGNALLING");
+    expect(nextState.sdpOffer).toBe(offer);
+    expect(nextState.iceCandidates).toEqual({});
+    expect(nextState.outputMediaStream).toBe(state.outputMediaStream);
+    expect(nextState.inputMediaStream).toBe(state.inputMediaStream);
+  });
 });
@@ -44,6 +44,14 @@ export const reducer: React.Reducer<State, Action> = (state, action) => {
         ...state,
         sdpOffer: action.offer,
       };
+    case "RECONNECT":
+      // Signalling again on a new peer connection, with the same media.
+      return {
+        ...state,
+        webRtcState: "SIGNALLING",
+        sdpOffer: action.offer,
+        iceCandidates: {},
+      };
     case "ADD_ICE_CANDIDATE": {
       return {
         ...state,
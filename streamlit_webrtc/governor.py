@@ -0,0 +1,190 @@
+"""Server-wide admission control and graceful degradation.
+
+A :class:`ResourceGovernor` shared by the ``webrtc_streamer()`` calls of a
+server caps how many sessions run at once and watches a CPU and a per-frame
+latency budget. While over budget it raises a :class:`DegradationLevel` one
+step at a time, which the video process tracks apply to trade quality for
+load; once back well under budget it steps down again. New sessions are
+refused when the session limit is reached or when the load is still over
+budget at the highest level, so that running sessions keep working instead
+of all degrading at once.
+"""
+
+import enum
+import logging
+import os
+import threading
+import time
+from typing import NamedTuple, Optional
+
+__all__ = [
+    "DegradationLevel",
+    "GovernorStats",
+    "ResourceGovernor",
+]
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class DegradationLevel(enum.IntEnum):
+    """How much the video processing is thinned out. Each level includes the
+    ones below it."""
+
+    NONE = 0
+    # Run the video processor on every other frame and repeat its last output
+    # in between.
+    SKIP_FRAMES = 1
+    # Drop every other video frame, halving the frame rate to process and
+    # encode.
+    REDUCE_FPS = 2
+    # Halve the width and height of video frames before processing them.
+    REDUCE_RESOLUTION = 3
+
+
+class GovernorStats(NamedTuple):
+    sessions: int
+    max_sessions: Optional[int]
+    level: DegradationLevel
+    cpu_usage: Optional[float]
+    frame_latency: Optional[float]
+
+
+class ResourceGovernor:
+    """Caps concurrent sessions and degrades video processing under load.
+
+    ``max_sessions`` limits the number of running sessions. ``cpu_budget`` is
+    the share of all CPU cores (0 to 1) this process may use, and
+    ``frame_latency_budget`` the mean time in seconds a video processor may
+    take per frame. The load is evaluated at most once per
+    ``evaluation_interval`` seconds; the level goes up by one while over
+    either budget and down by one once both are under ``recovery_ratio``
+    times their budget.
+
+    Pass the same instance to every ``webrtc_streamer(governor=...)`` call,
+    e.g. by creating it with ``st.cache_resource``.
+    """
+
+    def __init__(
+        self,
+        max_sessions: Optional[int] = None,
+        *,
+        cpu_budget: Optional[float] = None,
+        frame_latency_budget: Optional[float] = None,
+        evaluation_interval: float = 2.0,
+        recovery_ratio: float = 0.7,
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.cpu_budget = cpu_budget
+        self.frame_latency_budget = frame_latency_budget
+        self.evaluation_interval = evaluation_interval
+        self.recovery_ratio = recovery_ratio
+
+        self._lock = threading.Lock()
+        self._sessions = 0
+        self._level = DegradationLevel.NONE
+        self._over_budget = False
+
+        self._last_evaluated_at = time.monotonic()
+        self._last_process_time = time.process_time()
+        self._cpu_usage: Optional[float] = None
+        self._latency_sum = 0.0
+        self._latency_count = 0
+        self._frame_latency: Optional[float] = None
+
+    @property
+    def level(self) -> DegradationLevel:
+        with self._lock:
+            self._evaluate_if_due()
+            return self._level
+
+    def try_admit(self) -> bool:
+        """Reserve a session slot, or return ``False`` if the server is busy.
+
+        A successful call must be paired with :meth:`release`.
+        """
+        with self._lock:
+            self._evaluate_if_due()
+            if self.max_sessions is not None and self._sessions >= self.max_sessions:
+                logger.info(
+                    "Refuse a new session: %d sessions are running", self._sessions
+                )
+                return False
+            if self._over_budget and self._level == max(DegradationLevel):
+                logger.info("Refuse a new session: over budget at the highest level")
+                return False
+            self._sessions += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._sessions = max(self._sessions - 1, 0)
+
+    def record_frame_latency(self, seconds: float) -> None:
+        """Report the time a video processor took for one frame."""
+        with self._lock:
+            self._latency_sum += seconds
+            self._latency_count += 1
+            self._evaluate_if_due()
+
+    def stats(self) -> GovernorStats:
+        with self._lock:
+            self._evaluate_if_due()
+            return GovernorStats(
+                sessions=self._sessions,
+                max_sessions=self.max_sessions,
+                level=self._level,
+                cpu_usage=self._cpu_usage,
+                frame_latency=self._frame_latency,
+            )
+
+    def _evaluate_if_due(self) -> None:
+        # Called with `self._lock` held. Evaluated lazily, on the calls the
+        # sessions make anyway, so that an idle server does no work.
+        now = time.monotonic()
+        elapsed = now - self._last_evaluated_at
+        if elapsed < self.evaluation_interval:
+            return
+
+        process_time = time.process_time()
+        if elapsed > 0:
+            self._cpu_usage = (process_time - self._last_process_time) / (
+                elapsed * (os.cpu_count() or 1)
+            )
+        self._last_evaluated_at = now
+        self._last_process_time = process_time
+
+        if self._latency_count > 0:
+            self._frame_latency = self._latency_sum / self._latency_count
+        else:
+            self._frame_latency = None
+        self._latency_sum = 0.0
+        self._latency_count = 0
+
+        loads = [
+            (self._cpu_usage, self.cpu_budget),
+            (self._frame_latency, self.frame_latency_budget),
+        ]
+        self._over_budget = any(
+            load is not None and budget is not None and load > budget
+            for load, budget in loads
+        )
+        recovered = all(
+            load is None or budget is None or load <= budget * self.recovery_ratio
+            for load, budget in loads
+        )
+
+        level = self._level
+        if self._over_budget and level < max(DegradationLevel):
+            level = DegradationLevel(level + 1)
+        elif recovered and level > DegradationLevel.NONE:
+            level = DegradationLevel(level - 1)
+        if level != self._level:
+            logger.info(
+                "Degradation level %s -> %s (cpu=%s, frame latency=%s)",
+                self._level.name,
+                level.name,
+                self._cpu_usage,
+                self._frame_latency,
+            )
+            self._level = level
@@ -0,0 +1,160 @@
+"""Server-side controls of ICE candidate gathering.
+
+aiortc gathers the local candidates of the answer in ``setLocalDescription``:
+a host candidate on every address of every interface, plus a server
+reflexive candidate from the STUN server and a relayed one from the TURN
+server, waiting up to 5 seconds for those servers. On a LAN or a single
+host, none of those servers are needed, and the answer is only sent once
+they have responded or timed out.
+"""
+
+import ipaddress
+import logging
+from typing import TYPE_CHECKING, Any, List, NamedTuple, Optional, Sequence
+
+import ifaddr
+
+if TYPE_CHECKING:
+    from aiortc import RTCPeerConnection
+
+__all__ = ["IceGatheringOptions"]
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class IceGatheringOptions(NamedTuple):
+    """How the server gathers its ICE candidates.
+
+    ``interfaces`` restricts the host candidates to the listed network
+    interfaces, by name (e.g. ``"eth0"``) or by address (e.g.
+    ``"192.168.0.10"``). Unlike the default, the loopback addresses are
+    included when listed, e.g. for a browser on the same host. ``use_ipv4``
+    and ``use_ipv6`` select the address families. ``use_stun`` and
+    ``use_turn`` set whether to query the configured STUN and TURN servers,
+    and ``timeout`` caps how many seconds to wait for them (5 by default).
+    """
+
+    interfaces: Optional[Sequence[str]] = None
+    use_ipv4: bool = True
+    use_ipv6: bool = True
+    use_stun: bool = True
+    use_turn: bool = True
+    timeout: Optional[float] = None
+
+    @property
+    def uses_ice_servers(self) -> bool:
+        return self.use_stun or self.use_turn
+
+
+def resolve_host_addresses(
+    interfaces: Sequence[str], use_ipv4: bool = True, use_ipv6: bool = True
+) -> List[str]:
+    """Return the addresses of ``interfaces``, given by name or address."""
+    families = set()
+    if use_ipv4:
+        families.add(4)
+    if use_ipv6:
+        families.add(6)
+
+    addresses: List[str] = []
+
+    def add(address: str) -> None:
+        if ipaddress.ip_address(address).version in families:
+            if address not in addresses:
+                addresses.append(address)
+
+    adapters = ifaddr.get_adapters()
+    for interface in interfaces:
+        try:
+            ipaddress.ip_address(interface)
+        except ValueError:
+            pass
+        else:
+            add(interface)
+            continue
+
+        matched = False
+        for adapter in adapters:
+            if interface not in (adapter.name, adapter.nice_name):
+                continue
+            matched = True
+            for ip in adapter.ips:
+                if isinstance(ip.ip, str):
+                    add(ip.ip)
+                elif ip.ip[2] == 0:
+                    # Scoped (link-local) IPv6 addresses are skipped, as
+                    # aioice does.
+                    add(ip.ip[0])
+        if not matched:
+            logger.warning("Network interface %s is not found", interface)
+    return addresses
+
+
+def apply_ice_gathering_options(
+    pc: "RTCPeerConnection", options: IceGatheringOptions
+) -> None:
+    """Apply ``options`` to the candidate gathering of ``pc``.
+
+    Call this after ``setRemoteDescription()``, which creates the ICE
+    transports, and before ``setLocalDescription()``, which gathers.
+    """
+    gatherers = []
+    for transceiver in pc.getTransceivers():
+        transport = transceiver.receiver.transport
+        if transport is not None:
+            gatherers.append(transport.transport.iceGatherer)
+    if pc.sctp is not None:
+        gatherers.append(pc.sctp.transport.transport.iceGatherer)
+
+    # With BUNDLE, the transceivers share one transport.
+    seen = set()
+    for gatherer in gatherers:
+        if id(gatherer) in seen:
+            continue
+        seen.add(id(gatherer))
+        # `_connection` is the aioice connection that gathers the candidates
+        # (aiortc 1.14: `src/aiortc/rtcicetransport.py`). If it disappears,
+        # the options are ignored.
+        connection = getattr(gatherer, "_connection", None)
+        if connection is None:
+            logger.warning(
+                "Cannot apply the ICE gathering options with this version of aiortc"
+            )
+            return
+        _apply_to_connection(connection, options)
+
+
+def _apply_to_connection(connection: Any, options: IceGatheringOptions) -> None:
+    if not options.use_stun:
+        connection.stun_server = None
+    if not options.use_turn:
+        connection.turn_server = None
+    # aioice reads them in `gather_candidates()` (aioice 0.10: `src/aioice/ice.py`).
+    connection._use_ipv4 = options.use_ipv4
+    connection._use_ipv6 = options.use_ipv6
+
+    if options.interfaces is None and options.timeout is None:
+        return
+
+    get_component_candidates = getattr(connection, "get_component_candidates", None)
+    if not callable(get_component_candidates):
+        logger.warning(
+            "Cannot restrict the ICE interfaces or timeout with this version of aioice"
+        )
+        return
+
+    async def restricted_get_component_candidates(
+        component: int, addresses: List[str], timeout: float = 5
+    ):
+        if options.interfaces is not None:
+            addresses = resolve_host_addresses(
+                options.interfaces, options.use_ipv4, options.use_ipv6
+            )
+        if options.timeout is not None:
+            timeout = options.timeout
+        return await get_component_candidates(
+            component=component, addresses=addresses, timeout=timeout
+        )
+
+    connection.get_component_candidates = restricted_get_component_candidates
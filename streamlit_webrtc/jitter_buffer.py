@@ -0,0 +1,224 @@
+"""Buffering an audio input to pull it in fixed ``ptime`` chunks.
+
+The frames of an audio input arrive in bursts and at the pace of the
+sender's clock, while a consumer such as a mix track takes one ``ptime`` of
+samples on its own clock. Keeping only the latest frame repeats or skips
+chunks whenever the two drift apart. :class:`AudioJitterBuffer` places the
+samples of each frame by its pts in a ring buffer instead, so that the
+consumer reads exactly ``ptime`` of samples at each tick, with silence where
+the input had none.
+"""
+
+from __future__ import annotations
+
+import fractions
+import logging
+from typing import NamedTuple, Optional
+
+import av
+import numpy as np
+
+__all__ = [
+    "AudioJitterBuffer",
+    "JitterBufferOptions",
+    "JitterBufferStats",
+]
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class JitterBufferOptions(NamedTuple):
+    """How an :class:`AudioJitterBuffer` buffers its input.
+
+    ``target_delay`` is how many seconds of audio are buffered before the
+    first pull, to absorb the jitter of the input, and ``max_delay`` how many
+    at most; the oldest samples are dropped beyond that. The samples are
+    converted to s16 in ``layout`` and at ``sample_rate``.
+    """
+
+    target_delay: float = 0.04
+    max_delay: float = 0.2
+    sample_rate: int = 48000
+    layout: str = "stereo"
+
+
+class JitterBufferStats(NamedTuple):
+    # Seconds of audio buffered, and how far that is from the target delay.
+    # A drift that keeps growing (or shrinking) means that the input's clock
+    # runs faster (or slower) than the consumer's.
+    depth: float
+    drift: float
+    # Pulls that found less than a ptime of samples, and the seconds of
+    # silence inserted for them and for the gaps in the input.
+    underruns: int
+    silence: float
+    # Seconds of audio dropped for arriving after they were pulled, and for
+    # exceeding the max delay.
+    late: float
+    overflow: float
+    # Times the input's timestamps jumped and the buffer started over.
+    resyncs: int
+
+
+class AudioJitterBuffer:
+    """A FIFO of the samples of an audio input, indexed by their pts."""
+
+    def __init__(
+        self, ptime: float, options: JitterBufferOptions = JitterBufferOptions()
+    ) -> None:
+        if options.max_delay < options.target_delay + ptime:
+            raise ValueError(
+                "max_delay must be at least target_delay + ptime, "
+                f"got {options.max_delay} < {options.target_delay} + {ptime}"
+            )
+        self.options = options
+        self.sample_rate = options.sample_rate
+        self.samples = int(options.sample_rate * ptime)
+        if self.samples <= 0:
+            raise ValueError(
+                f"ptime ({ptime}) is too small for sample_rate ({options.sample_rate})"
+            )
+        self.channels = len(av.AudioLayout(options.layout).channels)
+        self._target = int(options.target_delay * options.sample_rate)
+        self._capacity = int(options.max_delay * options.sample_rate)
+        self._ring = np.zeros((self._capacity, self.channels), dtype=np.int16)
+        self._resampler: Optional[av.AudioResampler] = None
+
+        # The positions of the next sample to pull and of the end of the
+        # samples pushed, in samples on the input's clock. `None` until the
+        # first push.
+        self._read: Optional[int] = None
+        self._write = 0
+
+        self._underruns = 0
+        self._silence = 0
+        self._late = 0
+        self._overflow = 0
+        self._resyncs = 0
+
+    def push(self, frame: av.AudioFrame) -> None:
+        pcm = self._to_pcm(frame)
+        n = len(pcm)
+        if n == 0:
+            return
+        start = self._position(frame)
+        if start is None:
+            start = self._write if self._read is not None else 0
+        restarted = False
+        if self._read is None or abs(start - self._write) > self._capacity:
+            if self._read is not None:
+                logger.debug("The timestamps jumped by %d samples", start - self._write)
+                self._resyncs += 1
+            # Start with `target_delay` of silence before the first sample.
+            self._read = self._write = start - self._target
+            restarted = True
+
+        end = start + n
+        if end - self._read > self._capacity:
+            dropped = end - self._capacity - self._read
+            self._overflow += dropped
+            self._read += dropped
+            self._write = max(self._write, self._read)
+        if start < self._read:
+            skip = min(self._read - start, n)
+            self._late += skip
+            pcm = pcm[skip:]
+            start += skip
+            if start >= end:
+                return
+
+        if start > self._write:
+            # A gap in the input, e.g. a lost packet, or the target delay.
+            if not restarted:
+                self._silence += start - self._write
+            self._copy_in(
+                self._write,
+                np.zeros((start - self._write, self.channels), dtype=np.int16),
+            )
+        self._copy_in(start, pcm)
+        self._write = max(self._write, end)
+
+    def pull(self, out: np.ndarray) -> None:
+        """Write the next ``ptime`` of samples into ``out``, an int16 array
+        of shape (samples, channels), with silence where there are none."""
+        if self._read is None:
+            out.fill(0)
+            return
+        available = max(min(self._write - self._read, self.samples), 0)
+        self._copy_out(self._read, out[:available])
+        if available < self.samples:
+            out[available:] = 0
+            self._underruns += 1
+            self._silence += self.samples - available
+        self._read += self.samples
+        self._write = max(self._write, self._read)
+
+    def pull_frame(self) -> av.AudioFrame:
+        """The next ``ptime`` of samples as a frame, timestamped on the
+        input's clock."""
+        pts = self._read
+        out = np.empty((1, self.samples * self.channels), dtype=np.int16)
+        self.pull(out.reshape(self.samples, self.channels))
+        frame = av.AudioFrame.from_ndarray(
+            out, format="s16", layout=self.options.layout
+        )
+        frame.sample_rate = self.sample_rate
+        if pts is not None:
+            frame.pts = pts
+            frame.time_base = fractions.Fraction(1, self.sample_rate)
+        return frame
+
+    def stats(self) -> JitterBufferStats:
+        depth = self._write - self._read if self._read is not None else 0
+        rate = self.sample_rate
+        return JitterBufferStats(
+            depth=depth / rate,
+            drift=(depth - self._target) / rate if self._read is not None else 0.0,
+            underruns=self._underruns,
+            silence=self._silence / rate,
+            late=self._late / rate,
+            overflow=self._overflow / rate,
+            resyncs=self._resyncs,
+        )
+
+    def _position(self, frame: av.AudioFrame) -> Optional[int]:
+        if frame.pts is None or frame.time_base is None:
+            return None
+        return round(frame.pts * frame.time_base * self.sample_rate)
+
+    def _copy_in(self, position: int, pcm: np.ndarray) -> None:
+        index = position % self._capacity
+        first = min(len(pcm), self._capacity - index)
+        self._ring[index : index + first] = pcm[:first]
+        self._ring[: len(pcm) - first] = pcm[first:]
+
+    def _copy_out(self, position: int, out: np.ndarray) -> None:
+        index = position % self._capacity
+        first = min(len(out), self._capacity - index)
+        out[:first] = self._ring[index : index + first]
+        out[first:] = self._ring[: len(out) - first]
+
+    def _to_pcm(self, frame: av.AudioFrame) -> np.ndarray:
+        """The s16 samples of ``frame``, of shape (samples, channels)."""
+        options = self.options
+        if (
+            frame.format.name != "s16"
+            or frame.layout.name != options.layout
+            or frame.sample_rate != options.sample_rate
+        ):
+            if self._resampler is None:
+                self._resampler = av.AudioResampler(
+                    format="s16", layout=options.layout, rate=options.sample_rate
+                )
+            resampled = self._resampler.resample(frame)
+            if not resampled:
+                return np.empty((0, self.channels), dtype=np.int16)
+            return np.concatenate(
+                [f.to_ndarray().reshape(-1, self.channels) for f in resampled]
+            )
+        return np.frombuffer(
+            memoryview(frame.planes[0]),
+            dtype=np.int16,
+            count=frame.samples * self.channels,
+        ).reshape(-1, self.channels)
@@ -0,0 +1,320 @@
+"""Measuring the lag of the shared event loop and finding what blocks it.
+
+The sink callbacks, the source track callbacks, the mixer callbacks and the
+processors of the (non-async) process tracks all run on the event loop that
+also sends and receives the RTP packets of every session, so one slow
+callback delays the media of all of them. :class:`LoopLagMonitor` measures
+how late the loop runs a timer, and times those callbacks to name the ones
+that block it. A watchdog thread reports a loop that stays blocked, with the
+callback running at the time, or the loop thread's stack if it is not one of
+those.
+"""
+
+import asyncio
+import concurrent.futures
+import contextlib
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Tuple
+
+from .metrics import LOOP_BLOCKED, LOOP_LAG, LOOP_SLOW_CALLBACKS, LOOP_STALLS
+
+__all__ = [
+    "LoopLagMonitor",
+    "LoopLagStats",
+    "get_loop_lag_monitor",
+    "start_loop_lag_monitor",
+    "stop_loop_lag_monitor",
+]
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class LoopLagStats(NamedTuple):
+    samples: int
+    # Seconds the timer ran late, on average, at most and last.
+    lag_mean: float
+    lag_max: float
+    lag_last: float
+    # Callbacks that ran longer than the threshold, and the seconds they took
+    # in total, by component.
+    slow_callbacks: Dict[str, int]
+    blocked: Dict[str, float]
+    # Times the watchdog found the loop blocked longer than `stall_timeout`.
+    stalls: int
+
+
+def describe_callback(callback: Any) -> str:
+    """A readable name of a callback or a processor, for the reports."""
+    # The processor wrapping a `video_frame_callback` etc.
+    frame_callback = getattr(callback, "_frame_callback", None)
+    if frame_callback is not None:
+        callback = frame_callback
+    if not hasattr(callback, "__qualname__"):
+        callback = type(callback)
+    qualname: str = callback.__qualname__
+    module: Optional[str] = getattr(callback, "__module__", None)
+    return f"{module}.{qualname}" if module else qualname
+
+
+class _Section:
+    __slots__ = ("component", "callback", "owner", "started_at", "previous")
+
+    def __init__(
+        self,
+        component: str,
+        callback: Any,
+        owner: Any,
+        started_at: float,
+        previous: Optional["_Section"],
+    ) -> None:
+        self.component = component
+        self.callback = callback
+        self.owner = owner
+        self.started_at = started_at
+        self.previous = previous
+
+
+class LoopLagMonitor:
+    """Measures the lag of ``loop`` every ``interval`` seconds.
+
+    Callbacks taking longer than ``threshold`` seconds on the loop are
+    counted and logged, at most once per ``log_interval`` seconds for each
+    callback. If the loop does not run the timer for ``stall_timeout``
+    seconds, the watchdog thread logs what it is running.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        interval: float = 0.1,
+        threshold: float = 0.05,
+        stall_timeout: float = 1.0,
+        log_interval: float = 10.0,
+    ) -> None:
+        self.loop = loop
+        self.interval = interval
+        self.threshold = threshold
+        self.stall_timeout = stall_timeout
+        self.log_interval = log_interval
+
+        self._loop_thread_id: Optional[int] = None
+        self._current: Optional[_Section] = None
+        self._last_tick = time.monotonic()
+
+        self._samples = 0
+        self._lag_total = 0.0
+        self._lag_max = 0.0
+        self._lag_last = 0.0
+        self._slow_callbacks: Dict[str, int] = {}
+        self._blocked: Dict[str, float] = {}
+        self._stalls = 0
+        # The last time each callback was logged, and how many times it was
+        # slow since.
+        self._log_state: Dict[Tuple[str, str], Tuple[Optional[float], int]] = {}
+
+        self._sampler: Optional[concurrent.futures.Future] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        if self._sampler is not None:
+            return
+        self._stopped.clear()
+        self._last_tick = time.monotonic()
+        self._sampler = asyncio.run_coroutine_threadsafe(self._sample(), self.loop)
+        self._watchdog = threading.Thread(
+            target=self._watch, name="streamlit-webrtc-loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        sampler, self._sampler = self._sampler, None
+        if sampler is not None:
+            sampler.cancel()
+        self._stopped.set()
+        watchdog, self._watchdog = self._watchdog, None
+        if watchdog is not None and watchdog is not threading.current_thread():
+            watchdog.join()
+
+    def stats(self) -> LoopLagStats:
+        samples = self._samples
+        return LoopLagStats(
+            samples=samples,
+            lag_mean=self._lag_total / samples if samples else 0.0,
+            lag_max=self._lag_max,
+            lag_last=self._lag_last,
+            slow_callbacks=dict(self._slow_callbacks),
+            blocked=dict(self._blocked),
+            stalls=self._stalls,
+        )
+
+    def enter(self, component: str, callback: Any, owner: Any = None) -> Any:
+        """Mark that ``callback`` of ``component`` (e.g. ``"sink"``) starts
+        running for ``owner``, typically a track. Pass the return value to
+        :meth:`exit` when it returns."""
+        if threading.get_ident() != self._loop_thread_id:
+            # Not on the monitored loop.
+            return None
+        section = _Section(component, callback, owner, time.monotonic(), self._current)
+        self._current = section
+        return section
+
+    def exit(self, token: Any) -> None:
+        if token is None:
+            return
+        section: _Section = token
+        self._current = section.previous
+        elapsed = time.monotonic() - section.started_at
+        if elapsed > self.threshold:
+            self._report_slow(section, elapsed)
+
+    def _report_slow(self, section: _Section, elapsed: float) -> None:
+        component = section.component
+        self._slow_callbacks[component] = self._slow_callbacks.get(component, 0) + 1
+        self._blocked[component] = self._blocked.get(component, 0.0) + elapsed
+        LOOP_SLOW_CALLBACKS.inc(component=component)
+        LOOP_BLOCKED.inc(elapsed, component=component)
+
+        name = describe_callback(section.callback)
+        key = (component, name)
+        now = time.monotonic()
+        logged_at, count = self._log_state.get(key, (None, 0))
+        count += 1
+        if logged_at is not None and now - logged_at < self.log_interval:
+            self._log_state[key] = (logged_at, count)
+            return
+        self._log_state[key] = (now, 0)
+        logger.warning(
+            "The %s callback %s blocked the event loop for %.1f ms "
+            "(%d times over %.1f ms since the last report)%s",
+            component,
+            name,
+            elapsed * 1000,
+            count,
+            self.threshold * 1000,
+            f", for {section.owner!r}" if section.owner is not None else "",
+        )
+
+    async def _sample(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                self._last_tick = time.monotonic()
+                expected = loop.time() + self.interval
+                await asyncio.sleep(self.interval)
+                lag = max(loop.time() - expected, 0.0)
+                self._samples += 1
+                self._lag_total += lag
+                self._lag_max = max(self._lag_max, lag)
+                self._lag_last = lag
+                LOOP_LAG.observe(lag)
+        finally:
+            self._loop_thread_id = None
+
+    def _watch(self) -> None:
+        reported_tick: Optional[float] = None
+        while not self._stopped.wait(self.interval):
+            last_tick = self._last_tick
+            blocked_for = time.monotonic() - last_tick - self.interval
+            if blocked_for < self.stall_timeout or reported_tick == last_tick:
+                continue
+            # Once per stall.
+            reported_tick = last_tick
+            self._stalls += 1
+            LOOP_STALLS.inc()
+            self._report_stall(blocked_for)
+
+    def _report_stall(self, blocked_for: float) -> None:
+        section = self._current
+        if section is not None:
+            logger.warning(
+                "The event loop has been blocked for %.1f s, running the %s "
+                "callback %s for %.1f s%s",
+                blocked_for,
+                section.component,
+                describe_callback(section.callback),
+                time.monotonic() - section.started_at,
+                f" for {section.owner!r}" if section.owner is not None else "",
+            )
+            return
+
+        thread_id = self._loop_thread_id
+        frame = sys._current_frames().get(thread_id) if thread_id else None
+        stack = "".join(traceback.format_stack(frame, limit=10)) if frame else ""
+        logger.warning(
+            "The event loop has been blocked for %.1f s in:\n%s",
+            blocked_for,
+            stack or "(unknown)",
+        )
+
+
+_monitor: Optional[LoopLagMonitor] = None
+_monitor_lock = threading.Lock()
+
+
+def get_loop_lag_monitor() -> Optional[LoopLagMonitor]:
+    """The monitor started by :func:`start_loop_lag_monitor`, if any."""
+    return _monitor
+
+
+@contextlib.contextmanager
+def monitor_callback(
+    component: str, callback: Any, owner: Any = None
+) -> Iterator[None]:
+    """Time the body as ``callback`` of ``component`` running for ``owner``
+    (see :meth:`LoopLagMonitor.enter`), if a monitor is running."""
+    monitor = _monitor
+    if monitor is None:
+        yield
+        return
+    section = monitor.enter(component, callback, owner)
+    try:
+        yield
+    finally:
+        monitor.exit(section)
+
+
+def start_loop_lag_monitor(
+    loop: Optional[asyncio.AbstractEventLoop] = None,
+    interval: float = 0.1,
+    threshold: float = 0.05,
+    stall_timeout: float = 1.0,
+) -> LoopLagMonitor:
+    """Start monitoring ``loop``, the loop the library runs on by default.
+
+    Only one monitor runs at a time; the one already started is returned if
+    it monitors the same loop, and stopped otherwise.
+    """
+    global _monitor
+    if loop is None:
+        from .eventloop import get_global_event_loop
+
+        loop = get_global_event_loop()
+
+    with _monitor_lock:
+        if _monitor is not None:
+            if _monitor.loop is loop:
+                return _monitor
+            _monitor.stop()
+        monitor = LoopLagMonitor(
+            loop, interval=interval, threshold=threshold, stall_timeout=stall_timeout
+        )
+        monitor.start()
+        _monitor = monitor
+        return monitor
+
+
+def stop_loop_lag_monitor() -> Optional[LoopLagMonitor]:
+    """Stop the monitor, returning it so its stats can still be read."""
+    global _monitor
+    with _monitor_lock:
+        monitor, _monitor = _monitor, None
+    if monitor is not None:
+        monitor.stop()
+    return monitor
@@ -0,0 +1,511 @@
+"""Counters, gauges and histograms of the library, in Prometheus text format.
+
+The workers, process tracks, receivers, sinks and the relay update the
+metrics defined at the bottom of this module in the process-wide registry
+returned by :func:`get_metrics_registry`. Render them with
+:func:`render_metrics`, e.g. from your own HTTP handler, or serve them with
+:func:`start_metrics_server`. The gauges of live objects, such as the number
+of workers or the frames waiting in queues, are computed when rendered, so
+they cost nothing in between.
+"""
+
+import http.server
+import logging
+import math
+import threading
+import weakref
+from typing import (
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "get_metrics_registry",
+    "render_metrics",
+    "start_metrics_server",
+]
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+T = TypeVar("T")
+
+LabelValues = Tuple[str, ...]
+GaugeFunction = Callable[[], Union[float, Mapping[LabelValues, float]]]
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if value == int(value) and abs(value) < 2**53:
+        return str(int(value))
+    return repr(value)
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(
+    names: Sequence[str],
+    values: Sequence[str],
+    extra: Optional[Tuple[str, str]] = None,
+) -> str:
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return (
+        "{"
+        + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs)
+        + "}"
+    )
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: Mapping[str, str]) -> LabelValues:
+        try:
+            if len(labels) != len(self.labelnames):
+                raise KeyError
+            return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError:
+            raise ValueError(
+                f"{self.name} takes the labels {self.labelnames}, not {tuple(labels)}"
+            ) from None
+
+    def _render_samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self._render_samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """A value that only goes up, e.g. the number of frames dropped."""
+
+    type_name = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        if not self.labelnames:
+            self._values[()] = 0.0
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("A counter cannot decrease")
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._label_values(labels), 0.0)
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, set directly or computed when
+    rendered by the functions given to :meth:`add_function`."""
+
+    type_name = "gauge"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._functions: List[GaugeFunction] = []
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def add_function(self, function: GaugeFunction) -> None:
+        """Compute the gauge with ``function`` when rendered, adding up the
+        values of all the functions added. With labels, it returns a mapping
+        from the tuples of label values to the values."""
+        with self._lock:
+            self._functions.append(function)
+
+    def values(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            values = dict(self._values)
+            functions = list(self._functions)
+        for function in functions:
+            result = function()
+            if not isinstance(result, Mapping):
+                result = {(): result}
+            for key, value in result.items():
+                values[key] = values.get(key, 0.0) + value
+        return values
+
+    def _render_samples(self) -> List[str]:
+        try:
+            values = sorted(self.values().items())
+        except Exception:
+            logger.exception("Failed to compute the gauge %s", self.name)
+            return []
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram(_Metric):
+    """The distribution of observed values, e.g. durations, in cumulative
+    buckets."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: the count of each bucket (not cumulative, plus
+        # one for +Inf), and the sum.
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._label_values(labels)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            return sum(self._counts.get(self._label_values(labels), []))
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            snapshot = [
+                (key, list(counts), self._sums[key])
+                for key, counts in sorted(self._counts.items())
+            ]
+        lines = []
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                labels = _format_labels(
+                    self.labelnames, key, ("le", _format_value(bound))
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._register(metric)
+        return metric
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        metric = Gauge(name, documentation, labelnames)
+        self._register(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._register(metric)
+        return metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """All the metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "".join(metric.render() + "\n" for metric in metrics)
+
+
+class LiveObjects(Generic[T]):
+    """The live objects of a kind, held weakly, for a gauge function to
+    count from the scraping thread.
+
+    A ``WeakSet`` cannot be iterated while another thread adds to it, so the
+    objects are added, discarded and listed under a lock.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._objects: "weakref.WeakSet[T]" = weakref.WeakSet()
+
+    def add(self, obj: T) -> None:
+        with self._lock:
+            self._objects.add(obj)
+
+    def discard(self, obj: T) -> None:
+        with self._lock:
+            self._objects.discard(obj)
+
+    def snapshot(self) -> List[T]:
+        with self._lock:
+            return list(self._objects)
+
+    def __contains__(self, obj: object) -> bool:
+        with self._lock:
+            return obj in self._objects
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._objects)
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """The process-wide registry the library updates."""
+    return _registry
+
+
+def render_metrics() -> str:
+    """The library's metrics in the Prometheus text exposition format."""
+    return _registry.render()
+
+
+def start_metrics_server(
+    port: int = 9464,
+    addr: str = "127.0.0.1",
+    registry: Optional[MetricsRegistry] = None,
+) -> http.server.ThreadingHTTPServer:
+    """Serve the metrics at ``http://<addr>:<port>/metrics`` on a daemon
+    thread. Call ``shutdown()`` on the returned server to stop it.
+
+    It listens on the loopback interface by default; pass ``addr="0.0.0.0"``
+    for a scraper on another host.
+    """
+    target = registry if registry is not None else _registry
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = target.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            logger.debug("Metrics server: " + format, *args)
+
+    server = http.server.ThreadingHTTPServer((addr, port), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(
+        target=server.serve_forever, name="streamlit-webrtc-metrics", daemon=True
+    )
+    thread.start()
+    logger.info("Serving the metrics at http://%s:%d/metrics", addr, port)
+    return server
+
+
+# The library's metrics.
+
+WORKERS = _registry.gauge(
+    "streamlit_webrtc_workers", "WebRtcWorker instances that have not stopped."
+)
+TRACKS = _registry.gauge(
+    "streamlit_webrtc_tracks",
+    "Live process tracks, receivers and sinks.",
+    ("type", "kind"),
+)
+THREADS = _registry.gauge(
+    "streamlit_webrtc_threads",
+    "Threads of the process, and those the library runs, by their type.",
+    ("type",),
+)
+QUEUED_FRAMES = _registry.gauge(
+    "streamlit_webrtc_queued_frames",
+    "Frames waiting in the queues of the live tracks and receivers.",
+    ("queue",),
+)
+FRAMES_PROCESSED = _registry.counter(
+    "streamlit_webrtc_frames_processed_total",
+    "Frames passed to the processors.",
+    ("kind",),
+)
+FRAMES_DROPPED = _registry.counter(
+    "streamlit_webrtc_frames_dropped_total",
+    "Frames dropped before reaching their consumer.",
+    ("stage",),
+)
+SINK_FRAMES = _registry.counter(
+    "streamlit_webrtc_sink_frames_total",
+    "Frames delivered to the sink callbacks.",
+    ("kind",),
+)
+SINK_ERRORS = _registry.counter(
+    "streamlit_webrtc_sink_errors_total",
+    "Exceptions raised by the sink callbacks.",
+    ("kind",),
+)
+OFFER_DURATION = _registry.histogram(
+    "streamlit_webrtc_offer_duration_seconds",
+    "Time from receiving an offer to having its answer.",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+STOP_DURATION = _registry.histogram(
+    "streamlit_webrtc_worker_stop_duration_seconds",
+    "Time WebRtcWorker.stop() took.",
+)
+PROCESS_AUDIO_UNDERRUNS = _registry.counter(
+    "streamlit_webrtc_process_audio_underruns_total",
+    "Times an async audio process track had less processed audio than a frame "
+    "to output.",
+)
+PROCESS_AUDIO_SILENCE = _registry.counter(
+    "streamlit_webrtc_process_audio_silence_seconds_total",
+    "Seconds of silence the async audio process tracks output in place of "
+    "processed audio.",
+)
+FRAME_SYNC_MATCHES = _registry.counter(
+    "streamlit_webrtc_frame_sync_matches_total",
+    "Sets of frames of the inputs captured at the same time, matched by the "
+    "frame synchronizers.",
+)
+FRAME_SYNC_MISSES = _registry.counter(
+    "streamlit_webrtc_frame_sync_misses_total",
+    "Frames the frame synchronizers dropped without a match.",
+    ("reason",),
+)
+
+LOOP_LAG = _registry.histogram(
+    "streamlit_webrtc_event_loop_lag_seconds",
+    "How late the event loop ran the lag monitor's timer.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+LOOP_SLOW_CALLBACKS = _registry.counter(
+    "streamlit_webrtc_event_loop_slow_callbacks_total",
+    "Callbacks that ran on the event loop longer than the monitor's threshold.",
+    ("component",),
+)
+LOOP_BLOCKED = _registry.counter(
+    "streamlit_webrtc_event_loop_blocked_seconds_total",
+    "Seconds the slow callbacks blocked the event loop.",
+    ("component",),
+)
+LOOP_STALLS = _registry.counter(
+    "streamlit_webrtc_event_loop_stalls_total",
+    "Times the event loop was blocked longer than the monitor's stall timeout.",
+)
+
+
+# The threads this library starts, by their name prefixes.
+_THREAD_NAME_PREFIXES = {
+    "async_media_processor_": "processor",
+    "SessionShutdownCallback": "session_shutdown_callback",
+    "SessionShutdownWatcher": "session_shutdown_watcher",
+    "streamlit-webrtc-decoder-": "decoder_pool",
+    "streamlit-webrtc-ice-servers-refresh-": "ice_servers_refresh",
+    "streamlit-webrtc-loop-watchdog": "loop_watchdog",
+    "streamlit-webrtc-mixer-": "mixer",
+}
+
+
+def _threads() -> Dict[LabelValues, float]:
+    counts: Dict[LabelValues, float] = {("process",): 0}
+    for thread in threading.enumerate():
+        counts[("process",)] += 1
+        for prefix, thread_type in _THREAD_NAME_PREFIXES.items():
+            if thread.name.startswith(prefix):
+                key = (thread_type,)
+                counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+THREADS.add_function(_threads)
@@ -1,12 +1,26 @@
 import asyncio
 import fractions
 import functools
+import itertools
 import logging
 import threading
 import time
 import weakref
-from collections import OrderedDict
-from typing import Callable, Generic, List, NamedTuple, Optional, Union, cast
+from collections import OrderedDict, deque
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Generic,
+    List,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Tuple,
+    Union,
+    cast,
+    runtime_checkable,
+)
 
 import av
 from aiortc import MediaStreamTrack
@@ -16,11 +30,19 @@ from av.frame import Frame
 from av.packet import Packet
 
 from .eventloop import get_global_event_loop, loop_context
+from .jitter_buffer import AudioJitterBuffer, JitterBufferOptions, JitterBufferStats
+from .loop_monitor import monitor_callback
+from .metrics import FRAMES_DROPPED
 from .models import FrameT
-from .relay import get_global_relay
+from .normalize import AudioInputFormat, FrameNormalizer, InputFormat
+from .relay import DropPolicy, get_global_relay
+from .sync import FrameSynchronizer, FrameSyncOptions, FrameSyncStats
+from .tracing import get_frame_tracer
 
 __all__ = [
+    "InputAwareMixer",
     "MixerCallback",
+    "MixerStats",
     "MediaStreamMixTrack",
 ]
 
@@ -39,6 +61,21 @@ VIDEO_TIME_BASE = fractions.Fraction(1, VIDEO_CLOCK_RATE)
 MixerCallback = Callable[[List[FrameT]], FrameT]
 
 
+@runtime_checkable
+class InputAwareMixer(Protocol[FrameT]):
+    """A mixer callback that also needs to know which input each frame is
+    from, e.g. to apply a per-input gain.
+
+    Instead of being called with the frames, its ``mix_inputs()`` is called
+    with the pairs of each input track, as passed to
+    :meth:`MediaStreamMixTrack.add_input_track`, and its latest frame.
+    """
+
+    def __call__(self, frames: List[FrameT]) -> FrameT: ...
+
+    def mix_inputs(self, inputs: List[Tuple[MediaStreamTrack, FrameT]]) -> FrameT: ...
+
+
 class InputQueueItem(NamedTuple):
     source_track_id: str
     frame: Optional[Union[Frame, Packet]]
@@ -54,6 +91,9 @@ async def input_track_coro(
         except MediaStreamError:
             frame = None
         if mix_track._output_started:
+            tracer = get_frame_tracer()
+            if tracer is not None and frame is not None:
+                tracer.begin(frame, "mix.input")
             mix_track._input_queue.put_nowait(
                 InputQueueItem(source_track_id=source_track_id, frame=frame)
             )
@@ -70,50 +110,195 @@ async def gather_frames_coro(mix_track: "MediaStreamMixTrack"):
             mix_track.stop()
             return
 
-        source_track = None
         with mix_track._input_proxies_lock:
-            for proxy in mix_track._input_proxies.values():
-                if proxy.id == item.source_track_id:
-                    source_track = proxy
-            if source_track is None:
-                LOGGER.warning("Source track not found")
-                continue
+            source_track = mix_track._input_proxies_by_id.get(item.source_track_id)
+        if source_track is None:
+            # Removed while its frame was queued.
+            LOGGER.debug("Source track not found")
+            continue
 
         frame = item.frame
+        tracer = get_frame_tracer()
+        if tracer is not None and frame is not None:
+            tracer.end(frame, "mix.input")
         mix_track._set_latest_frame(source_track, frame)
 
 
-async def mix_coro(mix_track: "MediaStreamMixTrack"):
-    started_at = time.monotonic()
+def _copy_frame(frame: Union[Frame, Packet]) -> Optional[Frame]:
+    """A copy of ``frame``'s data in a new frame, or ``None`` if it can't be
+    copied that way."""
+    copy: Frame
+    if isinstance(frame, av.VideoFrame):
+        copy = av.VideoFrame(frame.width, frame.height, frame.format.name)
+    elif isinstance(frame, av.AudioFrame):
+        copy = av.AudioFrame(
+            format=frame.format.name, layout=frame.layout.name, samples=frame.samples
+        )
+        copy.sample_rate = frame.sample_rate
+    else:
+        return None
+    for source, destination in zip(frame.planes, copy.planes):
+        if source.buffer_size != destination.buffer_size:
+            return None
+        # Any buffer is taken, though typed as bytes.
+        destination.update(source)  # type: ignore[arg-type]
+    return copy
+
+
+def _repeat_frame(last_output: Frame, elapsed: float) -> Optional[Frame]:
+    """A copy of ``last_output`` to send again ``elapsed`` seconds after it,
+    or ``None`` if it can't be copied."""
+    output_frame = _copy_frame(last_output)
+    if output_frame is not None:
+        if last_output.time_base is not None and last_output.pts is not None:
+            # On the mixer callback's own timeline.
+            output_frame.time_base = last_output.time_base
+            output_frame.pts = last_output.pts + round(elapsed / last_output.time_base)
+    return output_frame
 
+
+async def mix_coro(mix_track: "MediaStreamMixTrack"):
+    loop = asyncio.get_running_loop()
+    interval = mix_track.mixer_output_interval
+
+    # Wait for the first frame; there is nothing to output until then.
+    await mix_track._latest_frames_updated_event.wait()
+
+    # The ticks are on a grid from the first one, so that the time the mixing
+    # takes does not add up to a drift.
+    started_at = loop.time()
+    tick = 0
+    last_output: Optional[Frame] = None
+    last_timestamp = 0.0
     while True:
-        this_iter_start_time = time.monotonic()
+        delay = started_at + tick * interval - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        elif -delay >= interval:
+            # Skip the ticks already past, rather than running them in a
+            # burst.
+            missed = int(-delay // interval)
+            mix_track._missed_ticks += missed
+            tick += missed
+        timestamp = tick * interval
+        tick += 1
+        mix_track._ticks += 1
+
+        changed = (
+            mix_track._jitter_buffer_options is not None
+            or mix_track._latest_frames_updated_event.is_set()
+            or mix_track._mix_pending
+        )
+        # If only the mixer callback or the set of inputs changed, the latest
+        # frames are mixed as they are rather than after the next one.
+        wait = not mix_track._mix_pending
+        output_frame: Optional[Frame] = None
+        if mix_track._mixer_thread is None:
+            if last_output is not None and not changed:
+                # No input has changed; output the previous frame again.
+                output_frame = _repeat_frame(last_output, timestamp - last_timestamp)
+                if output_frame is not None:
+                    mix_track._repeated += 1
+            if output_frame is None:
+                mix_track._mix_pending = False
+                output_frame = await _mix(mix_track, wait)
+                mix_track._mixed += 1
+                last_output = output_frame
+                last_timestamp = timestamp
+        else:
+            # The mixer thread mixes this tick's inputs while the loop goes
+            # on; what it mixed since the last tick is output now, so the
+            # output keeps to the ticks, one interval behind the inputs.
+            if changed:
+                mix_track._mix_pending = False
+                mix_track._submit_inputs(await mix_track._get_latest_inputs(wait))
+            output_frame = mix_track._take_mixed_output()
+            if output_frame is not None:
+                mix_track._mixed += 1
+                last_output = output_frame
+                last_timestamp = timestamp
+            elif last_output is not None and mix_track._jitter_buffer_options is None:
+                output_frame = _repeat_frame(last_output, timestamp - last_timestamp)
+                if output_frame is not None:
+                    mix_track._repeated += 1
+            if output_frame is None:
+                continue
 
-        latest_frames = (
-            await mix_track._get_latest_frames()
-        )  # Wait for new frames arrive
-        try:
-            output_frame = mix_track._mixer_callback(latest_frames)
-
-            if output_frame.pts is None and output_frame.time_base is None:
-                timestamp = time.monotonic() - started_at
-                if isinstance(output_frame, av.VideoFrame):
-                    output_frame.pts = int(timestamp * VIDEO_CLOCK_RATE)
-                    output_frame.time_base = VIDEO_TIME_BASE
-                elif isinstance(output_frame, av.AudioFrame):
-                    output_frame.pts = int(timestamp * AUDIO_SAMPLE_RATE)
-                    output_frame.time_base = AUDIO_TIME_BASE
-
-        except Exception as exc:
-            LOGGER.error(
-                "Error occurred in the WebRTC mixer task: %s", exc, exc_info=True
-            )
-            raise exc
+        if output_frame.pts is None and output_frame.time_base is None:
+            if mix_track._jitter_buffer_options is not None and isinstance(
+                output_frame, av.AudioFrame
+            ):
+                # Each output frame follows the previous one, as each tick
+                # pulls one ptime from the inputs.
+                output_frame.pts = mix_track._output_samples
+                output_frame.time_base = fractions.Fraction(1, output_frame.sample_rate)
+                mix_track._output_samples += output_frame.samples
+            elif isinstance(output_frame, av.VideoFrame):
+                output_frame.pts = int(timestamp * VIDEO_CLOCK_RATE)
+                output_frame.time_base = VIDEO_TIME_BASE
+            elif isinstance(output_frame, av.AudioFrame):
+                output_frame.pts = int(timestamp * AUDIO_SAMPLE_RATE)
+                output_frame.time_base = AUDIO_TIME_BASE
+
+        mix_track._put_output(output_frame)
+
+
+async def _mix(mix_track: "MediaStreamMixTrack", wait: bool = True) -> Frame:
+    latest_inputs = await mix_track._get_latest_inputs(wait)
+    with monitor_callback("mixer", mix_track._mixer_callback, mix_track):
+        return _call_mixer(mix_track, latest_inputs)
+
+
+def _call_mixer(
+    mix_track: "MediaStreamMixTrack",
+    latest_inputs: List[Tuple[MediaStreamTrack, Union[Frame, Packet]]],
+) -> Frame:
+    latest_frames = [frame for _, frame in latest_inputs]
+    mixer_callback = mix_track._mixer_callback
+    mix_started_at = time.monotonic()
+    try:
+        if isinstance(mixer_callback, InputAwareMixer):
+            output_frame = mixer_callback.mix_inputs(latest_inputs)
+        else:
+            output_frame = mixer_callback(latest_frames)
+    except Exception as exc:
+        LOGGER.error("Error occurred in the WebRTC mixer task: %s", exc, exc_info=True)
+        raise exc
+
+    tracer = get_frame_tracer()
+    if tracer is not None:
+        # A mixed frame is traced on its own, listing the traced frames it
+        # was mixed from.
+        tracer.record(
+            output_frame,
+            "mix",
+            mix_started_at,
+            inputs=[
+                frame_id
+                for frame_id in map(tracer.frame_id, latest_frames)
+                if frame_id is not None
+            ],
+        )
+    return output_frame
 
-        mix_track._queue.put_nowait(output_frame)
 
-        wait = this_iter_start_time + mix_track.mixer_output_interval - time.monotonic()
-        await asyncio.sleep(wait)
+# See https://stackoverflow.com/a/42007659
+mixer_thread_id_generator = itertools.count()
+
+
+class MixerStats(NamedTuple):
+    # Ticks run, those that called the mixer callback and those that output
+    # the previous frame again as no input had changed.
+    ticks: int
+    mixed: int
+    repeated: int
+    # Ticks skipped as the mixer ran later than their time.
+    missed_ticks: int
+    # Output frames dropped as the consumer did not keep up.
+    dropped: int
+    # With `async_mixing`, the inputs of ticks that the mixer thread skipped
+    # as it was still mixing those of earlier ticks.
+    skipped: int = 0
 
 
 class MediaStreamMixTrack(MediaStreamTrack, Generic[FrameT]):
@@ -124,6 +309,10 @@ class MediaStreamMixTrack(MediaStreamTrack, Generic[FrameT]):
     _loop: asyncio.AbstractEventLoop
     _input_proxies_lock: threading.Lock
     _input_proxies: "OrderedDict[MediaStreamTrack, RelayStreamTrack]"
+    # Indexes of `_input_proxies`, by the proxies' IDs, so that routing a
+    # frame and removing an input do not scan all the inputs.
+    _input_proxies_by_id: Dict[str, RelayStreamTrack]
+    _input_tracks_by_proxy_id: Dict[str, MediaStreamTrack]
     _input_tasks: "weakref.WeakKeyDictionary[RelayStreamTrack, asyncio.Task]"
     _input_queue: asyncio.Queue
     _queue: "asyncio.Queue[Optional[Frame]]"
@@ -131,6 +320,31 @@ class MediaStreamMixTrack(MediaStreamTrack, Generic[FrameT]):
         "weakref.WeakKeyDictionary[RelayStreamTrack, Union[Frame, Packet, None]]"
     )
     _latest_frames_updated_event: asyncio.Event
+    _jitter_buffer_options: Optional[JitterBufferOptions]
+    _jitter_buffers: "weakref.WeakKeyDictionary[RelayStreamTrack, AudioJitterBuffer]"
+    _output_samples: int
+    _normalizer: Optional[FrameNormalizer]
+    _frame_sync: Optional[FrameSynchronizer[RelayStreamTrack]]
+    _latest_matched_inputs: List[Tuple[MediaStreamTrack, Union[Frame, Packet]]]
+    # Set when the mixer callback or the inputs change, to mix again even if
+    # no new frame arrives.
+    _mix_pending: bool
+
+    _ticks: int
+    _mixed: int
+    _repeated: int
+    _missed_ticks: int
+    _dropped: int
+    _skipped: int
+
+    # With `async_mixing`, the inputs of each tick to mix, and the frames
+    # mixed from them, handed between the loop and the mixer thread.
+    _mixer_thread: Optional[threading.Thread]
+    _mixer_thread_cond: threading.Condition
+    _mixer_thread_stopped: bool
+    _mixer_thread_exception: Optional[Exception]
+    _pending_inputs: Deque[List[Tuple[MediaStreamTrack, Union[Frame, Packet]]]]
+    _mixed_outputs: Deque[Frame]
 
     _output_started: bool
 
@@ -138,6 +352,8 @@ class MediaStreamMixTrack(MediaStreamTrack, Generic[FrameT]):
     _mix_task: Union[asyncio.Task, None]
 
     mixer_output_interval: float
+    output_queue_size: int
+    output_drop_policy: DropPolicy
 
     def __init__(
         self,
@@ -147,7 +363,56 @@ class MediaStreamMixTrack(MediaStreamTrack, Generic[FrameT]):
         *,
         loop: Optional[asyncio.AbstractEventLoop] = None,
         relay: Optional[MediaRelay] = None,
+        jitter_buffer: Optional[JitterBufferOptions] = None,
+        output_queue_size: int = 2,
+        output_drop_policy: DropPolicy = "drop_oldest",
+        async_mixing: bool = False,
+        frame_sync: Optional[FrameSyncOptions] = None,
+        input_format: Optional[InputFormat] = None,
     ) -> None:
+        """The mixer ticks every ``mixer_output_interval`` seconds. At a tick
+        where no input has a new frame, the previous output is sent again
+        instead of calling the mixer callback. At most ``output_queue_size``
+        output frames wait for the consumer; beyond that, they are dropped
+        by ``output_drop_policy``.
+
+        With ``jitter_buffer``, the frames of each audio input are buffered
+        by their pts, and the mixer callback gets exactly one
+        ``mixer_output_interval`` of samples from each input at every tick,
+        silence where the input had none, instead of its latest frame.
+
+        With ``async_mixing``, the mixer callback runs in a thread of its
+        own instead of on the event loop, so a slow callback does not delay
+        the other tracks. The inputs of each tick are handed to the thread,
+        and what it mixed is output at the next tick, so the output keeps to
+        the ticks, one interval later. If the thread is still mixing when
+        the inputs of another tick come, it skips to the latest ones; with
+        ``jitter_buffer``, it mixes them all, up to ``output_queue_size``
+        ticks behind.
+
+        With ``frame_sync``, the mixer callback gets the frames of the
+        inputs that were captured at the same time, matched by their pts,
+        instead of the latest frame of each input. It is called once for
+        each set of matched frames, as long as ``mixer_output_interval`` is
+        no longer than the interval of the inputs' frames.
+
+        With ``input_format``, a :class:`~streamlit_webrtc.VideoInputFormat`
+        or an :class:`~streamlit_webrtc.AudioInputFormat`, the frames of
+        each input are converted to it as they arrive, with a scaler or a
+        resampler kept for the input, so that the mixer callback gets them
+        all in the same format."""
+        if output_queue_size < 1:
+            raise ValueError(
+                f"output_queue_size must be at least 1, got {output_queue_size}"
+            )
+        if jitter_buffer is not None and kind != "audio":
+            raise ValueError("jitter_buffer is only for audio mix tracks")
+        if input_format is not None and isinstance(input_format, AudioInputFormat) != (
+            kind == "audio"
+        ):
+            raise ValueError(f"input_format {input_format} is not for {kind} inputs")
+        if jitter_buffer is not None and frame_sync is not None:
+            raise ValueError("jitter_buffer and frame_sync can't be used together")
         # Resolve runtime-bound dependencies once at construction so subsequent
         # methods can run without touching Streamlit's Runtime singleton.
         # Callers that own their own loop/relay (e.g. tests) can inject them;
@@ -160,6 +425,37 @@ class MediaStreamMixTrack(MediaStreamTrack, Generic[FrameT]):
         self._mixer_callback_lock = threading.Lock()
 
         self.mixer_output_interval = mixer_output_interval
+        self._jitter_buffer_options = jitter_buffer
+        self._output_samples = 0
+        self._normalizer = (
+            FrameNormalizer(input_format) if input_format is not None else None
+        )
+        self._frame_sync = (
+            FrameSynchronizer(frame_sync) if frame_sync is not None else None
+        )
+        self._latest_matched_inputs = []
+        self._mix_pending = False
+        self.output_queue_size = output_queue_size
+        self.output_drop_policy = output_drop_policy
+
+        self._ticks = 0
+        self._mixed = 0
+        self._repeated = 0
+        self._missed_ticks = 0
+        self._dropped = 0
+        self._skipped = 0
+
+        self.async_mixing = async_mixing
+        self._mixer_thread = None
+        self._mixer_thread_cond = threading.Condition()
+        self._mixer_thread_stopped = False
+        self._mixer_thread_exception = None
+        # Every tick's inputs are mixed with a jitter buffer, as each holds
+        # the samples pulled at that tick.
+        self._pending_inputs = deque(
+            maxlen=1 if jitter_buffer is None else output_queue_size
+        )
+        self._mixed_outputs = deque()
 
         with loop_context(resolved_loop):
             # aiortc's `MediaStreamTrack.__init__` sets its own `self._loop`,
@@ -167,9 +463,11 @@ class MediaStreamMixTrack(MediaStreamTrack, Generic[FrameT]):
             # to avoid being clobbered.
             super().__init__()
 
-            self._queue = asyncio.Queue()
+            self._queue = asyncio.Queue(maxsize=output_queue_size)
 
             self._input_proxies = OrderedDict()
+            self._input_proxies_by_id = {}
+            self._input_tracks_by_proxy_id = {}
             self._input_proxies_lock = threading.Lock()
 
             self._input_tasks = weakref.WeakKeyDictionary()
@@ -177,6 +475,7 @@ class MediaStreamMixTrack(MediaStreamTrack, Generic[FrameT]):
             self._input_queue = asyncio.Queue()
 
             self._latest_frames_map = weakref.WeakKeyDictionary()
+            self._jitter_buffers = weakref.WeakKeyDictionary()
 
             self._latest_frames_updated_event = asyncio.Event()
 
@@ -190,6 +489,7 @@ class MediaStreamMixTrack(MediaStreamTrack, Generic[FrameT]):
     def _update_mixer_callback(self, mixer_callback: MixerCallback[FrameT]) -> None:
         with self._mixer_callback_lock:
             self._mixer_callback = mixer_callback
+            self._mix_pending = True
 
     def _start(self):
         if self._output_started:
@@ -199,6 +499,13 @@ class MediaStreamMixTrack(MediaStreamTrack, Generic[FrameT]):
             gather_frames_coro(mix_track=self)
         )
         self._mix_task = self._loop.create_task(mix_coro(mix_track=self))
+        if self.async_mixing:
+            self._mixer_thread = threading.Thread(
+                target=self._run_mixer_thread,
+                name=f"streamlit-webrtc-mixer-{next(mixer_thread_id_generator)}",
+                daemon=True,
+            )
+            self._mixer_thread.start()
 
         self._output_started = True
 
@@ -211,6 +518,10 @@ class MediaStreamMixTrack(MediaStreamTrack, Generic[FrameT]):
         if self._mix_task:
             self._mix_task.cancel()
             self._mix_task = None
+        with self._mixer_thread_cond:
+            # Not joined, not to block the loop while a slow callback runs.
+            self._mixer_thread_stopped = True
+            self._mixer_thread_cond.notify()
 
     def add_input_track(self, input_track: MediaStreamTrack) -> None:
         LOGGER.debug("Add a track %s to %s", input_track, self)
@@ -223,6 +534,8 @@ class MediaStreamMixTrack(MediaStreamTrack, Generic[FrameT]):
                 input_proxy = cast(RelayStreamTrack, self._relay.subscribe(input_track))
 
             self._input_proxies[input_track] = input_proxy
+            self._input_proxies_by_id[input_proxy.id] = input_proxy
+            self._input_tracks_by_proxy_id[input_proxy.id] = input_track
 
         LOGGER.debug(
             "A proxy %s subscribing %s is added to %s", input_proxy, input_track, self
@@ -238,14 +551,17 @@ class MediaStreamMixTrack(MediaStreamTrack, Generic[FrameT]):
     def remove_input_proxy(self, input_proxy: RelayStreamTrack) -> None:
         LOGGER.debug("Remove a relay track %s from %s", input_proxy, self)
         with self._input_proxies_lock:
-            del_key = None
-            for key, value in self._input_proxies.items():
-                if value == input_proxy:
-                    del_key = key
-            if del_key:
-                self._input_proxies.pop(del_key)
-
-        self._latest_frames_map.pop(input_proxy)
+            self._input_proxies_by_id.pop(input_proxy.id, None)
+            input_track = self._input_tracks_by_proxy_id.pop(input_proxy.id, None)
+            if input_track is not None:
+                self._input_proxies.pop(input_track, None)
+
+        # No frame is there if the input ended before sending any.
+        self._latest_frames_map.pop(input_proxy, None)
+        self._jitter_buffers.pop(input_proxy, None)
+        if self._normalizer is not None:
+            self._normalizer.remove(input_proxy)
+        self._mix_pending = True
 
         task = self._input_tasks.pop(input_proxy)
         task.cancel()
@@ -253,21 +569,176 @@ class MediaStreamMixTrack(MediaStreamTrack, Generic[FrameT]):
     def _set_latest_frame(
         self, input_proxy: RelayStreamTrack, frame: Union[Frame, Packet, None]
     ):
+        if self._normalizer is not None and isinstance(frame, Frame):
+            frame = self._normalizer.normalize(input_proxy, frame)
+            if frame is None:
+                # Resampled with the next ones.
+                return
         # TODO: Lock here to make these 2 lines atomic
         self._latest_frames_map[input_proxy] = frame
+        if self._jitter_buffer_options is not None and isinstance(frame, av.AudioFrame):
+            jitter_buffer = self._jitter_buffers.get(input_proxy)
+            if jitter_buffer is None:
+                jitter_buffer = AudioJitterBuffer(
+                    self.mixer_output_interval, self._jitter_buffer_options
+                )
+                self._jitter_buffers[input_proxy] = jitter_buffer
+            jitter_buffer.push(frame)
+        if self._frame_sync is not None:
+            if frame is not None and self._match_frame(input_proxy, frame):
+                self._latest_frames_updated_event.set()
+            return
         self._latest_frames_updated_event.set()
 
+    def _match_frame(
+        self, input_proxy: RelayStreamTrack, frame: Union[Frame, Packet]
+    ) -> bool:
+        """Pass ``frame`` to the frame synchronizer, returning whether it
+        completed a set of matched frames."""
+        assert self._frame_sync is not None
+        with self._input_proxies_lock:
+            inputs = list(self._input_proxies.items())
+        self._frame_sync.set_inputs([proxy for _, proxy in inputs])
+        matches = self._frame_sync.push(input_proxy, frame, self._loop.time())
+        if not matches:
+            return False
+        # Only the latest set is mixed, if the mixer ticks less often.
+        input_tracks = {proxy: input_track for input_track, proxy in inputs}
+        self._latest_matched_inputs = [
+            (input_tracks[proxy], matched_frame) for proxy, matched_frame in matches[-1]
+        ]
+        return True
+
     async def _get_latest_frames(self) -> List[Union[Frame, Packet]]:
+        return [frame for _, frame in await self._get_latest_inputs()]
+
+    async def _get_latest_inputs(
+        self, wait: bool = True
+    ) -> List[Tuple[MediaStreamTrack, Union[Frame, Packet]]]:
+        """The latest inputs, once a frame arrived since the last call. With
+        ``wait`` false, those there are now unless there are none."""
+        if not wait:
+            self._latest_frames_updated_event.clear()
+            latest_inputs = self._take_latest_inputs()
+            if latest_inputs:
+                return latest_inputs
+        if self._jitter_buffer_options is None or not self._jitter_buffers:
+            # With jitter buffers, only the first frame is waited for; then
+            # every tick pulls from the buffers, whether or not a frame
+            # arrived since the last one.
+            await self._latest_frames_updated_event.wait()
         # TODO: Lock here to make these 2 lines atomic
-        await self._latest_frames_updated_event.wait()
         self._latest_frames_updated_event.clear()
+        return self._take_latest_inputs()
+
+    def _take_latest_inputs(
+        self,
+    ) -> List[Tuple[MediaStreamTrack, Union[Frame, Packet]]]:
+        if self._jitter_buffer_options is not None:
+            return self._pull_buffered_inputs()
+        if self._frame_sync is not None:
+            return self._latest_matched_inputs
 
         with self._input_proxies_lock:
-            latest_frames = [
-                self._latest_frames_map.get(proxy)
-                for proxy in self._input_proxies.values()
+            latest_inputs = [
+                (input_track, self._latest_frames_map.get(proxy))
+                for input_track, proxy in self._input_proxies.items()
             ]
-        return [f for f in latest_frames if f is not None]
+        return [
+            (input_track, frame)
+            for input_track, frame in latest_inputs
+            if frame is not None
+        ]
+
+    def _pull_buffered_inputs(
+        self,
+    ) -> List[Tuple[MediaStreamTrack, Union[Frame, Packet]]]:
+        with self._input_proxies_lock:
+            buffered_inputs = [
+                (input_track, self._jitter_buffers.get(proxy))
+                for input_track, proxy in self._input_proxies.items()
+            ]
+        return [
+            (input_track, jitter_buffer.pull_frame())
+            for input_track, jitter_buffer in buffered_inputs
+            if jitter_buffer is not None
+        ]
+
+    def _submit_inputs(
+        self, inputs: List[Tuple[MediaStreamTrack, Union[Frame, Packet]]]
+    ) -> None:
+        with self._mixer_thread_cond:
+            if len(self._pending_inputs) == self._pending_inputs.maxlen:
+                self._skipped += 1
+            self._pending_inputs.append(inputs)
+            self._mixer_thread_cond.notify()
+
+    def _take_mixed_output(self) -> Optional[Frame]:
+        with self._mixer_thread_cond:
+            if self._mixer_thread_exception is not None:
+                raise self._mixer_thread_exception
+            if self._mixed_outputs:
+                return self._mixed_outputs.popleft()
+        return None
+
+    def _run_mixer_thread(self) -> None:
+        while True:
+            with self._mixer_thread_cond:
+                while not self._pending_inputs and not self._mixer_thread_stopped:
+                    self._mixer_thread_cond.wait()
+                if self._mixer_thread_stopped:
+                    return
+                inputs = self._pending_inputs.popleft()
+            try:
+                output_frame = _call_mixer(self, inputs)
+            except Exception as exc:
+                # Raised on the loop at the next tick.
+                with self._mixer_thread_cond:
+                    self._mixer_thread_exception = exc
+                return
+            with self._mixer_thread_cond:
+                self._mixed_outputs.append(output_frame)
+
+    def _put_output(self, frame: Frame) -> None:
+        if self._queue.full():
+            self._dropped += 1
+            FRAMES_DROPPED.inc(stage="mixer")
+            if self.output_drop_policy == "drop_newest":
+                return
+            self._queue.get_nowait()
+        tracer = get_frame_tracer()
+        if tracer is not None:
+            tracer.begin(frame, "mix.output")
+        self._queue.put_nowait(frame)
+
+    def stats(self) -> MixerStats:
+        return MixerStats(
+            ticks=self._ticks,
+            mixed=self._mixed,
+            repeated=self._repeated,
+            missed_ticks=self._missed_ticks,
+            dropped=self._dropped,
+            skipped=self._skipped,
+        )
+
+    def jitter_buffer_stats(self) -> Dict[MediaStreamTrack, JitterBufferStats]:
+        """The stats of the jitter buffer of each input, by the input track,
+        if the track is made with ``jitter_buffer``."""
+        with self._input_proxies_lock:
+            proxies = list(self._input_proxies.items())
+        stats: Dict[MediaStreamTrack, JitterBufferStats] = {}
+        for input_track, proxy in proxies:
+            jitter_buffer = self._jitter_buffers.get(proxy)
+            if jitter_buffer is not None:
+                stats[input_track] = jitter_buffer.stats()
+        return stats
+
+    def frame_sync_stats(self) -> Optional[FrameSyncStats]:
+        """The stats of matching the inputs' frames, if the track is made
+        with ``frame_sync``."""
+        if self._frame_sync is None:
+            return None
+        return self._frame_sync.stats()
 
     async def recv(self):
         if self.readyState != "live":
@@ -279,4 +750,7 @@ class MediaStreamMixTrack(MediaStreamTrack, Generic[FrameT]):
         if frame is None:
             self.stop()
             raise MediaStreamError
+        tracer = get_frame_tracer()
+        if tracer is not None:
+            tracer.end(frame, "mix.output")
         return frame
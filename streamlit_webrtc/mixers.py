@@ -0,0 +1,403 @@
+"""Built-in mixer callbacks for :class:`~streamlit_webrtc.mix.MediaStreamMixTrack`."""
+
+from __future__ import annotations
+
+import logging
+import math
+import weakref
+from typing import Any, Dict, List, Literal, MutableMapping, Optional, Tuple
+
+import av
+import numpy as np
+from aiortc import MediaStreamTrack
+from av.video.reformatter import VideoReformatter
+
+from .source import AUDIO_PTIME
+
+__all__ = [
+    "AudioMixer",
+    "CompositorLayout",
+    "VideoCompositor",
+]
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Gains are applied in fixed point, as multiples of 1 / 2**_GAIN_SHIFT, so
+# that the mixing stays in integers. The largest gain keeps the product of a
+# sample and the gain within int32.
+_GAIN_SHIFT = 12
+MAX_GAIN = 8.0
+
+
+class AudioMixer:
+    """Mixes the audio inputs of a mix track by summing their samples.
+
+    Pass it as the ``mixer_callback`` of :func:`~streamlit_webrtc.create_mix_track`
+    with ``mixer_output_interval`` set to ``ptime``. Every call sums the latest
+    frame of each input into a preallocated int32 accumulator, applying the
+    input's gain, and saturates the sum to s16 in a reused buffer, so the cost
+    per input is a few vectorized operations over one frame of samples.
+
+    The output frames are ``int(sample_rate * ptime)`` samples of s16 audio in
+    ``layout``. Inputs in another format, layout or sample rate are converted
+    with a resampler kept for each input; inputs shorter than the output are
+    padded with silence and longer ones are truncated.
+    """
+
+    def __init__(
+        self,
+        *,
+        sample_rate: int = 48000,
+        layout: str = "stereo",
+        ptime: float = AUDIO_PTIME,
+    ) -> None:
+        if sample_rate <= 0:
+            raise ValueError(
+                f"sample_rate must be a positive integer, got {sample_rate}"
+            )
+        samples = int(sample_rate * ptime)
+        if samples <= 0:
+            raise ValueError(
+                f"ptime ({ptime}) is too small for sample_rate ({sample_rate}); "
+                "int(sample_rate * ptime) must be >= 1"
+            )
+        self.sample_rate = sample_rate
+        self.layout = layout
+        self.ptime = ptime
+        self.samples = samples
+        self.channels = len(av.AudioLayout(layout).channels)
+
+        # Interleaved (packed) samples of one output frame.
+        size = samples * self.channels
+        self._accumulator = np.zeros(size, dtype=np.int32)
+        self._scaled = np.empty(size, dtype=np.int32)
+        self._output = np.empty((1, size), dtype=np.int16)
+
+        self._gains: MutableMapping[MediaStreamTrack, int] = weakref.WeakKeyDictionary()
+        # Keyed by the input track, or by the position of the input when
+        # called without the tracks.
+        self._resamplers: Dict[Any, av.AudioResampler] = {}
+
+    def set_gain(self, track: MediaStreamTrack, gain: float) -> None:
+        """Scale the input ``track``, as passed to
+        :meth:`~streamlit_webrtc.mix.MediaStreamMixTrack.add_input_track`, by
+        ``gain`` (between 0 and ``MAX_GAIN``; 1 by default)."""
+        if not 0 <= gain <= MAX_GAIN:
+            raise ValueError(f"gain must be between 0 and {MAX_GAIN}, got {gain}")
+        self._gains[track] = round(gain * (1 << _GAIN_SHIFT))
+
+    def get_gain(self, track: MediaStreamTrack) -> float:
+        return self._gains.get(track, 1 << _GAIN_SHIFT) / (1 << _GAIN_SHIFT)
+
+    def __call__(self, frames: List[av.AudioFrame]) -> av.AudioFrame:
+        return self._mix([(i, None, frame) for i, frame in enumerate(frames)])
+
+    def mix_inputs(
+        self, inputs: List[Tuple[MediaStreamTrack, av.AudioFrame]]
+    ) -> av.AudioFrame:
+        return self._mix([(track, track, frame) for track, frame in inputs])
+
+    def _mix(
+        self, inputs: List[Tuple[Any, Optional[MediaStreamTrack], av.AudioFrame]]
+    ) -> av.AudioFrame:
+        accumulator = self._accumulator
+        accumulator.fill(0)
+        unity = 1 << _GAIN_SHIFT
+        for key, track, frame in inputs:
+            pcm = self._to_pcm(key, frame)
+            n = min(len(pcm), len(accumulator))
+            if n == 0:
+                continue
+            gain = self._gains.get(track, unity) if track is not None else unity
+            if gain == unity:
+                np.add(accumulator[:n], pcm[:n], out=accumulator[:n])
+            elif gain != 0:
+                scaled = self._scaled[:n]
+                np.multiply(pcm[:n], gain, out=scaled, dtype=np.int32)
+                np.right_shift(scaled, _GAIN_SHIFT, out=scaled)
+                np.add(accumulator[:n], scaled, out=accumulator[:n])
+
+        if len(self._resamplers) > len(inputs):
+            # Forget the resamplers of the removed inputs.
+            keys = {key for key, _, _ in inputs}
+            for key in [key for key in self._resamplers if key not in keys]:
+                del self._resamplers[key]
+
+        np.clip(accumulator, -32768, 32767, out=accumulator)
+        np.copyto(self._output[0], accumulator, casting="unsafe")
+
+        # The frame itself can't be reused, as the previous one may still be
+        # queued for the encoder.
+        output = av.AudioFrame.from_ndarray(
+            self._output, format="s16", layout=self.layout
+        )
+        output.sample_rate = self.sample_rate
+        return output
+
+    def _to_pcm(self, key: Any, frame: av.AudioFrame) -> np.ndarray:
+        """The interleaved s16 samples of ``frame`` in the output's layout and
+        sample rate, without a copy if it is already in them."""
+        if (
+            frame.format.name == "s16"
+            and frame.layout.name == self.layout
+            and frame.sample_rate == self.sample_rate
+        ):
+            return np.frombuffer(
+                memoryview(frame.planes[0]),
+                dtype=np.int16,
+                count=frame.samples * self.channels,
+            )
+
+        resampler = self._resamplers.get(key)
+        if resampler is None:
+            resampler = av.AudioResampler(
+                format="s16", layout=self.layout, rate=self.sample_rate
+            )
+            self._resamplers[key] = resampler
+        try:
+            resampled = resampler.resample(frame)
+        except ValueError:
+            # The input changed its format; start over with a new resampler.
+            logger.debug("Resetting the resampler of the input %r", key)
+            resampler = av.AudioResampler(
+                format="s16", layout=self.layout, rate=self.sample_rate
+            )
+            self._resamplers[key] = resampler
+            resampled = resampler.resample(frame)
+        if not resampled:
+            return np.empty(0, dtype=np.int16)
+        return np.concatenate([f.to_ndarray().reshape(-1) for f in resampled])
+
+
+CompositorLayout = Literal["grid", "pip", "speaker"]
+
+# x, y, width, height
+_Rect = Tuple[int, int, int, int]
+
+
+def _even(value: int) -> int:
+    return value & ~1
+
+
+def _overlaps(a: _Rect, b: _Rect) -> bool:
+    return (
+        a[0] < b[0] + b[2]
+        and b[0] < a[0] + a[2]
+        and a[1] < b[1] + b[3]
+        and b[1] < a[1] + a[3]
+    )
+
+
+class _Tile:
+    __slots__ = ("reformatter", "frame", "window")
+
+    def __init__(self) -> None:
+        self.reformatter = VideoReformatter()
+        # The frame drawn last, and where in the tile's cell.
+        self.frame: Optional[av.VideoFrame] = None
+        self.window: Optional[_Rect] = None
+
+
+class VideoCompositor:
+    """Composes the video inputs of a mix track on one canvas.
+
+    Pass it as the ``mixer_callback`` of :func:`~streamlit_webrtc.create_mix_track`.
+    ``layout`` arranges the inputs:
+
+    * ``"grid"``: in a grid of equal cells.
+    * ``"pip"``: the focused input fills the canvas, and the others are small
+      pictures in its bottom-right corner.
+    * ``"speaker"``: the focused input takes the top three quarters, and the
+      others share a strip below.
+
+    The focused input is the one passed to :meth:`set_focus`, or the first
+    one. Each input is scaled to fit its cell, keeping its aspect ratio, by a
+    scaler kept for its tile. The canvas is kept between the calls and only
+    the tiles whose input has a new frame since the last call are redrawn,
+    along with those drawn over them; ``tiles_drawn`` counts the redraws.
+
+    The canvas is in yuv420p, which the encoders take as is, so its size must
+    be even.
+    """
+
+    def __init__(
+        self,
+        *,
+        width: int = 640,
+        height: int = 480,
+        layout: CompositorLayout = "grid",
+        background: Tuple[int, int, int] = (0, 0, 0),
+    ) -> None:
+        if width <= 0 or height <= 0 or width % 2 or height % 2:
+            raise ValueError(
+                f"The canvas size must be positive and even, got {width}x{height}"
+            )
+        self.width = width
+        self.height = height
+        self._layout: CompositorLayout = self._validate_layout(layout)
+
+        # The planes are views of the canvas, laid out as `from_ndarray()`
+        # takes it.
+        self._canvas = np.empty((height * 3 // 2, width), dtype=np.uint8)
+        chroma_size = (height // 2) * (width // 2)
+        chroma = self._canvas[height:].reshape(-1)
+        self._planes = (
+            self._canvas[:height],
+            chroma[:chroma_size].reshape(height // 2, width // 2),
+            chroma[chroma_size:].reshape(height // 2, width // 2),
+        )
+        # The RGB background in YUV, as converted by the scaler.
+        background_frame = av.VideoFrame.from_ndarray(
+            np.full((2, 2, 3), background, dtype=np.uint8), format="rgb24"
+        ).reformat(format="yuv420p")
+        self._background = tuple(bytes(plane)[0] for plane in background_frame.planes)
+        self._fill((0, 0, width, height))
+
+        self._focus: Any = None
+        # The inputs and the focus the cells were arranged for.
+        self._arranged_for: Optional[Tuple[Any, ...]] = None
+        self._cells: List[Tuple[Any, _Rect]] = []
+        self._tiles: Dict[Any, _Tile] = {}
+        self.tiles_drawn = 0
+
+    @staticmethod
+    def _validate_layout(layout: str) -> CompositorLayout:
+        if layout not in ("grid", "pip", "speaker"):
+            raise ValueError(
+                f"layout must be 'grid', 'pip' or 'speaker', got {layout!r}"
+            )
+        return layout  # type: ignore[return-value]
+
+    @property
+    def layout(self) -> CompositorLayout:
+        return self._layout
+
+    @layout.setter
+    def layout(self, layout: CompositorLayout) -> None:
+        layout = self._validate_layout(layout)
+        if layout != self._layout:
+            self._layout = layout
+            self._arranged_for = None
+
+    def set_focus(self, track: Optional[MediaStreamTrack]) -> None:
+        """Make ``track``, as passed to
+        :meth:`~streamlit_webrtc.mix.MediaStreamMixTrack.add_input_track`, the
+        focused input of the ``"pip"`` and ``"speaker"`` layouts."""
+        if track is not self._focus:
+            self._focus = track
+            self._arranged_for = None
+
+    def __call__(self, frames: List[av.VideoFrame]) -> av.VideoFrame:
+        return self._compose(list(enumerate(frames)))
+
+    def mix_inputs(
+        self, inputs: List[Tuple[MediaStreamTrack, av.VideoFrame]]
+    ) -> av.VideoFrame:
+        return self._compose(inputs)
+
+    def _compose(self, inputs: List[Tuple[Any, av.VideoFrame]]) -> av.VideoFrame:
+        keys = tuple(key for key, _ in inputs)
+        arranged_for = (self._layout, self._focus, *keys)
+        if arranged_for != self._arranged_for:
+            self._arrange(keys)
+            self._arranged_for = arranged_for
+
+        frames = dict(inputs)
+        redrawn: List[_Rect] = []
+        for key, cell in self._cells:
+            tile = self._tiles[key]
+            frame = frames[key]
+            if frame is tile.frame and not any(_overlaps(cell, r) for r in redrawn):
+                continue
+            self._draw(tile, frame, cell)
+            redrawn.append(cell)
+
+        # The canvas is copied, as the previous frame may still be queued for
+        # the encoder.
+        return av.VideoFrame.from_ndarray(self._canvas, format="yuv420p")
+
+    def _arrange(self, keys: Tuple[Any, ...]) -> None:
+        """Lay out the cells of the inputs, in the order they are drawn, and
+        clear the canvas to redraw all of them."""
+        width, height = self.width, self.height
+        n = len(keys)
+        cells: List[Tuple[Any, _Rect]] = []
+        if n > 0 and self._layout == "grid":
+            n_cols = math.ceil(math.sqrt(n))
+            n_rows = math.ceil(n / n_cols)
+            cell_w, cell_h = _even(width // n_cols), _even(height // n_rows)
+            for i, key in enumerate(keys):
+                cells.append(
+                    (
+                        key,
+                        ((i % n_cols) * cell_w, (i // n_cols) * cell_h, cell_w, cell_h),
+                    )
+                )
+        elif n > 0:
+            focus = self._focus if self._focus in keys else keys[0]
+            others = [key for key in keys if key is not focus]
+            if self._layout == "pip":
+                cells.append((focus, (0, 0, width, height)))
+                cell_w, cell_h = _even(width // 4), _even(height // 4)
+                margin = max(_even(width // 64), 2)
+                per_row = max((width - margin) // (cell_w + margin), 1)
+                for i, key in enumerate(others):
+                    x = width - (i % per_row + 1) * (cell_w + margin)
+                    y = height - (i // per_row + 1) * (cell_h + margin)
+                    cells.append((key, (x, y, cell_w, cell_h)))
+            else:
+                strip_h = _even(height // 4) if others else 0
+                cells.append((focus, (0, 0, width, height - strip_h)))
+                for i, key in enumerate(others):
+                    cell_w = _even(width // len(others))
+                    cells.append((key, (i * cell_w, height - strip_h, cell_w, strip_h)))
+
+        self._cells = cells
+        self._tiles = {key: self._tiles.get(key) or _Tile() for key in keys}
+        for tile in self._tiles.values():
+            tile.frame = None
+            tile.window = None
+        self._fill((0, 0, width, height))
+
+    def _draw(self, tile: _Tile, frame: av.VideoFrame, cell: _Rect) -> None:
+        cell_x, cell_y, cell_w, cell_h = cell
+        aspect_ratio = frame.width / frame.height
+        window_w = _even(min(cell_w, int(cell_h * aspect_ratio)))
+        window_h = _even(min(cell_h, int(window_w / aspect_ratio)))
+        if window_w <= 0 or window_h <= 0:
+            return
+        window = (
+            cell_x + _even((cell_w - window_w) // 2),
+            cell_y + _even((cell_h - window_h) // 2),
+            window_w,
+            window_h,
+        )
+        if window != tile.window:
+            # The letterbox changed, e.g. with the input's resolution.
+            self._fill(cell)
+            tile.window = window
+
+        image = tile.reformatter.reformat(
+            frame, width=window_w, height=window_h, format="yuv420p"
+        )
+        x, y = window[0], window[1]
+        for i, (plane, canvas_plane) in enumerate(zip(image.planes, self._planes)):
+            shift = 1 if i > 0 else 0
+            w, h = window_w >> shift, window_h >> shift
+            # The lines of a plane may be padded.
+            pixels = np.frombuffer(memoryview(plane), dtype=np.uint8)
+            pixels = pixels.reshape(-1, plane.line_size)[:h, :w]
+            canvas_plane[
+                y >> shift : (y >> shift) + h, x >> shift : (x >> shift) + w
+            ] = pixels
+        tile.frame = frame
+        self.tiles_drawn += 1
+
+    def _fill(self, rect: _Rect) -> None:
+        x, y, w, h = rect
+        for i, (canvas_plane, value) in enumerate(zip(self._planes, self._background)):
+            shift = 1 if i > 0 else 0
+            canvas_plane[
+                y >> shift : (y + h) >> shift, x >> shift : (x + w) >> shift
+            ] = value
@@ -7,6 +7,8 @@ import av
 import numpy as np
 from aiortc.contrib.media import MediaPlayer, MediaRecorder
 
+from .recorder import PassthroughRecorder
+
 logger = logging.getLogger(__name__)
 
 FrameT = TypeVar("FrameT", av.VideoFrame, av.AudioFrame)
@@ -192,7 +194,7 @@ AudioProcessorT = TypeVar(
 )
 
 MediaPlayerFactory = Callable[[], MediaPlayer]
-MediaRecorderFactory = Callable[[], MediaRecorder]
+MediaRecorderFactory = Callable[[], Union[MediaRecorder, PassthroughRecorder]]
 VideoProcessorFactory = Callable[[], VideoProcessorT]
 AudioProcessorFactory = Callable[[], AudioProcessorT]
 ProcessorFactory = Union[VideoProcessorFactory, AudioProcessorFactory]
@@ -0,0 +1,141 @@
+"""Converting the frames of a mix track's inputs to one format on arrival.
+
+The inputs of a mix track come in whatever size, pixel format, sample
+format, rate or layout their senders chose, and may change them on the fly.
+A mixer callback that needs them uniform, e.g. to stack them as NumPy
+arrays, would otherwise convert every frame of every input itself, setting
+up a new scaler or resampler each time. :class:`FrameNormalizer` converts
+each input's frames once, as they arrive, with a scaler or a resampler kept
+for the input.
+"""
+
+from __future__ import annotations
+
+import logging
+import weakref
+from typing import NamedTuple, Optional, Union
+
+import av
+import numpy as np
+from av.frame import Frame
+from av.video.reformatter import VideoReformatter
+
+__all__ = [
+    "AudioInputFormat",
+    "FrameNormalizer",
+    "InputFormat",
+    "VideoInputFormat",
+]
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class VideoInputFormat(NamedTuple):
+    """The size and the pixel format to convert the video inputs to. The
+    frames are scaled to ``width`` x ``height`` without keeping their aspect
+    ratio; either left ``None`` keeps the input's."""
+
+    width: Optional[int] = None
+    height: Optional[int] = None
+    format: str = "bgr24"
+
+
+class AudioInputFormat(NamedTuple):
+    """The sample format, rate and layout to resample the audio inputs to."""
+
+    format: str = "s16"
+    sample_rate: int = 48000
+    layout: str = "stereo"
+
+
+InputFormat = Union[VideoInputFormat, AudioInputFormat]
+
+
+class FrameNormalizer:
+    """Converts the frames of the inputs, by their key, to ``input_format``,
+    with a scaler or a resampler kept for each input."""
+
+    def __init__(self, input_format: InputFormat) -> None:
+        if isinstance(input_format, VideoInputFormat):
+            for name in ("width", "height"):
+                value = getattr(input_format, name)
+                if value is not None and (value <= 0 or value % 2):
+                    raise ValueError(f"{name} must be positive and even, got {value}")
+        self.input_format = input_format
+        self._reformatters: "weakref.WeakKeyDictionary[object, VideoReformatter]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._resamplers: "weakref.WeakKeyDictionary[object, av.AudioResampler]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def normalize(self, key: object, frame: Frame) -> Optional[Frame]:
+        """``frame`` of the input ``key`` in the format, or ``None`` if the
+        resampler keeps its samples until it has enough."""
+        input_format = self.input_format
+        if isinstance(input_format, VideoInputFormat):
+            if not isinstance(frame, av.VideoFrame):
+                raise TypeError(f"Expected a video frame, got {frame!r}")
+            return self._normalize_video(key, frame, input_format)
+        if not isinstance(frame, av.AudioFrame):
+            raise TypeError(f"Expected an audio frame, got {frame!r}")
+        return self._normalize_audio(key, frame, input_format)
+
+    def remove(self, key: object) -> None:
+        self._reformatters.pop(key, None)
+        self._resamplers.pop(key, None)
+
+    def _normalize_video(
+        self, key: object, frame: av.VideoFrame, input_format: VideoInputFormat
+    ) -> av.VideoFrame:
+        width = input_format.width or frame.width
+        height = input_format.height or frame.height
+        if (
+            frame.format.name == input_format.format
+            and frame.width == width
+            and frame.height == height
+        ):
+            return frame
+        reformatter = self._reformatters.get(key)
+        if reformatter is None:
+            reformatter = self._reformatters[key] = VideoReformatter()
+        # The reformatter keeps its scaler while the input's size and format
+        # stay the same.
+        return reformatter.reformat(
+            frame, width=width, height=height, format=input_format.format
+        )
+
+    def _normalize_audio(
+        self, key: object, frame: av.AudioFrame, input_format: AudioInputFormat
+    ) -> Optional[av.AudioFrame]:
+        if (
+            frame.format.name == input_format.format
+            and frame.layout.name == input_format.layout
+            and frame.sample_rate == input_format.sample_rate
+        ):
+            return frame
+        resampler = self._resamplers.get(key)
+        if resampler is None:
+            resampler = self._resamplers[key] = av.AudioResampler(
+                format=input_format.format,
+                layout=input_format.layout,
+                rate=input_format.sample_rate,
+            )
+        resampled = resampler.resample(frame)
+        if not resampled:
+            return None
+        if len(resampled) == 1:
+            return resampled[0]
+        # One frame for the mixer callback, in place of the several the
+        # resampler output.
+        first = resampled[0]
+        merged = av.AudioFrame.from_ndarray(
+            np.concatenate([f.to_ndarray() for f in resampled], axis=1),
+            format=input_format.format,
+            layout=input_format.layout,
+        )
+        merged.sample_rate = input_format.sample_rate
+        merged.pts = first.pts
+        merged.time_base = first.time_base
+        return merged
@@ -1,46 +1,173 @@
 import asyncio
+import fractions
 import itertools
 import logging
 import queue
 import threading
 import time
 from collections import deque
-from typing import Generic, List, Optional, Union
+from typing import Dict, Generic, List, Optional, Tuple, Union, cast
 
 import av
 from aiortc import MediaStreamTrack
 from aiortc.mediastreams import MediaStreamError
 
+from .governor import DegradationLevel, ResourceGovernor
+from .jitter_buffer import AudioJitterBuffer, JitterBufferOptions, JitterBufferStats
+from .loop_monitor import monitor_callback
+from .metrics import (
+    FRAMES_DROPPED,
+    FRAMES_PROCESSED,
+    PROCESS_AUDIO_SILENCE,
+    PROCESS_AUDIO_UNDERRUNS,
+    QUEUED_FRAMES,
+    TRACKS,
+    LiveObjects,
+)
+from .mix import _copy_frame
 from .models import AudioProcessorT, FrameT, ProcessorT, VideoProcessorT
+from .source import AUDIO_PTIME
+from .tracing import get_frame_tracer
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
+# For the metrics.
+_live_tracks: "LiveObjects[MediaStreamTrack]" = LiveObjects()
+
+
+def _count_tracks() -> Dict[Tuple[str, ...], float]:
+    counts: Dict[Tuple[str, ...], float] = {}
+    for track in _live_tracks.snapshot():
+        if track.readyState != "live":
+            continue
+        track_type = (
+            "async_process" if isinstance(track, AsyncMediaProcessTrack) else "process"
+        )
+        key = (track_type, track.kind)
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def _count_queued_frames() -> Dict[Tuple[str, ...], float]:
+    queued: Dict[Tuple[str, ...], float] = {
+        ("process_input",): 0,
+        ("process_output",): 0,
+    }
+    for track in _live_tracks.snapshot():
+        if isinstance(track, AsyncMediaProcessTrack) and track._thread is not None:
+            queued[("process_input",)] += track._in_queue.qsize()
+            queued[("process_output",)] += len(track._out_deque)
+    return queued
+
+
+TRACKS.add_function(_count_tracks)
+QUEUED_FRAMES.add_function(_count_queued_frames)
+
+
+def _copy_video_frame(frame: av.VideoFrame) -> av.VideoFrame:
+    copy = _copy_frame(frame)
+    if copy is None:
+        # The planes are laid out differently; go through an ndarray.
+        copy = av.VideoFrame.from_ndarray(
+            frame.to_ndarray(format="bgr24"), format="bgr24"
+        )
+    return cast(av.VideoFrame, copy)
+
+
+class _VideoDegradation:
+    """Thins out a video process track's input as the governor's level asks."""
+
+    def __init__(self, governor: ResourceGovernor) -> None:
+        self.governor = governor
+        self._frame_count = 0
+
+    async def next_frame(self, track: MediaStreamTrack) -> Tuple[av.VideoFrame, bool]:
+        """Receive the next frame to output, and whether to run the processor
+        on it."""
+        level = self.governor.level
+        frame = cast(av.VideoFrame, await track.recv())
+        if level >= DegradationLevel.REDUCE_FPS:
+            frame = cast(av.VideoFrame, await track.recv())
+        if level >= DegradationLevel.REDUCE_RESOLUTION:
+            # Even dimensions, as required by the YUV 4:2:0 formats.
+            reduced = frame.reformat(
+                width=max(frame.width // 4 * 2, 2),
+                height=max(frame.height // 4 * 2, 2),
+            )
+            reduced.pts = frame.pts
+            reduced.time_base = frame.time_base
+            frame = reduced
+
+        self._frame_count += 1
+        process = level < DegradationLevel.SKIP_FRAMES or self._frame_count % 2 == 1
+        return frame, process
+
 
 class MediaProcessTrack(MediaStreamTrack, Generic[ProcessorT, FrameT]):
-    def __init__(self, track: MediaStreamTrack, processor: ProcessorT):
+    def __init__(
+        self,
+        track: MediaStreamTrack,
+        processor: ProcessorT,
+        governor: Optional[ResourceGovernor] = None,
+    ):
         super().__init__()  # don't forget this!
         self.track = track
         self.processor: ProcessorT = processor
 
+        self._degradation: Optional[_VideoDegradation] = (
+            _VideoDegradation(governor)
+            if governor is not None and self.kind == "video"
+            else None
+        )
+        self._last_out_frame: Union[FrameT, None] = None
+
         def on_input_track_ended():
             logger.debug("Input track %s ended. Stop self %s", self.track, self)
             self.stop()
 
         self.track.on("ended", on_input_track_ended)
+        _live_tracks.add(self)
 
     async def recv(self):
         if self.readyState != "live":
             raise MediaStreamError
 
-        frame = await self.track.recv()
+        tracer = get_frame_tracer()
+        degradation = self._degradation
+        if degradation is None:
+            frame = await self.track.recv()
+            start_time = time.monotonic()
+            new_frame = self._process(frame)
+            if tracer is not None:
+                tracer.record(frame, "process", start_time)
+                tracer.propagate(frame, new_frame)
+        else:
+            frame, process = await degradation.next_frame(self.track)
+            if process or self._last_out_frame is None:
+                start_time = time.monotonic()
+                new_frame = self._process(frame)
+                degradation.governor.record_frame_latency(time.monotonic() - start_time)
+                if tracer is not None:
+                    tracer.record(frame, "process", start_time)
+                    tracer.propagate(frame, new_frame)
+                self._last_out_frame = new_frame
+            else:
+                # The last output frame has already been sent, so the encoder
+                # gets a copy to stamp with this tick's timestamp.
+                new_frame = _copy_video_frame(self._last_out_frame)
 
-        new_frame = self.processor.recv(frame)
         new_frame.pts = frame.pts
         new_frame.time_base = frame.time_base
 
         return new_frame
 
+    def _process(self, frame: FrameT) -> FrameT:
+        # The processor runs on the event loop, blocking it.
+        FRAMES_PROCESSED.inc(kind=self.kind)
+        with monitor_callback("processor", self.processor, self):
+            return self.processor.recv(frame)
+
     def stop(self):
         super().stop()
 
@@ -70,12 +197,19 @@ class AsyncMediaProcessTrack(MediaStreamTrack, Generic[ProcessorT, FrameT]):
         track: MediaStreamTrack,
         processor: ProcessorT,
         stop_timeout: Optional[float] = None,
+        governor: Optional[ResourceGovernor] = None,
     ):
         super().__init__()  # don't forget this!
 
         self.track = track
         self.processor: ProcessorT = processor
 
+        self._degradation: Optional[_VideoDegradation] = (
+            _VideoDegradation(governor)
+            if governor is not None and self.kind == "video"
+            else None
+        )
+
         self._last_out_frame: Union[FrameT, None] = None
 
         self.stop_timeout = stop_timeout
@@ -90,6 +224,7 @@ class AsyncMediaProcessTrack(MediaStreamTrack, Generic[ProcessorT, FrameT]):
             self.stop()
 
         self.track.on("ended", on_input_track_ended)
+        _live_tracks.add(self)
 
     def _start(self) -> None:
         if self._thread:
@@ -123,6 +258,7 @@ class AsyncMediaProcessTrack(MediaStreamTrack, Generic[ProcessorT, FrameT]):
                 "Some frames have been dropped. "
                 "`recv_queued` is recommended to use instead."
             )
+            FRAMES_DROPPED.inc(len(frames) - 1, stage="process")
         return [self.processor.recv(frames[-1])]
 
     def _worker_thread(self) -> None:
@@ -152,6 +288,11 @@ class AsyncMediaProcessTrack(MediaStreamTrack, Generic[ProcessorT, FrameT]):
             if len(queued_frames) == 0:
                 raise Exception("Unexpectedly, queued frames do not exist")
 
+            tracer = get_frame_tracer()
+            if tracer is not None:
+                for queued_frame in queued_frames:
+                    tracer.end(queued_frame, "process.queue")
+
             # Set up a task, providing the frames.
             if hasattr(self.processor, "recv_queued"):
                 coro = self.processor.recv_queued(queued_frames)
@@ -160,6 +301,7 @@ class AsyncMediaProcessTrack(MediaStreamTrack, Generic[ProcessorT, FrameT]):
 
             task = loop.create_task(coro=coro)
             tasks.append(task)
+            FRAMES_PROCESSED.inc(len(queued_frames), kind=self.kind)
 
             # NOTE: If the execution time of recv_queued() increases
             #       with the length of the input frames,
@@ -170,6 +312,8 @@ class AsyncMediaProcessTrack(MediaStreamTrack, Generic[ProcessorT, FrameT]):
                 asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
             )
             elapsed_time = time.monotonic() - start_time
+            if self._degradation is not None:
+                self._degradation.governor.record_frame_latency(elapsed_time)
 
             if (
                 elapsed_time > 10
@@ -192,18 +336,33 @@ class AsyncMediaProcessTrack(MediaStreamTrack, Generic[ProcessorT, FrameT]):
             finished = done.pop()
             new_frames = finished.result()
 
-            with self._out_lock:
-                if len(self._out_deque) > 1:
-                    logger.warning(
-                        "Not all the queued frames have been consumed, "
-                        "which means the processing and consuming threads "
-                        "seem not to be synchronized."
+            if tracer is not None and finished is task:
+                for queued_frame in queued_frames:
+                    tracer.record(
+                        queued_frame, "process", start_time, batch=len(queued_frames)
                     )
-                    firstitem = self._out_deque.popleft()
-                    self._out_deque.clear()
-                    self._out_deque.append(firstitem)
+                for new_frame in new_frames:
+                    tracer.propagate(queued_frames[-1], new_frame)
+                    tracer.begin(new_frame, "process.output")
+
+            self._put_out_frames(new_frames)
+
+    def _put_out_frames(self, new_frames: List[FrameT]) -> None:
+        """Hand the processed frames over to :meth:`recv`. Called in the
+        worker thread."""
+        with self._out_lock:
+            if len(self._out_deque) > 1:
+                logger.warning(
+                    "Not all the queued frames have been consumed, "
+                    "which means the processing and consuming threads "
+                    "seem not to be synchronized."
+                )
+                firstitem = self._out_deque.popleft()
+                FRAMES_DROPPED.inc(len(self._out_deque), stage="process_output")
+                self._out_deque.clear()
+                self._out_deque.append(firstitem)
 
-                self._out_deque.extend(new_frames)
+            self._out_deque.extend(new_frames)
 
     def stop(self):
         super().stop()
@@ -225,13 +384,31 @@ class AsyncMediaProcessTrack(MediaStreamTrack, Generic[ProcessorT, FrameT]):
 
         self._start()
 
-        frame = await self.track.recv()
-        self._in_queue.put(frame)
-
+        tracer = get_frame_tracer()
+        if self._degradation is None:
+            frame = await self.track.recv()
+            if tracer is not None:
+                tracer.begin(frame, "process.queue")
+            self._in_queue.put(frame)
+        else:
+            frame, process = await self._degradation.next_frame(self.track)
+            if process:
+                if tracer is not None:
+                    tracer.begin(frame, "process.queue")
+                self._in_queue.put(frame)
+
+        return self._next_out_frame(frame)
+
+    def _next_out_frame(self, frame: FrameT) -> FrameT:
+        """The frame to output in place of the input ``frame``: the next
+        processed one, or the last one again if none is ready."""
+        tracer = get_frame_tracer()
         new_frame = None
         with self._out_lock:
             if len(self._out_deque) > 0:
                 new_frame = self._out_deque.popleft()
+        if new_frame is not None and tracer is not None:
+            tracer.end(new_frame, "process.output")
 
         if new_frame is None:
             new_frame = self._last_out_frame
@@ -252,5 +429,89 @@ class AsyncVideoProcessTrack(AsyncMediaProcessTrack[VideoProcessorT, av.VideoFra
 
 
 class AsyncAudioProcessTrack(AsyncMediaProcessTrack[AudioProcessorT, av.AudioFrame]):
+    """Outputs the processed audio through a FIFO of its samples, exactly as
+    many samples as each input frame has, with silence where the processor
+    has not caught up, instead of the last processed frame again.
+
+    The FIFO is an :class:`~streamlit_webrtc.AudioJitterBuffer` with
+    ``output_buffer``, which also sets the sample rate and the layout of
+    the output. Its ``target_delay`` is the processed audio buffered before
+    the first output, to absorb the time the processor takes.
+    """
+
     kind = "audio"
     processor: AudioProcessorT
+
+    def __init__(
+        self,
+        track: MediaStreamTrack,
+        processor: AudioProcessorT,
+        stop_timeout: Optional[float] = None,
+        governor: Optional[ResourceGovernor] = None,
+        output_buffer: JitterBufferOptions = JitterBufferOptions(
+            target_delay=AUDIO_PTIME
+        ),
+    ):
+        super().__init__(track, processor, stop_timeout=stop_timeout, governor=governor)
+        self.output_buffer_options = output_buffer
+        # Made with the ptime of the first frame, by whichever thread has it
+        # first, under `_out_lock`.
+        self._output_buffer: Optional[AudioJitterBuffer] = None
+        self._output_pts: Optional[int] = None
+        self._reported_stats: Optional[JitterBufferStats] = None
+
+    def _get_output_buffer(self, frame: av.AudioFrame) -> AudioJitterBuffer:
+        if self._output_buffer is None:
+            self._output_buffer = AudioJitterBuffer(
+                frame.samples / frame.sample_rate, self.output_buffer_options
+            )
+            self._reported_stats = self._output_buffer.stats()
+        return self._output_buffer
+
+    def _put_out_frames(self, new_frames: List[av.AudioFrame]) -> None:
+        tracer = get_frame_tracer()
+        with self._out_lock:
+            for new_frame in new_frames:
+                if tracer is not None:
+                    tracer.end(new_frame, "process.output")
+                self._get_output_buffer(new_frame).push(new_frame)
+
+    def _next_out_frame(self, frame: av.AudioFrame) -> av.AudioFrame:
+        with self._out_lock:
+            output_buffer = self._get_output_buffer(frame)
+            new_frame = output_buffer.pull_frame()
+            stats = output_buffer.stats()
+        self._report(stats)
+
+        # On a timeline of its own, as the FIFO's output is continuous.
+        if self._output_pts is None:
+            self._output_pts = (
+                round(frame.pts * frame.time_base * new_frame.sample_rate)
+                if frame.pts is not None and frame.time_base is not None
+                else 0
+            )
+        new_frame.pts = self._output_pts
+        new_frame.time_base = fractions.Fraction(1, new_frame.sample_rate)
+        self._output_pts += new_frame.samples
+        return new_frame
+
+    def _report(self, stats: JitterBufferStats) -> None:
+        reported = self._reported_stats
+        if reported is not None:
+            if stats.underruns > reported.underruns:
+                PROCESS_AUDIO_UNDERRUNS.inc(stats.underruns - reported.underruns)
+            if stats.silence > reported.silence:
+                PROCESS_AUDIO_SILENCE.inc(stats.silence - reported.silence)
+        self._reported_stats = stats
+
+    def output_buffer_stats(self) -> Optional[JitterBufferStats]:
+        """The stats of the continuity of the output: the processed audio
+        buffered, the underruns and the silence inserted for them, and the
+        audio dropped as it came too late or exceeded the max delay.
+        ``None`` until the first frame."""
+        output_buffer = self._output_buffer
+        if output_buffer is None:
+            return None
+        # `_out_lock` is made before the buffer.
+        with self._out_lock:
+            return output_buffer.stats()
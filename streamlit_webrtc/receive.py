@@ -1,18 +1,48 @@
 import asyncio
 import logging
 import queue
-from typing import Generic, List, Optional, TypeVar, Union
+from typing import Dict, Generic, List, Optional, Tuple, TypeVar, Union
 
 import av
 from aiortc import MediaStreamTrack
 from aiortc.mediastreams import MediaStreamError
 
+from .metrics import FRAMES_DROPPED, QUEUED_FRAMES, TRACKS, LiveObjects
+from .tracing import get_frame_tracer
+
 logger = logging.getLogger(__name__)
 
 # Type inference does not work on PyAV, which is a Python wrapper of C library.
 # TODO: Write stubs
 FrameT = TypeVar("FrameT", av.VideoFrame, av.AudioFrame)
 
+# For the metrics.
+_live_receivers: "LiveObjects[MediaReceiver]" = LiveObjects()
+
+
+def _count_receivers() -> Dict[Tuple[str, ...], float]:
+    counts: Dict[Tuple[str, ...], float] = {}
+    for receiver in _live_receivers.snapshot():
+        if receiver._task is None or receiver._track is None:
+            continue
+        key = ("receiver", receiver._track.kind)
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def _count_queued_frames() -> Dict[Tuple[str, ...], float]:
+    return {
+        ("receiver",): sum(
+            receiver._frames_queue.qsize()
+            for receiver in _live_receivers.snapshot()
+            if receiver._task is not None
+        )
+    }
+
+
+TRACKS.add_function(_count_receivers)
+QUEUED_FRAMES.add_function(_count_queued_frames)
+
 
 # Inspired by `aiortc.contrib.media.MediaRecorder`:
 # https://github.com/aiortc/aiortc/blob/2362e6d1f0c730a0f8c387bbea76546775ad2fe8/src/aiortc/contrib/media.py#L304  # noqa: E501
@@ -32,6 +62,7 @@ class MediaReceiver(Generic[FrameT]):
         self._track = None
         self._task = None
         self._frame_read = False
+        _live_receivers.add(self)
 
     def addTrack(self, track: MediaStreamTrack):
         if self._track is not None:
@@ -65,7 +96,11 @@ class MediaReceiver(Generic[FrameT]):
     def get_frame(self, block: bool = True, timeout: Optional[float] = None) -> FrameT:
         self._frame_read = True
 
-        return self._frames_queue.get(block=block, timeout=timeout)
+        frame = self._frames_queue.get(block=block, timeout=timeout)
+        tracer = get_frame_tracer()
+        if tracer is not None:
+            tracer.end(frame, "receiver.queue")
+        return frame
 
     def get_frames(
         self, block: bool = True, timeout: Optional[float] = None
@@ -78,6 +113,10 @@ class MediaReceiver(Generic[FrameT]):
         frames: List[FrameT] = []
         while not self._frames_queue.empty():
             frames.append(self._frames_queue.get_nowait())
+        tracer = get_frame_tracer()
+        if tracer is not None:
+            for frame in frames:
+                tracer.end(frame, "receiver.queue")
         return frames
 
     async def _run_track(self, track: MediaStreamTrack):
@@ -95,6 +134,10 @@ class MediaReceiver(Generic[FrameT]):
                         self._frames_queue.maxsize,
                     )
                 self._frames_queue.get_nowait()
+                FRAMES_DROPPED.inc(stage="receiver")
+            tracer = get_frame_tracer()
+            if tracer is not None:
+                tracer.begin(frame, "receiver.queue")
             self._frames_queue.put(frame)
 
 
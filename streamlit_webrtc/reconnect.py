@@ -0,0 +1,135 @@
+"""Input tracks that survive the replacement of their peer connection.
+
+aiortc cannot restart ICE on an existing ``RTCPeerConnection``: once its ICE
+transport has failed, the connection is done for. To recover from a network
+blip without a cold start, the worker negotiates a *new* peer connection
+with the same frontend and moves the media over to it. The processors,
+receivers, sinks and recorders read the peer's media through a
+:class:`ReconnectableTrack`, so they keep running across the switch and
+simply see a short gap in the frames. A
+:class:`~streamlit_webrtc.recorder.PassthroughRecorder` reads the peer's
+encoded packets through a :class:`ReconnectableEncodedTrack` likewise.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional, Union, cast
+
+from aiortc.mediastreams import MediaStreamError, MediaStreamTrack
+from aiortc.rtcrtpparameters import RTCRtpCodecParameters
+from av.frame import Frame
+from av.packet import Packet
+
+from .encoded import EncodedStreamTrack
+
+__all__ = ["ReconnectableEncodedTrack", "ReconnectableTrack"]
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class ReconnectableTrack(MediaStreamTrack):
+    """Relays the frames of a remote track that can be swapped for another.
+
+    When the current upstream track ends, :meth:`recv` waits for a new one to
+    be set with :meth:`replace` instead of ending, so consumers outlive the
+    peer connection the upstream belongs to. The track only ends when it is
+    stopped. Timestamps are rebased on each replacement so that they keep
+    increasing, by the wall-clock time the track was waiting, across
+    reconnections.
+    """
+
+    def __init__(self, track: MediaStreamTrack) -> None:
+        super().__init__()
+        self.kind = track.kind
+        self._track = track
+        self._replaced = asyncio.Event()
+
+        self._pts_offset: Optional[int] = 0
+        self._last_pts: Optional[int] = None
+        self._last_recv_time: Optional[float] = None
+
+    @property
+    def upstream(self) -> MediaStreamTrack:
+        return self._track
+
+    def replace(self, track: MediaStreamTrack) -> None:
+        """Continue with the frames of ``track``."""
+        if track.kind != self.kind:
+            raise ValueError(
+                f"Cannot replace a {self.kind} track with a {track.kind} track"
+            )
+        logger.info("Replace the upstream of the %s track", self.kind)
+        self._track = track
+        # Computed from the first frame of the new upstream.
+        self._pts_offset = None
+        self._replaced.set()
+
+    async def recv(self) -> Union[Frame, Packet]:
+        while True:
+            if self.readyState != "live":
+                raise MediaStreamError
+
+            track = self._track
+            try:
+                frame = await track.recv()
+            except MediaStreamError:
+                if self.readyState != "live":
+                    raise
+                if track is self._track:
+                    logger.debug(
+                        "The upstream of the %s track ended. Wait for a replacement.",
+                        self.kind,
+                    )
+                    self._replaced.clear()
+                    await self._replaced.wait()
+                continue
+
+            if track is not self._track:
+                # Replaced while this frame was in flight.
+                continue
+            return self._rebase(frame)
+
+    def stop(self) -> None:
+        super().stop()
+        self._replaced.set()
+
+    def _rebase(self, frame: Union[Frame, Packet]) -> Union[Frame, Packet]:
+        now = time.monotonic()
+        if frame.pts is not None:
+            if self._pts_offset is None:
+                self._pts_offset = 0
+                if (
+                    self._last_pts is not None
+                    and self._last_recv_time is not None
+                    and frame.time_base
+                ):
+                    gap = int((now - self._last_recv_time) / frame.time_base)
+                    self._pts_offset = self._last_pts + max(gap, 1) - frame.pts
+            frame.pts += self._pts_offset
+            if isinstance(frame, Packet) and frame.dts is not None:
+                frame.dts += self._pts_offset
+            self._last_pts = frame.pts
+        self._last_recv_time = now
+        return frame
+
+
+class ReconnectableEncodedTrack(ReconnectableTrack):
+    """Relays the encoded packets of an :class:`EncodedStreamTrack` that can
+    be swapped for that of the tap of a new peer connection."""
+
+    def __init__(self, track: EncodedStreamTrack) -> None:
+        super().__init__(track)
+
+    @property
+    def codec(self) -> Optional[RTCRtpCodecParameters]:
+        return cast(EncodedStreamTrack, self._track).codec
+
+    async def recv(self) -> Packet:
+        return cast(Packet, await super().recv())
+
+    def replace(self, track: MediaStreamTrack) -> None:
+        if not isinstance(track, EncodedStreamTrack):
+            raise TypeError(f"Expected an encoded track, got {track!r}")
+        super().replace(track)
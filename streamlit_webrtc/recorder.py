@@ -0,0 +1,218 @@
+"""Recorder that remuxes the peer's encoded media without transcoding."""
+
+import asyncio
+import logging
+import struct
+import time
+from typing import Dict, List, Optional, Union
+
+import av
+from aiortc.mediastreams import MediaStreamError
+from aiortc.rtcrtpparameters import RTCRtpCodecParameters
+
+from .encoded import EncodedStreamTrack
+from .reconnect import ReconnectableEncodedTrack
+
+__all__ = ["PassthroughRecorder"]
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+# Opus identification header (RFC 7845 5.1), which Matroska/WebM require as
+# the codec private data. aiortc never gives us one since the encoder runs in
+# the browser.
+def _opus_head(channels: int, sample_rate: int) -> bytes:
+    pre_skip = 312
+    return b"OpusHead" + struct.pack(
+        "<BBHIhB", 1, channels, pre_skip, sample_rate, 0, 0
+    )
+
+
+def _vp8_frame_size(data: bytes) -> Optional[tuple]:
+    # RFC 6386 9.1: a keyframe has a 3-byte frame tag, the 0x9d012a start
+    # code, then 14-bit width and height.
+    if len(data) < 10 or data[3:6] != b"\x9d\x01\x2a":
+        return None
+    width, height = struct.unpack("<HH", data[6:10])
+    return width & 0x3FFF, height & 0x3FFF
+
+
+_RecordedTrack = Union[EncodedStreamTrack, ReconnectableEncodedTrack]
+
+
+class _TrackContext:
+    def __init__(self) -> None:
+        self.codec: Optional[RTCRtpCodecParameters] = None
+        self.first_packet: Optional[av.Packet] = None
+        self.pending: List[av.Packet] = []
+        self.stream: Optional[av.stream.Stream] = None
+        self.last_dts: Optional[int] = None
+        self.task: Optional[asyncio.Task] = None
+        self.ended = False
+
+
+class PassthroughRecorder:
+    """Records the peer's media into a container without decoding it.
+
+    A drop-in alternative to aiortc's ``MediaRecorder`` for
+    ``in_recorder_factory``: the frames the browser encoded are remuxed as-is,
+    so recordings are bit-identical to what was sent and no decoder or
+    encoder runs for them. If nothing else consumes the input (no
+    processor, sink, receiver or sendback), the session's media is not
+    decoded at all.
+
+    VP8 and Opus can be written to WebM (the default format); H.264 needs
+    Matroska, e.g. ``PassthroughRecorder("in.mkv")``.
+
+    The container is written once every added track has delivered its first
+    packet (a keyframe for video), or ``stream_setup_timeout`` seconds after
+    the first packet, whichever comes first; tracks that are still silent by
+    then are left out of the recording.
+    """
+
+    def __init__(
+        self,
+        file: str,
+        format: Optional[str] = None,
+        *,
+        stream_setup_timeout: float = 5.0,
+    ) -> None:
+        if format is None and not str(file).endswith((".mkv", ".mka")):
+            format = "webm"
+        self._file = file
+        self._format = format
+        self._stream_setup_timeout = stream_setup_timeout
+        self._container: Optional[av.container.OutputContainer] = None
+        self._setup_deadline: Optional[float] = None
+        self._closed = False
+        self._tracks: Dict[_RecordedTrack, _TrackContext] = {}
+
+    def addTrack(self, track: _RecordedTrack) -> None:
+        if not isinstance(track, (EncodedStreamTrack, ReconnectableEncodedTrack)):
+            raise TypeError(
+                f"{self.__class__.__name__} records encoded tracks only, got {track!r}"
+            )
+        self._tracks[track] = _TrackContext()
+
+    async def start(self) -> None:
+        for track, context in self._tracks.items():
+            if context.task is None:
+                context.task = asyncio.ensure_future(self._run_track(track))
+
+    async def stop(self) -> None:
+        for context in self._tracks.values():
+            if context.task is not None:
+                context.task.cancel()
+                context.task = None
+        self._close()
+
+    async def _run_track(self, track: _RecordedTrack) -> None:
+        context = self._tracks[track]
+        while True:
+            try:
+                packet = await track.recv()
+            except MediaStreamError:
+                break
+            try:
+                self._handle_packet(track, context, packet)
+            except Exception:
+                logger.exception("Failed to record a packet from %s", track)
+
+        context.ended = True
+        if all(c.ended for c in self._tracks.values()):
+            self._close()
+
+    def _handle_packet(
+        self, track: _RecordedTrack, context: _TrackContext, packet: av.Packet
+    ) -> None:
+        if self._closed:
+            return
+        if context.first_packet is None:
+            if track.kind == "video" and not packet.is_keyframe:
+                return
+            context.codec = track.codec
+            context.first_packet = packet
+            if self._setup_deadline is None:
+                self._setup_deadline = time.monotonic() + self._stream_setup_timeout
+
+        if self._container is None:
+            context.pending.append(packet)
+            ready = all(c.first_packet is not None for c in self._tracks.values())
+            deadline = self._setup_deadline
+            if ready or (deadline is not None and time.monotonic() >= deadline):
+                self._open()
+            return
+
+        self._mux(context, packet)
+
+    def _open(self) -> None:
+        container = av.open(self._file, mode="w", format=self._format)
+        for track, context in self._tracks.items():
+            if context.first_packet is None:
+                logger.warning(
+                    "No %s packet arrived before the recording started. "
+                    "The track is not recorded.",
+                    track.kind,
+                )
+                continue
+            context.stream = self._add_stream(container, context)
+        self._container = container
+
+        for context in self._tracks.values():
+            pending, context.pending = context.pending, []
+            for packet in pending:
+                self._mux(context, packet)
+
+    @staticmethod
+    def _add_stream(
+        container: av.container.OutputContainer, context: _TrackContext
+    ) -> av.stream.Stream:
+        codec = context.codec
+        assert codec is not None and context.first_packet is not None
+        name = codec.name.lower()
+        stream: av.stream.Stream
+        if name == "vp8":
+            stream = container.add_stream("libvpx")
+            size = _vp8_frame_size(bytes(context.first_packet))
+            if size:
+                stream.width, stream.height = size
+        elif name == "h264":
+            stream = container.add_stream("h264")
+        elif name == "opus":
+            channels = codec.channels or 2
+            stream = container.add_stream("libopus", rate=codec.clockRate)
+            stream.codec_context.extradata = _opus_head(channels, codec.clockRate)
+        elif name in ("pcmu", "pcma"):
+            stream = container.add_stream(
+                "pcm_mulaw" if name == "pcmu" else "pcm_alaw", rate=codec.clockRate
+            )
+        else:
+            raise ValueError(f"Codec {codec.mimeType} cannot be recorded as-is")
+        return stream
+
+    def _mux(self, context: _TrackContext, packet: av.Packet) -> None:
+        if context.stream is None or self._container is None:
+            return
+        # Containers require strictly increasing timestamps per stream.
+        dts = packet.dts
+        if dts is None or (context.last_dts is not None and dts <= context.last_dts):
+            return
+        context.last_dts = dts
+        time_base = packet.time_base
+        packet.stream = context.stream
+        packet.time_base = time_base
+        self._container.mux(packet)
+
+    def _close(self) -> None:
+        if self._closed:
+            return
+        if self._container is None and any(
+            c.first_packet is not None for c in self._tracks.values()
+        ):
+            # Stopped before every track showed up; write what has arrived.
+            self._open()
+        self._closed = True
+        if self._container is not None:
+            self._container.close()
+            self._container = None
@@ -1,12 +1,301 @@
-from aiortc.contrib.media import MediaRelay
+"""Relaying a track to multiple consumers with bounded buffering.
+
+aiortc's ``MediaRelay`` gives each buffered subscriber an unbounded queue, so
+a consumer that stops reading, e.g. a stuck recorder, makes the queue grow
+for as long as the source produces frames. :class:`BoundedMediaRelay` caps
+each subscriber's queue, drops frames by a policy when it is full, counts the
+lag and the drops per subscriber, and can evict a subscriber that has fallen
+too far behind.
+"""
+
+import asyncio
+import collections
+import logging
+import time
+from typing import Deque, Dict, List, Literal, NamedTuple, Optional, Set, Tuple, Union
+
+from aiortc.contrib.media import MediaRelay, RelayStreamTrack
+from aiortc.mediastreams import MediaStreamError, MediaStreamTrack
+from av.frame import Frame
+from av.packet import Packet
 from streamlit.runtime.runtime import Runtime
 
 from .eventloop import get_global_event_loop, loop_context
+from .metrics import FRAMES_DROPPED, QUEUED_FRAMES, LiveObjects
+from .tracing import get_frame_tracer
+
+__all__ = [
+    "BoundedMediaRelay",
+    "BoundedRelayStreamTrack",
+    "DropPolicy",
+    "RelaySubscriberStats",
+    "get_global_relay",
+]
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Which frame to drop when a subscriber's queue is full: the oldest one in
+# the queue, keeping the latency low, or the arriving one, keeping the frames
+# already queued.
+DropPolicy = Literal["drop_oldest", "drop_newest"]
+
+_Item = Union[Frame, Packet, None]
+
+
+class RelaySubscriberStats(NamedTuple):
+    subscriber_id: int
+    source_id: int
+    kind: str
+    buffered: bool
+    # Frames waiting in the queue, now and at most.
+    queued: int
+    max_queued: int
+    frames_delivered: int
+    frames_dropped: int
+    # Seconds the oldest queued frame has been waiting.
+    lag: float
+    # Seconds since the subscriber last took a frame while frames are
+    # waiting for it; keeps growing while its consumer is stuck.
+    stalled: float
+    evicted: bool
+
+
+class BoundedRelayStreamTrack(RelayStreamTrack):
+    """A subscriber of a :class:`BoundedMediaRelay`."""
+
+    def __init__(
+        self,
+        relay: "BoundedMediaRelay",
+        source: MediaStreamTrack,
+        buffered: bool,
+        maxsize: int,
+        drop_policy: DropPolicy,
+    ) -> None:
+        super().__init__(relay, source, buffered)
+        self._source_id = id(source)
+        # Unbuffered subscribers only get the latest frame, like aiortc's.
+        self._maxsize = maxsize if buffered else 1
+        self._drop_policy: DropPolicy = drop_policy if buffered else "drop_oldest"
+        # Pairs of the time a frame was queued and the frame. `None` ends the
+        # track.
+        self._items: Deque[Tuple[float, _Item]] = collections.deque()
+        self._items_available = asyncio.Event()
+        # Since when the frames in the queue have been waiting to be taken.
+        self._waiting_since = 0.0
+
+        self._max_queued = 0
+        self._frames_delivered = 0
+        self._frames_dropped = 0
+        self._evicted = False
+
+    async def recv(self) -> Union[Frame, Packet]:
+        if self.readyState != "live":
+            raise MediaStreamError
+
+        relay = self._relay
+        if relay is not None:
+            relay._start(self)
+
+        while not self._items:
+            self._items_available.clear()
+            await self._items_available.wait()
+            if self.readyState != "live":
+                raise MediaStreamError
+
+        queued_at, frame = self._items.popleft()
+        self._waiting_since = time.monotonic()
+        if frame is None:
+            self.stop()
+            raise MediaStreamError
+        self._frames_delivered += 1
+        tracer = get_frame_tracer()
+        if tracer is not None:
+            tracer.record(frame, "relay", queued_at, subscriber=id(self))
+        return frame
+
+    def stop(self) -> None:
+        super().stop()
+        # Wake up a pending `recv()`.
+        self._items_available.set()
+
+    def stats(self) -> RelaySubscriberStats:
+        now = time.monotonic()
+        items = self._items
+        return RelaySubscriberStats(
+            subscriber_id=id(self),
+            source_id=self._source_id,
+            kind=self.kind,
+            buffered=self._buffered,
+            queued=len(items) - (1 if items and items[-1][1] is None else 0),
+            max_queued=self._max_queued,
+            frames_delivered=self._frames_delivered,
+            frames_dropped=self._frames_dropped,
+            lag=now - items[0][0] if items else 0.0,
+            stalled=self._stalled(now),
+            evicted=self._evicted,
+        )
+
+    def _put(self, frame: _Item, now: float) -> None:
+        # The end of the track is queued beyond the bound, after all the
+        # frames.
+        if frame is not None and len(self._items) >= self._maxsize:
+            if self._drop_policy == "drop_oldest":
+                self._drop(self._items.popleft()[1])
+            else:
+                self._drop(frame)
+                return
+        if not self._items:
+            self._waiting_since = now
+        self._items.append((now, frame))
+        if frame is not None:
+            self._max_queued = max(self._max_queued, len(self._items))
+        self._items_available.set()
+
+    def _drop(self, frame: _Item) -> None:
+        if frame is not None:
+            self._frames_dropped += 1
+            FRAMES_DROPPED.inc(stage="relay")
+
+    def _stalled(self, now: float) -> float:
+        return now - self._waiting_since if self._items else 0.0
+
+    def _evict(self) -> None:
+        self._evicted = True
+        while self._items:
+            self._drop(self._items.popleft()[1])
+        self.stop()
+
+
+# For the metrics.
+_live_relays: "LiveObjects[BoundedMediaRelay]" = LiveObjects()
+
+
+def _count_queued_frames() -> Dict[Tuple[str, ...], float]:
+    return {
+        ("relay",): sum(
+            stats.queued for relay in _live_relays.snapshot() for stats in relay.stats()
+        )
+    }
+
+
+QUEUED_FRAMES.add_function(_count_queued_frames)
+
+
+class BoundedMediaRelay(MediaRelay):
+    """A drop-in replacement of aiortc's ``MediaRelay`` that bounds the
+    buffering of each subscriber.
+
+    Each buffered subscriber queues at most ``maxsize`` frames, and frames
+    are dropped by ``drop_policy`` beyond that. With ``evict_after``, a
+    subscriber that has not taken any frame for that many seconds while
+    frames were waiting for it is evicted: it is stopped, so its consumer
+    sees the track end, and the relay stops buffering for it. Changes to
+    ``maxsize`` and ``drop_policy`` apply to the subscribers created
+    afterwards, and changes to ``evict_after`` right away.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 30,
+        drop_policy: DropPolicy = "drop_oldest",
+        evict_after: Optional[float] = None,
+    ) -> None:
+        super().__init__()
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.drop_policy: DropPolicy = drop_policy
+        self.evict_after = evict_after
+
+        self._proxies: Dict[MediaStreamTrack, Set[BoundedRelayStreamTrack]] = {}
+        self._tasks: Dict[MediaStreamTrack, "asyncio.Future[None]"] = {}
+        self._subscribers: Dict[int, BoundedRelayStreamTrack] = {}
+        # The number of subscribers evicted so far.
+        self.evictions = 0
+        _live_relays.add(self)
+
+    def subscribe(
+        self, track: MediaStreamTrack, buffered: bool = True
+    ) -> MediaStreamTrack:
+        proxy = BoundedRelayStreamTrack(
+            self,
+            track,
+            buffered,
+            maxsize=self.maxsize,
+            drop_policy=self.drop_policy,
+        )
+        logger.debug("Create proxy %s for source %s", id(proxy), id(track))
+        self._proxies.setdefault(track, set())
+        return proxy
+
+    def stats(self) -> List[RelaySubscriberStats]:
+        """The stats of the started subscribers that are still subscribed."""
+        return [proxy.stats() for proxy in list(self._subscribers.values())]
+
+    def _start(self, proxy: RelayStreamTrack) -> None:
+        track = proxy._source
+        if track is None or track not in self._proxies:
+            return
+        assert isinstance(proxy, BoundedRelayStreamTrack)
+        proxies = self._proxies[track]
+        if proxy not in proxies:
+            logger.debug("Start proxy %s", id(proxy))
+            proxies.add(proxy)
+            self._subscribers[id(proxy)] = proxy
+        if track not in self._tasks:
+            self._tasks[track] = asyncio.ensure_future(self._run_track(track))
+
+    def _stop(self, proxy: RelayStreamTrack) -> None:
+        track = proxy._source
+        if track is None or track not in self._proxies:
+            return
+        assert isinstance(proxy, BoundedRelayStreamTrack)
+        logger.debug("Stop proxy %s", id(proxy))
+        self._proxies[track].discard(proxy)
+        self._subscribers.pop(id(proxy), None)
+
+    async def _run_track(self, track: MediaStreamTrack) -> None:
+        logger.debug("Start reading source %s", id(track))
+        try:
+            while True:
+                frame: _Item
+                try:
+                    frame = await track.recv()
+                except MediaStreamError:
+                    frame = None
+                now = time.monotonic()
+                # Evicting a subscriber removes it from the set.
+                for proxy in list(self._proxies[track]):
+                    proxy._put(frame, now)
+                    if (
+                        frame is not None
+                        and self.evict_after is not None
+                        and proxy._stalled(now) > self.evict_after
+                    ):
+                        logger.warning(
+                            "Evict the relay subscriber %s of a %s track, "
+                            "stalled for %.1f seconds with %d frames dropped",
+                            id(proxy),
+                            track.kind,
+                            proxy._stalled(now),
+                            proxy._frames_dropped,
+                        )
+                        proxy._evict()
+                        self.evictions += 1
+                if frame is None:
+                    break
+        finally:
+            logger.debug("Stop reading source %s", id(track))
+            for proxy in self._proxies.pop(track, set()):
+                self._subscribers.pop(id(proxy), None)
+            self._tasks.pop(track, None)
+
 
 _SERVER_GLOBAL_RELAY_ATTR_NAME_ = "streamlit-webrtc-global-relay"
 
 
-def get_global_relay() -> MediaRelay:
+def get_global_relay() -> BoundedMediaRelay:
     singleton = Runtime.instance()  # type: ignore
 
     if hasattr(singleton, _SERVER_GLOBAL_RELAY_ATTR_NAME_):
@@ -14,6 +303,6 @@ def get_global_relay() -> MediaRelay:
     else:
         loop = get_global_event_loop()
         with loop_context(loop):
-            relay = MediaRelay()
+            relay = BoundedMediaRelay()
             setattr(singleton, _SERVER_GLOBAL_RELAY_ATTR_NAME_, relay)
         return relay
@@ -0,0 +1,314 @@
+"""Mixing the audio of a room where every participant hears everyone else.
+
+Giving each participant a :class:`~streamlit_webrtc.mix.MediaStreamMixTrack`
+of the other participants' inputs sums every input once per listener, so the
+work grows with the square of the participants. :class:`AudioMixRoom` sums
+all the inputs once per tick instead, and derives the output of each
+participant by subtracting their own input from the sum.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import fractions
+import logging
+import threading
+from typing import Dict, Hashable, NamedTuple, Optional, cast
+
+import av
+import numpy as np
+from aiortc import MediaStreamTrack
+from aiortc.contrib.media import MediaRelay, RelayStreamTrack
+from aiortc.mediastreams import MediaStreamError
+
+from .eventloop import get_global_event_loop, loop_context
+from .jitter_buffer import AudioJitterBuffer, JitterBufferOptions, JitterBufferStats
+from .loop_monitor import monitor_callback
+from .metrics import FRAMES_DROPPED
+from .relay import get_global_relay
+from .source import AUDIO_PTIME
+
+__all__ = [
+    "AudioMixRoom",
+    "AudioMixRoomStats",
+]
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class AudioMixRoomStats(NamedTuple):
+    participants: int
+    ticks: int
+    # Ticks skipped as the room ran later than their time.
+    missed_ticks: int
+    # Output frames dropped as a participant's consumer did not keep up.
+    dropped: int
+    jitter_buffers: Dict[Hashable, JitterBufferStats]
+
+
+class _RoomOutputTrack(MediaStreamTrack):
+    kind = "audio"
+
+    def __init__(self, room: "AudioMixRoom", queue_size: int) -> None:
+        super().__init__()
+        self._room = room
+        self._queue: "asyncio.Queue[Optional[av.AudioFrame]]" = asyncio.Queue(
+            maxsize=queue_size
+        )
+
+    def _put(self, frame: Optional[av.AudioFrame]) -> bool:
+        """Queue ``frame``, dropping the oldest one if full. ``None`` ends the
+        track. Returns whether a frame was dropped."""
+        dropped = False
+        if self._queue.full():
+            self._queue.get_nowait()
+            dropped = True
+        self._queue.put_nowait(frame)
+        return dropped
+
+    async def recv(self) -> av.AudioFrame:
+        if self.readyState != "live":
+            raise MediaStreamError
+
+        self._room._start()
+
+        frame = await self._queue.get()
+        if frame is None:
+            self.stop()
+            raise MediaStreamError
+        return frame
+
+
+class _Participant:
+    __slots__ = ("output", "input_track", "input_proxy", "input_task", "jitter_buffer")
+
+    def __init__(self, output: _RoomOutputTrack, jitter_buffer: AudioJitterBuffer):
+        self.output = output
+        self.input_track: Optional[MediaStreamTrack] = None
+        self.input_proxy: Optional[RelayStreamTrack] = None
+        self.input_task: Optional[concurrent.futures.Future] = None
+        self.jitter_buffer = jitter_buffer
+
+
+async def _input_coro(participant: _Participant, input_proxy: RelayStreamTrack) -> None:
+    while True:
+        try:
+            frame = await input_proxy.recv()
+        except MediaStreamError:
+            # The participant stays in the room, silent, until removed or
+            # given another input.
+            return
+        if participant.input_proxy is input_proxy and isinstance(frame, av.AudioFrame):
+            participant.jitter_buffer.push(frame)
+
+
+class AudioMixRoom:
+    """Mixes the audio inputs of the participants of a room so that each
+    hears everyone but themselves.
+
+    :meth:`output_track` returns the track a participant hears, to pass as the
+    ``source_audio_track`` of their ``webrtc_streamer()``, and
+    :meth:`set_input_track` sets the track they speak in. Each input is
+    buffered with ``jitter_buffer``, which also sets the sample rate and the
+    layout of the outputs. Every ``ptime`` seconds, one ptime of samples is
+    pulled from each input and summed once into an int32 buffer; the output
+    of each participant is the sum minus their own samples, saturated to s16.
+    """
+
+    def __init__(
+        self,
+        *,
+        ptime: float = AUDIO_PTIME,
+        jitter_buffer: JitterBufferOptions = JitterBufferOptions(),
+        output_queue_size: int = 2,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        relay: Optional[MediaRelay] = None,
+    ) -> None:
+        self.ptime = ptime
+        self.jitter_buffer_options = jitter_buffer
+        self.output_queue_size = output_queue_size
+        self._loop = loop if loop is not None else get_global_event_loop()
+        self._relay = relay if relay is not None else get_global_relay()
+
+        # Validates the options.
+        probe = AudioJitterBuffer(ptime, jitter_buffer)
+        self.sample_rate = probe.sample_rate
+        self.samples = probe.samples
+        self.channels = probe.channels
+        self._time_base = fractions.Fraction(1, self.sample_rate)
+
+        self._participants: Dict[Hashable, _Participant] = {}
+        self._participants_lock = threading.Lock()
+
+        # Grown to the number of participants as they join.
+        self._inputs = np.zeros((0, self.samples, self.channels), dtype=np.int16)
+        self._outputs = np.zeros((0, self.samples, self.channels), dtype=np.int32)
+        self._total = np.zeros((self.samples, self.channels), dtype=np.int32)
+
+        self._task: Optional[asyncio.Task] = None
+        self._ticks = 0
+        self._missed_ticks = 0
+        self._dropped = 0
+
+    def output_track(self, participant: Hashable) -> MediaStreamTrack:
+        """The track ``participant`` hears, adding them to the room if not
+        there yet."""
+        with self._participants_lock:
+            state = self._participants.get(participant)
+            if state is None:
+                with loop_context(self._loop):
+                    output = _RoomOutputTrack(self, self.output_queue_size)
+                state = _Participant(
+                    output, AudioJitterBuffer(self.ptime, self.jitter_buffer_options)
+                )
+                self._participants[participant] = state
+            return state.output
+
+    def set_input_track(
+        self, participant: Hashable, input_track: MediaStreamTrack
+    ) -> None:
+        """Make ``input_track`` what ``participant`` says to the others."""
+        self.output_track(participant)
+        with self._participants_lock:
+            state = self._participants[participant]
+            if state.input_track is input_track:
+                return
+            self._stop_input(state)
+            with loop_context(self._loop):
+                input_proxy = cast(RelayStreamTrack, self._relay.subscribe(input_track))
+            state.input_track = input_track
+            state.input_proxy = input_proxy
+            # The new input's timestamps are on a clock of its own.
+            state.jitter_buffer = AudioJitterBuffer(
+                self.ptime, self.jitter_buffer_options
+            )
+            state.input_task = asyncio.run_coroutine_threadsafe(
+                _input_coro(state, input_proxy), self._loop
+            )
+
+    def remove_participant(self, participant: Hashable) -> None:
+        """Remove ``participant`` from the room, ending their output track."""
+        with self._participants_lock:
+            state = self._participants.pop(participant, None)
+        if state is None:
+            return
+        self._stop_input(state)
+        self._loop.call_soon_threadsafe(state.output._put, None)
+
+    def _stop_input(self, state: _Participant) -> None:
+        state.input_track = None
+        input_proxy, state.input_proxy = state.input_proxy, None
+        input_task, state.input_task = state.input_task, None
+        if input_task is not None:
+            input_task.cancel()
+        if input_proxy is not None:
+            self._loop.call_soon_threadsafe(input_proxy.stop)
+
+    def stats(self) -> AudioMixRoomStats:
+        with self._participants_lock:
+            participants = list(self._participants.items())
+        return AudioMixRoomStats(
+            participants=len(participants),
+            ticks=self._ticks,
+            missed_ticks=self._missed_ticks,
+            dropped=self._dropped,
+            jitter_buffers={
+                participant: state.jitter_buffer.stats()
+                for participant, state in participants
+            },
+        )
+
+    def stop(self) -> None:
+        """Remove all the participants and stop mixing."""
+        with self._participants_lock:
+            participants = list(self._participants)
+        for participant in participants:
+            self.remove_participant(participant)
+        task, self._task = self._task, None
+        if task is not None:
+            self._loop.call_soon_threadsafe(task.cancel)
+
+    def _start(self) -> None:
+        if self._task is None:
+            self._task = self._loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        try:
+            await self._tick_until_empty()
+        except Exception as exc:
+            logger.error("Error occurred in the audio room: %s", exc, exc_info=True)
+            # No more mixes are coming, so end the participants' outputs. The
+            # ones who join afterwards start mixing again.
+            with self._participants_lock:
+                participants = list(self._participants)
+            for participant in participants:
+                self.remove_participant(participant)
+            raise
+        finally:
+            if self._task is asyncio.current_task():
+                self._task = None
+
+    async def _tick_until_empty(self) -> None:
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        tick = 0
+        while True:
+            delay = started_at + tick * self.ptime - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif -delay >= self.ptime:
+                missed = int(-delay // self.ptime)
+                self._missed_ticks += missed
+                tick += missed
+            with self._participants_lock:
+                empty = not self._participants
+            if empty:
+                # Until the next participant's `recv()` starts it again.
+                return
+            pts = tick * self.samples
+            tick += 1
+            self._ticks += 1
+
+            with monitor_callback("mixer", self, self):
+                self._mix(pts)
+
+    def _mix(self, pts: int) -> None:
+        with self._participants_lock:
+            participants = list(self._participants.values())
+        n = len(participants)
+        if len(self._inputs) < n:
+            capacity = max(n, 2 * len(self._inputs))
+            self._inputs = np.zeros(
+                (capacity, self.samples, self.channels), dtype=np.int16
+            )
+            self._outputs = np.zeros(
+                (capacity, self.samples, self.channels), dtype=np.int32
+            )
+
+        inputs = self._inputs[:n]
+        for i, participant in enumerate(participants):
+            participant.jitter_buffer.pull(inputs[i])
+
+        # The sum once, then everyone's output from it.
+        total = self._total
+        np.sum(inputs, axis=0, dtype=np.int32, out=total)
+        outputs = self._outputs[:n]
+        np.subtract(total, inputs, out=outputs)
+        np.clip(outputs, -32768, 32767, out=outputs)
+
+        layout = self.jitter_buffer_options.layout
+        for i, participant in enumerate(participants):
+            frame = av.AudioFrame.from_ndarray(
+                outputs[i].astype(np.int16).reshape(1, -1), format="s16", layout=layout
+            )
+            frame.sample_rate = self.sample_rate
+            frame.pts = pts
+            frame.time_base = self._time_base
+            if participant.output._put(frame):
+                self._dropped += 1
+                FRAMES_DROPPED.inc(stage="room")
+
+    def __repr__(self) -> str:
+        return f"<AudioMixRoom participants={len(self._participants)}>"
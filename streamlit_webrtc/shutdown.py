@@ -1,9 +1,10 @@
+import functools
 import logging
 import threading
 import weakref
-from typing import Callable, Union
+from typing import Callable, Dict, List, Optional, Set
 
-from ._compat import AppSession, AppSessionState, get_script_run_ctx
+from ._compat import AppSession, AppSessionState, ScriptRunnerEvent, get_script_run_ctx
 from .session_info import get_this_session_info
 
 logger = logging.getLogger(__name__)
@@ -18,11 +19,208 @@ def _get_current_page_script_hash(app_session: AppSession) -> str:
     return getattr(app_session._client_state, "page_script_hash", "") or ""
 
 
+class _WatchedSession:
+    def __init__(self, session_ref: "weakref.ReferenceType[AppSession]") -> None:
+        self.session_ref = session_ref
+        # Observer -> the page script hash it was created on.
+        self.observers: Dict["SessionShutdownObserver", str] = {}
+
+
+class _SessionWatcher:
+    """The one thread behind all the :class:`SessionShutdownObserver` s of
+    the process.
+
+    Observers are registered per session, so registering and unregistering
+    one is a dict operation. A session is checked as soon as Streamlit
+    reports a change of its state (see :func:`_install_app_session_hooks`),
+    and all of them are swept every ``sweep_interval`` seconds as a safety
+    net, e.g. for when those hooks are unavailable. The thread runs only
+    while there are observers. Each callback runs on a thread of its own, so
+    that one slow to release its resources does not hold up the others or
+    the watching.
+    """
+
+    def __init__(self, sweep_interval: float = 1.0) -> None:
+        self.sweep_interval = sweep_interval
+        self._cond = threading.Condition()
+        self._sessions: Dict[str, _WatchedSession] = {}
+        self._changed_session_ids: Set[str] = set()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(
+        self,
+        observer: "SessionShutdownObserver",
+        session: AppSession,
+        initial_page_script_hash: str,
+    ) -> None:
+        _install_app_session_hooks()
+        session_id = session.id
+        with self._cond:
+            watched = self._sessions.get(session_id)
+            if watched is None:
+                watched = _WatchedSession(
+                    weakref.ref(session, lambda _: self.notify(session_id))
+                )
+                self._sessions[session_id] = watched
+            watched.observers[observer] = initial_page_script_hash
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="SessionShutdownWatcher", daemon=True
+                )
+                self._thread.start()
+
+    def unregister(self, observer: "SessionShutdownObserver", session_id: str) -> None:
+        with self._cond:
+            watched = self._sessions.get(session_id)
+            if watched is None:
+                return
+            watched.observers.pop(observer, None)
+            if not watched.observers:
+                del self._sessions[session_id]
+
+    def notify(self, session_id: str) -> None:
+        """Have the session checked now."""
+        with self._cond:
+            if session_id not in self._sessions:
+                return
+            self._changed_session_ids.add(session_id)
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._changed_session_ids:
+                    self._cond.wait(self.sweep_interval)
+                if self._changed_session_ids:
+                    session_ids = self._changed_session_ids
+                    self._changed_session_ids = set()
+                else:
+                    session_ids = set(self._sessions)
+                due = self._pop_due_observers(session_ids)
+                if not self._sessions and not due:
+                    logger.debug("No sessions to watch, stopping the watcher thread.")
+                    self._thread = None
+                    return
+
+            for observer in due:
+                threading.Thread(
+                    target=observer._run_callback,
+                    name="SessionShutdownCallback",
+                    daemon=True,
+                ).start()
+
+    def _pop_due_observers(
+        self, session_ids: Set[str]
+    ) -> List["SessionShutdownObserver"]:
+        # Called with `self._cond` held.
+        due: List[SessionShutdownObserver] = []
+        for session_id in session_ids:
+            watched = self._sessions.get(session_id)
+            if watched is None:
+                continue
+            session_due = self._due_observers_of(session_id, watched)
+            for observer in session_due:
+                del watched.observers[observer]
+            if not watched.observers:
+                del self._sessions[session_id]
+            due.extend(session_due)
+        return due
+
+    @staticmethod
+    def _due_observers_of(
+        session_id: str, watched: _WatchedSession
+    ) -> List["SessionShutdownObserver"]:
+        app_session = watched.session_ref()
+        if not app_session:
+            logger.debug("AppSession %s removed.", session_id)
+            return list(watched.observers)
+        if app_session._state == AppSessionState.SHUTDOWN_REQUESTED:
+            logger.debug("AppSession %s requested shutdown.", session_id)
+            return list(watched.observers)
+
+        current_page_script_hash = _get_current_page_script_hash(app_session)
+        if not current_page_script_hash:
+            return []
+        due = [
+            observer
+            for observer, initial_page_script_hash in watched.observers.items()
+            if initial_page_script_hash
+            and current_page_script_hash != initial_page_script_hash
+        ]
+        if due:
+            logger.debug(
+                "AppSession %s navigated to page %s.",
+                session_id,
+                current_page_script_hash,
+            )
+        return due
+
+
+_watcher = _SessionWatcher()
+
+_hooks_lock = threading.Lock()
+_hooks_installed = False
+
+
+def _install_app_session_hooks() -> None:
+    """Notify the watcher of the state changes of every ``AppSession``.
+
+    ``AppSession.shutdown()`` sets ``SHUTDOWN_REQUESTED``, and
+    ``_handle_scriptrunner_event_on_event_loop()`` updates the page script
+    hash on script runs. Both are wrapped to have the session checked right
+    away, as they are private Streamlit APIs (Streamlit 1.56:
+    ``streamlit/runtime/app_session.py``); if either disappears, that change
+    is only picked up by the watcher's periodic sweep.
+    """
+    global _hooks_installed
+    with _hooks_lock:
+        if _hooks_installed:
+            return
+        _hooks_installed = True
+
+        shutdown = getattr(AppSession, "shutdown", None)
+        if callable(shutdown):
+
+            @functools.wraps(shutdown)
+            def notifying_shutdown(self, *args, **kwargs):
+                try:
+                    return shutdown(self, *args, **kwargs)
+                finally:
+                    _watcher.notify(self.id)
+
+            setattr(AppSession, "shutdown", notifying_shutdown)
+        else:
+            logger.debug("AppSession.shutdown is not available.")
+
+        handle_event = getattr(
+            AppSession, "_handle_scriptrunner_event_on_event_loop", None
+        )
+        if callable(handle_event):
+
+            @functools.wraps(handle_event)
+            def notifying_handle_event(self, sender, event, *args, **kwargs):
+                try:
+                    return handle_event(self, sender, event, *args, **kwargs)
+                finally:
+                    if event != ScriptRunnerEvent.ENQUEUE_FORWARD_MSG:
+                        _watcher.notify(self.id)
+
+            setattr(
+                AppSession,
+                "_handle_scriptrunner_event_on_event_loop",
+                notifying_handle_event,
+            )
+        else:
+            logger.debug(
+                "AppSession._handle_scriptrunner_event_on_event_loop is not available."
+            )
+
+
 class SessionShutdownObserver:
     """Watches the AppSession and runs ``callback`` when the resource it
     guards is no longer needed for this session.
 
-    Two triggers, both polled on a background thread:
+    Two triggers, both detected by the process-wide watcher thread:
 
     - **Session shutdown**: ``AppSessionState.SHUTDOWN_REQUESTED`` (browser
       tab closed, server stop, etc.).
@@ -32,30 +230,24 @@ class SessionShutdownObserver:
       collides with the stale instance.
     """
 
-    _polling_thread: Union[threading.Thread, None]
-    _polling_thread_stop_event: threading.Event
+    _session_id: Optional[str]
     _stop_lock: threading.Lock
 
     def __init__(self, callback: Callback) -> None:
-        self._polling_thread = None
-        self._polling_thread_stop_event = threading.Event()
+        self._session_id = None
         self._stop_lock = threading.Lock()
+        self._stopped = False
+        self._callback_started = False
+        self._callback_thread: Optional[threading.Thread] = None
+        self._callback_finished = threading.Event()
         self._callback = callback
 
         session_info = get_this_session_info()
         if session_info:
             session = session_info.session
             initial_page_script_hash = self._resolve_initial_page_script_hash(session)
-            self._polling_thread = threading.Thread(
-                target=self._polling_thread_impl,
-                kwargs={
-                    "app_session_ref": weakref.ref(session),
-                    "initial_page_script_hash": initial_page_script_hash,
-                },
-                name=f"ShutdownPolling_{session.id}",
-                daemon=True,
-            )
-            self._polling_thread.start()
+            self._session_id = session.id
+            _watcher.register(self, session, initial_page_script_hash)
 
     @staticmethod
     def _resolve_initial_page_script_hash(app_session: AppSession) -> str:
@@ -70,69 +262,40 @@ class SessionShutdownObserver:
                 return page_hash
         return _get_current_page_script_hash(app_session)
 
-    def _polling_thread_impl(
-        self,
-        app_session_ref: "weakref.ReferenceType[AppSession]",
-        initial_page_script_hash: str,
-    ):
-        navigated_away = False
-        while True:
-            app_session = app_session_ref()
-            if not app_session:
-                logger.debug("AppSession removed, stopping polling thread.")
-                break
-            if app_session._state == AppSessionState.SHUTDOWN_REQUESTED:
-                logger.debug(
-                    "AppSession %s requested shutdown, stopping polling thread.",
-                    app_session.id,
-                )
-                break
-            if initial_page_script_hash:
-                current_page_script_hash = _get_current_page_script_hash(app_session)
-                if (
-                    current_page_script_hash
-                    and current_page_script_hash != initial_page_script_hash
-                ):
-                    logger.debug(
-                        "AppSession %s navigated from page %s to page %s, "
-                        "stopping polling thread.",
-                        app_session.id,
-                        initial_page_script_hash,
-                        current_page_script_hash,
-                    )
-                    navigated_away = True
-                    break
-            if self._polling_thread_stop_event.wait(1.0):
-                logger.debug("Polling thread stop requested.")
+    def _run_callback(self) -> None:
+        with self._stop_lock:
+            if self._stopped:
                 return
+            self._stopped = True
+            self._callback_started = True
+            self._callback_thread = threading.current_thread()
 
-        # Ensure the flag is set
-        self._polling_thread_stop_event.set()
-
-        if navigated_away:
-            logger.debug("Page navigation detected, executing callback.")
-        else:
-            logger.debug("AppSession shutdown detected, executing callback.")
+        logger.debug(
+            "Session shutdown or page navigation detected, executing callback."
+        )
         try:
             self._callback()
         except Exception as e:
             logger.exception("Error in shutdown callback: %s", e)
+        finally:
+            self._callback_finished.set()
 
     def stop(self, timeout: float = 1.0) -> None:
         with self._stop_lock:
-            polling_thread = self._polling_thread
-            self._polling_thread = None
-            self._polling_thread_stop_event.set()
+            self._stopped = True
+            callback_started = self._callback_started
+            callback_thread = self._callback_thread
+            session_id = self._session_id
+            self._session_id = None
 
-        if polling_thread is None:
-            return
+        if session_id is not None:
+            _watcher.unregister(self, session_id)
 
-        if threading.current_thread() is polling_thread:
-            logger.debug("Stop called from polling thread itself, skipping join.")
+        if not callback_started or threading.current_thread() is callback_thread:
+            # Called by the callback itself.
             return
 
-        polling_thread.join(timeout=timeout)
-        if polling_thread.is_alive():
-            logger.warning("ShutdownPolling thread did not exit cleanly")
-        else:
-            logger.debug("ShutdownPolling thread stopped cleanly")
+        # Like the callback, whatever calls `stop()` typically releases the
+        # guarded resource, so let a running callback finish first.
+        if not self._callback_finished.wait(timeout):
+            logger.warning("The shutdown callback did not finish in time")
@@ -1,11 +1,25 @@
 import asyncio
 import logging
-from typing import Callable, Generic, Optional, Protocol, TypeVar, runtime_checkable
+import time
+from typing import (
+    Callable,
+    Dict,
+    Generic,
+    Optional,
+    Protocol,
+    Tuple,
+    TypeVar,
+    runtime_checkable,
+)
 
 import av
 from aiortc import MediaStreamTrack
 from aiortc.mediastreams import MediaStreamError
 
+from .loop_monitor import monitor_callback
+from .metrics import SINK_ERRORS, SINK_FRAMES, TRACKS, LiveObjects
+from .tracing import get_frame_tracer
+
 logger = logging.getLogger(__name__)
 
 FrameT = TypeVar("FrameT", av.VideoFrame, av.AudioFrame)
@@ -33,6 +47,22 @@ class MediaSink(Protocol):
     def stop(self) -> None: ...
 
 
+# For the metrics.
+_live_sinks: "LiveObjects[CallbackSinkTrack]" = LiveObjects()
+
+
+def _count_sinks() -> Dict[Tuple[str, ...], float]:
+    counts: Dict[Tuple[str, ...], float] = {}
+    for sink in _live_sinks.snapshot():
+        if sink.readyState == "live":
+            key = ("sink", sink.kind)
+            counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+TRACKS.add_function(_count_sinks)
+
+
 SinkCallback = Callable[[FrameT], None]
 VideoSinkCallback = SinkCallback[av.VideoFrame]
 AudioSinkCallback = SinkCallback[av.AudioFrame]
@@ -59,6 +89,7 @@ class CallbackSinkTrack(Generic[FrameT]):
         self._on_ended_callback: Optional[Callable[[], None]] = None
         self._track: Optional[MediaStreamTrack] = None
         self._task: Optional[asyncio.Task] = None
+        _live_sinks.add(self)
 
     def addTrack(self, track: MediaStreamTrack) -> None:
         # Recover after a prior session ended: a cached sink can be reused
@@ -107,19 +138,27 @@ class CallbackSinkTrack(Generic[FrameT]):
                     frame = await track.recv()
                 except MediaStreamError:
                     return
-                try:
-                    # aiortc's `track.recv()` is typed as `Frame | Packet`,
-                    # but a kind-tagged sink only sees the matching frame.
-                    self._callback(frame)  # type: ignore[arg-type]
-                except Exception:
-                    # Log and keep draining — the upstream track is fine, only
-                    # user code failed. Mirrors the philosophy of the source
-                    # tracks' callback error handling, but doesn't tear down
-                    # the consumer for a transient bug in user code.
-                    logger.exception(
-                        "%s: sink callback raised an exception",
-                        self.__class__.__name__,
-                    )
+                tracer = get_frame_tracer()
+                start_time = time.monotonic()
+                SINK_FRAMES.inc(kind=self.kind)
+                with monitor_callback("sink", self._callback, self):
+                    try:
+                        # aiortc's `track.recv()` is typed as `Frame | Packet`,
+                        # but a kind-tagged sink only sees the matching frame.
+                        self._callback(frame)  # type: ignore[arg-type]
+                    except Exception:
+                        SINK_ERRORS.inc(kind=self.kind)
+                        # Log and keep draining — the upstream track is fine,
+                        # only user code failed. Mirrors the philosophy of the
+                        # source tracks' callback error handling, but doesn't
+                        # tear down the consumer for a transient bug in user
+                        # code.
+                        logger.exception(
+                            "%s: sink callback raised an exception",
+                            self.__class__.__name__,
+                        )
+                if tracer is not None:
+                    tracer.record(frame, "sink", start_time)
         finally:
             self._fire_on_ended()
 
@@ -8,6 +8,8 @@ import av
 from aiortc import MediaStreamTrack
 from aiortc.mediastreams import MediaStreamError
 
+from .loop_monitor import monitor_callback
+
 logger = logging.getLogger(__name__)
 
 # Copied from https://github.com/aiortc/aiortc/blob/main/src/aiortc/mediastreams.py
@@ -78,16 +80,17 @@ class VideoSourceTrack(MediaStreamTrack):
         # Per-call timing (not cumulative wall-clock drift): one late frame
         # mustn't keep tripping the warning on subsequent fast calls.
         callback_start = time.monotonic()
-        try:
-            frame = self._callback(pts, time_base)
-        except Exception as exc:
-            logger.error(
-                "%s: Video frame callback raised an exception: %s",
-                self.__class__.__name__,
-                exc,
-                exc_info=True,
-            )
-            raise
+        with monitor_callback("source", self._callback, self):
+            try:
+                frame = self._callback(pts, time_base)
+            except Exception as exc:
+                logger.error(
+                    "%s: Video frame callback raised an exception: %s",
+                    self.__class__.__name__,
+                    exc,
+                    exc_info=True,
+                )
+                raise
         callback_elapsed = time.monotonic() - callback_start
 
         frame_budget = 1.0 / self._fps
@@ -164,16 +167,17 @@ class AudioSourceTrack(MediaStreamTrack):
         # Per-call timing (not cumulative wall-clock drift): one late frame
         # mustn't keep tripping the warning on subsequent fast calls.
         callback_start = time.monotonic()
-        try:
-            frame = self._callback(pts, time_base)
-        except Exception as exc:
-            logger.error(
-                "%s: Audio frame callback raised an exception: %s",
-                self.__class__.__name__,
-                exc,
-                exc_info=True,
-            )
-            raise
+        with monitor_callback("source", self._callback, self):
+            try:
+                frame = self._callback(pts, time_base)
+            except Exception as exc:
+                logger.error(
+                    "%s: Audio frame callback raised an exception: %s",
+                    self.__class__.__name__,
+                    exc,
+                    exc_info=True,
+                )
+                raise
         callback_elapsed = time.monotonic() - callback_start
 
         if callback_elapsed > self._ptime:
@@ -0,0 +1,200 @@
+"""Matching the frames of several inputs that were captured at the same time.
+
+A mix track gives its mixer callback the latest frame of each input, which
+may be from different moments as the inputs' frames arrive at their own
+pace and with their own delays. :class:`FrameSynchronizer` buffers the
+frames of each input briefly instead, maps their pts onto a common clock,
+and yields sets of one frame from each input whose times are within a
+tolerance of each other, e.g. for stereo or multi-angle analysis.
+
+Each input's pts are on the clock of its sender, with an offset of its own.
+The offset to the local clock is estimated as the least difference between
+a frame's arrival and its pts seen so far, i.e. that of the frame which
+came with the least delay, so that the jitter of the arrivals does not
+shift the mapped times.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import (
+    Deque,
+    Dict,
+    Generic,
+    Hashable,
+    List,
+    NamedTuple,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from av.frame import Frame
+from av.packet import Packet
+
+from .metrics import FRAME_SYNC_MATCHES, FRAME_SYNC_MISSES
+
+__all__ = [
+    "FrameSynchronizer",
+    "FrameSyncOptions",
+    "FrameSyncStats",
+]
+
+KeyT = TypeVar("KeyT", bound=Hashable)
+
+# An input whose frames map further than this from their arrival has
+# restarted its timestamps, and its offset is estimated anew.
+_RESYNC_THRESHOLD = 1.0
+
+
+class FrameSyncOptions(NamedTuple):
+    """How a :class:`FrameSynchronizer` matches the frames of its inputs.
+
+    The frames in a matched set are at most ``tolerance`` seconds from the
+    latest of them. A frame is dropped if it has not been matched
+    ``max_delay`` seconds after it arrived, or if more than ``max_frames``
+    frames of its input are buffered.
+    """
+
+    tolerance: float = 0.02
+    max_delay: float = 0.2
+    max_frames: int = 10
+
+
+class FrameSyncStats(NamedTuple):
+    # Sets of frames matched, and the frames dropped without a match: those
+    # that none of the other inputs had a frame close enough for, and those
+    # beyond `max_frames`.
+    matched: int
+    unmatched: int
+    overflow: int
+    # Frames waiting for their match.
+    buffered: int
+    # The seconds between the earliest and the latest frame of the last
+    # matched set.
+    skew: float
+
+
+class _BufferedFrame(NamedTuple):
+    time: float
+    arrival: float
+    frame: Union[Frame, Packet]
+
+
+class FrameSynchronizer(Generic[KeyT]):
+    """Buffers the frames of the inputs, by their key, and yields the sets
+    of the inputs' frames that were captured at the same time."""
+
+    def __init__(self, options: FrameSyncOptions = FrameSyncOptions()) -> None:
+        if options.tolerance < 0:
+            raise ValueError(f"tolerance must not be negative, got {options.tolerance}")
+        if options.max_frames < 1:
+            raise ValueError(f"max_frames must be at least 1, got {options.max_frames}")
+        self.options = options
+        self._inputs: List[KeyT] = []
+        self._buffers: Dict[KeyT, Deque[_BufferedFrame]] = {}
+        self._offsets: Dict[KeyT, float] = {}
+
+        self._matched = 0
+        self._unmatched = 0
+        self._overflow = 0
+        self._skew = 0.0
+
+    def set_inputs(self, inputs: Sequence[KeyT]) -> None:
+        """Match the frames of ``inputs``, in this order, dropping the
+        buffers of the inputs not in it."""
+        if list(inputs) == self._inputs:
+            return
+        self._inputs = list(inputs)
+        for key in list(self._buffers):
+            if key not in inputs:
+                del self._buffers[key]
+                self._offsets.pop(key, None)
+        for key in self._inputs:
+            self._buffers.setdefault(key, deque())
+
+    def push(
+        self, key: KeyT, frame: Union[Frame, Packet], arrival: float
+    ) -> List[List[Tuple[KeyT, Union[Frame, Packet]]]]:
+        """Buffer ``frame`` of the input ``key``, which arrived at
+        ``arrival`` seconds on the local clock, and return the sets of
+        frames this completed, oldest first."""
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            # Not one of the inputs.
+            return []
+
+        self._expire(arrival)
+        if len(buffer) >= self.options.max_frames:
+            buffer.popleft()
+            self._overflow += 1
+            FRAME_SYNC_MISSES.inc(reason="overflow")
+        buffer.append(_BufferedFrame(self._time(key, frame, arrival), arrival, frame))
+        return self._match()
+
+    def stats(self) -> FrameSyncStats:
+        return FrameSyncStats(
+            matched=self._matched,
+            unmatched=self._unmatched,
+            overflow=self._overflow,
+            buffered=sum(len(buffer) for buffer in self._buffers.values()),
+            skew=self._skew,
+        )
+
+    def _time(self, key: KeyT, frame: Union[Frame, Packet], arrival: float) -> float:
+        if frame.pts is None or frame.time_base is None:
+            return arrival
+        pts_time = float(frame.pts * frame.time_base)
+        offset = self._offsets.get(key)
+        delay = arrival - pts_time
+        if offset is None or delay < offset or delay - offset > _RESYNC_THRESHOLD:
+            offset = self._offsets[key] = delay
+        return pts_time + offset
+
+    def _expire(self, now: float) -> None:
+        deadline = now - self.options.max_delay
+        for buffer in self._buffers.values():
+            while buffer and buffer[0].arrival < deadline:
+                buffer.popleft()
+                self._drop_unmatched()
+
+    def _drop_unmatched(self) -> None:
+        self._unmatched += 1
+        FRAME_SYNC_MISSES.inc(reason="unmatched")
+
+    def _match(self) -> List[List[Tuple[KeyT, Union[Frame, Packet]]]]:
+        matches: List[List[Tuple[KeyT, Union[Frame, Packet]]]] = []
+        if not self._inputs:
+            return matches
+        tolerance = self.options.tolerance
+        buffers = [self._buffers[key] for key in self._inputs]
+        while all(buffers):
+            # The latest of the oldest frames; none of the other inputs'
+            # frames can match an earlier one any more.
+            pivot = max(buffer[0].time for buffer in buffers)
+            for buffer in buffers:
+                while (
+                    len(buffer) > 1
+                    and buffer[1].time <= pivot + tolerance
+                    and abs(buffer[1].time - pivot) <= abs(buffer[0].time - pivot)
+                ):
+                    buffer.popleft()
+                    self._drop_unmatched()
+
+            if all(buffer[0].time >= pivot - tolerance for buffer in buffers):
+                heads = [buffer.popleft() for buffer in buffers]
+                times = [head.time for head in heads]
+                self._skew = max(times) - min(times)
+                self._matched += 1
+                FRAME_SYNC_MATCHES.inc()
+                matches.append(
+                    [(key, head.frame) for key, head in zip(self._inputs, heads)]
+                )
+                continue
+
+            for buffer in buffers:
+                if buffer[0].time < pivot - tolerance:
+                    buffer.popleft()
+                    self._drop_unmatched()
+        return matches
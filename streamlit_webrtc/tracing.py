@@ -0,0 +1,334 @@
+"""Following sampled frames through the media pipeline.
+
+A frame goes through several hops between the network and back: decoding,
+the relay's per-subscriber queue, the process track's input queue, the
+processor, its output deque, and the encoder (or a sink or a mix track
+instead). When :func:`start_frame_tracing` is on, a sample of the frames is
+tagged as they enter the pipeline, and each hop records the time the tagged
+frames spent in it. :meth:`FrameTracer.dump` writes the spans of a time
+window as a Chrome trace, which https://ui.perfetto.dev and
+``chrome://tracing`` open, with the spans of each frame linked by a flow.
+
+The tag is kept in the frame's ``opaque`` attribute, so frames whose
+``opaque`` is already set by the application are not traced. The hops only
+read a module global while tracing is off.
+"""
+
+import collections
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    OrderedDict,
+    Tuple,
+)
+
+__all__ = [
+    "FrameSpan",
+    "FrameTracer",
+    "get_frame_tracer",
+    "start_frame_tracing",
+    "stop_frame_tracing",
+]
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class FrameSpan(NamedTuple):
+    name: str
+    frame_id: int
+    # `time.monotonic()` seconds.
+    start: float
+    end: float
+    thread_id: int
+    args: Optional[Dict[str, Any]]
+
+
+class _Tag:
+    __slots__ = ("frame_id",)
+
+    def __init__(self, frame_id: int) -> None:
+        self.frame_id = frame_id
+
+
+# Marks the frames the sampling has passed over, so that a later hop does not
+# start tracing them halfway through.
+_UNSAMPLED = _Tag(-1)
+
+
+class FrameTracer:
+    """Records the spans of the sampled frames in a ring buffer.
+
+    ``sample_rate`` is the fraction of the frames entering the pipeline that
+    are traced, and ``capacity`` the number of spans kept; the oldest are
+    discarded beyond that.
+    """
+
+    def __init__(self, sample_rate: float = 0.01, capacity: int = 100_000) -> None:
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.sample_rate = sample_rate
+        self._spans: Deque[FrameSpan] = collections.deque(maxlen=capacity)
+        # The starts of the hops begun and not ended yet, e.g. of the frames
+        # waiting in a queue. Frames dropped from a queue never end theirs,
+        # so this is bounded too.
+        self._pending: OrderedDict[Tuple[int, str], float] = collections.OrderedDict()
+        self._max_pending = max(capacity // 10, 1)
+        self._lock = threading.Lock()
+        self._next_frame_id = 0
+        self._thread_names: Dict[int, str] = {}
+
+    def tag(self, frame: Any) -> Optional[int]:
+        """Decide whether to trace ``frame`` if not decided yet, and return
+        its trace ID if it is traced."""
+        opaque = frame.opaque
+        if isinstance(opaque, _Tag):
+            return opaque.frame_id if opaque is not _UNSAMPLED else None
+        if opaque is not None:
+            return None
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            frame.opaque = _UNSAMPLED
+            return None
+        with self._lock:
+            frame_id = self._next_frame_id
+            self._next_frame_id += 1
+        frame.opaque = _Tag(frame_id)
+        return frame_id
+
+    @staticmethod
+    def frame_id(frame: Any) -> Optional[int]:
+        """The trace ID of ``frame``, without sampling it."""
+        opaque = getattr(frame, "opaque", None)
+        if isinstance(opaque, _Tag) and opaque is not _UNSAMPLED:
+            return opaque.frame_id
+        return None
+
+    @staticmethod
+    def propagate(source: Any, destination: Any) -> None:
+        """Carry the tag of ``source`` over to ``destination``, a frame made
+        from it, e.g. by a processor."""
+        opaque = getattr(source, "opaque", None)
+        if isinstance(opaque, _Tag) and destination.opaque is None:
+            destination.opaque = opaque
+
+    def record(
+        self,
+        frame: Any,
+        name: str,
+        start: float,
+        end: Optional[float] = None,
+        **args: Any,
+    ) -> None:
+        """Record that ``frame`` spent from ``start`` to ``end`` (now by
+        default) in the hop ``name``."""
+        frame_id = self.tag(frame)
+        if frame_id is None:
+            return
+        self._add(frame_id, name, start, time.monotonic() if end is None else end, args)
+
+    def begin(self, frame: Any, name: str) -> None:
+        """Mark that ``frame`` enters the hop ``name``, e.g. a queue."""
+        frame_id = self.tag(frame)
+        if frame_id is None:
+            return
+        with self._lock:
+            self._pending[(frame_id, name)] = time.monotonic()
+            if len(self._pending) > self._max_pending:
+                self._pending.popitem(last=False)
+
+    def end(self, frame: Any, name: str, **args: Any) -> None:
+        """Mark that ``frame`` leaves the hop ``name`` begun with :meth:`begin`."""
+        frame_id = self.frame_id(frame)
+        if frame_id is None:
+            return
+        with self._lock:
+            start = self._pending.pop((frame_id, name), None)
+        if start is not None:
+            self._add(frame_id, name, start, time.monotonic(), args)
+
+    def _add(
+        self,
+        frame_id: int,
+        name: str,
+        start: float,
+        end: float,
+        args: Dict[str, Any],
+    ) -> None:
+        thread_id = threading.get_ident()
+        if thread_id not in self._thread_names:
+            self._thread_names[thread_id] = threading.current_thread().name
+        self._spans.append(
+            FrameSpan(name, frame_id, start, end, thread_id, args or None)
+        )
+
+    def spans(self, window: Optional[float] = None) -> List[FrameSpan]:
+        """The recorded spans, only those that ended in the last ``window``
+        seconds if given."""
+        spans = list(self._spans)
+        if window is not None:
+            since = time.monotonic() - window
+            spans = [span for span in spans if span.end >= since]
+        return spans
+
+    def export(self, window: Optional[float] = None) -> Dict[str, Any]:
+        """The spans as a Chrome trace (JSON object format)."""
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = []
+        by_frame: Dict[int, List[FrameSpan]] = {}
+        for span in self.spans(window):
+            args: Dict[str, Any] = {"frame": span.frame_id}
+            if span.args:
+                args.update(span.args)
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": "frame",
+                    "ph": "X",
+                    "ts": span.start * 1e6,
+                    "dur": (span.end - span.start) * 1e6,
+                    "pid": pid,
+                    "tid": span.thread_id,
+                    "args": args,
+                }
+            )
+            by_frame.setdefault(span.frame_id, []).append(span)
+
+        # Flow events link the spans of each frame in time order.
+        for frame_id, frame_spans in by_frame.items():
+            if len(frame_spans) < 2:
+                continue
+            frame_spans.sort(key=lambda span: span.start)
+            last = len(frame_spans) - 1
+            for i, span in enumerate(frame_spans):
+                event = {
+                    "name": "frame",
+                    "cat": "frame",
+                    "ph": "s" if i == 0 else "f" if i == last else "t",
+                    "id": frame_id,
+                    "ts": span.start * 1e6,
+                    "pid": pid,
+                    "tid": span.thread_id,
+                }
+                if i == last:
+                    event["bp"] = "e"
+                events.append(event)
+
+        for thread_id, thread_name in list(self._thread_names.items()):
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": thread_id,
+                    "args": {"name": thread_name},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump(self, path: str, window: Optional[float] = None) -> None:
+        """Write :meth:`export` to ``path``."""
+        with open(path, "w") as f:
+            json.dump(self.export(window), f)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._pending.clear()
+
+
+_tracer: Optional[FrameTracer] = None
+
+
+def get_frame_tracer() -> Optional[FrameTracer]:
+    """The tracer started by :func:`start_frame_tracing`, if any."""
+    return _tracer
+
+
+def start_frame_tracing(
+    sample_rate: float = 0.01, capacity: int = 100_000
+) -> FrameTracer:
+    """Start tracing a ``sample_rate`` fraction of the frames in this
+    process, replacing the tracer started before, if any."""
+    global _tracer
+    _install_codec_tracing()
+    _tracer = FrameTracer(sample_rate=sample_rate, capacity=capacity)
+    return _tracer
+
+
+def stop_frame_tracing() -> Optional[FrameTracer]:
+    """Stop tracing, returning the tracer so its spans can still be dumped."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+class _TracedCodec:
+    """Wraps an aiortc encoder or decoder to record the frames' spans in it."""
+
+    def __init__(self, codec: Any) -> None:
+        object.__setattr__(self, "_codec", codec)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._codec, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # E.g. `target_bitrate`, set by the sender.
+        setattr(self._codec, name, value)
+
+    def encode(self, frame: Any, force_keyframe: bool = False) -> Any:
+        tracer = _tracer
+        if tracer is None or tracer.frame_id(frame) is None:
+            return self._codec.encode(frame, force_keyframe)
+        start = time.monotonic()
+        result = self._codec.encode(frame, force_keyframe)
+        tracer.record(frame, "encode", start)
+        return result
+
+    def decode(self, encoded_frame: Any) -> Any:
+        tracer = _tracer
+        if tracer is None:
+            return self._codec.decode(encoded_frame)
+        start = time.monotonic()
+        frames = self._codec.decode(encoded_frame)
+        for frame in frames:
+            tracer.record(frame, "decode", start)
+        return frames
+
+
+def _install_codec_tracing() -> None:
+    """Wrap the codecs aiortc creates for its senders and receivers.
+
+    They are created with the ``get_encoder`` and ``get_decoder`` functions
+    imported into ``aiortc.rtcrtpsender`` and ``aiortc.rtcrtpreceiver``
+    (aiortc 1.14); if those disappear, the encode and decode hops are not
+    traced.
+    """
+    import aiortc.rtcrtpreceiver
+    import aiortc.rtcrtpsender
+
+    for module, name in (
+        (aiortc.rtcrtpsender, "get_encoder"),
+        (aiortc.rtcrtpreceiver, "get_decoder"),
+    ):
+        original = getattr(module, name, None)
+        if not callable(original):
+            logger.debug("%s.%s is not available.", module.__name__, name)
+            continue
+        if getattr(original, "_streamlit_webrtc_traced", False):
+            continue
+
+        def traced(codec: Any, _original: Any = original) -> Any:
+            return _TracedCodec(_original(codec))
+
+        traced._streamlit_webrtc_traced = True  # type: ignore[attr-defined]
+        setattr(module, name, traced)
@@ -0,0 +1,259 @@
+"""Periodic sampling of a peer connection's RTP transport statistics."""
+
+import asyncio
+import collections
+import logging
+import time
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from aiortc import RTCPeerConnection, RTCRtpTransceiver
+
+from .encoded import get_encoded_frame_tap
+
+__all__ = [
+    "InboundRtpStats",
+    "OutboundRtpStats",
+    "TransportStats",
+    "TransportStatsSampler",
+]
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class InboundRtpStats(NamedTuple):
+    kind: str
+    packets_received: int
+    packets_lost: int
+    # Interarrival jitter in seconds.
+    jitter: Optional[float]
+    # RTCP feedback sent to the peer about this stream.
+    nacks_sent: int
+    plis_sent: int
+    # Encoded frames received, and how many of them were decoded.
+    frames_received: Optional[int]
+    frames_decoded: Optional[int]
+
+
+class OutboundRtpStats(NamedTuple):
+    kind: str
+    packets_sent: int
+    bytes_sent: int
+    # Bits per second since the previous sample.
+    bitrate: Optional[float]
+    # As reported by the peer's receiver reports.
+    round_trip_time: Optional[float]
+    fraction_lost: Optional[float]
+    # Keyframe requests (PLI/FIR) received from the peer.
+    keyframes_requested: int
+
+
+class TransportStats(NamedTuple):
+    timestamp: float
+    bytes_sent: int
+    bytes_received: int
+    # Bits per second since the previous sample.
+    send_bitrate: Optional[float]
+    receive_bitrate: Optional[float]
+    round_trip_time: Optional[float]
+    inbound: Tuple[InboundRtpStats, ...]
+    outbound: Tuple[OutboundRtpStats, ...]
+
+
+class _FeedbackCounter:
+    """Counts calls to a method of an aiortc object by wrapping it in place."""
+
+    def __init__(self, obj: Any, method_name: str) -> None:
+        self.count = 0
+        method = getattr(obj, method_name, None)
+        if not callable(method):
+            logger.debug("%s.%s is not available.", type(obj).__name__, method_name)
+            return
+
+        if asyncio.iscoroutinefunction(method):
+
+            async def counting_async_method(*args, **kwargs):
+                self.count += 1
+                return await method(*args, **kwargs)
+
+            setattr(obj, method_name, counting_async_method)
+        else:
+
+            def counting_method(*args, **kwargs):
+                self.count += 1
+                return method(*args, **kwargs)
+
+            setattr(obj, method_name, counting_method)
+
+
+class _TransceiverCounters:
+    def __init__(self, transceiver: RTCRtpTransceiver) -> None:
+        # `_send_rtcp_nack`, `_send_rtcp_pli` and `_send_keyframe` are where
+        # aiortc sends NACKs and PLIs and handles the peer's keyframe
+        # requests. They are private APIs (aiortc 1.14:
+        # `src/aiortc/rtcrtpreceiver.py`, `src/aiortc/rtcrtpsender.py`); if
+        # they disappear, the counts stay at 0.
+        self.nacks_sent = _FeedbackCounter(transceiver.receiver, "_send_rtcp_nack")
+        self.plis_sent = _FeedbackCounter(transceiver.receiver, "_send_rtcp_pli")
+        self.keyframes_requested = _FeedbackCounter(
+            transceiver.sender, "_send_keyframe"
+        )
+
+
+class TransportStatsSampler:
+    """Samples ``pc.getStats()``-equivalent statistics every ``interval``
+    seconds, keeping the latest ``history_size`` samples in :attr:`history`.
+
+    Run :meth:`run` as a task on the connection's event loop once the remote
+    description is set, and cancel it to stop sampling.
+    """
+
+    def __init__(
+        self, pc: RTCPeerConnection, interval: float, history_size: int = 60
+    ) -> None:
+        self.pc = pc
+        self.interval = interval
+        self.history: Deque[TransportStats] = collections.deque(maxlen=history_size)
+        self._counters: Dict[RTCRtpTransceiver, _TransceiverCounters] = {}
+
+    async def run(self) -> None:
+        self._instrument()
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                sample = await self.sample()
+            except Exception:
+                logger.debug("Failed to sample the transport stats", exc_info=True)
+                continue
+            self.history.append(sample)
+            logger.debug("Transport stats: %s", sample)
+
+    async def sample(self) -> TransportStats:
+        reconnected = self._instrument()
+        # The byte counts of a new connection start over, so the rates are
+        # measured from its next sample.
+        previous = self.history[-1] if self.history and not reconnected else None
+        now = time.time()
+        elapsed = now - previous.timestamp if previous else None
+
+        transports: Dict[str, Any] = {}
+        inbound: List[InboundRtpStats] = []
+        outbound: List[OutboundRtpStats] = []
+        for transceiver in self.pc.getTransceivers():
+            counters = self._counters[transceiver]
+            receiver_report = await transceiver.receiver.getStats()
+            sender_report = await transceiver.sender.getStats()
+            for report in (receiver_report, sender_report):
+                for stats in report.values():
+                    if stats.type == "transport":
+                        transports[stats.id] = stats
+
+            inbound.extend(self._inbound_stats(transceiver, receiver_report, counters))
+            outbound.extend(
+                self._outbound_stats(
+                    transceiver, sender_report, counters, previous, elapsed
+                )
+            )
+
+        bytes_sent = sum(t.bytesSent for t in transports.values())
+        bytes_received = sum(t.bytesReceived for t in transports.values())
+        round_trip_times = [
+            o.round_trip_time for o in outbound if o.round_trip_time is not None
+        ]
+        return TransportStats(
+            timestamp=now,
+            bytes_sent=bytes_sent,
+            bytes_received=bytes_received,
+            send_bitrate=_bitrate(
+                bytes_sent, previous.bytes_sent if previous else None, elapsed
+            ),
+            receive_bitrate=_bitrate(
+                bytes_received, previous.bytes_received if previous else None, elapsed
+            ),
+            round_trip_time=max(round_trip_times) if round_trip_times else None,
+            inbound=tuple(inbound),
+            outbound=tuple(outbound),
+        )
+
+    def _instrument(self) -> bool:
+        """Count the feedback of the current transceivers, returning whether
+        they changed."""
+        # `pc` may be replaced with a new connection, whose transceivers
+        # replace the old ones.
+        transceivers = self.pc.getTransceivers()
+        changed = set(transceivers) != set(self._counters)
+        self._counters = {
+            transceiver: self._counters.get(transceiver)
+            or _TransceiverCounters(transceiver)
+            for transceiver in transceivers
+        }
+        return changed
+
+    @staticmethod
+    def _inbound_stats(
+        transceiver: RTCRtpTransceiver,
+        report: Any,
+        counters: _TransceiverCounters,
+    ) -> List[InboundRtpStats]:
+        # `_codecs` holds the negotiated codecs (aiortc 1.14:
+        # `src/aiortc/rtcrtptransceiver.py`); the jitter is in units of the
+        # codec's clock rate.
+        codecs = getattr(transceiver, "_codecs", None)
+        clock_rate = codecs[0].clockRate if codecs else None
+        tap = get_encoded_frame_tap(transceiver.receiver)
+        return [
+            InboundRtpStats(
+                kind=stats.kind,
+                packets_received=stats.packetsReceived,
+                packets_lost=stats.packetsLost,
+                jitter=stats.jitter / clock_rate if clock_rate else None,
+                nacks_sent=counters.nacks_sent.count,
+                plis_sent=counters.plis_sent.count,
+                frames_received=tap.frames_received if tap else None,
+                frames_decoded=tap.frames_decoded if tap else None,
+            )
+            for stats in report.values()
+            if stats.type == "inbound-rtp"
+        ]
+
+    @staticmethod
+    def _outbound_stats(
+        transceiver: RTCRtpTransceiver,
+        report: Any,
+        counters: _TransceiverCounters,
+        previous: Optional[TransportStats],
+        elapsed: Optional[float],
+    ) -> List[OutboundRtpStats]:
+        remote_inbound = [s for s in report.values() if s.type == "remote-inbound-rtp"]
+        result = []
+        for stats in report.values():
+            if stats.type != "outbound-rtp":
+                continue
+            remote = next((r for r in remote_inbound if r.ssrc == stats.ssrc), None)
+            previous_bytes = None
+            if previous is not None:
+                previous_bytes = next(
+                    (o.bytes_sent for o in previous.outbound if o.kind == stats.kind),
+                    None,
+                )
+            result.append(
+                OutboundRtpStats(
+                    kind=stats.kind,
+                    packets_sent=stats.packetsSent,
+                    bytes_sent=stats.bytesSent,
+                    bitrate=_bitrate(stats.bytesSent, previous_bytes, elapsed),
+                    round_trip_time=remote.roundTripTime if remote else None,
+                    fraction_lost=remote.fractionLost if remote else None,
+                    keyframes_requested=counters.keyframes_requested.count,
+                )
+            )
+        return result
+
+
+def _bitrate(
+    current_bytes: int, previous_bytes: Optional[int], elapsed: Optional[float]
+) -> Optional[float]:
+    if previous_bytes is None or not elapsed or current_bytes < previous_bytes:
+        # No baseline, or the counter started over.
+        return None
+    return (current_bytes - previous_bytes) * 8 / elapsed
@@ -5,11 +5,12 @@ import itertools
 import logging
 import queue
 import threading
-import weakref
+import time
 from typing import (
     Callable,
     Dict,
     Generic,
+    List,
     Literal,
     Optional,
     Set,
@@ -29,7 +30,16 @@ from aiortc.sdp import candidate_from_sdp
 
 from streamlit_webrtc.shutdown import SessionShutdownObserver
 
+from .decoder_pool import DecoderPool
+from .encoded import (
+    EncodedForwardTrack,
+    EncodedFrameTap,
+    install_encoded_frame_tap,
+)
 from .eventloop import get_global_event_loop, loop_context
+from .governor import ResourceGovernor
+from .ice import IceGatheringOptions, apply_ice_gathering_options
+from .metrics import OFFER_DURATION, STOP_DURATION, WORKERS, LiveObjects
 from .models import (
     AudioFrameCallback,
     AudioProcessorBase,
@@ -55,8 +65,11 @@ from .process import (
     VideoProcessTrack,
 )
 from .receive import AudioReceiver, VideoReceiver
+from .reconnect import ReconnectableEncodedTrack, ReconnectableTrack
+from .recorder import PassthroughRecorder
 from .relay import get_global_relay
 from .sink import MediaSink
+from .transport_stats import TransportStats, TransportStatsSampler
 
 __all__ = [
     "AudioProcessorBase",
@@ -95,6 +108,7 @@ def _wrap_with_processor(
     *,
     async_processing: bool,
     relay: MediaRelay,
+    governor: Optional[ResourceGovernor] = None,
 ) -> MediaStreamTrack:
     """Wrap ``track`` in a kind-matched process track when a processor is given,
     otherwise return ``track`` unchanged."""
@@ -105,10 +119,18 @@ def _wrap_with_processor(
     relayed = relay.subscribe(track)
     if track.kind == "audio":
         audio_cls = AsyncAudioProcessTrack if async_processing else AudioProcessTrack
-        return audio_cls(track=relayed, processor=cast(AudioProcessorBase, processor))
+        return audio_cls(
+            track=relayed,
+            processor=cast(AudioProcessorBase, processor),
+            governor=governor,
+        )
     if track.kind == "video":
         video_cls = AsyncVideoProcessTrack if async_processing else VideoProcessTrack
-        return video_cls(track=relayed, processor=cast(VideoProcessorBase, processor))
+        return video_cls(
+            track=relayed,
+            processor=cast(VideoProcessorBase, processor),
+            governor=governor,
+        )
     raise ValueError(f"Unknown track kind {track.kind}")
 
 
@@ -121,6 +143,33 @@ def _notify_track_created(
         callback(cast(TrackType, f"{role}:{track.kind}"), track)
 
 
+def _add_input_track_to_recorder(
+    recorder: Union[MediaRecorder, PassthroughRecorder],
+    input_track: MediaStreamTrack,
+    tap: Optional[EncodedFrameTap],
+    relay: MediaRelay,
+    recorded_tracks: Optional[Dict[str, ReconnectableEncodedTrack]] = None,
+) -> None:
+    if isinstance(recorder, PassthroughRecorder):
+        if tap is None:
+            logger.warning(
+                "Encoded frames of the %s track are not accessible. "
+                "The track is not recorded.",
+                input_track.kind,
+            )
+            return
+        if recorded_tracks is not None:
+            # Moved to the tap of the next peer connection on reconnection,
+            # so that the recording goes on.
+            recorded_track = ReconnectableEncodedTrack(tap.subscribe())
+            recorded_tracks[input_track.kind] = recorded_track
+            recorder.addTrack(recorded_track)
+        else:
+            recorder.addTrack(tap.subscribe())
+    else:
+        recorder.addTrack(relay.subscribe(input_track))
+
+
 def _reset_factory_cache_on_webrtc_session_end(obj: object) -> bool:
     lifecycle_scope = getattr(obj, "_streamlit_webrtc_lifecycle_scope", None)
     if lifecycle_scope != "webrtc-session":
@@ -143,7 +192,7 @@ async def _process_offer_coro(
     source_audio_track: Optional[MediaStreamTrack],
     sink_video_track: Optional[MediaSink],
     sink_audio_track: Optional[MediaSink],
-    in_recorder: Optional[MediaRecorder],
+    in_recorder: Optional[Union[MediaRecorder, PassthroughRecorder]],
     out_recorder: Optional[MediaRecorder],
     video_processor: Optional[Union[VideoProcessorBase, CallbackAttachableProcessor]],
     audio_processor: Optional[Union[AudioProcessorBase, CallbackAttachableProcessor]],
@@ -154,6 +203,11 @@ async def _process_offer_coro(
     sendback_audio: bool,
     on_track_created: Callable[[TrackType, MediaStreamTrack], None],
     remote_description_set_event: asyncio.Event,
+    decoder_pool: Optional[DecoderPool] = None,
+    governor: Optional[ResourceGovernor] = None,
+    reconnectable: bool = False,
+    ice_gathering: Optional[IceGatheringOptions] = None,
+    recorded_tracks: Optional[Dict[str, ReconnectableEncodedTrack]] = None,
 ):
     def _source_for(kind: str) -> Optional[MediaStreamTrack]:
         return source_audio_track if kind == "audio" else source_video_track
@@ -186,6 +240,7 @@ async def _process_offer_coro(
                 _processor_for(kind),
                 async_processing=async_processing,
                 relay=relay,
+                governor=governor,
             )
         if _sink_for(kind) is not None:
             return None
@@ -196,8 +251,11 @@ async def _process_offer_coro(
             _processor_for(kind),
             async_processing=async_processing,
             relay=relay,
+            governor=governor,
         )
 
+    loop = asyncio.get_running_loop()
+
     # Tracks which kinds the peer is actually sending. Populated by `on_track`
     # in SENDRECV mode and consulted after `setRemoteDescription` so we can
     # attach `source_*` for kinds the peer didn't send (e.g. audio-only input
@@ -210,6 +268,9 @@ async def _process_offer_coro(
         def on_track(input_track: MediaStreamTrack):
             logger.info("Track %s received", input_track.kind)
             peer_sending_kinds.add(input_track.kind)
+            tap = install_encoded_frame_tap(pc, input_track, loop, decoder_pool)
+            if reconnectable:
+                input_track = ReconnectableTrack(input_track)
             _notify_track_created(on_track_created, "input", input_track)
 
             sink = _sink_for(input_track.kind)
@@ -221,7 +282,14 @@ async def _process_offer_coro(
             if output_track is not None:
                 if _sendback_for(output_track.kind):
                     logger.info("Add a track %s to %s", output_track, pc)
-                    pc.addTrack(relay.subscribe(output_track))
+                    sendback_track = relay.subscribe(output_track)
+                    if output_track is input_track and tap is not None:
+                        # An unprocessed echo: send the peer's encoded frames
+                        # back instead of decoding and re-encoding them.
+                        sendback_track = EncodedForwardTrack(
+                            pc, tap, fallback=sendback_track
+                        )
+                    pc.addTrack(sendback_track)
                 else:
                     logger.info("Block a track %s", output_track)
 
@@ -230,7 +298,13 @@ async def _process_offer_coro(
                 _notify_track_created(on_track_created, "output", output_track)
 
             if in_recorder:
-                in_recorder.addTrack(relay.subscribe(input_track))
+                _add_input_track_to_recorder(
+                    in_recorder,
+                    input_track,
+                    tap,
+                    relay,
+                    recorded_tracks if reconnectable else None,
+                )
 
             @input_track.listens_to("ended")
             async def on_ended():
@@ -245,6 +319,9 @@ async def _process_offer_coro(
         @pc.listens_to("track")
         def on_track(input_track: MediaStreamTrack):
             logger.info("Track %s received", input_track.kind)
+            tap = install_encoded_frame_tap(pc, input_track, loop, decoder_pool)
+            if reconnectable:
+                input_track = ReconnectableTrack(input_track)
             _notify_track_created(on_track_created, "input", input_track)
 
             sink = _sink_for(input_track.kind)
@@ -264,12 +341,19 @@ async def _process_offer_coro(
                         _processor_for(input_track.kind),
                         async_processing=async_processing,
                         relay=relay,
+                        governor=governor,
                     )
                     logger.info("Add a track %s to receiver %s", output_track, receiver)
                     receiver.addTrack(relay.subscribe(output_track))
 
             if in_recorder:
-                in_recorder.addTrack(relay.subscribe(input_track))
+                _add_input_track_to_recorder(
+                    in_recorder,
+                    input_track,
+                    tap,
+                    relay,
+                    recorded_tracks if reconnectable else None,
+                )
 
             @input_track.listens_to("ended")
             async def on_ended():
@@ -340,6 +424,85 @@ async def _process_offer_coro(
     if out_recorder:
         await out_recorder.start()
 
+    if ice_gathering is not None:
+        apply_ice_gathering_options(pc, ice_gathering)
+    answer = await pc.createAnswer()
+    await pc.setLocalDescription(answer)
+
+    return pc.localDescription
+
+
+async def _reconnect_coro(
+    mode: WebRtcMode,
+    pc: RTCPeerConnection,
+    offer: RTCSessionDescription,
+    relay: MediaRelay,
+    input_tracks: Dict[str, ReconnectableTrack],
+    output_tracks: Dict[str, MediaStreamTrack],
+    sendback_video: bool,
+    sendback_audio: bool,
+    remote_description_set_event: asyncio.Event,
+    decoder_pool: Optional[DecoderPool] = None,
+    ice_gathering: Optional[IceGatheringOptions] = None,
+    recorded_tracks: Optional[Dict[str, ReconnectableEncodedTrack]] = None,
+):
+    """Answer ``offer`` on a fresh ``pc``, attaching the track graph built by
+    `_process_offer_coro` for a previous peer connection instead of a new one.
+
+    The peer's tracks become the upstreams of the existing ``input_tracks``,
+    the new taps' packets those of the ``recorded_tracks``, and the existing
+    ``output_tracks`` are sent back as before.
+    """
+    loop = asyncio.get_running_loop()
+    taps: Dict[str, EncodedFrameTap] = {}
+
+    @pc.listens_to("track")
+    def on_track(track: MediaStreamTrack):
+        logger.info("Track %s received on reconnection", track.kind)
+        tap = install_encoded_frame_tap(pc, track, loop, decoder_pool)
+        if tap is not None:
+            taps[track.kind] = tap
+
+        recorded_track = (recorded_tracks or {}).get(track.kind)
+        if recorded_track is not None:
+            if tap is not None:
+                recorded_track.replace(tap.subscribe())
+            else:
+                logger.warning(
+                    "Encoded frames of the %s track are not accessible. "
+                    "The recording of the track pauses.",
+                    track.kind,
+                )
+
+        input_track = input_tracks.get(track.kind)
+        if input_track is None:
+            logger.warning(
+                "The peer sends a %s track it did not send before reconnecting. "
+                "It is ignored.",
+                track.kind,
+            )
+            return
+        input_track.replace(track)
+
+    await pc.setRemoteDescription(offer)
+    remote_description_set_event.set()
+
+    for t in pc.getTransceivers():
+        output_track = output_tracks.get(t.kind)
+        if output_track is None:
+            continue
+        sendback = sendback_video if t.kind == "video" else sendback_audio
+        if mode == WebRtcMode.SENDRECV and not sendback:
+            continue
+        sendback_track = relay.subscribe(output_track)
+        tap = taps.get(t.kind)
+        if output_track is input_tracks.get(t.kind) and tap is not None:
+            sendback_track = EncodedForwardTrack(pc, tap, fallback=sendback_track)
+        logger.info("Add a track %s to %s", sendback_track, pc)
+        pc.addTrack(sendback_track)
+
+    if ice_gathering is not None:
+        apply_ice_gathering_options(pc, ice_gathering)
     answer = await pc.createAnswer()
     await pc.setLocalDescription(answer)
 
@@ -385,14 +548,16 @@ def _force_stop_decoder_threads(pc: RTCPeerConnection) -> None:
 # construction and discarded at the end of `stop()`; anything left at
 # interpreter shutdown gets its decoder threads force-stopped so the process
 # can exit.
-_live_workers: "weakref.WeakSet[WebRtcWorker]" = weakref.WeakSet()
+_live_workers: "LiveObjects[WebRtcWorker]" = LiveObjects()
+WORKERS.add_function(lambda: len(_live_workers))
+_stop_measure_lock = threading.Lock()
 
 _exit_hook_lock = threading.Lock()
 _exit_hook_registered = False
 
 
 def _stop_leaked_decoder_threads_at_interpreter_exit() -> None:
-    for worker in list(_live_workers):
+    for worker in _live_workers.snapshot():
         logger.info(
             "A WebRTC worker was still alive at interpreter shutdown. "
             "Force-stopping its decoder threads so the process can exit."
@@ -460,6 +625,28 @@ class WebRtcWorker(Generic[VideoProcessorT, AudioProcessorT]):
     def output_audio_track(self) -> Optional[MediaStreamTrack]:
         return self._output_audio_track
 
+    @property
+    def reconnectable(self) -> bool:
+        return self._reconnect_grace_period is not None
+
+    @property
+    def offer_sdp(self) -> Optional[str]:
+        """The SDP of the offer the current peer connection was set up with."""
+        return self._offer_sdp
+
+    @property
+    def time_to_answer(self) -> Optional[float]:
+        """Seconds it took to answer the latest offer, including the ICE
+        candidate gathering, or ``None`` before the first answer."""
+        return self._time_to_answer
+
+    @property
+    def transport_stats(self) -> Optional[List[TransportStats]]:
+        """The latest transport stats samples, oldest first, or ``None`` if
+        sampling is disabled."""
+        sampler = self._transport_stats_sampler
+        return list(sampler.history) if sampler else None
+
     def __init__(
         self,
         mode: WebRtcMode,
@@ -487,6 +674,12 @@ class WebRtcWorker(Generic[VideoProcessorT, AudioProcessorT]):
         *,
         loop: Optional[asyncio.AbstractEventLoop] = None,
         relay: Optional[MediaRelay] = None,
+        decoder_pool: Optional[DecoderPool] = None,
+        governor: Optional[ResourceGovernor] = None,
+        transport_stats_interval: Optional[float] = None,
+        transport_stats_history_size: int = 60,
+        reconnect_grace_period: Optional[float] = None,
+        ice_gathering: Optional[IceGatheringOptions] = None,
     ) -> None:
         # Resolve runtime-bound dependencies once at construction so subsequent
         # methods can run without touching Streamlit's Runtime singleton.
@@ -494,9 +687,27 @@ class WebRtcWorker(Generic[VideoProcessorT, AudioProcessorT]):
         # if they do, they must have constructed the relay on the same loop.
         self._loop = loop if loop is not None else get_global_event_loop()
         self._relay = relay if relay is not None else get_global_relay()
+        # Decode the peer's media on a shared pool instead of on aiortc's
+        # per-receiver decoder threads.
+        self._decoder_pool = decoder_pool
+        # The session slot this worker holds, reserved with
+        # `governor.try_admit()` by whoever created it and released on stop.
+        self._governor = governor
+
+        # How long to keep the processors and tracks alive, waiting for the
+        # peer to reconnect with a new offer, after the connection failed.
+        # `None` disables reconnection.
+        self._reconnect_grace_period = reconnect_grace_period
+        self._reconnect_timer: Optional[asyncio.TimerHandle] = None
+
+        self._ice_gathering = ice_gathering
+        # Seconds from receiving the latest offer to having its answer.
+        self._time_to_answer: Optional[float] = None
 
         self._process_offer_thread: Union[threading.Thread, None] = None
+        self._rtc_configuration = rtc_configuration
         self.pc = RTCPeerConnection(rtc_configuration)
+        self._offer_sdp: Optional[str] = None
         self._answer_queue: queue.Queue = queue.Queue()
 
         with loop_context(self._loop):
@@ -534,6 +745,8 @@ class WebRtcWorker(Generic[VideoProcessorT, AudioProcessorT]):
         self._audio_receiver: Optional[AudioReceiver] = None
         self._input_video_track: Optional[MediaStreamTrack] = None
         self._input_audio_track: Optional[MediaStreamTrack] = None
+        # The passthrough recorder's tracks, moved over on reconnection.
+        self._recorded_input_tracks: Dict[str, ReconnectableEncodedTrack] = {}
         self._output_video_track: Optional[MediaStreamTrack] = None
         self._output_audio_track: Optional[MediaStreamTrack] = None
         self._player: Optional[MediaPlayer] = None
@@ -542,10 +755,23 @@ class WebRtcWorker(Generic[VideoProcessorT, AudioProcessorT]):
 
         self._added_ice_candidate_ids: Set[str] = set()
 
+        self._transport_stats_sampler: Optional[TransportStatsSampler] = (
+            TransportStatsSampler(
+                self.pc,
+                interval=transport_stats_interval,
+                history_size=transport_stats_history_size,
+            )
+            if transport_stats_interval is not None
+            else None
+        )
+        self._transport_stats_future: Optional[concurrent.futures.Future] = None
+
         self._session_shutdown_observer: Optional[SessionShutdownObserver] = (
             SessionShutdownObserver(self.stop)
         )
 
+        self._stop_measured = False
+
         _register_exit_hook()
         _live_workers.add(self)
 
@@ -623,9 +849,15 @@ class WebRtcWorker(Generic[VideoProcessorT, AudioProcessorT]):
         if self.in_recorder_factory:
             in_recorder = self.in_recorder_factory()
 
-        out_recorder = None
+        out_recorder: Optional[MediaRecorder] = None
         if self.out_recorder_factory:
-            out_recorder = self.out_recorder_factory()
+            recorder = self.out_recorder_factory()
+            if isinstance(recorder, PassthroughRecorder):
+                raise TypeError(
+                    "PassthroughRecorder records the encoded input as-is, so it "
+                    "can only be returned from in_recorder_factory."
+                )
+            out_recorder = recorder
 
         video_receiver = None
         audio_receiver = None
@@ -667,24 +899,7 @@ class WebRtcWorker(Generic[VideoProcessorT, AudioProcessorT]):
                 )
                 source_video_track = self._relayed_source_video_track
 
-        @self.pc.listens_to("iceconnectionstatechange")
-        async def on_iceconnectionstatechange():
-            ice_state = self.pc.iceConnectionState
-            logger.debug("ICE connection state is %s", ice_state)
-
-            if ice_state in ("disconnected", "failed", "closed"):
-                logger.debug("ICE state=%s -> stopping WebRTC worker", ice_state)
-
-                self._unset_processors()
-
-                if self.pc and self.pc.connectionState != "closed":
-                    try:
-                        await self.pc.close()
-                    except Exception as e:
-                        logger.debug(
-                            "Error occurred while closing the peer connection", e
-                        )
-                self.stop()
+        self._listen_ice_connection_state(self.pc)
 
         process_offer_task = asyncio.run_coroutine_threadsafe(
             _process_offer_coro(
@@ -707,6 +922,11 @@ class WebRtcWorker(Generic[VideoProcessorT, AudioProcessorT]):
                 sendback_audio=self.sendback_audio,
                 on_track_created=on_track_created,
                 remote_description_set_event=self._remote_description_set,
+                decoder_pool=self._decoder_pool,
+                governor=self._governor,
+                reconnectable=self.reconnectable,
+                ice_gathering=self._ice_gathering,
+                recorded_tracks=self._recorded_input_tracks,
             ),
             loop=loop,
         )
@@ -724,9 +944,94 @@ class WebRtcWorker(Generic[VideoProcessorT, AudioProcessorT]):
 
         process_offer_task.add_done_callback(callback)
 
+        sampler = self._transport_stats_sampler
+        if sampler is not None:
+
+            async def run_transport_stats_sampler():
+                # The transceivers to sample exist once the offer is applied.
+                await self._remote_description_set.wait()
+                await sampler.run()
+
+            self._transport_stats_future = asyncio.run_coroutine_threadsafe(
+                run_transport_stats_sampler(), loop=loop
+            )
+
+    def _listen_ice_connection_state(self, pc: RTCPeerConnection) -> None:
+        @pc.listens_to("iceconnectionstatechange")
+        async def on_iceconnectionstatechange():
+            if pc is not self.pc:
+                # Replaced by a reconnection.
+                return
+            ice_state = pc.iceConnectionState
+            logger.debug("ICE connection state is %s", ice_state)
+
+            if self._reconnect_grace_period is not None:
+                if ice_state in ("connected", "completed"):
+                    reconnect_timer = self._reconnect_timer
+                    self._reconnect_timer = None
+                    if reconnect_timer is not None:
+                        logger.info("ICE state=%s -> recovered", ice_state)
+                        reconnect_timer.cancel()
+                    return
+                if ice_state not in ("disconnected", "failed", "closed"):
+                    return
+                # The peer may come back with a new offer, which `reconnect()`
+                # answers on a new connection.
+                if self._reconnect_timer is None:
+                    logger.info(
+                        "ICE state=%s -> wait %s seconds for the peer to reconnect",
+                        ice_state,
+                        self._reconnect_grace_period,
+                    )
+                    self._reconnect_timer = asyncio.get_running_loop().call_later(
+                        self._reconnect_grace_period, self._give_up_reconnection
+                    )
+                if ice_state != "disconnected":
+                    # A disconnected connection often recovers by itself, as
+                    # the frontend waits for, so it is only closed once failed.
+                    await self._close_replaced_peer_connection(pc)
+                return
+
+            if ice_state in ("disconnected", "failed", "closed"):
+                logger.debug("ICE state=%s -> stopping WebRTC worker", ice_state)
+
+                self._unset_processors()
+
+                if pc.connectionState != "closed":
+                    try:
+                        await pc.close()
+                    except Exception as e:
+                        logger.debug(
+                            "Error occurred while closing the peer connection", e
+                        )
+                self.stop()
+
+    def _give_up_reconnection(self) -> None:
+        self._reconnect_timer = None
+        logger.info("The peer did not reconnect in time. Stop the WebRTC worker.")
+        self.stop()
+
+    @staticmethod
+    async def _close_replaced_peer_connection(pc: RTCPeerConnection) -> None:
+        # The senders' tracks are relay subscriptions of outputs that live on,
+        # which would keep buffering frames nobody sends.
+        for transceiver in pc.getTransceivers():
+            if transceiver.sender.track is not None:
+                transceiver.sender.track.stop()
+        if pc.connectionState != "closed":
+            try:
+                await pc.close()
+            except Exception:
+                logger.debug(
+                    "Error occurred while closing the peer connection", exc_info=True
+                )
+        _force_stop_decoder_threads(pc)
+
     def process_offer(
         self, sdp, type_, timeout: Union[float, None] = None
     ) -> RTCSessionDescription:
+        started_at = time.perf_counter()
+        self._offer_sdp = sdp
         self._process_offer_thread = threading.Thread(
             target=self._run_process_offer_thread,
             kwargs={
@@ -751,8 +1056,89 @@ class WebRtcWorker(Generic[VideoProcessorT, AudioProcessorT]):
             self.stop(timeout=1)
             raise result
 
+        self._record_time_to_answer(started_at)
         return result
 
+    def reconnect(
+        self, sdp, type_, timeout: Union[float, None] = None
+    ) -> RTCSessionDescription:
+        """Answer a new offer from the same peer on a new peer connection,
+        keeping the processors, receivers, sinks and tracks of this worker.
+
+        aiortc cannot restart ICE on an existing connection, so the previous
+        peer connection, failed or not, is closed and replaced. The worker is
+        stopped if the reconnection fails.
+        """
+        if not self.reconnectable:
+            raise RuntimeError("Reconnection is not enabled for this worker")
+
+        started_at = time.perf_counter()
+        future = asyncio.run_coroutine_threadsafe(
+            self._reconnect(RTCSessionDescription(sdp, type_)), loop=self._loop
+        )
+        try:
+            answer = future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            self.stop(timeout=1)
+            raise SignallingTimeoutError(
+                f"Reconnecting the worker has not finished in {timeout} seconds"
+            )
+        except Exception:
+            self.stop(timeout=1)
+            raise
+
+        self._record_time_to_answer(started_at)
+        return answer
+
+    def _record_time_to_answer(self, started_at: float) -> None:
+        self._time_to_answer = time.perf_counter() - started_at
+        OFFER_DURATION.observe(self._time_to_answer)
+        logger.info("Answered the offer in %.3f seconds", self._time_to_answer)
+
+    async def _reconnect(self, offer: RTCSessionDescription) -> RTCSessionDescription:
+        reconnect_timer = self._reconnect_timer
+        self._reconnect_timer = None
+        if reconnect_timer:
+            reconnect_timer.cancel()
+
+        logger.info("Reconnect the WebRTC worker with a new peer connection")
+        old_pc = self.pc
+        pc = RTCPeerConnection(self._rtc_configuration)
+        self.pc = pc
+        self._offer_sdp = offer.sdp
+        self._remote_description_set = asyncio.Event()
+        self._added_ice_candidate_ids = set()
+        if self._transport_stats_sampler is not None:
+            self._transport_stats_sampler.pc = pc
+        self._listen_ice_connection_state(pc)
+
+        await self._close_replaced_peer_connection(old_pc)
+
+        input_tracks: Dict[str, ReconnectableTrack] = {}
+        for input_track in (self._input_video_track, self._input_audio_track):
+            if isinstance(input_track, ReconnectableTrack):
+                input_tracks[input_track.kind] = input_track
+        output_tracks: Dict[str, MediaStreamTrack] = {}
+        for output_track in (self._output_video_track, self._output_audio_track):
+            if output_track is not None:
+                output_tracks[output_track.kind] = output_track
+
+        return await _reconnect_coro(
+            self.mode,
+            pc,
+            offer,
+            relay=self._relay,
+            input_tracks=input_tracks,
+            output_tracks=output_tracks,
+            sendback_video=self.sendback_video,
+            sendback_audio=self.sendback_audio,
+            remote_description_set_event=self._remote_description_set,
+            decoder_pool=self._decoder_pool,
+            ice_gathering=self._ice_gathering,
+            recorded_tracks=self._recorded_input_tracks,
+        )
+
     def set_ice_candidates_from_offerer(self, candidates: Dict[str, Dict]):
         logger.info("Setting ICE candidates from offerer: %s", candidates)
         for candidate_id, candidate_dict in candidates.items():
@@ -894,11 +1280,48 @@ class WebRtcWorker(Generic[VideoProcessorT, AudioProcessorT]):
         self.source_video_track = None
         self._relayed_source_video_track = None
 
+    def _stop_reconnectable_input_tracks(self) -> None:
+        # Unlike the remote tracks, these do not end with the peer connection.
+        # Stopping them ends the processors, receivers, sinks and recorders
+        # reading them.
+        tracks = [self._input_video_track, self._input_audio_track]
+        tracks.extend(self._recorded_input_tracks.values())
+        for track in tracks:
+            if not isinstance(track, ReconnectableTrack):
+                continue
+            loop = self._loop
+            if loop.is_running():
+                # `recv()` may be waiting for a replacement on the loop.
+                loop.call_soon_threadsafe(track.stop)
+            else:
+                track.stop()
+
     def stop(self, timeout: Union[float, None] = 1.0):
         logger.debug("Stopping WebRTC worker")
+        started_at = time.perf_counter()
+        # Only the first of the calls, which may overlap, is measured.
+        with _stop_measure_lock:
+            measured = self in _live_workers and not getattr(
+                self, "_stop_measured", False
+            )
+            self._stop_measured = True
+
+        # From here on, the connection closing is not a chance to reconnect.
+        self._reconnect_grace_period = None
 
         try:
+            reconnect_timer = self._reconnect_timer
+            self._reconnect_timer = None
+            if reconnect_timer:
+                reconnect_timer.cancel()
+
             self._unset_processors()
+            self._stop_reconnectable_input_tracks()
+
+            transport_stats_future = self._transport_stats_future
+            self._transport_stats_future = None
+            if transport_stats_future:
+                transport_stats_future.cancel()
 
             if self._process_offer_thread:
                 self._process_offer_thread.join(timeout=timeout)
@@ -952,4 +1375,11 @@ class WebRtcWorker(Generic[VideoProcessorT, AudioProcessorT]):
             if session_shutdown_observer:
                 session_shutdown_observer.stop()
 
+            governor = self._governor
+            self._governor = None
+            if governor:
+                governor.release()
+
             _live_workers.discard(self)
+            if measured:
+                STOP_DURATION.observe(time.perf_counter() - started_at)
@@ -1,3 +1,4 @@
+from types import SimpleNamespace
 from typing import Any
 
 import pytest
@@ -8,10 +9,12 @@ from streamlit_webrtc.component import (
     WebRtcStreamerContext,
     WebRtcStreamerState,
     _handle_worker_lifecycle,
+    _resolve_server_rtc_configuration,
     _validate_sink_conflicts,
     compile_state,
     generate_frontend_component_key,
 )
+from streamlit_webrtc.ice import IceGatheringOptions
 from streamlit_webrtc.sink import VideoSinkTrack
 
 
@@ -113,6 +116,64 @@ class TestHandleWorkerLifecycle:
 
         assert reruns == []
 
+    def test_new_offer_reconnects_the_running_worker(self, monkeypatch) -> None:
+        reruns: list[bool] = []
+        monkeypatch.setattr(component, "rerun", lambda: reruns.append(True))
+
+        class FakeWorker:
+            reconnectable = True
+            offer_sdp = "old-offer"
+            pc = SimpleNamespace(
+                localDescription=SimpleNamespace(sdp="old-answer", type="answer")
+            )
+
+            def reconnect(self, sdp, type_, timeout=None):
+                self.offer_sdp = sdp
+                self.pc = SimpleNamespace(
+                    localDescription=SimpleNamespace(sdp="new-answer", type="answer")
+                )
+
+        worker = FakeWorker()
+        context: WebRtcStreamerContext[Any, Any] = WebRtcStreamerContext(
+            worker=worker,  # type: ignore[arg-type]
+            state=WebRtcStreamerState(playing=False, signalling=True),
+        )
+        context._is_sdp_answer_sent = True
+
+        _handle_worker_lifecycle(
+            context,
+            key="k",
+            sdp_offer={"sdp": "new-offer", "type": "offer"},
+            make_worker=lambda: pytest.fail("worker should not be created"),
+        )
+
+        assert context._get_worker() is worker
+        assert worker.offer_sdp == "new-offer"
+        assert context._sdp_answer_json == '{"sdp": "new-answer", "type": "answer"}'
+        assert reruns == [True]
+
+
+class TestResolveServerRtcConfiguration:
+    def test_ice_servers_are_not_fetched_if_not_used(self, monkeypatch) -> None:
+        def fail():
+            raise AssertionError("ICE servers should not be fetched")
+
+        monkeypatch.setattr(component, "get_available_ice_servers", fail)
+        config = _resolve_server_rtc_configuration(
+            None, IceGatheringOptions(use_stun=False, use_turn=False)
+        )
+        assert config.iceServers == []
+
+    def test_ice_servers_are_fetched_by_default(self, monkeypatch) -> None:
+        monkeypatch.setattr(
+            component,
+            "get_available_ice_servers",
+            lambda: [{"urls": "stun:stun.example.com:3478"}],
+        )
+        config = _resolve_server_rtc_configuration(None, IceGatheringOptions())
+        assert config.iceServers is not None
+        assert [s.urls for s in config.iceServers] == ["stun:stun.example.com:3478"]
+
 
 class TestValidateSinkConflicts:
     def _sink(self) -> VideoSinkTrack:
@@ -0,0 +1,220 @@
+import http.server
+import json
+import threading
+import time
+from typing import Iterator, List
+
+import pytest
+
+import streamlit_webrtc.credentials as credentials
+from streamlit_webrtc.credentials import _RefreshingCache, get_hf_ice_servers
+
+
+class _CredentialServer(http.server.ThreadingHTTPServer):
+    """A local stand-in for the Hugging Face TURN credential endpoint."""
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _CredentialHandler)
+        self.tokens: List[str] = []
+        self.status = 200
+        self.delay = 0.0
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host!s}:{port}/credentials"
+
+
+class _CredentialHandler(http.server.BaseHTTPRequestHandler):
+    server: _CredentialServer
+
+    def do_GET(self) -> None:
+        self.server.tokens.append(self.headers["X-HF-Access-Token"])
+        time.sleep(self.server.delay)
+        body = json.dumps(
+            {"username": "user", "credential": f"cred-{len(self.server.tokens)}"}
+        ).encode()
+        self.send_response(self.server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch: pytest.MonkeyPatch) -> Iterator[_CredentialServer]:
+    server = _CredentialServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(credentials, "HF_ICE_SERVER_CREDENTIALS_URL", server.url)
+    monkeypatch.delenv(credentials.ICE_SERVERS_CACHE_PATH_ENV, raising=False)
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def cache(monkeypatch: pytest.MonkeyPatch) -> Iterator[_RefreshingCache]:
+    cache = _RefreshingCache("hf", ttl=0.5, failure_backoff=0.2)
+    monkeypatch.setattr(credentials, "_hf_ice_servers_cache", cache)
+    try:
+        yield cache
+    finally:
+        cache.clear()
+
+
+def test_credentials_are_cached(server: _CredentialServer, cache) -> None:
+    ice_servers = get_hf_ice_servers("token")
+
+    assert ice_servers == [
+        {"urls": "turn:gradio-turn.com:80", "username": "user", "credential": "cred-1"}
+    ]
+    assert get_hf_ice_servers("token") == ice_servers
+    assert server.tokens == ["token"]
+
+    get_hf_ice_servers("another-token")
+    assert server.tokens == ["token", "another-token"]
+
+
+def test_credentials_are_refreshed_in_the_background(
+    server: _CredentialServer, cache
+) -> None:
+    assert get_hf_ice_servers("token")[0]["credential"] == "cred-1"
+
+    # Make the refresh slow, to see that callers do not wait for it.
+    server.delay = 0.3
+    time.sleep(cache.ttl * cache.refresh_ratio + 0.1)
+    start = time.monotonic()
+    assert get_hf_ice_servers("token")[0]["credential"] == "cred-1"
+    assert time.monotonic() - start < 0.1
+
+    time.sleep(0.4)
+    assert get_hf_ice_servers("token")[0]["credential"] == "cred-2"
+
+
+def test_stale_credentials_are_served_while_the_refresh_fails(
+    server: _CredentialServer, cache
+) -> None:
+    get_hf_ice_servers("token")
+
+    server.status = 500
+    time.sleep(cache.ttl + 0.1)
+    assert get_hf_ice_servers("token")[0]["credential"] == "cred-1"
+
+    # Retried after `failure_backoff`.
+    server.status = 200
+    time.sleep(cache.failure_backoff * 2)
+    assert get_hf_ice_servers("token")[0]["credential"] != "cred-1"
+
+
+def test_stale_credentials_expire_after_the_grace_period(
+    server: _CredentialServer, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    cache = _RefreshingCache("hf", ttl=0.5, stale_grace=0.3, failure_backoff=0.1)
+    monkeypatch.setattr(credentials, "_hf_ice_servers_cache", cache)
+    try:
+        get_hf_ice_servers("token")
+
+        server.status = 500
+        time.sleep(cache.ttl + 0.1)
+        assert get_hf_ice_servers("token")[0]["credential"] == "cred-1"
+        time.sleep(0.3)
+        # Fetched again by the caller, which fails.
+        with pytest.raises(ValueError):
+            get_hf_ice_servers("token")
+    finally:
+        cache.clear()
+
+
+def test_unused_credentials_are_no_longer_refreshed(
+    server: _CredentialServer, cache
+) -> None:
+    get_hf_ice_servers("token")
+
+    # Refreshed once, as the key was used less than a TTL before, then not.
+    time.sleep(cache.ttl * 3)
+    assert server.tokens == ["token", "token"]
+    assert not cache._refresh_at
+
+    # Served from the cache, and refreshed again.
+    assert get_hf_ice_servers("token")[0]["credential"] == "cred-2"
+    assert cache._refresh_at
+
+
+def test_keys_are_refreshed_on_one_thread(server: _CredentialServer, cache) -> None:
+    # Other tests' caches may still be finishing a refresh.
+    others = set(threading.enumerate())
+
+    def refresh_threads():
+        return [
+            t
+            for t in threading.enumerate()
+            if t.name == "streamlit-webrtc-ice-servers-refresh-hf" and t not in others
+        ]
+
+    tokens = [f"token-{i}" for i in range(5)]
+    for token in tokens:
+        get_hf_ice_servers(token)
+    assert len(refresh_threads()) == 1
+
+    time.sleep(cache.ttl * cache.refresh_ratio + 0.2)
+    assert sorted(server.tokens) == sorted(tokens * 2)
+
+    # The thread ends once nothing is left to refresh.
+    cache.clear()
+    time.sleep(0.1)
+    assert refresh_threads() == []
+
+
+def test_failed_first_fetch_is_not_retried_until_the_backoff(
+    server: _CredentialServer, cache
+) -> None:
+    server.status = 500
+    with pytest.raises(ValueError):
+        get_hf_ice_servers("token")
+    with pytest.raises(ValueError):
+        get_hf_ice_servers("token")
+    assert len(server.tokens) == 1
+
+    server.status = 200
+    time.sleep(cache.failure_backoff + 0.05)
+    assert get_hf_ice_servers("token")[0]["credential"] == "cred-2"
+
+
+def test_disk_cache_survives_restarts(
+    server: _CredentialServer, tmp_path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "ice-servers.json"
+    monkeypatch.setenv(credentials.ICE_SERVERS_CACHE_PATH_ENV, str(path))
+
+    first = _RefreshingCache("hf", ttl=60)
+    monkeypatch.setattr(credentials, "_hf_ice_servers_cache", first)
+    ice_servers = get_hf_ice_servers("token")
+    first.clear()
+    assert "token" not in path.read_text()
+
+    # A new process starts with an empty in-memory cache.
+    second = _RefreshingCache("hf", ttl=60)
+    monkeypatch.setattr(credentials, "_hf_ice_servers_cache", second)
+    try:
+        assert get_hf_ice_servers("token") == ice_servers
+        assert server.tokens == ["token"]
+    finally:
+        second.clear()
+
+    # Expired entries are not loaded.
+    data = json.loads(path.read_text())
+    for item in data.values():
+        item["fetched_at"] -= 60
+    path.write_text(json.dumps(data))
+    third = _RefreshingCache("hf", ttl=60)
+    monkeypatch.setattr(credentials, "_hf_ice_servers_cache", third)
+    try:
+        assert get_hf_ice_servers("token") != ice_servers
+    finally:
+        third.clear()
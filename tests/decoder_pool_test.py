@@ -0,0 +1,207 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+from typing import List, Optional
+
+import pytest
+from aiortc.rtcrtpparameters import RTCRtpCodecParameters
+
+import streamlit_webrtc.decoder_pool as decoder_pool_module
+from streamlit_webrtc.decoder_pool import DecoderPool
+from streamlit_webrtc.encoded import EncodedFrameTap
+
+CODEC = RTCRtpCodecParameters(mimeType="video/VP8", clockRate=90000, payloadType=96)
+
+
+class _EchoDecoder:
+    """Decodes a "frame" into itself, recording the decoding order."""
+
+    def __init__(self, order: List[str], gate: Optional[threading.Event]) -> None:
+        self._order = order
+        self._gate = gate
+
+    def decode(self, encoded_frame: str) -> List[str]:
+        if self._gate is not None:
+            assert self._gate.wait(timeout=5)
+        self._order.append(encoded_frame)
+        return [encoded_frame]
+
+
+@pytest.fixture
+def decode_gate() -> threading.Event:
+    """Set to let the decoders run; set by default."""
+    gate = threading.Event()
+    gate.set()
+    return gate
+
+
+@pytest.fixture
+def decode_order(monkeypatch, decode_gate) -> List[str]:
+    order: List[str] = []
+    monkeypatch.setattr(
+        decoder_pool_module,
+        "get_decoder",
+        lambda codec: _EchoDecoder(order, decode_gate),
+    )
+    return order
+
+
+async def _collect(output_q: asyncio.Queue, count: int) -> list:
+    return [await asyncio.wait_for(output_q.get(), timeout=5) for _ in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_lanes_are_decoded_round_robin(decode_order, decode_gate) -> None:
+    loop = asyncio.get_running_loop()
+    pool = DecoderPool(max_workers=1)
+    busy = pool.open_lane("video")
+    quiet = pool.open_lane("video")
+    busy_q: asyncio.Queue = asyncio.Queue()
+    quiet_q: asyncio.Queue = asyncio.Queue()
+
+    # Lanes are only scheduled once attached, so both backlogs are in place
+    # before the single thread starts decoding. The thread is held on the
+    # first frame until the second lane is attached too.
+    for i in range(4):
+        assert busy.submit((CODEC, f"busy-{i}"))
+    for i in range(2):
+        assert quiet.submit((CODEC, f"quiet-{i}"))
+    decode_gate.clear()
+    busy.attach(loop, busy_q)
+    quiet.attach(loop, quiet_q)
+    decode_gate.set()
+
+    assert await _collect(busy_q, 4) == [f"busy-{i}" for i in range(4)]
+    assert await _collect(quiet_q, 2) == ["quiet-0", "quiet-1"]
+    assert decode_order == [
+        "busy-0",
+        "quiet-0",
+        "busy-1",
+        "quiet-1",
+        "busy-2",
+        "busy-3",
+    ]
+
+    stats = pool.stats()
+    assert stats.threads == 1
+    assert stats.frames_decoded == 6
+    assert busy.frames_decoded == 4
+    assert stats.decode_time_max >= 0
+    pool.shutdown(timeout=5)
+
+
+@pytest.mark.asyncio
+async def test_close_ends_the_track_after_the_backlog(decode_order) -> None:
+    loop = asyncio.get_running_loop()
+    pool = DecoderPool(max_workers=2)
+    lane = pool.open_lane("audio")
+    output_q: asyncio.Queue = asyncio.Queue()
+
+    lane.submit((CODEC, "a"))
+    lane.submit((CODEC, "b"))
+    lane.close()
+    assert lane.submit((CODEC, "after-close"))
+    lane.attach(loop, output_q)
+
+    assert await _collect(output_q, 3) == ["a", "b", None]
+    assert "after-close" not in decode_order
+    assert pool.stats().lanes == 0
+    pool.shutdown(timeout=5)
+
+
+def test_overflowing_lane_drops_its_backlog(decode_order) -> None:
+    pool = DecoderPool(max_workers=1, max_pending_frames=2)
+    lane = pool.open_lane("video")
+
+    assert lane.submit((CODEC, "0"))
+    assert lane.submit((CODEC, "1"))
+    assert not lane.submit((CODEC, "2"))
+
+    stats = pool.stats()
+    assert stats.frames_dropped == 3
+    assert stats.pending_frames == 0
+    assert stats.threads == 0
+    pool.shutdown(timeout=5)
+
+
+@pytest.mark.asyncio
+async def test_lane_decodes_again_after_overflowing(decode_order, decode_gate) -> None:
+    loop = asyncio.get_running_loop()
+    pool = DecoderPool(max_workers=1, max_pending_frames=2)
+    blocker = pool.open_lane("video")
+    lane = pool.open_lane("video")
+    blocker_q: asyncio.Queue = asyncio.Queue()
+    output_q: asyncio.Queue = asyncio.Queue()
+
+    # The only thread is held on the other lane while this one is scheduled
+    # and overflows.
+    decode_gate.clear()
+    blocker.submit((CODEC, "blocker"))
+    blocker.attach(loop, blocker_q)
+    lane.attach(loop, output_q)
+    assert lane.submit((CODEC, "0"))
+    assert lane.submit((CODEC, "1"))
+    assert not lane.submit((CODEC, "2"))
+    decode_gate.set()
+    assert await _collect(blocker_q, 1) == ["blocker"]
+
+    assert lane.submit((CODEC, "3"))
+    assert lane.submit((CODEC, "4"))
+    assert await _collect(output_q, 2) == ["3", "4"]
+    assert lane.frames_decoded == 2
+    assert pool.stats().threads == 1
+    pool.shutdown(timeout=5)
+
+
+@pytest.mark.asyncio
+async def test_lane_goes_on_after_its_decoder_cannot_be_created(
+    monkeypatch, decode_order
+) -> None:
+    def get_decoder(codec):
+        if codec.name == "H264":
+            raise ValueError("Unsupported codec")
+        return _EchoDecoder(decode_order, None)
+
+    monkeypatch.setattr(decoder_pool_module, "get_decoder", get_decoder)
+    h264 = RTCRtpCodecParameters(
+        mimeType="video/H264", clockRate=90000, payloadType=102
+    )
+    loop = asyncio.get_running_loop()
+    pool = DecoderPool(max_workers=1)
+    lane = pool.open_lane("video")
+    output_q: asyncio.Queue = asyncio.Queue()
+    lane.attach(loop, output_q)
+
+    assert lane.submit((h264, "unsupported"))
+    assert lane.submit((CODEC, "0"))
+    assert await _collect(output_q, 1) == ["0"]
+    assert pool.stats().threads == 1
+
+    assert lane.submit((CODEC, "1"))
+    assert await _collect(output_q, 1) == ["1"]
+    pool.shutdown(timeout=5)
+
+
+@pytest.mark.asyncio
+async def test_tap_counts_the_frames_decoded_by_its_lane(decode_order) -> None:
+    loop = asyncio.get_running_loop()
+    pool = DecoderPool(max_workers=1, max_pending_frames=2)
+    lane = pool.open_lane("video")
+    receiver = SimpleNamespace(
+        track=SimpleNamespace(kind="video"), getSynchronizationSources=lambda: []
+    )
+    tap = EncodedFrameTap(receiver, loop, decoder_lane=lane)
+    tap._pending_recv_count = 1  # The decoded track is being pulled.
+    keyframe = SimpleNamespace(data=b"\x10\x02\x00\x9d\x01\x2a", timestamp=0)
+
+    # Not attached yet, so the backlog overflows.
+    for _ in range(3):
+        tap.put((CODEC, keyframe))
+    assert tap.frames_decoded == 0
+
+    output_q: asyncio.Queue = asyncio.Queue()
+    tap.put((CODEC, keyframe))
+    lane.attach(loop, output_q)
+    await _collect(output_q, 1)
+    assert tap.frames_decoded == 1
+    pool.shutdown(timeout=5)
@@ -0,0 +1,90 @@
+import asyncio
+import fractions
+from types import SimpleNamespace
+from typing import List
+
+import av
+import pytest
+from aiortc.mediastreams import MediaStreamTrack
+from aiortc.rtcrtpparameters import RTCRtpCodecParameters
+
+from streamlit_webrtc.encoded import (
+    EncodedForwardTrack,
+    EncodedStreamTrack,
+    is_keyframe,
+)
+
+VP8 = RTCRtpCodecParameters(mimeType="video/VP8", clockRate=90000, payloadType=96)
+H264 = RTCRtpCodecParameters(mimeType="video/H264", clockRate=90000, payloadType=102)
+OPUS = RTCRtpCodecParameters(
+    mimeType="audio/opus", clockRate=48000, channels=2, payloadType=111
+)
+
+
+def test_is_keyframe() -> None:
+    assert is_keyframe(VP8, b"\x10\x02\x00\x9d\x01\x2a")
+    assert not is_keyframe(VP8, b"\x11\x02\x00")
+    assert is_keyframe(H264, b"\x00\x00\x00\x01\x67\x42\x00\x00\x00\x01\x65")
+    assert not is_keyframe(H264, b"\x00\x00\x00\x01\x41\x9a")
+    assert is_keyframe(OPUS, b"\xfc")
+
+
+class _FakeTap:
+    kind = "video"
+
+    def __init__(self) -> None:
+        self.encoded = EncodedStreamTrack("video")
+        self.keyframe_requests = 0
+
+    def subscribe(self):
+        return self.encoded
+
+    def request_keyframe(self) -> None:
+        self.keyframe_requests += 1
+
+
+class _DecodedTrack(MediaStreamTrack):
+    kind = "video"
+
+    async def recv(self) -> av.VideoFrame:
+        frame = av.VideoFrame(16, 16, "yuv420p")
+        frame.pts = 0
+        frame.time_base = fractions.Fraction(1, 90000)
+        return frame
+
+
+def _make_forward_track(sender_codec: RTCRtpCodecParameters):
+    tap = _FakeTap()
+    keyframes_sent: List[bool] = []
+    sender = SimpleNamespace(
+        track=None, _send_keyframe=lambda: keyframes_sent.append(True)
+    )
+    transceiver = SimpleNamespace(sender=sender, _codecs=[sender_codec])
+    pc = SimpleNamespace(getTransceivers=lambda: [transceiver])
+    track = EncodedForwardTrack(pc, tap, fallback=_DecodedTrack())  # type: ignore[arg-type]
+    sender.track = track
+    return track, tap, sender, keyframes_sent
+
+
+@pytest.mark.asyncio
+async def test_forward_track_passes_packets_and_keyframe_requests() -> None:
+    track, tap, sender, keyframes_sent = _make_forward_track(VP8)
+    tap.encoded._put(VP8, b"\x10\x02\x00\x9d\x01\x2a", 0)
+
+    packet = await asyncio.wait_for(track.recv(), timeout=1)
+    assert isinstance(packet, av.Packet)
+    assert bytes(packet) == b"\x10\x02\x00\x9d\x01\x2a"
+
+    sender._send_keyframe()
+    assert keyframes_sent == [True]
+    assert tap.keyframe_requests == 1
+
+
+@pytest.mark.asyncio
+async def test_forward_track_falls_back_to_decoded_frames() -> None:
+    track, tap, _, _ = _make_forward_track(H264)
+    tap.encoded._put(VP8, b"\x10\x02\x00\x9d\x01\x2a", 0)
+
+    assert isinstance(await asyncio.wait_for(track.recv(), timeout=1), av.VideoFrame)
+    assert tap.encoded.readyState == "ended"
+    assert isinstance(await asyncio.wait_for(track.recv(), timeout=1), av.VideoFrame)
@@ -1,9 +1,9 @@
 """Tests for `_get_or_create_context`'s orphaned-context detection.
 
 The detection is what makes a same-tick page-away-and-back round-trip safe
-in a multi-page app: the SessionShutdownObserver's polling thread fires
-within ~1s of navigation, but the user can return faster than that and a
-stale worker/state must not be re-used against the freshly mounted iframe.
+in a multi-page app: the SessionShutdownObserver fires shortly after
+navigation, but the user can return faster than that and a stale
+worker/state must not be re-used against the freshly mounted iframe.
 """
 
 from types import SimpleNamespace
@@ -106,7 +106,7 @@ def test_orphaned_context_resets_worker_and_state():
 
 
 def test_orphan_reset_handles_already_stopped_worker():
-    # Same scenario as above, but the SessionShutdownObserver's polling
+    # Same scenario as above, but the SessionShutdownObserver's watcher
     # thread already called worker.stop() before the user returned. The
     # context still holds a weakref-resolvable worker reference, so the
     # reset path must tolerate `.stop()` being called twice without
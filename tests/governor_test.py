@@ -0,0 +1,189 @@
+import fractions
+import time
+from typing import Any, List
+
+import av
+import numpy as np
+import pytest
+from aiortc import MediaStreamTrack
+from aiortc.mediastreams import MediaStreamError
+
+import streamlit_webrtc.component as component
+from streamlit_webrtc.component import (
+    WebRtcStreamerContext,
+    WebRtcStreamerState,
+    _handle_worker_lifecycle,
+)
+from streamlit_webrtc.governor import DegradationLevel, ResourceGovernor
+from streamlit_webrtc.models import VideoProcessorBase
+from streamlit_webrtc.process import VideoProcessTrack
+
+
+def test_max_sessions() -> None:
+    governor = ResourceGovernor(max_sessions=2)
+
+    assert governor.try_admit()
+    assert governor.try_admit()
+    assert not governor.try_admit()
+    governor.release()
+    assert governor.try_admit()
+    assert governor.stats().sessions == 2
+
+
+def _evaluate_with_latency(governor: ResourceGovernor, seconds: float) -> None:
+    # Let the evaluation interval pass, so that this sample alone makes up
+    # the window evaluated by the call.
+    time.sleep(governor.evaluation_interval * 1.2)
+    governor.record_frame_latency(seconds)
+
+
+def test_level_follows_frame_latency_budget() -> None:
+    governor = ResourceGovernor(frame_latency_budget=0.010, evaluation_interval=0.05)
+
+    levels = []
+    for _ in range(4):
+        _evaluate_with_latency(governor, 0.050)
+        levels.append(governor.level)
+    assert levels == [
+        DegradationLevel.SKIP_FRAMES,
+        DegradationLevel.REDUCE_FPS,
+        DegradationLevel.REDUCE_RESOLUTION,
+        DegradationLevel.REDUCE_RESOLUTION,
+    ]
+    # Still over budget at the highest level: no room for another session.
+    assert not governor.try_admit()
+
+    # Just under budget is not enough to recover...
+    _evaluate_with_latency(governor, 0.009)
+    assert governor.level == DegradationLevel.REDUCE_RESOLUTION
+    # ...well under budget is.
+    _evaluate_with_latency(governor, 0.001)
+    assert governor.level == DegradationLevel.REDUCE_FPS
+    assert governor.try_admit()
+
+
+def test_cpu_usage_is_measured() -> None:
+    governor = ResourceGovernor(cpu_budget=0.0, evaluation_interval=0.05)
+    deadline = time.monotonic() + 0.1
+    while time.monotonic() < deadline:
+        pass
+
+    stats = governor.stats()
+    assert stats.cpu_usage is not None and stats.cpu_usage > 0
+    assert stats.level == DegradationLevel.SKIP_FRAMES
+
+
+class _FixedLevelGovernor:
+    def __init__(self, level: DegradationLevel) -> None:
+        self.level = level
+        self.latencies: List[float] = []
+
+    def record_frame_latency(self, seconds: float) -> None:
+        self.latencies.append(seconds)
+
+
+class _StubVideoTrack(MediaStreamTrack):
+    kind = "video"
+
+    def __init__(self, count: int) -> None:
+        super().__init__()
+        self._frames = []
+        for i in range(count):
+            frame = av.VideoFrame.from_ndarray(
+                np.full((16, 32, 3), i, dtype=np.uint8), format="bgr24"
+            )
+            frame.pts = i
+            frame.time_base = fractions.Fraction(1, 90000)
+            self._frames.append(frame)
+
+    async def recv(self) -> av.VideoFrame:
+        if not self._frames:
+            raise MediaStreamError
+        return self._frames.pop(0)
+
+
+class _RecordingProcessor(VideoProcessorBase):
+    def __init__(self) -> None:
+        self.received: List[av.VideoFrame] = []
+
+    def recv(self, frame: av.VideoFrame) -> av.VideoFrame:
+        self.received.append(frame)
+        return frame
+
+
+@pytest.mark.asyncio
+async def test_process_track_applies_degradation_level() -> None:
+    governor = _FixedLevelGovernor(DegradationLevel.REDUCE_RESOLUTION)
+    processor = _RecordingProcessor()
+    track = VideoProcessTrack(
+        _StubVideoTrack(8),
+        processor,
+        governor=governor,  # type: ignore[arg-type]
+    )
+
+    pts = [(await track.recv()).pts for _ in range(4)]
+
+    # Every other input frame is dropped...
+    assert pts == [1, 3, 5, 7]
+    # ...the processor only runs on every other output frame...
+    assert len(processor.received) == 2
+    assert len(governor.latencies) == 2
+    # ...at half the resolution.
+    assert (processor.received[0].width, processor.received[0].height) == (16, 8)
+
+
+@pytest.mark.asyncio
+async def test_skipped_frames_repeat_a_copy_of_the_last_output() -> None:
+    governor = _FixedLevelGovernor(DegradationLevel.SKIP_FRAMES)
+    track = VideoProcessTrack(
+        _StubVideoTrack(2),
+        _RecordingProcessor(),
+        governor=governor,  # type: ignore[arg-type]
+    )
+
+    processed = await track.recv()
+    repeated = await track.recv()
+
+    # The repeat is a new frame, so restamping it leaves the frame already
+    # sent alone.
+    assert repeated is not processed
+    assert (processed.pts, repeated.pts) == (0, 1)
+    np.testing.assert_array_equal(
+        repeated.to_ndarray(format="bgr24"), processed.to_ndarray(format="bgr24")
+    )
+
+
+def test_refused_offer_reports_server_busy(monkeypatch) -> None:
+    reruns: List[bool] = []
+    monkeypatch.setattr(component, "rerun", lambda: reruns.append(True))
+    governor = ResourceGovernor(max_sessions=0)
+    context: WebRtcStreamerContext[Any, Any] = WebRtcStreamerContext(
+        worker=None, state=WebRtcStreamerState(playing=False, signalling=True)
+    )
+
+    _handle_worker_lifecycle(
+        context,
+        key="k",
+        sdp_offer={"sdp": "v=0\r\n", "type": "offer"},
+        make_worker=lambda: pytest.fail("worker should not be created"),
+        governor=governor,
+    )
+
+    assert context.state.server_busy
+    assert context._refusing_offer
+    assert reruns == [True]
+
+    # The frontend stopped; the playing state is handed back to the user
+    # and the refusal is cleared.
+    context._set_state(WebRtcStreamerState(playing=False, signalling=False))
+    _handle_worker_lifecycle(
+        context,
+        key="k",
+        sdp_offer=None,
+        make_worker=lambda: pytest.fail("worker should not be created"),
+        governor=governor,
+    )
+
+    assert context.state == WebRtcStreamerState(playing=False, signalling=False)
+    assert not context._refusing_offer
+    assert reruns == [True, True]
@@ -0,0 +1,33 @@
+import ifaddr
+import pytest
+
+from streamlit_webrtc.ice import IceGatheringOptions, resolve_host_addresses
+
+
+def _loopback_adapter_name() -> str:
+    for adapter in ifaddr.get_adapters():
+        if any(ip.ip == "127.0.0.1" for ip in adapter.ips):
+            return adapter.name
+    pytest.skip("No loopback interface")
+
+
+def test_resolve_host_addresses_by_address() -> None:
+    assert resolve_host_addresses(["127.0.0.1", "::1"]) == ["127.0.0.1", "::1"]
+    assert resolve_host_addresses(["127.0.0.1", "::1"], use_ipv6=False) == ["127.0.0.1"]
+    assert resolve_host_addresses(["127.0.0.1", "::1"], use_ipv4=False) == ["::1"]
+
+
+def test_resolve_host_addresses_by_interface_name() -> None:
+    addresses = resolve_host_addresses([_loopback_adapter_name()], use_ipv6=False)
+    assert addresses == ["127.0.0.1"]
+
+
+def test_unknown_interface_is_skipped(caplog: pytest.LogCaptureFixture) -> None:
+    assert resolve_host_addresses(["no-such-interface0"]) == []
+    assert "no-such-interface0 is not found" in caplog.text
+
+
+def test_uses_ice_servers() -> None:
+    assert IceGatheringOptions().uses_ice_servers
+    assert IceGatheringOptions(use_stun=False).uses_ice_servers
+    assert not IceGatheringOptions(use_stun=False, use_turn=False).uses_ice_servers
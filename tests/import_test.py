@@ -1,2 +1,51 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import streamlit_webrtc
+
+# The dependencies that make `import streamlit_webrtc` slow to import.
+_HEAVY_MODULES = ("aiortc", "av", "numpy", "streamlit")
+
+
 def test_streamlit_webrtc_can_be_imported():
     import streamlit_webrtc  # noqa: F401
+
+
+def _modules_loaded_by(code: str) -> "list[str]":
+    # A fresh interpreter, as the test session has imported everything already.
+    check = f"import sys\n{code}\nprint(' '.join(m for m in {_HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", check],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).parent.parent,
+    )
+    return result.stdout.split()
+
+
+def test_import_does_not_load_heavy_dependencies():
+    assert _modules_loaded_by("import streamlit_webrtc") == []
+    assert (
+        _modules_loaded_by(
+            "from streamlit_webrtc import IceGatheringOptions, RTCConfiguration, "
+            "ResourceGovernor, get_hf_ice_servers"
+        )
+        == []
+    )
+
+
+def test_heavy_dependencies_are_loaded_on_first_use():
+    loaded = _modules_loaded_by("from streamlit_webrtc import webrtc_streamer")
+    assert "aiortc" in loaded
+    assert "streamlit" in loaded
+
+
+def test_all_public_names_are_available():
+    for name in streamlit_webrtc.__all__:
+        assert getattr(streamlit_webrtc, name) is not None, name
+        assert name in dir(streamlit_webrtc)
+    assert streamlit_webrtc.VideoTransformerFactory is (
+        streamlit_webrtc.VideoProcessorFactory
+    )
@@ -0,0 +1,138 @@
+import asyncio
+import fractions
+from typing import List, Optional
+
+import av
+import numpy as np
+import pytest
+from aiortc.contrib.media import MediaRelay
+
+from streamlit_webrtc.jitter_buffer import AudioJitterBuffer, JitterBufferOptions
+from streamlit_webrtc.mix import MediaStreamMixTrack
+from streamlit_webrtc.mixers import AudioMixer
+from streamlit_webrtc.source import AudioSourceTrack
+
+SAMPLES = 960
+TIME_BASE = fractions.Fraction(1, 48000)
+
+
+def _frame(value: int, pts: Optional[int]) -> av.AudioFrame:
+    frame = av.AudioFrame.from_ndarray(
+        np.full((1, SAMPLES * 2), value, dtype=np.int16),
+        format="s16",
+        layout="stereo",
+    )
+    frame.sample_rate = 48000
+    if pts is not None:
+        frame.pts = pts
+        frame.time_base = TIME_BASE
+    return frame
+
+
+def _pulled_values(buffer: AudioJitterBuffer, pulls: int) -> List[int]:
+    values = []
+    for _ in range(pulls):
+        samples = buffer.pull_frame().to_ndarray()[0]
+        assert (samples == samples[0]).all()
+        values.append(int(samples[0]))
+    return values
+
+
+def test_jitter_buffer_delays_by_the_target_and_fills_gaps_with_silence() -> None:
+    buffer = AudioJitterBuffer(
+        0.02, JitterBufferOptions(target_delay=0.04, max_delay=0.2)
+    )
+    assert _pulled_values(buffer, 1) == [0]
+
+    # A burst of three frames, then a lost one, then a late arrival.
+    for i in (1, 2, 3):
+        buffer.push(_frame(i, pts=i * SAMPLES))
+    buffer.push(_frame(5, pts=5 * SAMPLES))
+    assert buffer.stats().depth == pytest.approx(0.04 + 0.1)
+
+    assert _pulled_values(buffer, 7) == [0, 0, 1, 2, 3, 0, 5]
+    stats = buffer.stats()
+    assert stats.underruns == 0
+    assert stats.silence == pytest.approx(0.02)
+    assert stats.depth == 0
+
+    assert _pulled_values(buffer, 1) == [0]
+    stats = buffer.stats()
+    assert stats.underruns == 1
+    assert stats.silence == pytest.approx(0.04)
+
+    # Arrived after it was pulled.
+    buffer.push(_frame(4, pts=4 * SAMPLES))
+    assert buffer.stats().late == pytest.approx(0.02)
+
+
+def test_jitter_buffer_bounds_its_delay_and_resyncs() -> None:
+    buffer = AudioJitterBuffer(
+        0.02, JitterBufferOptions(target_delay=0.02, max_delay=0.1)
+    )
+    for i in range(10):
+        buffer.push(_frame(i + 1, pts=i * SAMPLES))
+    stats = buffer.stats()
+    assert stats.depth == pytest.approx(0.1)
+    assert stats.overflow == pytest.approx(0.12)
+    assert stats.drift == pytest.approx(0.08)
+    assert _pulled_values(buffer, 2) == [6, 7]
+
+    # The sender restarted its timestamps.
+    buffer.push(_frame(100, pts=0))
+    assert buffer.stats().resyncs == 1
+    assert _pulled_values(buffer, 2) == [0, 100]
+
+    # Frames without timestamps follow the previous ones.
+    buffer.push(_frame(7, pts=None))
+    assert _pulled_values(buffer, 1) == [7]
+
+    with pytest.raises(ValueError):
+        AudioJitterBuffer(0.02, JitterBufferOptions(target_delay=0.1, max_delay=0.1))
+
+
+@pytest.mark.asyncio
+async def test_mix_track_pulls_one_ptime_from_each_input_per_tick() -> None:
+    loop = asyncio.get_running_loop()
+
+    def source_callback(pts: int, time_base: fractions.Fraction) -> av.AudioFrame:
+        return _frame(1000, pts=None)
+
+    mix_track: MediaStreamMixTrack = MediaStreamMixTrack(
+        kind="audio",
+        mixer_callback=AudioMixer(),
+        mixer_output_interval=0.02,
+        loop=loop,
+        relay=MediaRelay(),
+        jitter_buffer=JitterBufferOptions(target_delay=0.04),
+    )
+    sources = [AudioSourceTrack(source_callback), AudioSourceTrack(source_callback)]
+    for source in sources:
+        mix_track.add_input_track(source)
+
+    try:
+        outputs = [await mix_track.recv() for _ in range(15)]
+        assert all(frame.samples == SAMPLES for frame in outputs)
+        assert [frame.pts for frame in outputs] == [
+            i * SAMPLES for i in range(len(outputs))
+        ]
+        # Silent while the buffers fill up, then both inputs, continuously.
+        values = [int(frame.to_ndarray()[0, 0]) for frame in outputs]
+        assert values[-5:] == [2000] * 5
+
+        stats = mix_track.jitter_buffer_stats()
+        assert set(stats) == set(sources)
+    finally:
+        mix_track.stop()
+        for source in sources:
+            source.stop()
+        await asyncio.sleep(0.1)
+
+    with pytest.raises(ValueError):
+        MediaStreamMixTrack(
+            kind="video",
+            mixer_callback=lambda frames: frames[0],
+            loop=loop,
+            relay=MediaRelay(),
+            jitter_buffer=JitterBufferOptions(),
+        )
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from scripts.loadtest import (
+    _read_stamp,
+    _stamp,
+    resolve_processor,
+    run_load_test,
+)
+
+
+@pytest.mark.parametrize("seq", [0, 1, 0x1234, 0xFFFF])
+def test_stamp_round_trip(seq):
+    image = np.full((48, 64, 3), 96, dtype=np.uint8)
+    _stamp(image, seq)
+    assert _read_stamp(image[:, :, 0]) == seq
+
+
+def test_resolve_processor():
+    assert resolve_processor("none") is None
+    assert callable(resolve_processor("copy"))
+    assert callable(resolve_processor("busy:1"))
+    assert resolve_processor("numpy:copy") is np.copy
+    with pytest.raises(ValueError):
+        resolve_processor("unknown")
+
+
+@pytest.mark.asyncio
+async def test_run_load_test_reports_each_session():
+    report = await run_load_test(
+        2,
+        1.5,
+        processor=resolve_processor("copy"),
+        warmup=1.0,
+        width=160,
+        height=120,
+        fps=15,
+        audio=True,
+    )
+
+    assert [s.session for s in report.sessions] == [0, 1]
+    for session in report.sessions:
+        assert session.video_frames_received > 0
+        assert session.video_fps > 0
+        assert session.audio_fps is not None and session.audio_fps > 0
+        # The frames come back with their stamps intact.
+        assert session.latency_mean is not None and session.latency_mean > 0
+        assert session.latency_p95 is not None and session.latency_p95 > 0
+        assert session.time_to_answer is not None
+    assert report.cpu_usage > 0
+    assert report.max_rss_bytes > 0
@@ -0,0 +1,166 @@
+import asyncio
+import fractions
+import logging
+import threading
+import time
+
+import av
+import numpy as np
+import pytest
+from aiortc import MediaStreamTrack
+from aiortc.mediastreams import MediaStreamError
+
+from streamlit_webrtc.loop_monitor import (
+    LoopLagMonitor,
+    describe_callback,
+    get_loop_lag_monitor,
+    monitor_callback,
+    start_loop_lag_monitor,
+    stop_loop_lag_monitor,
+)
+from streamlit_webrtc.metrics import LOOP_SLOW_CALLBACKS
+from streamlit_webrtc.models import VideoProcessorBase
+from streamlit_webrtc.process import VideoProcessTrack
+from streamlit_webrtc.sink import VideoSinkTrack
+
+
+class _OneFrameTrack(MediaStreamTrack):
+    kind = "video"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._sent = False
+
+    async def recv(self) -> av.VideoFrame:
+        if self._sent:
+            self.stop()
+            raise MediaStreamError
+        self._sent = True
+        frame = av.VideoFrame.from_ndarray(
+            np.zeros((16, 16, 3), dtype=np.uint8), format="bgr24"
+        )
+        frame.pts = 0
+        frame.time_base = fractions.Fraction(1, 90000)
+        return frame
+
+
+def slow_callback(frame: av.VideoFrame) -> None:
+    time.sleep(0.1)
+
+
+class _SlowProcessor(VideoProcessorBase):
+    def recv(self, frame: av.VideoFrame) -> av.VideoFrame:
+        time.sleep(0.1)
+        return frame
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+@pytest.fixture
+def monitor(loop):
+    monitor = start_loop_lag_monitor(
+        loop, interval=0.02, threshold=0.05, stall_timeout=0.2
+    )
+    # Wait for the sampler to run on the loop.
+    while monitor.stats().samples == 0:
+        time.sleep(0.01)
+    yield monitor
+    stop_loop_lag_monitor()
+
+
+def _run(loop, coro, timeout=5):
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+
+def test_slow_sink_callback_is_attributed(loop, monitor, caplog):
+    before = LOOP_SLOW_CALLBACKS.value(component="sink")
+    sink = VideoSinkTrack(slow_callback)
+
+    async def run_sink() -> None:
+        sink.addTrack(_OneFrameTrack())
+        sink.start()
+        assert sink._task is not None
+        await sink._task
+
+    with caplog.at_level(logging.WARNING, "streamlit_webrtc.loop_monitor"):
+        _run(loop, run_sink())
+
+    stats = monitor.stats()
+    assert stats.slow_callbacks == {"sink": 1}
+    assert stats.blocked["sink"] >= 0.1
+    assert LOOP_SLOW_CALLBACKS.value(component="sink") == before + 1
+    assert "slow_callback" in caplog.text
+    # The loop ran the timer late while the callback blocked it.
+    time.sleep(0.05)
+    assert monitor.stats().lag_max >= 0.05
+
+
+def test_slow_processor_is_attributed(loop, monitor, caplog):
+    track = VideoProcessTrack(track=_OneFrameTrack(), processor=_SlowProcessor())
+
+    with caplog.at_level(logging.WARNING, "streamlit_webrtc.loop_monitor"):
+        _run(loop, track.recv())
+
+    assert monitor.stats().slow_callbacks == {"processor": 1}
+    assert "_SlowProcessor" in caplog.text
+
+
+def test_stall_is_reported_with_the_running_callback(loop, monitor, caplog):
+    def block() -> None:
+        with monitor_callback("mixer", slow_callback):
+            time.sleep(0.5)
+
+    with caplog.at_level(logging.WARNING, "streamlit_webrtc.loop_monitor"):
+        loop.call_soon_threadsafe(block)
+        time.sleep(0.7)
+
+    assert monitor.stats().stalls == 1
+    assert "running the mixer callback" in caplog.text
+    assert "slow_callback" in caplog.text
+
+
+def test_stall_outside_callbacks_is_reported_with_the_stack(loop, monitor, caplog):
+    with caplog.at_level(logging.WARNING, "streamlit_webrtc.loop_monitor"):
+        loop.call_soon_threadsafe(time.sleep, 0.5)
+        time.sleep(0.7)
+
+    assert monitor.stats().stalls == 1
+    assert "The event loop has been blocked" in caplog.text
+    assert "run_forever" in caplog.text
+
+
+def test_sections_off_the_loop_are_ignored(loop):
+    monitor = LoopLagMonitor(loop)
+    assert monitor.enter("sink", slow_callback) is None
+    monitor.exit(None)
+    assert monitor.stats().slow_callbacks == {}
+
+
+def test_monitor_callback_without_a_monitor():
+    assert get_loop_lag_monitor() is None
+    with monitor_callback("sink", slow_callback):
+        pass
+
+
+def test_start_returns_the_running_monitor(loop, monitor):
+    assert start_loop_lag_monitor(loop) is monitor
+    assert get_loop_lag_monitor() is monitor
+
+
+def test_describe_callback():
+    assert describe_callback(slow_callback) == f"{__name__}.slow_callback"
+    assert describe_callback(_SlowProcessor()) == f"{__name__}._SlowProcessor"
+
+    class Wrapper:
+        _frame_callback = staticmethod(slow_callback)
+
+    assert describe_callback(Wrapper()) == f"{__name__}.slow_callback"
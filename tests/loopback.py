@@ -0,0 +1,52 @@
+"""Helpers shared by the tests and scripts that connect an in-process aiortc
+client to a real `WebRtcWorker` over the loopback interface."""
+
+from typing import Any, Dict
+
+from aiortc import RTCPeerConnection
+
+from streamlit_webrtc.webrtc import WebRtcWorker
+
+WORKER_DEFAULTS: Dict[str, Any] = dict(
+    rtc_configuration=None,
+    source_video_track=None,
+    source_audio_track=None,
+    sink_video_track=None,
+    sink_audio_track=None,
+    player_factory=None,
+    in_recorder_factory=None,
+    out_recorder_factory=None,
+    video_frame_callback=None,
+    audio_frame_callback=None,
+    queued_video_frames_callback=None,
+    queued_audio_frames_callback=None,
+    on_video_ended=None,
+    on_audio_ended=None,
+    video_processor_factory=None,
+    audio_processor_factory=None,
+    async_processing=True,
+    video_receiver_size=4,
+    audio_receiver_size=4,
+    sendback_video=True,
+    sendback_audio=True,
+)
+
+
+def wire_ice(client: RTCPeerConnection, worker: WebRtcWorker) -> None:
+    """Trickle ICE candidates in both directions.
+
+    aiortc's `setLocalDescription` waits for ICE gathering, so host
+    candidates are embedded in the initial SDP. But aiortc still emits
+    `icecandidate` events afterward; without these wirings, in-process
+    loopback occasionally stalls before the connection completes.
+    """
+
+    @client.on("icecandidate")  # type: ignore[arg-type]
+    async def _to_worker(c):  # pragma: no cover - aiortc-driven
+        if c is not None:
+            worker.add_ice_candidate(c)
+
+    @worker.pc.on("icecandidate")  # type: ignore[arg-type]
+    async def _to_client(c):  # pragma: no cover - aiortc-driven
+        if c is not None:
+            await client.addIceCandidate(c)
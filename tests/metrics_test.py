@@ -0,0 +1,225 @@
+import asyncio
+import fractions
+import threading
+import urllib.error
+import urllib.request
+from typing import List
+
+import av
+import numpy as np
+import pytest
+from aiortc import MediaStreamTrack
+from aiortc.mediastreams import MediaStreamError
+
+from scripts.loadtest import run_load_test
+from streamlit_webrtc.metrics import (
+    FRAMES_DROPPED,
+    FRAMES_PROCESSED,
+    OFFER_DURATION,
+    STOP_DURATION,
+    THREADS,
+    WORKERS,
+    LiveObjects,
+    MetricsRegistry,
+    render_metrics,
+    start_metrics_server,
+)
+from streamlit_webrtc.models import VideoProcessorBase
+from streamlit_webrtc.process import VideoProcessTrack
+from streamlit_webrtc.receive import MediaReceiver
+
+
+def _video_frame(pts: int = 0) -> av.VideoFrame:
+    frame = av.VideoFrame.from_ndarray(
+        np.zeros((16, 16, 3), dtype=np.uint8), format="bgr24"
+    )
+    frame.pts = pts
+    frame.time_base = fractions.Fraction(1, 90000)
+    return frame
+
+
+class _FramesTrack(MediaStreamTrack):
+    kind = "video"
+
+    def __init__(self, frames: List[av.VideoFrame]) -> None:
+        super().__init__()
+        self._frames = list(frames)
+
+    async def recv(self) -> av.VideoFrame:
+        if not self._frames:
+            self.stop()
+            raise MediaStreamError
+        return self._frames.pop(0)
+
+
+class _IdentityProcessor(VideoProcessorBase):
+    def recv(self, frame: av.VideoFrame) -> av.VideoFrame:
+        return frame
+
+
+def test_render_in_text_exposition_format():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests.", ("path",))
+    counter.inc(path='/a"b')
+    counter.inc(2, path='/a"b')
+    gauge = registry.gauge("temperature", "Temperature.")
+    gauge.set(21.5)
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    assert registry.render() == (
+        "# HELP requests_total Requests.\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{path="/a\\"b"} 3\n'
+        "# HELP temperature Temperature.\n"
+        "# TYPE temperature gauge\n"
+        "temperature 21.5\n"
+        "# HELP latency_seconds Latency.\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{le="0.1"} 1\n'
+        'latency_seconds_bucket{le="1"} 2\n'
+        'latency_seconds_bucket{le="+Inf"} 3\n'
+        "latency_seconds_sum 5.55\n"
+        "latency_seconds_count 3\n"
+    )
+
+
+def test_labels_are_checked():
+    registry = MetricsRegistry()
+    counter = registry.counter("frames_total", "Frames.", ("kind",))
+    with pytest.raises(ValueError):
+        counter.inc()
+    with pytest.raises(ValueError):
+        counter.inc(kind="video", stage="relay")
+    with pytest.raises(ValueError):
+        counter.inc(-1, kind="video")
+    with pytest.raises(ValueError):
+        registry.counter("frames_total", "Frames again.")
+
+
+def test_gauge_functions_add_up():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("queued", "Queued.", ("queue",))
+    gauge.add_function(lambda: {("a",): 1, ("b",): 2})
+    gauge.add_function(lambda: {("a",): 3})
+    assert gauge.values() == {("a",): 4, ("b",): 2}
+
+    def broken():
+        raise RuntimeError
+
+    # A failing function leaves the gauge out instead of failing the render.
+    gauge.add_function(broken)
+    assert "queued{" not in registry.render()
+
+
+def test_library_threads_are_counted_by_type():
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=stop.wait, name=name, daemon=True)
+        for name in (
+            "SessionShutdownWatcher",
+            "SessionShutdownCallback",
+            "SessionShutdownCallback",
+            "streamlit-webrtc-ice-servers-refresh-hf",
+        )
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        values = THREADS.values()
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    assert values[("session_shutdown_watcher",)] >= 1
+    assert values[("session_shutdown_callback",)] >= 2
+    assert values[("ice_servers_refresh",)] >= 1
+
+
+def test_live_objects_are_counted_while_others_are_created():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("objects", "Objects.")
+
+    class _Object:
+        pass
+
+    live: "LiveObjects[_Object]" = LiveObjects()
+    gauge.add_function(lambda: len(live.snapshot()))
+    # Enough of them for a snapshot to take a while.
+    kept = [_Object() for _ in range(20000)]
+    for obj in kept:
+        live.add(obj)
+    stop = threading.Event()
+
+    def churn():
+        while not stop.is_set():
+            obj = _Object()
+            live.add(obj)
+            live.discard(obj)
+
+    thread = threading.Thread(target=churn)
+    thread.start()
+    try:
+        for _ in range(200):
+            assert "\nobjects " in registry.render()
+    finally:
+        stop.set()
+        thread.join()
+
+
+def test_metrics_server():
+    registry = MetricsRegistry()
+    registry.counter("hits_total", "Hits.").inc()
+    server = start_metrics_server(port=0, registry=registry)
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(f"{base}/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert "hits_total 1" in response.read().decode()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{base}/other")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_process_track_counts_processed_frames():
+    before = FRAMES_PROCESSED.value(kind="video")
+    track = VideoProcessTrack(
+        track=_FramesTrack([_video_frame(i) for i in range(3)]),
+        processor=_IdentityProcessor(),
+    )
+
+    async def drain() -> None:
+        for _ in range(3):
+            await track.recv()
+
+    asyncio.run(drain())
+    assert FRAMES_PROCESSED.value(kind="video") == before + 3
+    assert 'streamlit_webrtc_tracks{type="process",kind="video"}' in render_metrics()
+
+
+@pytest.mark.asyncio
+async def test_receiver_counts_dropped_frames():
+    before = FRAMES_DROPPED.value(stage="receiver")
+    receiver: MediaReceiver = MediaReceiver(queue_maxsize=1)
+    receiver.addTrack(_FramesTrack([_video_frame(i) for i in range(3)]))
+    receiver.start()
+    await asyncio.sleep(0.05)
+    receiver.stop()
+    assert FRAMES_DROPPED.value(stage="receiver") == before + 2
+
+
+@pytest.mark.asyncio
+async def test_worker_metrics():
+    offers = OFFER_DURATION.count()
+    stops = STOP_DURATION.count()
+
+    await run_load_test(1, 0.5, warmup=0.5)
+
+    assert OFFER_DURATION.count() == offers + 1
+    assert STOP_DURATION.count() == stops + 1
+    assert WORKERS.values() == {(): 0}
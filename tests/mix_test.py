@@ -9,6 +9,7 @@ simple `VideoSourceTrack`s yielding constant frames.
 
 import asyncio
 import fractions
+import threading
 import time
 from typing import List
 
@@ -62,12 +63,14 @@ async def test_mixer_callback_receives_a_single_input() -> None:
     mix_track.add_input_track(source)
 
     try:
-        outputs = [await mix_track.recv() for _ in range(3)]
-        assert len(outputs) == 3
+        outputs = [await mix_track.recv() for _ in range(8)]
+        assert len(outputs) == 8
+        # The mixer ticks twice as often as the input sends frames, and only
+        # calls the callback when there is a new one.
+        assert 2 <= len(received) < 8
         # Each invocation saw exactly one input frame — there's only one
         # input track registered.
-        assert len(received) >= 3
-        assert all(len(frames) == 1 for frames in received[:3])
+        assert all(len(frames) == 1 for frames in received)
     finally:
         await _teardown(mix_track, [source])
 
@@ -141,3 +144,184 @@ async def test_mixer_output_cadence_tracks_configured_interval() -> None:
         assert interval * 2 < elapsed < interval * 8
     finally:
         await _teardown(mix_track, [source])
+
+
+@pytest.mark.asyncio
+async def test_frames_are_routed_to_their_inputs_and_removed_inputs_dropped() -> None:
+    loop = asyncio.get_running_loop()
+    received: List[List[av.VideoFrame]] = []
+
+    def mixer_cb(frames: List[av.VideoFrame]) -> av.VideoFrame:
+        received.append(frames)
+        return _output_frame()
+
+    mix_track = MediaStreamMixTrack(
+        kind="video",
+        mixer_callback=mixer_cb,
+        loop=loop,
+        relay=MediaRelay(),
+    )
+    sources = [VideoSourceTrack(_video_source_callback, fps=30) for _ in range(3)]
+    for source in sources:
+        mix_track.add_input_track(source)
+    proxies = list(mix_track._input_proxies.values())
+    assert set(mix_track._input_proxies_by_id) == {proxy.id for proxy in proxies}
+
+    try:
+        await mix_track.recv()
+        mix_track.remove_input_proxy(proxies[0])
+
+        assert list(mix_track._input_proxies.values()) == proxies[1:]
+        assert set(mix_track._input_proxies_by_id) == {p.id for p in proxies[1:]}
+        assert set(mix_track._input_tracks_by_proxy_id) == {p.id for p in proxies[1:]}
+
+        received.clear()
+        for _ in range(5):
+            await mix_track.recv()
+        assert received
+        assert all(len(frames) <= 2 for frames in received)
+    finally:
+        await _teardown(mix_track, sources)
+
+
+@pytest.mark.asyncio
+async def test_mixer_repeats_the_output_until_an_input_changes() -> None:
+    loop = asyncio.get_running_loop()
+    calls = 0
+
+    def mixer_cb(frames: List[av.VideoFrame]) -> av.VideoFrame:
+        nonlocal calls
+        calls += 1
+        return _output_frame()
+
+    mix_track = MediaStreamMixTrack(
+        kind="video",
+        mixer_callback=mixer_cb,
+        mixer_output_interval=1 / 50,
+        loop=loop,
+        relay=MediaRelay(),
+    )
+    source = VideoSourceTrack(_video_source_callback, fps=5)
+    mix_track.add_input_track(source)
+
+    try:
+        outputs = [await mix_track.recv() for _ in range(15)]
+        stats = mix_track.stats()
+        assert stats.mixed == calls
+        assert stats.repeated > stats.mixed
+        assert stats.ticks == stats.mixed + stats.repeated
+        # The repeated frames are copies, on the tick grid.
+        assert len({id(frame) for frame in outputs}) == len(outputs)
+        assert all((frame.to_ndarray(format="bgr24") == 7).all() for frame in outputs)
+        pts = [frame.pts for frame in outputs]
+        assert all(p % 1800 == 0 for p in pts)
+        assert pts == sorted(set(pts))
+    finally:
+        await _teardown(mix_track, [source])
+
+
+@pytest.mark.asyncio
+async def test_mixer_skips_missed_ticks_and_bounds_its_output_queue() -> None:
+    loop = asyncio.get_running_loop()
+
+    def slow_mixer_cb(frames: List[av.VideoFrame]) -> av.VideoFrame:
+        time.sleep(0.035)
+        return _output_frame()
+
+    mix_track = MediaStreamMixTrack(
+        kind="video",
+        mixer_callback=slow_mixer_cb,
+        mixer_output_interval=0.01,
+        loop=loop,
+        relay=MediaRelay(),
+        output_queue_size=1,
+    )
+    source = VideoSourceTrack(_video_source_callback, fps=100)
+    mix_track.add_input_track(source)
+
+    try:
+        await mix_track.recv()
+        # Not consuming the output for a while.
+        await asyncio.sleep(0.3)
+        stats = mix_track.stats()
+        assert stats.missed_ticks > 0
+        assert stats.dropped > 0
+        assert mix_track._queue.qsize() == 1
+    finally:
+        await _teardown(mix_track, [source])
+
+
+@pytest.mark.asyncio
+async def test_async_mixing_runs_the_callback_off_the_loop() -> None:
+    loop = asyncio.get_running_loop()
+    threads = set()
+
+    def slow_mixer_cb(frames: List[av.VideoFrame]) -> av.VideoFrame:
+        threads.add(threading.get_ident())
+        time.sleep(0.035)
+        return _output_frame()
+
+    mix_track = MediaStreamMixTrack(
+        kind="video",
+        mixer_callback=slow_mixer_cb,
+        mixer_output_interval=0.01,
+        loop=loop,
+        relay=MediaRelay(),
+        async_mixing=True,
+    )
+    source = VideoSourceTrack(_video_source_callback, fps=100)
+    mix_track.add_input_track(source)
+
+    try:
+        await mix_track.recv()
+        started_at = time.monotonic()
+        outputs = [await mix_track.recv() for _ in range(20)]
+        elapsed = time.monotonic() - started_at
+        # The output keeps to the ticks though each mixing takes 3.5 of them.
+        assert elapsed < 20 * 0.01 * 2
+        assert threads and threading.get_ident() not in threads
+
+        stats = mix_track.stats()
+        assert stats.missed_ticks == 0
+        assert stats.skipped > 0
+        assert stats.repeated > 0
+        pts = [frame.pts for frame in outputs]
+        assert pts == sorted(set(pts))
+    finally:
+        await _teardown(mix_track, [source])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("async_mixing", [False, True])
+async def test_updated_callback_mixes_without_waiting_for_a_slow_input(
+    async_mixing: bool,
+) -> None:
+    loop = asyncio.get_running_loop()
+
+    def updated_mixer_cb(frames: List[av.VideoFrame]) -> av.VideoFrame:
+        arr = np.full((16, 16, 3), 9, dtype=np.uint8)
+        return av.VideoFrame.from_ndarray(arr, format="bgr24")
+
+    mix_track = MediaStreamMixTrack(
+        kind="video",
+        mixer_callback=lambda frames: _output_frame(),
+        mixer_output_interval=0.02,
+        loop=loop,
+        relay=MediaRelay(),
+        async_mixing=async_mixing,
+    )
+    # One frame a second, so the next one comes long after the update.
+    source = VideoSourceTrack(_video_source_callback, fps=1)
+    mix_track.add_input_track(source)
+
+    try:
+        await mix_track.recv()
+        mix_track._update_mixer_callback(updated_mixer_cb)
+
+        async def recv_updated() -> None:
+            while (await mix_track.recv()).to_ndarray()[0, 0, 0] != 9:
+                pass
+
+        await asyncio.wait_for(recv_updated(), timeout=0.3)
+    finally:
+        await _teardown(mix_track, [source])
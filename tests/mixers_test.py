@@ -0,0 +1,204 @@
+import asyncio
+import fractions
+from typing import List, Tuple
+
+import av
+import numpy as np
+import pytest
+from aiortc import MediaStreamTrack
+from aiortc.contrib.media import MediaRelay
+
+from streamlit_webrtc.mix import MediaStreamMixTrack
+from streamlit_webrtc.mixers import AudioMixer, VideoCompositor
+from streamlit_webrtc.source import AudioSourceTrack, VideoSourceTrack
+
+
+def _audio_frame(
+    value: int,
+    *,
+    layout: str = "stereo",
+    sample_rate: int = 48000,
+    samples: int = 960,
+) -> av.AudioFrame:
+    channels = len(av.AudioLayout(layout).channels)
+    frame = av.AudioFrame.from_ndarray(
+        np.full((1, samples * channels), value, dtype=np.int16),
+        format="s16",
+        layout=layout,
+    )
+    frame.sample_rate = sample_rate
+    return frame
+
+
+def test_audio_mixer_sums_and_saturates() -> None:
+    mixer = AudioMixer()
+
+    output = mixer([_audio_frame(1000), _audio_frame(-300), _audio_frame(20)])
+    assert output.format.name == "s16"
+    assert output.layout.name == "stereo"
+    assert output.sample_rate == 48000
+    assert output.samples == 960
+    assert (output.to_ndarray() == 720).all()
+
+    assert (
+        mixer([_audio_frame(30000), _audio_frame(30000)]).to_ndarray() == 32767
+    ).all()
+    assert (
+        mixer([_audio_frame(-30000), _audio_frame(-30000)]).to_ndarray() == -32768
+    ).all()
+    # The buffers are reused, but not the output frames.
+    assert (output.to_ndarray() == 720).all()
+
+
+def test_audio_mixer_pads_short_inputs_and_converts_others() -> None:
+    mixer = AudioMixer()
+
+    mixed = mixer([_audio_frame(100, samples=480), _audio_frame(10)]).to_ndarray()
+    assert (mixed[0, : 480 * 2] == 110).all()
+    assert (mixed[0, 480 * 2 :] == 10).all()
+
+    for _ in range(3):
+        output = mixer(
+            [_audio_frame(1000, layout="mono", sample_rate=16000, samples=320)]
+        )
+    # Once the resampler has warmed up; upmixing mono lowers the level.
+    assert output.samples == 960
+    tail = output.to_ndarray()[0, -100:]
+    assert (tail > 500).all()
+    assert (tail[0::2] == tail[1::2]).all()
+
+
+def test_audio_mixer_gains() -> None:
+    mixer = AudioMixer()
+    loud = AudioSourceTrack(lambda pts, time_base: _audio_frame(1000))
+    muted = AudioSourceTrack(lambda pts, time_base: _audio_frame(1000))
+    other = AudioSourceTrack(lambda pts, time_base: _audio_frame(1000))
+    mixer.set_gain(loud, 2.5)
+    mixer.set_gain(muted, 0)
+    assert mixer.get_gain(loud) == 2.5
+    assert mixer.get_gain(other) == 1.0
+
+    output = mixer.mix_inputs(
+        [
+            (loud, _audio_frame(1000)),
+            (muted, _audio_frame(1000)),
+            (other, _audio_frame(7)),
+        ]
+    )
+    assert (output.to_ndarray() == 2507).all()
+
+    with pytest.raises(ValueError):
+        mixer.set_gain(loud, -1)
+
+
+@pytest.mark.asyncio
+async def test_mix_track_passes_the_inputs_to_the_audio_mixer() -> None:
+    loop = asyncio.get_running_loop()
+    mixer = AudioMixer()
+
+    def source_callback(value: int):
+        def callback(pts: int, time_base: fractions.Fraction) -> av.AudioFrame:
+            return _audio_frame(value)
+
+        return callback
+
+    mix_track: MediaStreamMixTrack = MediaStreamMixTrack(
+        kind="audio",
+        mixer_callback=mixer,
+        mixer_output_interval=0.02,
+        loop=loop,
+        relay=MediaRelay(),
+    )
+    sources: List[AudioSourceTrack] = [
+        AudioSourceTrack(source_callback(100)),
+        AudioSourceTrack(source_callback(10)),
+    ]
+    mixer.set_gain(sources[0], 0.5)
+    for source in sources:
+        mix_track.add_input_track(source)
+
+    try:
+        values = set()
+        for _ in range(10):
+            output = await mix_track.recv()
+            values.add(int(output.to_ndarray()[0, 0]))
+        # 50 once both the inputs have delivered a frame, 10 or 60 otherwise.
+        assert 60 in values
+        assert values <= {10, 50, 60}
+    finally:
+        mix_track.stop()
+        for source in sources:
+            source.stop()
+        await asyncio.sleep(0.1)
+
+
+def _video_frame(value: int, width: int = 64, height: int = 48) -> av.VideoFrame:
+    return av.VideoFrame.from_ndarray(
+        np.full((height, width, 3), value, dtype=np.uint8), format="bgr24"
+    )
+
+
+def _close(image: np.ndarray, value: int) -> bool:
+    # Within the rounding of the conversions to and from YUV.
+    return bool((np.abs(image.astype(np.int16) - value) <= 2).all())
+
+
+def test_video_compositor_redraws_only_the_changed_tiles() -> None:
+    compositor = VideoCompositor(width=160, height=120)
+    frames = [_video_frame(50), _video_frame(100), _video_frame(150)]
+
+    canvas = compositor(frames).to_ndarray(format="bgr24")
+    assert compositor.tiles_drawn == 3
+    # A 2x2 grid of 80x60 cells, the frames fitting them exactly.
+    assert _close(canvas[:60, :80], 50)
+    assert _close(canvas[:60, 80:], 100)
+    assert _close(canvas[60:, :80], 150)
+    assert _close(canvas[60:, 80:], 0)
+
+    compositor(frames)
+    assert compositor.tiles_drawn == 3
+
+    frames[1] = _video_frame(200)
+    canvas = compositor(frames).to_ndarray(format="bgr24")
+    assert compositor.tiles_drawn == 4
+    assert _close(canvas[:60, 80:], 200)
+    assert _close(canvas[:60, :80], 50)
+
+    # A new layout redraws all of them.
+    frames.pop()
+    canvas = compositor(frames).to_ndarray(format="bgr24")
+    assert compositor.tiles_drawn == 6
+    # Two 80x120 cells, letterboxing the 4:3 frames.
+    assert _close(canvas[:30, :80], 0)
+    assert _close(canvas[30:90, :80], 50)
+
+
+def test_video_compositor_pip_redraws_the_tiles_over_the_focus() -> None:
+    compositor = VideoCompositor(width=160, height=120, layout="pip")
+    main = VideoSourceTrack(lambda pts, time_base: _video_frame(0), fps=30)
+    other = VideoSourceTrack(lambda pts, time_base: _video_frame(0), fps=30)
+    compositor.set_focus(main)
+    inputs: List[Tuple[MediaStreamTrack, av.VideoFrame]] = [
+        (other, _video_frame(200)),
+        (main, _video_frame(50)),
+    ]
+
+    canvas = compositor.mix_inputs(inputs).to_ndarray(format="bgr24")
+    assert _close(canvas[0, 0], 50)
+    assert _close(canvas[-10, -10], 200)
+    assert compositor.tiles_drawn == 2
+
+    inputs[1] = (main, _video_frame(60))
+    canvas = compositor.mix_inputs(inputs).to_ndarray(format="bgr24")
+    # The picture drawn over the focused input is drawn again.
+    assert compositor.tiles_drawn == 4
+    assert _close(canvas[0, 0], 60)
+    assert _close(canvas[-10, -10], 200)
+
+    compositor.layout = "speaker"
+    canvas = compositor.mix_inputs(inputs).to_ndarray(format="bgr24")
+    assert _close(canvas[:90, 20:140], 60)
+    assert _close(canvas[90:, 60:100], 200)
+
+    with pytest.raises(ValueError):
+        compositor.layout = "mosaic"  # type: ignore[assignment]
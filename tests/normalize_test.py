@@ -0,0 +1,127 @@
+import asyncio
+import fractions
+from typing import List, Tuple
+
+import av
+import numpy as np
+import pytest
+from aiortc.contrib.media import MediaRelay
+
+from streamlit_webrtc.mix import MediaStreamMixTrack
+from streamlit_webrtc.normalize import (
+    AudioInputFormat,
+    FrameNormalizer,
+    VideoInputFormat,
+)
+from streamlit_webrtc.source import VideoSourceTrack
+
+
+class _Input:
+    pass
+
+
+def _video_frame(width: int, height: int, format: str = "bgr24") -> av.VideoFrame:
+    frame = av.VideoFrame.from_ndarray(
+        np.full((height, width, 3), 100, dtype=np.uint8), format="bgr24"
+    )
+    return frame.reformat(format=format)
+
+
+def test_video_inputs_are_scaled_with_a_scaler_kept_for_each() -> None:
+    normalizer = FrameNormalizer(VideoInputFormat(width=160, height=120))
+    a, b = _Input(), _Input()
+
+    same = _video_frame(160, 120)
+    assert normalizer.normalize(a, same) is same
+
+    frame = _video_frame(640, 480, "yuv420p")
+    frame.pts = 3000
+    normalized = normalizer.normalize(b, frame)
+    assert isinstance(normalized, av.VideoFrame)
+    assert normalized.format.name == "bgr24"
+    assert normalized.to_ndarray().shape == (120, 160, 3)
+    assert normalized.pts == 3000
+    reformatter = normalizer._reformatters[b]
+    normalizer.normalize(b, _video_frame(320, 240))
+    assert normalizer._reformatters[b] is reformatter
+
+    normalizer.remove(b)
+    assert b not in normalizer._reformatters
+
+    with pytest.raises(TypeError):
+        normalizer.normalize(a, av.AudioFrame(format="s16", layout="mono", samples=8))
+    with pytest.raises(ValueError):
+        FrameNormalizer(VideoInputFormat(width=161))
+
+
+def test_audio_inputs_are_resampled() -> None:
+    normalizer = FrameNormalizer(AudioInputFormat(sample_rate=48000, layout="stereo"))
+    key = _Input()
+
+    frame = av.AudioFrame.from_ndarray(
+        np.full((1, 320), 1000, dtype=np.int16), format="s16", layout="mono"
+    )
+    frame.sample_rate = 16000
+    frame.pts = 0
+    frame.time_base = fractions.Fraction(1, 16000)
+    samples = 0
+    for _ in range(5):
+        normalized = normalizer.normalize(key, frame)
+        if normalized is None:
+            continue
+        assert isinstance(normalized, av.AudioFrame)
+        assert normalized.format.name == "s16"
+        assert normalized.layout.name == "stereo"
+        assert normalized.sample_rate == 48000
+        samples += normalized.samples
+    assert samples > 3 * 960
+
+    stereo = av.AudioFrame.from_ndarray(
+        np.zeros((1, 1920), dtype=np.int16), format="s16", layout="stereo"
+    )
+    stereo.sample_rate = 48000
+    assert normalizer.normalize(key, stereo) is stereo
+
+
+@pytest.mark.asyncio
+async def test_mixer_callback_gets_the_inputs_in_the_input_format() -> None:
+    loop = asyncio.get_running_loop()
+    shapes: List[Tuple[int, ...]] = []
+
+    def mixer_cb(frames: List[av.VideoFrame]) -> av.VideoFrame:
+        shapes.extend(frame.to_ndarray().shape for frame in frames)
+        return frames[0]
+
+    mix_track: MediaStreamMixTrack = MediaStreamMixTrack(
+        kind="video",
+        mixer_callback=mixer_cb,
+        loop=loop,
+        relay=MediaRelay(),
+        input_format=VideoInputFormat(width=160, height=120),
+    )
+    sources = [
+        VideoSourceTrack(lambda pts, time_base: _video_frame(640, 480), fps=30),
+        VideoSourceTrack(lambda pts, time_base: _video_frame(64, 48, "rgb24"), fps=30),
+    ]
+    for source in sources:
+        mix_track.add_input_track(source)
+
+    try:
+        for _ in range(5):
+            await mix_track.recv()
+        assert shapes
+        assert set(shapes) == {(120, 160, 3)}
+    finally:
+        mix_track.stop()
+        for source in sources:
+            source.stop()
+        await asyncio.sleep(0.1)
+
+    with pytest.raises(ValueError):
+        MediaStreamMixTrack(
+            kind="video",
+            mixer_callback=mixer_cb,
+            loop=loop,
+            relay=MediaRelay(),
+            input_format=AudioInputFormat(),
+        )
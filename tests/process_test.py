@@ -1,4 +1,5 @@
-"""Layer-2 tests for `process.VideoProcessTrack` and its async counterpart.
+"""Layer-2 tests for `process.VideoProcessTrack`, its async counterpart, and
+the async audio process track.
 
 These exercise the sync and async processor wrappers against a stub source
 track, so the timing-sensitive async path (which drops intermediate frames
@@ -17,13 +18,16 @@ import pytest
 from aiortc import MediaStreamTrack
 from aiortc.mediastreams import MediaStreamError
 
-from streamlit_webrtc.models import VideoProcessorBase
+from streamlit_webrtc.metrics import PROCESS_AUDIO_UNDERRUNS
+from streamlit_webrtc.models import AudioProcessorBase, VideoProcessorBase
 from streamlit_webrtc.process import (
+    AsyncAudioProcessTrack,
     AsyncVideoProcessTrack,
     VideoProcessTrack,
 )
 
 _VIDEO_TIME_BASE = fractions.Fraction(1, 90000)
+_AUDIO_TIME_BASE = fractions.Fraction(1, 48000)
 
 
 def _video_frame(value: int = 0, pts: int = 0) -> av.VideoFrame:
@@ -55,6 +59,34 @@ class _StubVideoTrack(MediaStreamTrack):
         return self._frames.pop(0)
 
 
+def _audio_frame(value: int, pts: int) -> av.AudioFrame:
+    frame = av.AudioFrame.from_ndarray(
+        np.full((1, 960 * 2), value, dtype=np.int16), format="s16", layout="stereo"
+    )
+    frame.sample_rate = 48000
+    frame.pts = pts
+    frame.time_base = _AUDIO_TIME_BASE
+    return frame
+
+
+class _StubAudioTrack(MediaStreamTrack):
+    """Yields a fixed sequence of frames at their pace, then ends."""
+
+    kind = "audio"
+
+    def __init__(self, frames: List[av.AudioFrame], delay: float) -> None:
+        super().__init__()
+        self._frames = list(frames)
+        self._delay = delay
+
+    async def recv(self) -> av.AudioFrame:
+        if self.readyState != "live" or not self._frames:
+            self.stop()
+            raise MediaStreamError
+        await asyncio.sleep(self._delay)
+        return self._frames.pop(0)
+
+
 class _IdentityProcessor(VideoProcessorBase):
     def __init__(self) -> None:
         self.calls = 0
@@ -204,3 +236,62 @@ class TestAsyncVideoProcessTrack:
         asyncio.run(trigger())
         track.stop()
         assert proc.ended.wait(timeout=1.0)
+
+
+class TestAsyncAudioProcessTrack:
+    """Async audio processor wrapper, outputting through a sample FIFO."""
+
+    @staticmethod
+    def _run(processor: AudioProcessorBase, n: int) -> List[av.AudioFrame]:
+        frames = [_audio_frame(i + 1, pts=i * 960) for i in range(n)]
+        track = AsyncAudioProcessTrack(
+            track=_StubAudioTrack(frames, delay=0.02), processor=processor
+        )
+
+        async def drain() -> List[av.AudioFrame]:
+            return [await track.recv() for _ in range(n)]
+
+        try:
+            outputs = asyncio.run(drain())
+            stats = track.output_buffer_stats()
+        finally:
+            track.stop()
+        assert stats is not None
+        assert [frame.samples for frame in outputs] == [960] * n
+        assert [frame.pts for frame in outputs] == [i * 960 for i in range(n)]
+        return outputs
+
+    @staticmethod
+    def _values(outputs: List[av.AudioFrame]) -> List[int]:
+        values = []
+        for frame in outputs:
+            samples = frame.to_ndarray()[0]
+            assert (samples == samples[0]).all()
+            values.append(int(samples[0]))
+        return values
+
+    def test_outputs_the_processed_audio_continuously(self) -> None:
+        class IdentityProcessor(AudioProcessorBase):
+            def recv(self, frame: av.AudioFrame) -> av.AudioFrame:
+                return frame
+
+        values = self._values(self._run(IdentityProcessor(), 10))
+        # Silent until the first processed frame comes out of the FIFO, then
+        # every frame once, in order.
+        audible = [v for v in values if v != 0]
+        assert audible == list(range(1, len(audible) + 1))
+        assert len(audible) >= 7
+
+    def test_outputs_silence_instead_of_repeating_on_underrun(self) -> None:
+        class SlowProcessor(AudioProcessorBase):
+            def recv(self, frame: av.AudioFrame) -> av.AudioFrame:
+                time.sleep(0.04)
+                return frame
+
+        underruns = PROCESS_AUDIO_UNDERRUNS.value()
+        values = self._values(self._run(SlowProcessor(), 12))
+        audible = [v for v in values if v != 0]
+        # No chunk is output twice, though the processor falls behind.
+        assert audible == sorted(set(audible))
+        assert audible
+        assert PROCESS_AUDIO_UNDERRUNS.value() > underruns
@@ -0,0 +1,63 @@
+import asyncio
+import fractions
+
+import av
+import pytest
+from aiortc.mediastreams import MediaStreamError, MediaStreamTrack
+
+from streamlit_webrtc.reconnect import ReconnectableTrack
+
+
+class _FiniteTrack(MediaStreamTrack):
+    kind = "video"
+
+    def __init__(self, pts_list) -> None:
+        super().__init__()
+        self._pts_list = list(pts_list)
+
+    async def recv(self) -> av.VideoFrame:
+        if not self._pts_list:
+            self.stop()
+            raise MediaStreamError
+        frame = av.VideoFrame(16, 16, "yuv420p")
+        frame.pts = self._pts_list.pop(0)
+        frame.time_base = fractions.Fraction(1, 90000)
+        return frame
+
+
+@pytest.mark.asyncio
+async def test_waits_for_a_replacement_and_rebases_timestamps() -> None:
+    track = ReconnectableTrack(_FiniteTrack([1000, 4000]))
+    assert (await track.recv()).pts == 1000
+    assert (await track.recv()).pts == 4000
+
+    pending = asyncio.ensure_future(track.recv())
+    await asyncio.sleep(0.1)
+    assert not pending.done()
+
+    track.replace(_FiniteTrack([0, 3000]))
+    first = await asyncio.wait_for(pending, timeout=1)
+    assert first.pts is not None
+    # Continues after the last timestamp, by about the time spent waiting.
+    assert first.pts >= 4000 + 9000
+    assert (await track.recv()).pts == first.pts + 3000
+    assert track.readyState == "live"
+
+
+@pytest.mark.asyncio
+async def test_stop_ends_a_waiting_track() -> None:
+    track = ReconnectableTrack(_FiniteTrack([]))
+    pending = asyncio.ensure_future(track.recv())
+    await asyncio.sleep(0.1)
+
+    track.stop()
+    with pytest.raises(MediaStreamError):
+        await asyncio.wait_for(pending, timeout=1)
+
+
+def test_replace_rejects_another_kind() -> None:
+    track = ReconnectableTrack(_FiniteTrack([]))
+    audio = _FiniteTrack([])
+    audio.kind = "audio"
+    with pytest.raises(ValueError):
+        track.replace(audio)
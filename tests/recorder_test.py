@@ -0,0 +1,172 @@
+"""Tests for `recorder.PassthroughRecorder`.
+
+Packets are fed through an `EncodedStreamTrack` the same way an
+`EncodedFrameTap` would, so the recorder can be checked for remuxing
+without any transcoding: what is read back must be byte-identical.
+"""
+
+import asyncio
+import fractions
+from pathlib import Path
+from typing import List
+
+import av
+import numpy as np
+import pytest
+from aiortc.rtcrtpparameters import RTCRtpCodecParameters
+
+from streamlit_webrtc.encoded import EncodedStreamTrack
+from streamlit_webrtc.reconnect import ReconnectableEncodedTrack
+from streamlit_webrtc.recorder import PassthroughRecorder
+
+_VP8 = RTCRtpCodecParameters(mimeType="video/VP8", clockRate=90000, payloadType=96)
+_OPUS = RTCRtpCodecParameters(
+    mimeType="audio/opus", clockRate=48000, channels=2, payloadType=111
+)
+
+
+def _vp8_payloads(n: int) -> List[bytes]:
+    encoder = av.CodecContext.create("libvpx", "w")
+    encoder.width = 64
+    encoder.height = 48
+    encoder.pix_fmt = "yuv420p"
+    encoder.time_base = fractions.Fraction(1, 90000)
+    encoder.framerate = fractions.Fraction(30)
+    payloads = []
+    for i in range(n):
+        arr = np.full((48, 64, 3), i * 10, dtype=np.uint8)
+        frame = av.VideoFrame.from_ndarray(arr, format="bgr24").reformat(
+            format="yuv420p"
+        )
+        frame.pts = i * 3000
+        frame.time_base = fractions.Fraction(1, 90000)
+        payloads += [bytes(p) for p in encoder.encode(frame)]
+    payloads += [bytes(p) for p in encoder.encode(None)]
+    return payloads
+
+
+def _opus_payloads(n: int) -> List[bytes]:
+    encoder = av.CodecContext.create("libopus", "w")
+    encoder.sample_rate = 48000
+    encoder.layout = "stereo"
+    encoder.format = "s16"
+    payloads = []
+    for i in range(n):
+        samples = np.zeros((1, 960 * 2), dtype=np.int16)
+        frame = av.AudioFrame.from_ndarray(samples, format="s16", layout="stereo")
+        frame.sample_rate = 48000
+        frame.pts = i * 960
+        payloads += [bytes(p) for p in encoder.encode(frame)]
+    return payloads
+
+
+def _read_payloads(path: Path, kind: str) -> List[bytes]:
+    with av.open(str(path)) as container:
+        stream = next(s for s in container.streams if s.type == kind)
+        return [bytes(p) for p in container.demux(stream) if p.size > 0]
+
+
+def test_vp8_and_opus_are_remuxed_bit_identically(tmp_path: Path) -> None:
+    video_payloads = _vp8_payloads(10)
+    audio_payloads = _opus_payloads(10)
+    path = tmp_path / "in.webm"
+
+    async def run() -> None:
+        video = EncodedStreamTrack("video")
+        audio = EncodedStreamTrack("audio")
+        recorder = PassthroughRecorder(str(path))
+        recorder.addTrack(video)
+        recorder.addTrack(audio)
+        await recorder.start()
+
+        for i, payload in enumerate(video_payloads):
+            video._put(_VP8, payload, i * 3000)
+        for i, payload in enumerate(audio_payloads):
+            audio._put(_OPUS, payload, i * 960)
+        video._queue.put_nowait(None)
+        audio._queue.put_nowait(None)
+        # The recorder closes the file by itself once all its tracks end.
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if recorder._closed:
+                break
+        assert recorder._closed
+
+    asyncio.run(run())
+
+    assert _read_payloads(path, "video") == video_payloads
+    assert _read_payloads(path, "audio") == audio_payloads
+    with av.open(str(path)) as container:
+        assert container.streams.video[0].codec_context.name == "vp8"
+        assert container.streams.video[0].codec_context.width == 64
+        assert container.streams.audio[0].codec_context.name == "opus"
+
+
+def test_video_recording_starts_at_a_keyframe(tmp_path: Path) -> None:
+    payloads = _vp8_payloads(10)
+    path = tmp_path / "in.webm"
+
+    async def run() -> None:
+        video = EncodedStreamTrack("video")
+        recorder = PassthroughRecorder(str(path))
+        recorder.addTrack(video)
+        await recorder.start()
+        # Drop the leading keyframe as if the recording joined mid-stream.
+        for i, payload in enumerate(payloads[1:], start=1):
+            video._put(_VP8, payload, i * 3000)
+        await asyncio.sleep(0.05)
+        await recorder.stop()
+
+    asyncio.run(run())
+
+    recorded = _read_payloads(path, "video")
+    assert recorded
+    assert recorded[0][0] & 0x01 == 0  # a keyframe
+    assert recorded == payloads[payloads.index(recorded[0]) :]
+
+
+def test_recording_goes_on_across_a_reconnection(tmp_path: Path) -> None:
+    payloads = _vp8_payloads(10)
+    path = tmp_path / "in.webm"
+
+    async def run() -> None:
+        before = EncodedStreamTrack("video")
+        video = ReconnectableEncodedTrack(before)
+        recorder = PassthroughRecorder(str(path))
+        recorder.addTrack(video)
+        await recorder.start()
+
+        for i, payload in enumerate(payloads[:5]):
+            before._put(_VP8, payload, i * 3000)
+        # The tap of the old peer connection ends with it.
+        before._queue.put_nowait(None)
+        await asyncio.sleep(0.05)
+        assert not recorder._closed
+
+        # The new tap's timestamps start over.
+        after = EncodedStreamTrack("video")
+        video.replace(after)
+        for i, payload in enumerate(payloads[5:]):
+            after._put(_VP8, payload, i * 3000)
+        await asyncio.sleep(0.05)
+        # As the worker stops and its peer connection closes.
+        video.stop()
+        after._queue.put_nowait(None)
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if recorder._closed:
+                break
+        assert recorder._closed
+
+    asyncio.run(run())
+
+    assert _read_payloads(path, "video") == payloads
+
+
+def test_add_track_rejects_decoded_tracks() -> None:
+    from streamlit_webrtc.source import VideoSourceTrack
+
+    recorder = PassthroughRecorder("unused.webm")
+    track = VideoSourceTrack(lambda pts, time_base: None, fps=30)  # type: ignore[arg-type, return-value]
+    with pytest.raises(TypeError):
+        recorder.addTrack(track)  # type: ignore[arg-type]
@@ -0,0 +1,112 @@
+import asyncio
+import fractions
+from typing import List, cast
+
+import av
+import pytest
+from aiortc.mediastreams import MediaStreamError, MediaStreamTrack
+
+from streamlit_webrtc.relay import BoundedMediaRelay, BoundedRelayStreamTrack
+
+
+class _CountingTrack(MediaStreamTrack):
+    kind = "video"
+
+    def __init__(self, count: int, interval: float = 0.0) -> None:
+        super().__init__()
+        self._count = count
+        self._interval = interval
+        self._pts = 0
+
+    async def recv(self) -> av.VideoFrame:
+        await asyncio.sleep(self._interval)
+        if self._pts >= self._count:
+            self.stop()
+            raise MediaStreamError
+        frame = av.VideoFrame(16, 16, "yuv420p")
+        frame.pts = self._pts
+        frame.time_base = fractions.Fraction(1, 30)
+        self._pts += 1
+        return frame
+
+
+async def _recv_all(track: MediaStreamTrack) -> List[int]:
+    pts: List[int] = []
+    while True:
+        try:
+            frame = await track.recv()
+        except MediaStreamError:
+            return pts
+        assert frame.pts is not None
+        pts.append(frame.pts)
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_drops_the_oldest_frames() -> None:
+    relay = BoundedMediaRelay(maxsize=3)
+    source = _CountingTrack(10, interval=0.01)
+    fast = relay.subscribe(source)
+    slow = cast(BoundedRelayStreamTrack, relay.subscribe(source))
+
+    # Start both subscribers, then let the slow one fall behind.
+    fast_task = asyncio.ensure_future(_recv_all(fast))
+    assert (await slow.recv()).pts == 0
+    assert await asyncio.wait_for(fast_task, timeout=5) == list(range(10))
+
+    stats = slow.stats()
+    assert stats.queued <= 3
+    assert stats.max_queued == 3
+    assert stats.frames_delivered == 1
+    assert stats.frames_dropped > 0
+    # The latest frames are kept, followed by the end of the track.
+    assert await _recv_all(slow) == [7, 8, 9]
+    assert slow.stats().frames_dropped == 6
+
+
+@pytest.mark.asyncio
+async def test_drop_newest_keeps_the_queued_frames() -> None:
+    relay = BoundedMediaRelay(maxsize=3, drop_policy="drop_newest")
+    source = _CountingTrack(10)
+    subscriber = relay.subscribe(source)
+
+    assert (await subscriber.recv()).pts == 0
+    await asyncio.sleep(0.1)
+    assert await _recv_all(subscriber) == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_stalled_subscriber_is_evicted() -> None:
+    relay = BoundedMediaRelay(maxsize=2, evict_after=0.2)
+    source = _CountingTrack(1000, interval=0.01)
+    healthy = relay.subscribe(source)
+    stalled = cast(BoundedRelayStreamTrack, relay.subscribe(source))
+
+    await stalled.recv()
+    ended = asyncio.Event()
+    stalled.on("ended", ended.set)
+    healthy_task = asyncio.ensure_future(_recv_all(healthy))
+
+    await asyncio.wait_for(ended.wait(), timeout=5)
+    assert stalled.stats().evicted
+    assert relay.evictions == 1
+    with pytest.raises(MediaStreamError):
+        await stalled.recv()
+
+    # The others keep receiving.
+    assert not healthy_task.done()
+    assert [s.subscriber_id for s in relay.stats()] == [id(healthy)]
+    healthy.stop()
+    await asyncio.wait_for(healthy_task, timeout=1)
+    source.stop()
+
+
+@pytest.mark.asyncio
+async def test_unbuffered_subscriber_gets_the_latest_frame() -> None:
+    relay = BoundedMediaRelay()
+    source = _CountingTrack(10)
+    subscriber = cast(BoundedRelayStreamTrack, relay.subscribe(source, buffered=False))
+
+    assert (await subscriber.recv()).pts == 0
+    await asyncio.sleep(0.1)
+    assert await _recv_all(subscriber) == [9]
+    assert subscriber.stats().frames_dropped == 8
@@ -0,0 +1,157 @@
+import asyncio
+import fractions
+from typing import List
+
+import av
+import numpy as np
+import pytest
+from aiortc.contrib.media import MediaRelay
+from aiortc.mediastreams import MediaStreamError
+
+from streamlit_webrtc.jitter_buffer import JitterBufferOptions
+from streamlit_webrtc.room import AudioMixRoom
+from streamlit_webrtc.source import AudioSourceTrack
+
+
+def _constant_source(value: int) -> AudioSourceTrack:
+    def callback(pts: int, time_base: fractions.Fraction) -> av.AudioFrame:
+        frame = av.AudioFrame.from_ndarray(
+            np.full((1, 960 * 2), value, dtype=np.int16),
+            format="s16",
+            layout="stereo",
+        )
+        frame.sample_rate = 48000
+        return frame
+
+    return AudioSourceTrack(callback)
+
+
+async def _latest_value(track, frames: int = 10) -> int:
+    for _ in range(frames):
+        frame = await track.recv()
+    samples = frame.to_ndarray()[0]
+    assert (samples == samples[0]).all()
+    return int(samples[0])
+
+
+@pytest.mark.asyncio
+async def test_each_participant_hears_everyone_else() -> None:
+    room = AudioMixRoom(
+        jitter_buffer=JitterBufferOptions(target_delay=0.02),
+        loop=asyncio.get_running_loop(),
+        relay=MediaRelay(),
+    )
+    sources = {"a": _constant_source(100), "b": _constant_source(20)}
+    sources["c"] = _constant_source(30000)
+    outputs = {name: room.output_track(name) for name in sources}
+    for name, source in sources.items():
+        room.set_input_track(name, source)
+    assert room.output_track("a") is outputs["a"]
+
+    try:
+        heard = await asyncio.gather(*(_latest_value(t) for t in outputs.values()))
+        # The sum is saturated after subtracting one's own input.
+        assert heard == [30020, 30100, 120]
+
+        stats = room.stats()
+        assert stats.participants == 3
+        assert stats.ticks >= 10
+        assert set(stats.jitter_buffers) == {"a", "b", "c"}
+
+        room.remove_participant("c")
+        with pytest.raises(MediaStreamError):
+            for _ in range(10):
+                await outputs["c"].recv()
+        assert await _latest_value(outputs["a"]) == 20
+    finally:
+        room.stop()
+        for source in sources.values():
+            source.stop()
+        await asyncio.sleep(0.1)
+
+
+@pytest.mark.asyncio
+async def test_a_participant_without_input_hears_the_others() -> None:
+    room = AudioMixRoom(
+        jitter_buffer=JitterBufferOptions(target_delay=0.02),
+        loop=asyncio.get_running_loop(),
+        relay=MediaRelay(),
+    )
+    speaker = _constant_source(500)
+    room.set_input_track("speaker", speaker)
+    listener = room.output_track("listener")
+    sources: List[AudioSourceTrack] = [speaker]
+
+    try:
+        assert await _latest_value(listener) == 500
+        assert await _latest_value(room.output_track("speaker"), frames=1) == 0
+
+        # Replacing the input.
+        sources.append(_constant_source(7))
+        room.set_input_track("speaker", sources[-1])
+        assert await _latest_value(listener) == 7
+    finally:
+        room.stop()
+        for source in sources:
+            source.stop()
+        await asyncio.sleep(0.1)
+
+
+@pytest.mark.asyncio
+async def test_the_room_stops_ticking_while_empty() -> None:
+    room = AudioMixRoom(
+        jitter_buffer=JitterBufferOptions(target_delay=0.02),
+        loop=asyncio.get_running_loop(),
+        relay=MediaRelay(),
+    )
+    source = _constant_source(42)
+
+    try:
+        room.set_input_track("a", source)
+        listener = room.output_track("b")
+        assert await _latest_value(listener, frames=3) in (0, 42)
+
+        room.remove_participant("a")
+        room.remove_participant("b")
+        await asyncio.sleep(0.1)
+        assert room._task is None
+        ticks = room.stats().ticks
+        await asyncio.sleep(0.1)
+        assert room.stats().ticks == ticks
+
+        # The next participant's `recv()` starts it again.
+        room.set_input_track("a", source)
+        assert await _latest_value(room.output_track("b")) == 42
+        assert room.stats().ticks > ticks
+    finally:
+        room.stop()
+        source.stop()
+        await asyncio.sleep(0.1)
+
+
+@pytest.mark.asyncio
+async def test_a_mixing_error_ends_the_outputs_and_mixing_restarts() -> None:
+    room = AudioMixRoom(loop=asyncio.get_running_loop(), relay=MediaRelay())
+    mix = room._mix
+    failures = [RuntimeError("mixing failed")]
+
+    def failing_mix(pts: int) -> None:
+        if failures:
+            raise failures.pop()
+        mix(pts)
+
+    room._mix = failing_mix  # type: ignore[method-assign]
+
+    try:
+        listener = room.output_track("a")
+        with pytest.raises(MediaStreamError):
+            await asyncio.wait_for(listener.recv(), timeout=1)
+        await asyncio.sleep(0)
+        assert room._task is None
+        assert room.stats().participants == 0
+
+        # The next participant's `recv()` starts mixing again.
+        assert await _latest_value(room.output_track("a"), frames=3) == 0
+    finally:
+        room.stop()
+        await asyncio.sleep(0.1)
@@ -1,8 +1,10 @@
 import threading
+import time
 from types import SimpleNamespace
-from typing import cast
+from typing import List
 from unittest.mock import patch
 
+from streamlit_webrtc import shutdown
 from streamlit_webrtc._compat import AppSessionState
 from streamlit_webrtc.shutdown import SessionShutdownObserver
 
@@ -19,8 +21,8 @@ class _FakeAppSession:
     of `weakref.ref`, matching the real AppSession's GC story.
     """
 
-    def __init__(self, page_hash: str, state=None) -> None:
-        self.id = "sess-1"
+    def __init__(self, page_hash: str, state=None, id: str = "sess-1") -> None:
+        self.id = id
         self._state = state if state is not None else AppSessionState.APP_IS_RUNNING
         self._client_state = _FakeClientState(page_hash)
 
@@ -29,13 +31,13 @@ def _make_session_info(session):
     return SimpleNamespace(session=session)
 
 
-def test_no_session_info_does_not_start_polling_thread():
+def test_no_session_info_does_not_watch():
     callback_called = threading.Event()
     with patch("streamlit_webrtc.shutdown.get_this_session_info", return_value=None):
         observer = SessionShutdownObserver(callback_called.set)
     try:
-        # No session -> no polling thread, no callback ever fires
-        assert observer._polling_thread is None
+        # No session -> nothing to watch, no callback ever fires
+        assert observer._session_id is None
         assert not callback_called.wait(0.2)
     finally:
         observer.stop()
@@ -167,50 +169,133 @@ def test_stop_idempotent_and_safe_to_call_after_callback():
         observer.stop()
 
 
-class _RaceThread:
-    def __init__(self) -> None:
-        self.first_join_entered = threading.Event()
-        self.release_first_join = threading.Event()
-        self._join_count = 0
-        self._lock = threading.Lock()
+def test_stop_safe_when_called_concurrently_with_the_callback():
+    session = _FakeAppSession(page_hash="page-A")
+    callback_entered = threading.Event()
+    release_callback = threading.Event()
+    errors = []
 
-    def join(self, timeout=None) -> None:
-        with self._lock:
-            self._join_count += 1
-            join_count = self._join_count
+    def callback():
+        callback_entered.set()
+        release_callback.wait(timeout=3.0)
 
-        if join_count == 1:
-            self.first_join_entered.set()
-            self.release_first_join.wait(timeout=3.0)
-        else:
-            self.release_first_join.set()
+    with (
+        patch(
+            "streamlit_webrtc.shutdown.get_this_session_info",
+            return_value=_make_session_info(session),
+        ),
+        patch("streamlit_webrtc.shutdown.get_script_run_ctx", return_value=None),
+    ):
+        observer = SessionShutdownObserver(callback)
+    session._state = AppSessionState.SHUTDOWN_REQUESTED
+    assert callback_entered.wait(timeout=3.0)
 
-    def is_alive(self) -> bool:
-        return False
+    def call_stop():
+        try:
+            observer.stop(timeout=3.0)
+        except Exception as e:
+            errors.append(e)
 
+    stop_threads = [threading.Thread(target=call_stop) for _ in range(2)]
+    for stop_thread in stop_threads:
+        stop_thread.start()
+    # Both wait for the running callback.
+    for stop_thread in stop_threads:
+        stop_thread.join(timeout=0.2)
+        assert stop_thread.is_alive()
+
+    release_callback.set()
+    for stop_thread in stop_threads:
+        stop_thread.join(timeout=3.0)
+        assert not stop_thread.is_alive()
+    assert errors == []
 
-def test_stop_safe_when_called_concurrently():
-    errors = []
-    with patch("streamlit_webrtc.shutdown.get_this_session_info", return_value=None):
-        observer = SessionShutdownObserver(lambda: None)
 
-    race_thread = _RaceThread()
-    observer._polling_thread = cast(threading.Thread, race_thread)
+def _watcher_threads() -> List[threading.Thread]:
+    return [t for t in threading.enumerate() if t.name == "SessionShutdownWatcher"]
+
+
+def test_observers_share_one_thread():
+    sessions = [_FakeAppSession(page_hash="page-A", id=f"sess-{i}") for i in range(20)]
+    callbacks_called: List[threading.Event] = []
+    observers = []
+    with patch("streamlit_webrtc.shutdown.get_script_run_ctx", return_value=None):
+        for session in sessions:
+            for _ in range(5):
+                with patch(
+                    "streamlit_webrtc.shutdown.get_this_session_info",
+                    return_value=_make_session_info(session),
+                ):
+                    callback_called = threading.Event()
+                    callbacks_called.append(callback_called)
+                    observers.append(SessionShutdownObserver(callback_called.set))
+    try:
+        assert len(_watcher_threads()) == 1
 
-    def call_stop():
-        try:
+        sessions[0]._state = AppSessionState.SHUTDOWN_REQUESTED
+        assert all(e.wait(3.0) for e in callbacks_called[:5])
+        assert not any(e.is_set() for e in callbacks_called[5:])
+    finally:
+        for observer in observers:
             observer.stop()
-        except Exception as e:
-            errors.append(e)
 
-    stop_thread = threading.Thread(target=call_stop)
-    stop_thread.start()
+    # The thread exits once there is nothing left to watch.
+    deadline = time.monotonic() + 3.0
+    while _watcher_threads() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert _watcher_threads() == []
+
+
+def test_notified_session_is_checked_without_waiting_for_the_sweep(monkeypatch):
+    watcher = shutdown._SessionWatcher(sweep_interval=60)
+    monkeypatch.setattr(shutdown, "_watcher", watcher)
+    session = _FakeAppSession(page_hash="page-A")
+    callback_called = threading.Event()
+    with (
+        patch(
+            "streamlit_webrtc.shutdown.get_this_session_info",
+            return_value=_make_session_info(session),
+        ),
+        patch("streamlit_webrtc.shutdown.get_script_run_ctx", return_value=None),
+    ):
+        observer = SessionShutdownObserver(callback_called.set)
+    try:
+        session._client_state.page_script_hash = "page-B"
+        watcher.notify(session.id)
+        assert callback_called.wait(1.0)
+    finally:
+        observer.stop()
+
 
-    assert race_thread.first_join_entered.wait(timeout=3.0)
-    observer.stop()
-    race_thread.release_first_join.set()
+def test_callbacks_do_not_wait_for_each_other(monkeypatch):
+    watcher = shutdown._SessionWatcher(sweep_interval=60)
+    monkeypatch.setattr(shutdown, "_watcher", watcher)
+    session = _FakeAppSession(page_hash="page-A")
+    second_called = threading.Event()
+    first_saw_second = threading.Event()
+    observers: List[SessionShutdownObserver] = []
 
-    stop_thread.join(timeout=3.0)
+    def first_callback():
+        # A slow callback, e.g. a worker taking long to stop.
+        if second_called.wait(2.0):
+            first_saw_second.set()
+        # Stopping its own observer from the callback does not wait for it.
+        observers[0].stop(timeout=5.0)
 
-    assert not stop_thread.is_alive()
-    assert errors == []
+    with (
+        patch(
+            "streamlit_webrtc.shutdown.get_this_session_info",
+            return_value=_make_session_info(session),
+        ),
+        patch("streamlit_webrtc.shutdown.get_script_run_ctx", return_value=None),
+    ):
+        observers.append(SessionShutdownObserver(first_callback))
+        observers.append(SessionShutdownObserver(second_called.set))
+    try:
+        session._state = AppSessionState.SHUTDOWN_REQUESTED
+        watcher.notify(session.id)
+        assert first_saw_second.wait(3.0)
+        assert observers[0]._callback_finished.wait(1.0)
+    finally:
+        for observer in observers:
+            observer.stop()
@@ -0,0 +1,134 @@
+import asyncio
+import fractions
+from typing import List, Optional, Tuple
+
+import av
+import numpy as np
+import pytest
+from aiortc.contrib.media import MediaRelay
+
+from streamlit_webrtc.jitter_buffer import JitterBufferOptions
+from streamlit_webrtc.metrics import FRAME_SYNC_MISSES
+from streamlit_webrtc.mix import MediaStreamMixTrack
+from streamlit_webrtc.source import VideoSourceTrack
+from streamlit_webrtc.sync import FrameSynchronizer, FrameSyncOptions
+
+TIME_BASE = fractions.Fraction(1, 90000)
+
+
+def _frame(pts: Optional[int], value: int = 0) -> av.VideoFrame:
+    frame = av.VideoFrame.from_ndarray(
+        np.full((8, 8, 3), value, dtype=np.uint8), format="bgr24"
+    )
+    if pts is not None:
+        frame.pts = pts
+        frame.time_base = TIME_BASE
+    return frame
+
+
+def _pts(matches) -> List[Tuple[str, ...]]:
+    return [tuple(f"{key}{frame.pts // 3000}" for key, frame in m) for m in matches]
+
+
+def test_synchronizer_matches_frames_on_a_common_clock() -> None:
+    sync: FrameSynchronizer[str] = FrameSynchronizer(
+        FrameSyncOptions(tolerance=0.01, max_delay=0.2)
+    )
+    sync.set_inputs(["a", "b"])
+    misses = FRAME_SYNC_MISSES.value(reason="unmatched")
+
+    # "b" timestamps from another origin, and its frames arrive 10-20 ms
+    # later than those of "a". Its frame 2 is lost, and so is frame 4 of "a".
+    offset = 1_000_000
+    assert sync.push("a", _frame(0), arrival=0.0) == []
+    assert _pts(sync.push("b", _frame(offset), arrival=0.01)) == [("a0", "b333")]
+    assert sync.push("a", _frame(3000), arrival=1 / 30) == []
+    assert sync.push("a", _frame(6000), arrival=2 / 30) == []
+    assert _pts(sync.push("b", _frame(offset + 3000), arrival=1 / 30 + 0.02)) == [
+        ("a1", "b334")
+    ]
+    assert sync.push("a", _frame(9000), arrival=3 / 30) == []
+    assert _pts(sync.push("b", _frame(offset + 9000), arrival=3 / 30 + 0.015)) == [
+        ("a3", "b336")
+    ]
+    assert sync.push("b", _frame(offset + 12000), arrival=4 / 30 + 0.01) == []
+    assert _pts(sync.push("a", _frame(15000), arrival=5 / 30)) == []
+
+    stats = sync.stats()
+    assert stats.matched == 3
+    # The unmatched frames are a2, then b337, which a5 is too late for.
+    assert stats.unmatched == 2
+    assert stats.buffered == 1
+    assert stats.skew <= 0.01
+    assert FRAME_SYNC_MISSES.value(reason="unmatched") == misses + 2
+
+
+def test_synchronizer_bounds_its_buffers() -> None:
+    sync: FrameSynchronizer[str] = FrameSynchronizer(
+        FrameSyncOptions(max_delay=0.2, max_frames=3)
+    )
+    sync.set_inputs(["a", "b"])
+    for i in range(5):
+        sync.push("a", _frame(i * 3000), arrival=i / 30)
+    stats = sync.stats()
+    assert stats.overflow == 2
+    assert stats.buffered == 3
+
+    # Waiting for "b" beyond the max delay.
+    sync.push("a", _frame(30000), arrival=12 / 30)
+    assert sync.stats().buffered == 1
+
+    # Removing "b" leaves "a" to match on its own.
+    sync.set_inputs(["a"])
+    assert _pts(sync.push("a", _frame(33000), arrival=13 / 30)) == [("a10",), ("a11",)]
+
+    with pytest.raises(ValueError):
+        FrameSynchronizer(FrameSyncOptions(max_frames=0))
+
+
+@pytest.mark.asyncio
+async def test_mix_track_mixes_the_frames_captured_at_the_same_time() -> None:
+    loop = asyncio.get_running_loop()
+    pairs: List[Tuple[int, ...]] = []
+
+    def mixer_cb(frames: List[av.VideoFrame]) -> av.VideoFrame:
+        pairs.append(tuple(int(frame.to_ndarray()[0, 0, 0]) for frame in frames))
+        return frames[0]
+
+    def source_callback(pts: int, time_base: fractions.Fraction) -> av.VideoFrame:
+        return _frame(None, value=pts // 3000 % 256)
+
+    mix_track: MediaStreamMixTrack = MediaStreamMixTrack(
+        kind="video",
+        mixer_callback=mixer_cb,
+        mixer_output_interval=1 / 60,
+        loop=loop,
+        relay=MediaRelay(),
+        frame_sync=FrameSyncOptions(tolerance=0.01),
+    )
+    sources = [VideoSourceTrack(source_callback, fps=30) for _ in range(2)]
+    for source in sources:
+        mix_track.add_input_track(source)
+
+    try:
+        for _ in range(20):
+            await mix_track.recv()
+        assert len(pairs) >= 5
+        assert all(a == b for a, b in pairs)
+        stats = mix_track.frame_sync_stats()
+        assert stats is not None and stats.matched >= len(pairs)
+    finally:
+        mix_track.stop()
+        for source in sources:
+            source.stop()
+        await asyncio.sleep(0.1)
+
+    with pytest.raises(ValueError):
+        MediaStreamMixTrack(
+            kind="audio",
+            mixer_callback=mixer_cb,
+            loop=loop,
+            relay=MediaRelay(),
+            frame_sync=FrameSyncOptions(),
+            jitter_buffer=JitterBufferOptions(),
+        )
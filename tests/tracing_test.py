@@ -0,0 +1,181 @@
+import asyncio
+import collections
+import fractions
+import json
+from typing import List
+
+import av
+import numpy as np
+import pytest
+from aiortc import MediaStreamTrack
+from aiortc.mediastreams import MediaStreamError
+
+from scripts.loadtest import resolve_processor, run_load_test
+from streamlit_webrtc.models import VideoProcessorBase
+from streamlit_webrtc.process import VideoProcessTrack
+from streamlit_webrtc.tracing import (
+    FrameTracer,
+    _TracedCodec,
+    get_frame_tracer,
+    start_frame_tracing,
+    stop_frame_tracing,
+)
+
+
+def _video_frame(pts: int = 0) -> av.VideoFrame:
+    frame = av.VideoFrame.from_ndarray(
+        np.zeros((16, 16, 3), dtype=np.uint8), format="bgr24"
+    )
+    frame.pts = pts
+    frame.time_base = fractions.Fraction(1, 90000)
+    return frame
+
+
+class _FramesTrack(MediaStreamTrack):
+    kind = "video"
+
+    def __init__(self, frames: List[av.VideoFrame]) -> None:
+        super().__init__()
+        self._frames = list(frames)
+
+    async def recv(self) -> av.VideoFrame:
+        if not self._frames:
+            self.stop()
+            raise MediaStreamError
+        return self._frames.pop(0)
+
+
+class _CopyProcessor(VideoProcessorBase):
+    def recv(self, frame: av.VideoFrame) -> av.VideoFrame:
+        return av.VideoFrame.from_ndarray(frame.to_ndarray(format="bgr24"))
+
+
+@pytest.fixture
+def tracer():
+    tracer = start_frame_tracing(sample_rate=1.0)
+    yield tracer
+    stop_frame_tracing()
+
+
+def test_sampling_decides_once_per_frame():
+    tracer = FrameTracer(sample_rate=0.0)
+    frame = _video_frame()
+    assert tracer.tag(frame) is None
+    # A later hop with a higher rate does not start tracing it halfway.
+    tracer.sample_rate = 1.0
+    assert tracer.tag(frame) is None
+
+    traced = _video_frame()
+    assert tracer.tag(traced) == 0
+    assert tracer.tag(traced) == 0
+    assert tracer.tag(_video_frame()) == 1
+
+    # Frames carrying the application's own `opaque` are left alone.
+    owned = _video_frame()
+    owned.opaque = "app data"
+    assert tracer.tag(owned) is None
+    assert owned.opaque == "app data"
+
+
+def test_spans_follow_a_frame_to_the_frames_made_from_it():
+    tracer = FrameTracer(sample_rate=1.0)
+    frame = _video_frame()
+    tracer.begin(frame, "queue")
+    tracer.end(frame, "queue")
+    tracer.record(frame, "process", 0.0, 1.0, batch=2)
+
+    output = _video_frame()
+    tracer.propagate(frame, output)
+    tracer.begin(output, "output")
+    tracer.end(output, "output")
+
+    spans = tracer.spans()
+    assert [span.name for span in spans] == ["queue", "process", "output"]
+    assert {span.frame_id for span in spans} == {0}
+    assert spans[1].args == {"batch": 2}
+    # A hop that never began has nothing to end.
+    tracer.end(output, "unknown")
+    assert len(tracer.spans()) == 3
+
+
+def test_export_as_chrome_trace(tmp_path):
+    tracer = FrameTracer(sample_rate=1.0)
+    frame = _video_frame()
+    tracer.record(frame, "decode", 0.0, 0.001)
+    tracer.begin(frame, "queue")
+    tracer.end(frame, "queue")
+
+    path = tmp_path / "trace.json"
+    tracer.dump(str(path))
+    trace = json.loads(path.read_text())
+    events = trace["traceEvents"]
+
+    complete = [e for e in events if e["ph"] == "X"]
+    assert [e["name"] for e in complete] == ["decode", "queue"]
+    assert complete[0]["ts"] == 0.0
+    assert complete[0]["dur"] == pytest.approx(1000.0)
+    assert complete[0]["args"] == {"frame": 0}
+    assert [e["ph"] for e in events if e.get("cat") == "frame" and e["ph"] != "X"] == [
+        "s",
+        "f",
+    ]
+    assert any(e["ph"] == "M" and e["name"] == "thread_name" for e in events)
+
+    # The decode span ended long before the window.
+    windowed = tracer.export(window=60)["traceEvents"]
+    assert [e["name"] for e in windowed if e["ph"] == "X"] == ["queue"]
+
+
+def test_traced_codec_delegates_to_the_codec(tracer):
+    class Encoder:
+        target_bitrate = 1000
+
+        def encode(self, frame, force_keyframe=False):
+            return [b"payload"], 0
+
+    encoder = _TracedCodec(Encoder())
+    encoder.target_bitrate = 2000
+    assert encoder.target_bitrate == 2000
+
+    frame = _video_frame()
+    tracer.tag(frame)
+    assert encoder.encode(frame) == ([b"payload"], 0)
+    assert [span.name for span in tracer.spans()] == ["encode"]
+
+
+def test_process_track_records_the_processor_span(tracer):
+    frames = [_video_frame(pts=i) for i in range(2)]
+    track = VideoProcessTrack(track=_FramesTrack(frames), processor=_CopyProcessor())
+
+    async def drain() -> List[av.VideoFrame]:
+        return [await track.recv() for _ in range(2)]
+
+    out = asyncio.run(drain())
+    assert [span.name for span in tracer.spans()] == ["process", "process"]
+    # The processor's new frames carry the tags of its input frames.
+    assert [tracer.frame_id(frame) for frame in out] == [0, 1]
+
+
+def test_stop_frame_tracing():
+    tracer = start_frame_tracing()
+    assert get_frame_tracer() is tracer
+    assert stop_frame_tracing() is tracer
+    assert get_frame_tracer() is None
+
+
+@pytest.mark.asyncio
+async def test_frames_are_traced_through_a_worker(tracer):
+    await run_load_test(1, 1.0, processor=resolve_processor("copy"), warmup=0.5, fps=15)
+
+    hops_by_frame = collections.defaultdict(list)
+    for span in tracer.spans():
+        hops_by_frame[span.frame_id].append(span.name)
+    # The frames the worker received, processed and sent back.
+    assert [
+        "decode",
+        "relay",
+        "process.queue",
+        "process",
+        "process.output",
+    ] in [hops[:5] for hops in hops_by_frame.values()]
+    assert any("encode" in hops for hops in hops_by_frame.values())
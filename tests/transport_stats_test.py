@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import pytest
+
+from streamlit_webrtc.transport_stats import TransportStatsSampler
+
+
+class _FakeReport:
+    def __init__(self, stats: Dict[str, Any]) -> None:
+        self._stats = stats
+
+    async def getStats(self) -> Dict[str, Any]:
+        return self._stats
+
+
+class _FakeTransceiver:
+    def __init__(self) -> None:
+        self.bytes_sent = 0
+        self.receiver = _FakeReport({})
+        self.sender = _FakeReport({})
+        self._update()
+
+    def send(self, count: int) -> None:
+        self.bytes_sent += count
+        self._update()
+
+    def _update(self) -> None:
+        self.sender._stats.update(
+            transport=SimpleNamespace(
+                type="transport",
+                id="transport",
+                bytesSent=self.bytes_sent,
+                bytesReceived=0,
+            ),
+            outbound=SimpleNamespace(
+                type="outbound-rtp",
+                kind="video",
+                ssrc=1,
+                packetsSent=0,
+                bytesSent=self.bytes_sent,
+            ),
+        )
+
+
+class _FakePeerConnection:
+    def __init__(self) -> None:
+        self.transceivers: List[_FakeTransceiver] = [_FakeTransceiver()]
+
+    def getTransceivers(self) -> List[_FakeTransceiver]:
+        return self.transceivers
+
+
+async def _sample(sampler: TransportStatsSampler):
+    sample = await sampler.sample()
+    sampler.history.append(sample)
+    return sample
+
+
+@pytest.mark.asyncio
+async def test_bitrates_start_over_with_a_new_connection() -> None:
+    pc = _FakePeerConnection()
+    sampler = TransportStatsSampler(pc, interval=1.0)  # type: ignore[arg-type]
+
+    pc.transceivers[0].send(100_000)
+    first = await _sample(sampler)
+    assert first.send_bitrate is None
+    pc.transceivers[0].send(1000)
+    second = await _sample(sampler)
+    assert second.send_bitrate is not None and second.send_bitrate > 0
+    assert second.outbound[0].bitrate is not None
+
+    # A reconnection replaces the transceivers, whose counts start from 0.
+    pc.transceivers = [_FakeTransceiver()]
+    pc.transceivers[0].send(500)
+    reconnected = await _sample(sampler)
+    assert reconnected.send_bitrate is None
+    assert reconnected.outbound[0].bitrate is None
+    pc.transceivers[0].send(500)
+    after = await _sample(sampler)
+    assert after.send_bitrate is not None and after.send_bitrate > 0
+
+
+@pytest.mark.asyncio
+async def test_bitrates_skip_counts_that_go_backwards() -> None:
+    pc = _FakePeerConnection()
+    sampler = TransportStatsSampler(pc, interval=1.0)  # type: ignore[arg-type]
+
+    pc.transceivers[0].send(100_000)
+    await _sample(sampler)
+    pc.transceivers[0].bytes_sent = 0
+    pc.transceivers[0].send(10)
+    sample = await _sample(sampler)
+
+    assert sample.send_bitrate is None
+    assert sample.outbound[0].bitrate is None
@@ -12,7 +12,8 @@ failures.
 import asyncio
 import concurrent.futures
 import fractions
-from typing import Any, Dict, List, Set
+import threading
+from typing import Any, List, Set
 
 import av
 import numpy as np
@@ -20,33 +21,16 @@ import pytest
 from aiortc import RTCPeerConnection
 from aiortc.contrib.media import MediaRelay
 
+from streamlit_webrtc.decoder_pool import DecoderPool
+from streamlit_webrtc.encoded import EncodedFrameTap
+from streamlit_webrtc.ice import IceGatheringOptions
+from streamlit_webrtc.models import VideoProcessorBase
+from streamlit_webrtc.recorder import PassthroughRecorder
 from streamlit_webrtc.sink import AudioSinkTrack, VideoSinkTrack
 from streamlit_webrtc.source import AudioSourceTrack, VideoSourceTrack
 from streamlit_webrtc.webrtc import WebRtcMode, WebRtcWorker
 
-_WORKER_DEFAULTS: Dict[str, Any] = dict(
-    rtc_configuration=None,
-    source_video_track=None,
-    source_audio_track=None,
-    sink_video_track=None,
-    sink_audio_track=None,
-    player_factory=None,
-    in_recorder_factory=None,
-    out_recorder_factory=None,
-    video_frame_callback=None,
-    audio_frame_callback=None,
-    queued_video_frames_callback=None,
-    queued_audio_frames_callback=None,
-    on_video_ended=None,
-    on_audio_ended=None,
-    video_processor_factory=None,
-    audio_processor_factory=None,
-    async_processing=True,
-    video_receiver_size=4,
-    audio_receiver_size=4,
-    sendback_video=True,
-    sendback_audio=True,
-)
+from .loopback import WORKER_DEFAULTS, wire_ice
 
 
 def _source_callback(pts: int, time_base: fractions.Fraction) -> av.VideoFrame:
@@ -69,6 +53,12 @@ def test_worker_stop_waits_for_peer_connection_close(monkeypatch) -> None:
     worker.source_audio_track = None
     worker._relayed_source_video_track = None
     worker.source_video_track = None
+    worker._governor = None
+    worker._transport_stats_future = None
+    worker._reconnect_timer = None
+    worker._input_video_track = None
+    worker._input_audio_track = None
+    worker._recorded_input_tracks = {}
 
     closed = {"submitted": False, "waited": False}
 
@@ -108,26 +98,6 @@ def test_worker_stop_waits_for_peer_connection_close(monkeypatch) -> None:
     assert closed == {"submitted": True, "waited": True}
 
 
-def _wire_ice(client: RTCPeerConnection, worker: WebRtcWorker) -> None:
-    """Trickle ICE candidates in both directions.
-
-    aiortc's `setLocalDescription` waits for ICE gathering, so host
-    candidates are embedded in the initial SDP. But aiortc still emits
-    `icecandidate` events afterward; without these wirings, in-process
-    loopback occasionally stalls before the connection completes.
-    """
-
-    @client.on("icecandidate")  # type: ignore[arg-type]
-    async def _to_worker(c):  # pragma: no cover - aiortc-driven
-        if c is not None:
-            worker.add_ice_candidate(c)
-
-    @worker.pc.on("icecandidate")  # type: ignore[arg-type]
-    async def _to_client(c):  # pragma: no cover - aiortc-driven
-        if c is not None:
-            await client.addIceCandidate(c)
-
-
 async def _drain_until(predicate, deadline: float) -> bool:
     loop = asyncio.get_running_loop()
     while loop.time() < deadline:
@@ -153,9 +123,9 @@ async def _setup_loopback(
         loop=loop,
         relay=MediaRelay(),
         mode=mode,
-        **{**_WORKER_DEFAULTS, **worker_overrides},
+        **{**WORKER_DEFAULTS, **worker_overrides},
     )
-    _wire_ice(client, worker)
+    wire_ice(client, worker)
     await client.setLocalDescription(await client.createOffer())
     assert client.localDescription is not None
     answer = await asyncio.to_thread(
@@ -230,9 +200,9 @@ async def test_sendrecv_audio_only_input_with_source_video_track() -> None:
         loop=loop,
         relay=MediaRelay(),
         mode=WebRtcMode.SENDRECV,
-        **{**_WORKER_DEFAULTS, "source_video_track": server_source},
+        **{**WORKER_DEFAULTS, "source_video_track": server_source},
     )
-    _wire_ice(client, worker)
+    wire_ice(client, worker)
     await client.setLocalDescription(await client.createOffer())
     assert client.localDescription is not None
     answer = await asyncio.to_thread(
@@ -342,12 +312,12 @@ async def test_sendrecv_audio_sink_with_independent_video_source() -> None:
         relay=MediaRelay(),
         mode=WebRtcMode.SENDRECV,
         **{
-            **_WORKER_DEFAULTS,
+            **WORKER_DEFAULTS,
             "source_video_track": server_source,
             "sink_audio_track": sink,
         },
     )
-    _wire_ice(client, worker)
+    wire_ice(client, worker)
     await client.setLocalDescription(await client.createOffer())
     assert client.localDescription is not None
     answer = await asyncio.to_thread(
@@ -400,3 +370,345 @@ async def test_sink_track_swap_across_sessions() -> None:
         assert await _drain_until(lambda: len(received_b) >= 1, loop.time() + 15)
     finally:
         await _teardown_loopback(client_b, worker_b)
+
+
+@pytest.mark.asyncio
+async def test_passthrough_recorder_records_without_decoding(tmp_path) -> None:
+    """A recording-only session remuxes the peer's VP8 and never decodes it."""
+    loop = asyncio.get_running_loop()
+    path = tmp_path / "in.webm"
+    recorder = PassthroughRecorder(str(path))
+
+    client, worker = await _setup_loopback(
+        mode=WebRtcMode.SENDRECV,
+        in_recorder_factory=lambda: recorder,
+        sendback_video=False,
+        sendback_audio=False,
+    )
+    try:
+        taps = [
+            getattr(t.receiver, "_RTCRtpReceiver__decoder_queue")
+            for t in worker.pc.getTransceivers()
+        ]
+        assert all(isinstance(tap, EncodedFrameTap) for tap in taps)
+        assert await _drain_until(
+            lambda: sum(tap.frames_received for tap in taps) >= 5, loop.time() + 15
+        )
+        assert sum(tap.frames_decoded for tap in taps) == 0
+    finally:
+        await _teardown_loopback(client, worker)
+        await recorder.stop()
+
+    with av.open(str(path)) as container:
+        assert container.streams.video[0].codec_context.name == "vp8"
+        assert sum(1 for p in container.demux(video=0) if p.size > 0) >= 1
+
+
+@pytest.mark.asyncio
+async def test_sessions_share_a_decoder_pool() -> None:
+    """Sessions sharing a pool decode on its threads, not one thread each."""
+    loop = asyncio.get_running_loop()
+    pool = DecoderPool(max_workers=1)
+    received: List[List[av.VideoFrame]] = [[], []]
+
+    sessions = []
+    try:
+        for frames in received:
+            sessions.append(
+                await _setup_loopback(
+                    mode=WebRtcMode.SENDONLY,
+                    video_frame_callback=lambda frame, frames=frames: (
+                        frames.append(frame) or frame
+                    ),
+                    decoder_pool=pool,
+                )
+            )
+        assert await _drain_until(
+            lambda: all(len(frames) >= 3 for frames in received), loop.time() + 15
+        )
+
+        assert not any(
+            t.name.endswith("-decoder") and t.is_alive() for t in threading.enumerate()
+        )
+        stats = pool.stats()
+        assert stats.threads == 1
+        assert stats.lanes == 2
+        assert stats.frames_decoded >= 6
+    finally:
+        for client, worker in sessions:
+            await _teardown_loopback(client, worker)
+
+    assert pool.stats().lanes == 0
+    pool.shutdown(timeout=5)
+
+
+@pytest.mark.asyncio
+async def test_sendrecv_unprocessed_echo_is_forwarded_without_decoding() -> None:
+    """With nothing to process, the input is echoed as-is and never decoded."""
+    loop = asyncio.get_running_loop()
+    echoed: List[av.VideoFrame] = []
+
+    client = RTCPeerConnection()
+    client.addTrack(VideoSourceTrack(_source_callback, fps=15))
+
+    @client.on("track")  # type: ignore[arg-type]
+    def on_track(track):
+        async def consume():
+            while True:
+                try:
+                    echoed.append(await track.recv())
+                except Exception:
+                    return
+
+        asyncio.ensure_future(consume())
+
+    worker: WebRtcWorker = WebRtcWorker(
+        loop=loop,
+        relay=MediaRelay(),
+        mode=WebRtcMode.SENDRECV,
+        **WORKER_DEFAULTS,
+    )
+    wire_ice(client, worker)
+    await client.setLocalDescription(await client.createOffer())
+    assert client.localDescription is not None
+    answer = await asyncio.to_thread(
+        worker.process_offer,
+        client.localDescription.sdp,
+        client.localDescription.type,
+        10,
+    )
+    await client.setRemoteDescription(answer)
+    try:
+        assert await _drain_until(lambda: len(echoed) >= 5, loop.time() + 15)
+        (tap,) = [
+            getattr(t.receiver, "_RTCRtpReceiver__decoder_queue")
+            for t in worker.pc.getTransceivers()
+        ]
+        assert isinstance(tap, EncodedFrameTap)
+        assert tap.frames_received >= 5
+        assert tap.frames_decoded == 0
+        assert echoed[0].width == 32
+    finally:
+        await _teardown_loopback(client, worker)
+
+
+@pytest.mark.asyncio
+async def test_transport_stats_are_sampled() -> None:
+    loop = asyncio.get_running_loop()
+
+    client, worker = await _setup_loopback(
+        mode=WebRtcMode.SENDRECV,
+        video_frame_callback=lambda frame: frame,
+        transport_stats_interval=0.2,
+        transport_stats_history_size=5,
+    )
+    try:
+
+        def inbound_frames_decoded() -> int:
+            stats = worker.transport_stats
+            if not stats:
+                return 0
+            return sum(s.frames_decoded or 0 for s in stats[-1].inbound)
+
+        assert await _drain_until(
+            lambda: inbound_frames_decoded() >= 3, loop.time() + 15
+        )
+        assert await _drain_until(
+            lambda: len(worker.transport_stats or []) == 5, loop.time() + 5
+        )
+        latest = (worker.transport_stats or [])[-1]
+        assert latest.bytes_received > 0
+        assert latest.receive_bitrate is not None
+        (inbound,) = latest.inbound
+        assert inbound.kind == "video"
+        assert inbound.packets_received > 0
+        assert inbound.jitter is not None
+        (outbound,) = latest.outbound
+        assert outbound.packets_sent > 0
+    finally:
+        await _teardown_loopback(client, worker)
+
+    # Sampling stops with the worker.
+    assert worker._transport_stats_future is None
+
+
+@pytest.mark.asyncio
+async def test_transport_stats_are_disabled_by_default() -> None:
+    client, worker = await _setup_loopback(mode=WebRtcMode.SENDONLY)
+    try:
+        assert worker.transport_stats is None
+    finally:
+        await _teardown_loopback(client, worker)
+
+
+@pytest.mark.asyncio
+async def test_reconnect_keeps_the_processor() -> None:
+    """A new offer from the same peer moves the media to a new connection
+    without re-creating the processor."""
+    loop = asyncio.get_running_loop()
+
+    class CountingProcessor(VideoProcessorBase):
+        instances = 0
+
+        def __init__(self) -> None:
+            CountingProcessor.instances += 1
+            self.frames = 0
+
+        def recv(self, frame: av.VideoFrame) -> av.VideoFrame:
+            self.frames += 1
+            return frame
+
+    client, worker = await _setup_loopback(
+        mode=WebRtcMode.SENDRECV,
+        video_processor_factory=CountingProcessor,
+        reconnect_grace_period=10,
+    )
+    new_client = RTCPeerConnection()
+    try:
+        processor = worker.video_processor
+        assert isinstance(processor, CountingProcessor)
+        assert await _drain_until(lambda: processor.frames >= 3, loop.time() + 15)
+        input_track = worker.input_video_track
+
+        # The peer loses its connection and comes back with a new one.
+        await client.close()
+        echoed: List[av.VideoFrame] = []
+
+        @new_client.on("track")  # type: ignore[arg-type]
+        def on_track(track):
+            async def consume():
+                while True:
+                    try:
+                        echoed.append(await track.recv())
+                    except Exception:
+                        return
+
+            asyncio.ensure_future(consume())
+
+        new_client.addTrack(VideoSourceTrack(_source_callback, fps=15))
+        await new_client.setLocalDescription(await new_client.createOffer())
+        assert new_client.localDescription is not None
+        answer = await asyncio.to_thread(
+            worker.reconnect,
+            new_client.localDescription.sdp,
+            new_client.localDescription.type,
+            10,
+        )
+        wire_ice(new_client, worker)
+        await new_client.setRemoteDescription(answer)
+
+        frames_before = processor.frames
+        assert await _drain_until(lambda: len(echoed) >= 3, loop.time() + 15)
+        assert processor.frames > frames_before
+        assert worker.video_processor is processor
+        assert worker.input_video_track is input_track
+        assert worker.offer_sdp == new_client.localDescription.sdp
+        assert CountingProcessor.instances == 1
+    finally:
+        await _teardown_loopback(new_client, worker)
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_worker_stops_if_the_peer_does_not_reconnect() -> None:
+    loop = asyncio.get_running_loop()
+    received: List[av.VideoFrame] = []
+    ended = threading.Event()
+
+    def cb(frame: av.VideoFrame) -> av.VideoFrame:
+        received.append(frame)
+        return frame
+
+    client, worker = await _setup_loopback(
+        mode=WebRtcMode.SENDONLY,
+        video_frame_callback=cb,
+        on_video_ended=ended.set,
+        reconnect_grace_period=0.5,
+    )
+    try:
+        assert worker.reconnectable
+        assert await _drain_until(lambda: len(received) >= 1, loop.time() + 15)
+        await client.close()
+        assert await _drain_until(lambda: worker._reconnect_timer, loop.time() + 5)
+        assert not ended.is_set()
+
+        assert await _drain_until(ended.is_set, loop.time() + 5)
+        assert worker.video_processor is None
+        assert not worker.reconnectable
+    finally:
+        await _teardown_loopback(client, worker)
+
+
+def _set_ice_connection_state(pc: RTCPeerConnection, state: str) -> None:
+    # aiortc itself never reports "disconnected", unlike browsers.
+    pc._RTCPeerConnection__iceConnectionState = state  # type: ignore[attr-defined]
+    pc.emit("iceconnectionstatechange")
+
+
+@pytest.mark.asyncio
+async def test_a_disconnected_connection_may_recover() -> None:
+    loop = asyncio.get_running_loop()
+    received: List[av.VideoFrame] = []
+
+    def cb(frame: av.VideoFrame) -> av.VideoFrame:
+        received.append(frame)
+        return frame
+
+    client, worker = await _setup_loopback(
+        mode=WebRtcMode.SENDONLY,
+        video_frame_callback=cb,
+        reconnect_grace_period=10,
+    )
+    try:
+        assert await _drain_until(lambda: len(received) >= 1, loop.time() + 15)
+        pc = worker.pc
+
+        # Waited out, as by the frontend, with the connection left open.
+        _set_ice_connection_state(pc, "disconnected")
+        assert await _drain_until(lambda: worker._reconnect_timer, loop.time() + 5)
+        assert pc.connectionState != "closed"
+
+        _set_ice_connection_state(pc, "completed")
+        assert await _drain_until(
+            lambda: worker._reconnect_timer is None, loop.time() + 5
+        )
+        frames_before = len(received)
+        assert await _drain_until(
+            lambda: len(received) > frames_before, loop.time() + 5
+        )
+        assert worker.pc is pc
+        assert worker.reconnectable
+    finally:
+        await _teardown_loopback(client, worker)
+
+
+@pytest.mark.asyncio
+async def test_ice_gathering_options_restrict_the_answer_candidates() -> None:
+    loop = asyncio.get_running_loop()
+    received: List[av.VideoFrame] = []
+
+    def cb(frame: av.VideoFrame) -> av.VideoFrame:
+        received.append(frame)
+        return frame
+
+    client, worker = await _setup_loopback(
+        mode=WebRtcMode.SENDONLY,
+        video_frame_callback=cb,
+        ice_gathering=IceGatheringOptions(
+            interfaces=["127.0.0.1"], use_ipv6=False, use_stun=False
+        ),
+    )
+    try:
+        assert client.remoteDescription is not None
+        candidates = [
+            line
+            for line in client.remoteDescription.sdp.splitlines()
+            if line.startswith("a=candidate:")
+        ]
+        assert candidates
+        assert all(" 127.0.0.1 " in c and "typ host" in c for c in candidates)
+        assert worker.time_to_answer is not None
+
+        assert await _drain_until(lambda: len(received) >= 1, loop.time() + 15)
+    finally:
+        await _teardown_loopback(client, worker)
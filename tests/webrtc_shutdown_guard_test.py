@@ -25,7 +25,7 @@ from streamlit_webrtc.webrtc import (
     _stop_leaked_decoder_threads_at_interpreter_exit,
 )
 
-from .webrtc_loopback_test import _WORKER_DEFAULTS, _wire_ice
+from .loopback import WORKER_DEFAULTS, wire_ice
 
 
 def _decoder_threads():
@@ -99,6 +99,12 @@ def _make_bare_worker() -> WebRtcWorker:
     worker.source_audio_track = None
     worker._relayed_source_video_track = None
     worker.source_video_track = None
+    worker._governor = None
+    worker._transport_stats_future = None
+    worker._reconnect_timer = None
+    worker._input_video_track = None
+    worker._input_audio_track = None
+    worker._recorded_input_tracks = {}
     return worker
 
 
@@ -187,9 +193,9 @@ async def test_worker_stop_releases_decoders_after_teardown_style_closure(monkey
         loop=loop,
         relay=MediaRelay(),
         mode=WebRtcMode.SENDONLY,
-        **_WORKER_DEFAULTS,
+        **WORKER_DEFAULTS,
     )
-    _wire_ice(client, worker)
+    wire_ice(client, worker)
     await client.setLocalDescription(await client.createOffer())
     answer = await asyncio.to_thread(
         worker.process_offer,
@@ -246,7 +252,7 @@ def test_live_worker_registry_and_exit_hook(monkeypatch) -> None:
             loop=loop,
             relay=MediaRelay(),
             mode=WebRtcMode.SENDRECV,
-            **_WORKER_DEFAULTS,
+            **WORKER_DEFAULTS,
         )
         assert worker in _live_workers
 